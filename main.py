@@ -6,7 +6,8 @@ This is the entry point for the entire project. It manages the lifecycle of the
 Data Science pipeline, from raw data ingestion to model deployment readiness.
 
 Features:
-- Smart Execution: Checks for existing artifacts (data, scalers, models) to avoid redundant computation.
+- Smart Execution: Fingerprints each stage (config values, upstream artifacts, source code)
+  and only recomputes the stages whose inputs actually changed.
 - Pipeline Integration: Connects Data Acquisition -> Processing -> Training -> Evaluation.
 - Command Line Interface (CLI): Allows forcing specific steps via flags (e.g., --force-train).
 
@@ -20,12 +21,21 @@ import os
 import argparse
 import traceback
 from src import config
+from src.stage_cache import fingerprint_stage, is_stage_fresh, changed_entries, record_stage, load_stamp
 
 from src.data_acquisition.data_loader import download_data
 from src.data_acquisition.synthetic_generator import generate_synthetic_data
 from src.preprocessing.split_data import split_and_normalize_dataset
 from src.neural_network.train import train_pipeline
 from src.neural_network.evaluate import evaluate_model
+from src.data_acquisition.parquet_store import dataset_path
+
+SRC_DIR = os.path.join(config.BASE_DIR, 'src')
+
+
+def _src(*parts: str) -> str:
+    """Path of a project source file (stage code fingerprinting)."""
+    return os.path.join(SRC_DIR, *parts)
 
 def check_artifact(path: str, description: str) -> bool:
     """Helper to check ia a file exists and log the status."""
@@ -36,62 +46,170 @@ def check_artifact(path: str, description: str) -> bool:
         print(f"{description} not found.")
         return False
 
+def run_stage(description: str, action, primary_output: str, outputs: list,
+              config_keys: list, inputs: list, sources: list, force: bool = False) -> bool:
+    """
+    Runs a pipeline stage only if it is forced, its outputs are missing,
+    or its fingerprint (config values + upstream hashes + source hashes) changed.
+
+    Returns:
+        bool: True if the stage was executed, False if the cached outputs were reused.
+    """
+    fingerprint = fingerprint_stage(config_keys, inputs, sources)
+    outputs_exist = all(check_artifact(path, description) for path in outputs)
+
+    if not force and outputs_exist and is_stage_fresh(primary_output, fingerprint, outputs):
+        print(f"{description} is up to date (fingerprint {fingerprint['digest'][:12]}).")
+        return False
+
+    if force:
+        print("Forced by command line flag.")
+    elif outputs_exist:
+        print(f"Stale {description}. Changed: {', '.join(changed_entries(primary_output, fingerprint))}")
+
+    action()
+    record_stage(primary_output, fingerprint)
+    return True
+
 def run_orchestrator(args):
     print("\n" + "=" * 60)
     print("   SIA-METEO: INTELLIGENT PIPELINE ORCHESTRATOR    ")
     print("=" * 60 + "\n")
 
+    raw_dataset = dataset_path('raw')
+    hybrid_dataset = dataset_path('hybrid')
+    model_path = os.path.join(config.BASE_DIR, 'models', 'trained_model.keras')
+    metrics_path = os.path.join(config.BASE_DIR, 'results', 'test_metrics.json')
+    storage_sources = [_src('data_acquisition', 'parquet_store.py')]
+
     # Data acquisition (raw)
+    # Only the API settings define the raw data: an existing CSV without a stamp (e.g., the
+    # committed thesis export) is adopted, and code edits never trigger a re-download.
     print(">>> Phase 1: Data acquisition")
-    if args.force_data or not check_artifact(config.RAW_DATA_PATH, "Raw Data"):
-        print("Dowloading historical data from Open-Meteo...")
-        download_data()
-    else:
-        print("Raw data already exists. Use --force-data to overwrite.")
+    raw_config_keys = ['LOCATION', 'API_START_DATE', 'API_END_DATE', 'API_URL_TEMPLATE']
+
+    def acquire_raw_data():
+        recorded = load_stamp(config.RAW_DATA_PATH).get("config")
+        api_changed = recorded is not None and recorded != fingerprint_stage(raw_config_keys, [], [])["config"]
+        download_data(force=args.force_data or api_changed)
+
+    run_stage(
+        "Raw Data",
+        acquire_raw_data,
+        primary_output=config.RAW_DATA_PATH,
+        outputs=[config.RAW_DATA_PATH, raw_dataset],
+        config_keys=raw_config_keys,
+        inputs=[],
+        sources=[],
+        force=args.force_data
+    )
     print("-" * 30)
 
     # Synthetic generation (Hybrid)
     print(">>> Phase 2: Synthetic data augmentation")
-    if args.force_data or not check_artifact(config.HYBRID_DATA_PATH, "Hybrid Dataset"):
-        print("Generating Black Swan events (storms, heatwaves, frost)...")
-        generate_synthetic_data()
-    else:
-        print("Hybrid dataset already exists.")
+    run_stage(
+        "Hybrid Dataset",
+        generate_synthetic_data,
+        primary_output=hybrid_dataset,
+        outputs=[hybrid_dataset],
+        config_keys=['EXTREME_SCENARIOS', 'SYNTHETIC_SAMPLES_TARGET', 'FEATURE_COLS', 'TARGET_COLS',
+                     'SCENARIO_EPISODE_COHERENCE', 'SCENARIO_REFERENCE_YEAR', 'SYNTHETIC_SEED'],
+        inputs=[raw_dataset],
+        sources=[_src('data_acquisition', 'synthetic_generator.py'),
+                 _src('data_acquisition', 'data_loader.py'),
+                 _src('preprocessing', 'time_features.py')] + storage_sources,
+        force=args.force_data
+    )
     print("-" * 30)
 
     # Preprocessing & Scaling
-    # I check for the scaler because it is critical for the ESP32 Live Mode
+    # The scaler is the primary output because it is critical for the ESP32 Live Mode
     print(">>> Phase 3: Preprocessing and normalization")
-    scaler_exists = check_artifact(config.SCALER_PATH, "MinMax Scaler")
-    train_exists = check_artifact(os.path.join(config.DATA_DIR, 'train', 'train.csv'), "Training Set")
-
-    if args.force_data or not (scaler_exists and train_exists):
-        print("Splitting data and fitting the scaler...")
-        split_and_normalize_dataset()
-    else:
-        print("Data is already processed and normalized.")
+    run_stage(
+        "MinMax Scaler & Splits",
+        split_and_normalize_dataset,
+        primary_output=config.SCALER_PATH,
+        outputs=[config.SCALER_PATH, config.FEATURE_TRANSFORM_PATH,
+                 dataset_path('train'), dataset_path('validation'), dataset_path('test')],
+        config_keys=['USE_SYNTHETIC_DATA', 'FEATURE_COLS', 'TARGET_COLS',
+                     'LOG_TRANSFORM_COLS', 'PHYSICS_BOUNDS', 'NOISE_GATES'],
+        inputs=[hybrid_dataset if config.USE_SYNTHETIC_DATA else raw_dataset],
+        sources=[_src('preprocessing', 'split_data.py'),
+                 _src('preprocessing', 'sequence_store.py'),
+                 _src('preprocessing', 'feature_transform.py')] + storage_sources,
+        force=args.force_data
+    )
     print("-" * 30)
 
     # Neural Network training
     print(">>> Phase 4: Model training (LSTM)")
-    model_path = os.path.join(config.BASE_DIR, 'models', 'trained_model.keras')
-
-    if args.force_train or not check_artifact(model_path, "Trained Model"):
-        print(f"Training the LSTM model ({config.EPOCHS} epochs)...")
-        train_pipeline()
-    else:
-        print("Trained model found. Use --force-train to retrain.")
+    run_stage(
+        "Trained Model",
+        train_pipeline,
+        primary_output=model_path,
+        outputs=[model_path],
+        config_keys=['SEQ_LENGTH', 'PREDICT_HORIZON', 'FEATURE_COLS', 'TARGET_COLS',
+                     'BATCH_SIZE', 'EPOCHS', 'LEARNING_RATE', 'PATIENCE'],
+        inputs=[dataset_path('train'), dataset_path('validation'), config.SCALER_PATH],
+        sources=[_src('neural_network', name) for name in
+                 ('train.py', 'model.py', 'data_generator.py', 'streaming.py')]
+                + [_src('preprocessing', 'sequence_store.py')],
+        force=args.force_train
+    )
+
+    # Optional direct multi-horizon model (one forward pass per 24h forecast)
+    if args.multi_horizon:
+        run_stage(
+            "Multi-Horizon Model",
+            lambda: train_pipeline(config.FORECAST_HORIZON),
+            primary_output=config.MULTI_HORIZON_MODEL_PATH,
+            outputs=[config.MULTI_HORIZON_MODEL_PATH, config.MULTI_HORIZON_NUMPY_MODEL_PATH],
+            config_keys=['SEQ_LENGTH', 'PREDICT_HORIZON', 'FORECAST_HORIZON', 'FEATURE_COLS', 'TARGET_COLS',
+                         'BATCH_SIZE', 'EPOCHS', 'LEARNING_RATE', 'PATIENCE'],
+            inputs=[dataset_path('train'), dataset_path('validation'), config.SCALER_PATH],
+            sources=[_src('neural_network', name) for name in
+                     ('train.py', 'model.py', 'data_generator.py', 'streaming.py', 'numpy_lstm.py')]
+                    + [_src('preprocessing', 'sequence_store.py')],
+            force=args.force_train
+        )
     print("-" * 30)
 
     # Evaluating & Reporting
     print(">>> Phase 5: Evaluation and metrics")
-    metrics_path = os.path.join(config.BASE_DIR, 'results', 'test_metrics.json')
 
     if args.skip_eval:
         print("Evaluation skipped by user.")
     else:
-        print("Running evaluation on test set (2024)...")
-        evaluate_model()
+        run_stage(
+            "Test Metrics",
+            evaluate_model,
+            primary_output=metrics_path,
+            outputs=[metrics_path],
+            config_keys=['MODEL_PATH', 'SEQ_LENGTH', 'PREDICT_HORIZON', 'FEATURE_COLS', 'TARGET_COLS',
+                         'INFERENCE_BACKEND'],
+            inputs=[config.NUMPY_MODEL_PATH if config.INFERENCE_BACKEND == 'numpy' else config.MODEL_PATH,
+                    config.FEATURE_TRANSFORM_PATH, dataset_path('test')],
+            sources=[_src('neural_network', name) for name in
+                     ('evaluate.py', 'data_generator.py', 'streaming.py', 'numpy_lstm.py')]
+                    + [_src('preprocessing', name) for name in ('sequence_store.py', 'feature_transform.py')],
+            force=args.force_eval
+        )
+        if args.multi_horizon:
+            multi_horizon_metrics = os.path.join(config.BASE_DIR, 'results', 'test_metrics_multi_horizon.json')
+            run_stage(
+                "Multi-Horizon Test Metrics",
+                lambda: evaluate_model(multi_horizon=True),
+                primary_output=multi_horizon_metrics,
+                outputs=[multi_horizon_metrics],
+                config_keys=['MULTI_HORIZON_MODEL_PATH', 'SEQ_LENGTH', 'PREDICT_HORIZON', 'FEATURE_COLS',
+                             'TARGET_COLS', 'INFERENCE_BACKEND'],
+                inputs=[config.MULTI_HORIZON_NUMPY_MODEL_PATH if config.INFERENCE_BACKEND == 'numpy'
+                        else config.MULTI_HORIZON_MODEL_PATH, config.FEATURE_TRANSFORM_PATH, dataset_path('test')],
+                sources=[_src('neural_network', name) for name in
+                         ('evaluate.py', 'data_generator.py', 'streaming.py', 'numpy_lstm.py', 'multi_horizon.py')]
+                        + [_src('preprocessing', name) for name in ('sequence_store.py', 'feature_transform.py')],
+                force=args.force_eval
+            )
     print("-" * 30)
 
     print("\n" + "=" * 60)
@@ -106,8 +224,12 @@ if __name__ == "__main__":
                         help="Force re-download and re-generation of all datasets.")
     parser.add_argument('--force-train', action='store_true',
                         help="Force re-training of the Neural Network model.")
+    parser.add_argument('--force-eval', action='store_true',
+                        help="Force re-evaluation even if the test metrics are up to date.")
     parser.add_argument('--skip-eval', action='store_true',
                         help="Skip the evaluation phase.")
+    parser.add_argument('--multi-horizon', action='store_true',
+                        help="Also train and evaluate the direct 24h multi-horizon model.")
 
     args = parser.parse_args()
 
@@ -9,19 +9,21 @@ to avoid overwriting the thesis's main artifacts.
 
 Key Features:
 1.  **Dynamic Data Acquisition:** Fetches historical weather data for any (lat, lon).
-2.  **Isolated Scaler:** Fits a new MinMaxScaler specific to the local climate.
-3.  **Model Reuse:** Reuses the exact same LSTM topology defined in `src.neural_network.model`.
+2.  **Transfer Learning (default):** Warm-starts from the project model (config.MODEL_PATH),
+    optionally freezes its first LSTM layer, and fine-tunes on a recent slice of local
+    history (config.ADAPTIVE_FINETUNE_DAYS) - seconds instead of minutes on a laptop CPU.
+3.  **From Scratch:** Fits a new min-max FeatureTransform specific to the local climate and trains
+    the exact same LSTM topology defined in `src.neural_network.model` on 5 years of history.
 4.  **Hot-Swap Readiness:** Saves artifacts in a structure ready for dynamic loading by the Dashboard.
 """
 
 import os
 import sys
 import json
-import joblib
+import time
 import numpy as np
 import pandas as pd
 import tensorflow as tf
-from sklearn.preprocessing import MinMaxScaler
 from datetime import datetime
 from typing import Dict, Union, Callable, Optional
 
@@ -30,9 +32,15 @@ from typing import Dict, Union, Callable, Optional
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from src import config
+from src.app.model_registry import register_model
+from src.app.training_jobs import adaptive_history_range, location_model_dir
 from src.data_acquisition.data_loader import fetch_open_meteo_history
 from src.neural_network.data_generator import TimeSeriesGenerator
 from src.neural_network.model import build_lstm_model
+from src.neural_network.numpy_lstm import export_weights
+from src.neural_network.streaming import create_streaming_dataset_from_arrays
+from src.preprocessing.feature_transform import FeatureTransform, load_feature_transform
+from src.preprocessing.time_features import time_features_frame
 
 # =============================================================================
 #  CUSTOM LOSS FUNCTION
@@ -71,30 +79,161 @@ def asymmetric_precipitation_loss(y_true, y_pred):
     return tf.reduce_mean(squared_error * penalty_factor)
 
 # =============================================================================
-#  FEATURE ENGINEERING UTILS
+#  TRAINING BUILDING BLOCKS
 # =============================================================================
-def calculate_time_features(timestamp: pd.Timestamp) -> list:
+def location_features(df: pd.DataFrame) -> np.ndarray:
     """
-    Transforms linear time into cyclical features (Sin/Cos).
+    Cleans a raw Open-Meteo history and builds the (Rows, 9) real-unit feature table.
 
-    This embedding allows the neural network to understand temporal proximity
-    (e.g., 23:00 is close to 00:00, December is close to January).
+    Args:
+        df (pd.DataFrame): Hourly history with 'timestamp' and the TARGET_COLS.
+
+    Returns:
+        np.ndarray: Physics (5 cols) + Time (4 cols) in config.FEATURE_COLS order.
+    """
+    # Handle missing values via linear interpolation (standard for time-series)
+    df = df.interpolate(method='linear').ffill().bfill()
+
+    # Generate Time Embeddings and concatenate: Physics (5 cols) + Time (4 cols) = 9 Input Features
+    time_df = time_features_frame(df['timestamp'])
+    data_full = pd.concat([df[config.TARGET_COLS].reset_index(drop=True), time_df.reset_index(drop=True)], axis=1)
+    return data_full[config.FEATURE_COLS].to_numpy(dtype=np.float64)
+
+
+def split_train_validation(data_real: np.ndarray, val_fraction: float = config.ADAPTIVE_VAL_FRACTION):
+    """
+    Chronological split: the most recent `val_fraction` of the rows are held out.
+
+    The validation table starts SEQ_LENGTH + PREDICT_HORIZON rows early so that its first
+    label is the first held-out row (inputs may overlap the training rows, labels never do).
+
+    Returns:
+        tuple: (train_real, val_real) row tables.
+    """
+    split = int(len(data_real) * (1.0 - val_fraction))
+    context = config.SEQ_LENGTH + config.PREDICT_HORIZON
+    return data_real[:split], data_real[max(split - context, 0):]
+
+
+def _build_model(mode: str, freeze_first_lstm: bool) -> tf.keras.Model:
+    """Fresh LSTM ('scratch') or the project model warm-started from config.MODEL_PATH ('finetune')."""
+    if mode == 'scratch':
+        model = build_lstm_model((config.SEQ_LENGTH, len(config.FEATURE_COLS)),
+                                 learning_rate=config.ADAPTIVE_SCRATCH_LR, output_units=len(config.TARGET_COLS))
+        learning_rate = config.ADAPTIVE_SCRATCH_LR
+    else:
+        if not os.path.exists(config.MODEL_PATH):
+            raise FileNotFoundError(f"Base model not found at {config.MODEL_PATH}. Run main.py first.")
+        model = tf.keras.models.load_model(config.MODEL_PATH, compile=False)
+        if freeze_first_lstm:
+            # The first LSTM layer encodes generic temporal patterns: only the upper layers adapt,
+            # which also skips its (most expensive) weight gradients
+            first_lstm = next(layer for layer in model.layers if isinstance(layer, tf.keras.layers.LSTM))
+            first_lstm.trainable = False
+        learning_rate = config.ADAPTIVE_FINETUNE_LR
+
+    # IMPORTANT: Recompile with Custom Loss
+    # The default build function uses MSE. I override it here to use the Asymmetric Loss.
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+        loss=asymmetric_precipitation_loss,
+        metrics=['mae']
+    )
+    return model
+
+
+def fit_location_model(
+        train_real: np.ndarray,
+        val_real: np.ndarray,
+        mode: str = config.ADAPTIVE_TRAINING_MODE,
+        freeze_first_lstm: bool = config.ADAPTIVE_FREEZE_FIRST_LSTM,
+        epochs: Optional[int] = None,
+        verbose: int = 0
+):
+    """
+    Trains a location model on real-unit feature tables and scores it on the held-out rows.
+
+    Modes:
+    - 'finetune': Starts from the config.MODEL_PATH weights and keeps the project
+      FeatureTransform (the pre-trained weights expect its input scaling).
+    - 'scratch': Random initialisation and a FeatureTransform fitted on the local climate.
 
     Args:
-        timestamp (pd.Timestamp): The datetime object to process.
+        train_real (np.ndarray): (Rows, 9) training table (real units).
+        val_real (np.ndarray): (Rows, 9) validation table (see `split_train_validation`).
+        mode (str): One of config.ADAPTIVE_TRAINING_MODES.
+        freeze_first_lstm (bool): Freeze the first LSTM layer ('finetune' only).
+        epochs (int, optional): Maximum epochs (defaults to the per-mode config value).
+        verbose (int): Keras fit verbosity.
 
     Returns:
-        list: [day_sin, day_cos, year_sin, year_cos]
+        tuple: (model, transform, metrics) with the wall-clock training time and the
+            validation MAE (scaled and per target in real units).
     """
-    day = 24 * 60 * 60
-    year = 365.2425 * day
-    ts_s = timestamp.timestamp()
-    return [
-        np.sin(ts_s * (2 * np.pi / day)),
-        np.cos(ts_s * (2 * np.pi / day)),
-        np.sin(ts_s * (2 * np.pi / year)),
-        np.cos(ts_s * (2 * np.pi / year))
-    ]
+    if mode not in config.ADAPTIVE_TRAINING_MODES:
+        raise ValueError(f"Unknown adaptive training mode '{mode}'. Expected one of {config.ADAPTIVE_TRAINING_MODES}.")
+    finetune = mode == 'finetune'
+
+    # --- NORMALIZATION (SCALING) ---
+    # From scratch I must fit a new scaler because the min/max values (e.g., Temp in mountains
+    # vs sea) will differ significantly from the generic Bucharest dataset. The transform applies
+    # the Log-Transformation to Precipitation itself (compresses the dynamic range of rainfall).
+    transform = load_feature_transform() if finetune else FeatureTransform.fit(np.concatenate([train_real, val_real]))
+    train_scaled = transform.transform(train_real).astype(np.float32)
+    val_scaled = transform.transform(val_real).astype(np.float32)
+
+    # --- SEQUENCE GENERATION ---
+    # Reuse the project's standardized Sequence Generator, windows are streamed per batch
+    gen = TimeSeriesGenerator(
+        input_width=config.SEQ_LENGTH,
+        label_width=config.PREDICT_HORIZON,
+        feature_cols=config.FEATURE_COLS,
+        target_cols=config.TARGET_COLS
+    )
+    if gen.num_sequences(len(train_scaled)) == 0 or gen.num_sequences(len(val_scaled)) == 0:
+        raise ValueError("Insufficient data to generate sequences.")
+
+    target_idx = transform.target_index
+    train_ds = create_streaming_dataset_from_arrays(gen, train_scaled, train_scaled[:, target_idx],
+                                                    batch_size=config.ADAPTIVE_BATCH_SIZE, shuffle=True)
+    val_ds = create_streaming_dataset_from_arrays(gen, val_scaled, val_scaled[:, target_idx],
+                                                  batch_size=config.ADAPTIVE_BATCH_SIZE, cache=True)
+
+    # --- MODEL TRAINING ---
+    model = _build_model(mode, freeze_first_lstm and finetune)
+
+    # Early Stopping prevents overfitting and saves time
+    early_stop = tf.keras.callbacks.EarlyStopping(
+        monitor='val_loss',
+        patience=config.ADAPTIVE_FINETUNE_PATIENCE if finetune else config.ADAPTIVE_SCRATCH_PATIENCE,
+        restore_best_weights=True
+    )
+    if epochs is None:
+        epochs = config.ADAPTIVE_FINETUNE_EPOCHS if finetune else config.ADAPTIVE_SCRATCH_EPOCHS
+
+    t0 = time.perf_counter()
+    history = model.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=[early_stop], verbose=verbose)
+    train_seconds = time.perf_counter() - t0
+
+    # --- EVALUATION ---
+    loss, mae = model.evaluate(val_ds, verbose=0)
+    X_val, y_val = gen.create_sequences_from_arrays(val_scaled, val_scaled[:, target_idx])
+    y_pred_real = transform.inverse_transform(model.predict(X_val, batch_size=256, verbose=0))
+    y_true_real = transform.inverse_transform(y_val, constrain=False)
+    val_mae_real = np.mean(np.abs(y_pred_real - y_true_real), axis=0)
+
+    metrics = {
+        "mode": mode,
+        "frozen_first_lstm": bool(freeze_first_lstm and finetune),
+        "train_seconds": round(train_seconds, 2),
+        "epochs_run": len(history.history['loss']),
+        "train_windows": gen.num_sequences(len(train_scaled)),
+        "mae": float(mae),
+        "loss": float(loss),
+        "val_mae_real": {col: float(err) for col, err in zip(config.TARGET_COLS, val_mae_real)},
+    }
+    return model, transform, metrics
+
 
 # =============================================================================
 #  MAIN ORCHESTRATION FUNCTION
@@ -102,162 +241,105 @@ def calculate_time_features(timestamp: pd.Timestamp) -> list:
 def train_adaptive_model(
         lat: float,
         lon: float,
-        progress_callback: Optional[Callable[[str, float], None]] = None
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+        mode: Optional[str] = None,
+        model_dir: Optional[str] = None,
+        history: Optional[pd.DataFrame] = None
 ) -> Dict[str, Union[str, float, int]]:
     """
     Executes the End-to-End pipeline for training a location-specific model.
 
     Pipeline Steps:
-    1.  **Data Ingestion:** Fetch 5 years of historical data for (lat, lon).
-    2.  **Preprocessing:** Clean data, apply Log-Transform, and generate Time Embeddings.
-    3.  **Scaling:** Fit a new MinMaxScaler specific to the local climate distribution.
-    4.  **Sequencing:** Create sliding windows (X, y) for LSTM input.
-    5.  **Training:** Compile and fit the LSTM model using Early Stopping.
-    6.  **Persistence:** Save model, scaler, and performance metrics to a dedicated folder.
+    1.  **Data Ingestion:** Fetch the local history for (lat, lon): the last ADAPTIVE_FINETUNE_DAYS
+        ('finetune') or ADAPTIVE_HISTORY_YEARS ('scratch').
+    2.  **Preprocessing:** Clean data and generate Time Embeddings.
+    3.  **Training:** Warm start from the project model (optionally with a frozen first LSTM
+        layer) or train a fresh LSTM, with Early Stopping on the most recent rows.
+    4.  **Persistence:** Save model, feature transform (.npz), and performance metrics to a dedicated folder.
 
     Args:
         lat (float): Latitude of the target location.
         lon (float): Longitude of the target location.
         progress_callback (func, optional): Function to report progress updates to UI.
+        mode (str, optional): 'finetune' or 'scratch' (default: config.ADAPTIVE_TRAINING_MODE).
+        model_dir (str, optional): Output folder (default: the location folder in config.ADAPTIVE_MODELS_DIR;
+            background jobs pass a staging folder that is swapped in afterwards, see `training_jobs`).
+        history (pd.DataFrame, optional): Pre-fetched local history (skips the download, e.g., batch training).
 
     Returns:
-        dict: Training metadata (MAE, Loss, Date) or error message.
+        dict: Training metadata (MAE, Loss, Date, training time) or error message.
     """
+    mode = mode or config.ADAPTIVE_TRAINING_MODE
 
     # --- ENVIRONMENT SETUP ---
     # Define a unique directory for this location to avoid collisions
-    model_dir = f"adaptive_models/{lat}_{lon}"
+    installed = model_dir is None
+    model_dir = model_dir or location_model_dir(lat, lon)
     os.makedirs(model_dir, exist_ok=True)
 
     model_path = os.path.join(model_dir, "model.keras")
-    scaler_path = os.path.join(model_dir, "scaler.pkl")
+    numpy_model_path = os.path.join(model_dir, "model.npz")
+    transform_path = os.path.join(model_dir, "transform.npz")
     metrics_path = os.path.join(model_dir, "metrics.json")
 
     # --- DATA ACQUISITION ---
+    label = f"{config.ADAPTIVE_FINETUNE_DAYS} Days" if mode == 'finetune' else f"{config.ADAPTIVE_HISTORY_YEARS} Years"
     if progress_callback:
-        progress_callback("Acquiring historical data (5 Years)...", 0.1)
-
-    end_date = datetime.now().strftime("%Y-%m-%d")
-    start_date = (datetime.now() - pd.DateOffset(years=5)).strftime("%Y-%m-%d")
-
-    try:
-        # Reuse existing data loader logic but with dynamic coordinates
-        df = fetch_open_meteo_history(lat, lon, start_date, end_date)
-        if df is None or df.empty:
-            return {"error": "Failed to download data from Open-Meteo API."}
-    except Exception as e:
-        return {"error": f"Data Loader Exception: {e}"}
+        progress_callback(f"Acquiring historical data ({label})...", 0.1)
+
+    df = history
+    if df is None:
+        start_date, end_date = adaptive_history_range(mode)
+        try:
+            # Reuse existing data loader logic but with dynamic coordinates
+            df = fetch_open_meteo_history(lat, lon, start_date, end_date)
+        except Exception as e:
+            return {"error": f"Data Loader Exception: {e}"}
+    if df is None or df.empty:
+        return {"error": "Failed to download data from Open-Meteo API."}
 
     # --- PREPROCESSING & CLEANING ---
     if progress_callback:
         progress_callback("Preprocessing & Feature Engineering...", 0.3)
 
-    # Handle missing values via linear interpolation (standard for time-series)
-    df = df.interpolate(method='linear').ffill().bfill()
-
-    # Apply Log-Transformation to Precipitation
-    # This compresses the high dynamic range of rainfall data, stabilizing gradient descent.
-    if 'precipitation' in df.columns:
-        df['precipitation'] = np.log1p(df['precipitation'])
-
-    # Generate Time Embeddings
-    time_feats = [calculate_time_features(ts) for ts in df['timestamp']]
-    time_df = pd.DataFrame(time_feats, columns=['day_sin', 'day_cos', 'year_sin', 'year_cos'])
-
-    # Concatenate Features: Physics (5 cols) + Time (4 cols) = 9 Input Features
     try:
-        data_physics = df[config.TARGET_COLS]
-        data_full = pd.concat([data_physics.reset_index(drop=True), time_df.reset_index(drop=True)], axis=1)
+        train_real, val_real = split_train_validation(location_features(df))
     except KeyError as e:
         return {"error": f"Missing required columns in dataset: {e}"}
 
-    # --- NORMALIZATION (SCALING) ---
-    if progress_callback:
-        progress_callback("Normalizing data (Fitting local Scaler)...", 0.4)
-
-    # I must fit a new scaler because the min/max values (e.g., Temp in mountains vs sea)
-    # will differ significantly from the generic Bucharest dataset.
-    scaler = MinMaxScaler()
-    data_scaled_numpy = scaler.fit_transform(data_full)
-
-    # Persist the scaler for later inference
-    joblib.dump(scaler, scaler_path)
-
-    # Reconstruct DataFrame because TimeSeriesGenerator expects pandas input
-    df_scaled = pd.DataFrame(data_scaled_numpy, columns=config.FEATURE_COLS)
-
-    # --- SEQUENCE GENERATION ---
-    if progress_callback:
-        progress_callback("Generating LSTM Sequences...", 0.5)
-
-    # Reuse the project's standardized Sequence Generator
-    gen = TimeSeriesGenerator(
-        input_width=config.SEQ_LENGTH,
-        label_width=config.PREDICT_HORIZON,
-        feature_cols=config.FEATURE_COLS,
-        target_cols=config.TARGET_COLS
-    )
-
-    X, y = gen.create_sequences(df_scaled)
-
-    if len(X) == 0:
-        return {"error": "Insufficient data to generate sequences."}
-
-    # Validation Split (90/10) - I keep validation data in memory (no disk IO needed)
-    split_idx = int(len(X) * 0.9)
-    X_train, y_train = X[:split_idx], y[:split_idx]
-    X_val, y_val = X[split_idx:], y[split_idx:]
-
     # --- MODEL TRAINING ---
     if progress_callback:
-        progress_callback("Training Neural Network (Adapting weights)...", 0.6)
-
-    # Construct the model architecture defined in src.neural_network.model
-    input_shape = (config.SEQ_LENGTH, len(config.FEATURE_COLS))
-    model = build_lstm_model(input_shape, learning_rate=0.001, output_units=len(config.TARGET_COLS))
-
-    # IMPORTANT: Recompile with Custom Loss
-    # The default build function uses MSE. I override it here to use the Asymmetric Loss.
-    model.compile(
-        optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
-        loss=asymmetric_precipitation_loss,
-        metrics=['mae']
-    )
-
-    # Early Stopping prevents overfitting and saves time
-    early_stop = tf.keras.callbacks.EarlyStopping(
-        monitor='val_loss',
-        patience=3,
-        restore_best_weights=True
-    )
+        action = "Fine-tuning the base model" if mode == 'finetune' else "Training Neural Network"
+        progress_callback(f"{action} (Adapting weights)...", 0.5)
 
-    history = model.fit(
-        X_train, y_train,
-        validation_data=(X_val, y_val),
-        epochs=15,  # Sufficient for adaptation (Transfer Learning concept)
-        batch_size=32,
-        callbacks=[early_stop],
-        verbose=0  # Silent mode to keep UI clean
-    )
+    try:
+        model, transform, fit_metrics = fit_location_model(train_real, val_real, mode=mode)
+    except (ValueError, FileNotFoundError) as e:
+        return {"error": str(e)}
 
-    # --- EVALUATION & SAVING ---
+    # --- SAVING ---
     if progress_callback:
         progress_callback("Finalizing and Saving artifacts...", 0.9)
 
     model.save(model_path)
-    loss, mae = model.evaluate(X_val, y_val, verbose=0)
+    # Same weights for the TensorFlow-free NumPy inference backend
+    export_weights(model, numpy_model_path)
+    # Persist the compiled transform (pickle-free) for later inference
+    transform.save(transform_path)
 
     metrics = {
         "location": f"{lat}, {lon}",
         "trained_date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-        "mae": float(mae),
-        "loss": float(loss),
         "data_points": len(df),
-        "epochs_run": len(history.history['loss'])
+        **fit_metrics
     }
 
     with open(metrics_path, 'w') as f:
         json.dump(metrics, f)
+    # Written straight into the location folder: make it visible to the nearest-model lookup
+    # (staged trainings are registered once they are swapped into place)
+    if installed:
+        register_model(lat, lon, metrics)
 
     if progress_callback:
         progress_callback("Process Complete!", 1.0)
@@ -0,0 +1,227 @@
+# src/app/batch_training.py
+"""
+Batch Adaptive Training for Many Locations.
+
+`train_adaptive_model` serves one (lat, lon) per call: download, scaling, windowing and
+training run one after the other. This entry point trains a whole list of sites:
+
+1.  **Input:** A CSV with 'lat' and 'lon' columns (optional 'name' and 'mode' per site).
+2.  **Download Stage (threads):** Histories are fetched a few locations at a time through the
+    shared on-disk API cache (weather_client), so re-runs and retries do not hit the API again.
+3.  **Training Stage (processes):** Each downloaded history is trained in a 'spawn' process pool;
+    every process pins TensorFlow to BATCH_TRAINING_TF_THREADS intra-op threads (1 inter-op
+    thread), so `workers x threads` never oversubscribes the cores. Downloads of the next
+    sites overlap with the trainings.
+4.  **Retries:** A failed location (download error, training error, crashed process) is retried
+    up to BATCH_TRAINING_RETRIES more times.
+5.  **Summary:** One row per location (status, attempts, download / training / total seconds,
+    metrics) written as CSV and printed as a markdown table.
+
+Models are installed exactly like background jobs (staging folder + swap, see `training_jobs`).
+
+Usage:
+    python -m src.app.batch_training sites.csv [--workers 4] [--threads 2] [--mode scratch]
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+# Ensure the project root is in the Python path for module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src import config
+from src.app.training_jobs import adaptive_history_range, location_key
+from src.data_acquisition.data_loader import fetch_open_meteo_history
+
+
+def read_locations(csv_path: str) -> List[Dict]:
+    """
+    Reads the sites to train.
+
+    Returns:
+        list: One dict per site with 'name', 'lat', 'lon' and 'mode'.
+    """
+    df = pd.read_csv(csv_path)
+    missing = {'lat', 'lon'} - set(df.columns)
+    if missing:
+        raise ValueError(f"Locations CSV needs the columns 'lat' and 'lon' (missing: {sorted(missing)}).")
+
+    sites = []
+    for row in df.to_dict('records'):
+        mode = row.get('mode') if isinstance(row.get('mode'), str) else config.ADAPTIVE_TRAINING_MODE
+        if mode not in config.ADAPTIVE_TRAINING_MODES:
+            raise ValueError(f"Unknown training mode '{mode}' for ({row['lat']}, {row['lon']}).")
+        lat, lon = float(row['lat']), float(row['lon'])
+        name = row.get('name') if isinstance(row.get('name'), str) else location_key(lat, lon)
+        sites.append({"name": name, "lat": lat, "lon": lon, "mode": mode})
+    return sites
+
+
+def _init_training_process(tf_threads: int) -> None:
+    """Pool initializer: bounds the TensorFlow thread pools before the first op runs."""
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+    os.environ['OMP_NUM_THREADS'] = str(tf_threads)
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _download(site: Dict) -> pd.DataFrame:
+    """Download stage of one site (raises so that the scheduler can retry it)."""
+    start_date, end_date = adaptive_history_range(site['mode'])
+    df = fetch_open_meteo_history(site['lat'], site['lon'], start_date, end_date)
+    if df is None or df.empty:
+        raise RuntimeError("Failed to download data from Open-Meteo API.")
+    return df
+
+
+def _train(site: Dict, history: pd.DataFrame) -> Dict:
+    """Training stage of one site (runs in a pool process)."""
+    from src.app.training_jobs import train_location
+    return train_location(site['lat'], site['lon'], mode=site['mode'], history=history)
+
+
+def run_batch(
+        sites: List[Dict],
+        workers: Optional[int] = None,
+        tf_threads: int = config.BATCH_TRAINING_TF_THREADS,
+        download_concurrency: int = config.BATCH_DOWNLOAD_CONCURRENCY,
+        retries: int = config.BATCH_TRAINING_RETRIES
+) -> pd.DataFrame:
+    """
+    Downloads and trains every site, overlapping downloads with trainings.
+
+    Args:
+        sites (list): Output of `read_locations`.
+        workers (int, optional): Training processes (default: cores // tf_threads).
+        tf_threads (int): TensorFlow intra-op threads per training process.
+        download_concurrency (int): Sites downloading at once.
+        retries (int): Extra attempts per failed site.
+
+    Returns:
+        pd.DataFrame: Summary, one row per site.
+    """
+    tf_threads = max(int(tf_threads), 1)
+    workers = workers or config.BATCH_TRAINING_WORKERS or max((os.cpu_count() or 1) // tf_threads, 1)
+    print(f"[BATCH] {len(sites)} locations | {workers} training processes x {tf_threads} TF threads | "
+          f"{download_concurrency} concurrent downloads | {retries} retries")
+
+    def new_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_training_process, initargs=(tf_threads,))
+
+    states = [{"site": site, "attempts": 0, "download_s": 0.0, "started": time.perf_counter()} for site in sites]
+    rows = [None] * len(sites)
+    pending = {}
+
+    downloads = ThreadPoolExecutor(max_workers=max(int(download_concurrency), 1))
+    pool = new_pool()
+
+    def start_download(i: int) -> None:
+        states[i]['attempts'] += 1
+        states[i]['download_t0'] = time.perf_counter()
+        pending[downloads.submit(_download, states[i]['site'])] = ('download', i, downloads)
+
+    def finish(i: int, status: str, result: Dict) -> None:
+        state, site = states[i], states[i]['site']
+        row = {"name": site['name'], "lat": site['lat'], "lon": site['lon'], "mode": site['mode'], "status": status,
+               "attempts": state['attempts'], "download_s": round(state['download_s'], 2),
+               "train_s": result.get('train_seconds', np.nan), "total_s": round(time.perf_counter() - state['started'], 2),
+               "epochs_run": result.get('epochs_run', np.nan), "mae": result.get('mae', np.nan)}
+        for col in config.TARGET_COLS:
+            row[f"val_mae_{col}"] = result.get('val_mae_real', {}).get(col, np.nan)
+        row["error"] = result.get('error', '')
+        rows[i] = row
+        print(f"[BATCH] {site['name']}: {status} after {state['attempts']} attempt(s)"
+              + (f" - {row['error']}" if row['error'] else f" (MAE {row['mae']:.4f}, {row['train_s']} s fit)"))
+
+    try:
+        for i in range(len(sites)):
+            start_download(i)
+
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, i, executor = pending.pop(future)
+                state = states[i]
+                try:
+                    value = future.result()
+                except BrokenProcessPool as e:
+                    # A training process died (e.g., out of memory): the pool must be rebuilt
+                    value = {"error": f"Training process crashed: {e}"}
+                    if executor is pool:  # Futures of an already replaced pool fail the same way
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = new_pool()
+                except Exception as e:
+                    value = {"error": f"{type(e).__name__}: {e}"}
+
+                if stage == 'download' and isinstance(value, pd.DataFrame):
+                    state['download_s'] += time.perf_counter() - state['download_t0']
+                    state['history'] = value
+                    pending[pool.submit(_train, state['site'], value)] = ('train', i, pool)
+                elif isinstance(value, dict) and "error" not in value:
+                    state.pop('history', None)
+                    finish(i, 'done', value)
+                elif state['attempts'] <= retries:
+                    print(f"[BATCH] {state['site']['name']}: {stage} failed ({value['error']}), retrying...")
+                    if stage == 'train':
+                        state['attempts'] += 1
+                        pending[pool.submit(_train, state['site'], state['history'])] = ('train', i, pool)
+                    else:
+                        start_download(i)
+                else:
+                    state.pop('history', None)
+                    finish(i, 'failed', value)
+    finally:
+        downloads.shutdown(wait=False, cancel_futures=True)
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    return pd.DataFrame(rows)
+
+
+def print_report(summary: pd.DataFrame) -> None:
+    """Prints the batch summary as a markdown table."""
+    print("\n| Location | Mode | Status | Attempts | Download (s) | Fit (s) | Total (s) | MAE |")
+    print("|----------|------|--------|----------|--------------|---------|-----------|-----|")
+    for row in summary.itertuples():
+        print(f"| {row.name} | {row.mode} | {row.status} | {row.attempts} | {row.download_s:.1f} | "
+              f"{row.train_s:.1f} | {row.total_s:.1f} | {row.mae:.4f} |")
+    done = summary[summary['status'] == 'done']
+    print(f"\n{len(done)}/{len(summary)} locations trained"
+          + (f", mean fit time {done['train_s'].mean():.1f} s." if len(done) else "."))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SIA-Meteo batch adaptive training")
+    parser.add_argument('locations', help="CSV with 'lat', 'lon' (optional 'name', 'mode') columns.")
+    parser.add_argument('--workers', type=int, default=None, help="Training processes.")
+    parser.add_argument('--threads', type=int, default=config.BATCH_TRAINING_TF_THREADS,
+                        help="TensorFlow intra-op threads per training process.")
+    parser.add_argument('--downloads', type=int, default=config.BATCH_DOWNLOAD_CONCURRENCY,
+                        help="Locations downloading at once.")
+    parser.add_argument('--retries', type=int, default=config.BATCH_TRAINING_RETRIES)
+    parser.add_argument('--mode', choices=config.ADAPTIVE_TRAINING_MODES, default=None,
+                        help="Training mode for sites without a 'mode' column value.")
+    parser.add_argument('--summary', default=None, help="Summary CSV path (default: results/batch_training_<time>.csv).")
+    args = parser.parse_args()
+
+    if args.mode:
+        config.ADAPTIVE_TRAINING_MODE = args.mode
+    batch_summary = run_batch(read_locations(args.locations), workers=args.workers, tf_threads=args.threads,
+                              download_concurrency=args.downloads, retries=args.retries)
+    print_report(batch_summary)
+
+    summary_path = args.summary or os.path.join(
+        config.BASE_DIR, 'results', f"batch_training_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+    batch_summary.to_csv(summary_path, index=False)
+    print(f"\n[OUTPUT] Batch summary saved to: {summary_path}")
@@ -0,0 +1,180 @@
+# src/app/checkpoint_store.py
+"""
+Durable Local Checkpoint Store for the Event Hub Consumer.
+
+Without a checkpoint store, `update_checkpoint` of the consumer client only lives in memory:
+every listener restart replays the whole LISTENER_REPLAY_HOURS window. This store persists
+the per-partition positions in SQLite (config.LISTENER_CHECKPOINT_DB_PATH), so a restart
+resumes after the last checkpointed event:
+
+1.  **Interface:** The four coroutines of `azure.eventhub.aio.CheckpointStore`
+    (`list_ownership`, `claim_ownership`, `update_checkpoint`, `list_checkpoints`), with the
+    SDK's dict layouts. It is passed as `checkpoint_store=` to `EventHubConsumerClient`.
+    The SDK is not imported, so the store also works with in-process fakes.
+2.  **Atomic Persistence:** Every update is one SQLite transaction (WAL, synchronous=FULL):
+    after a crash a partition holds either its previous or its new checkpoint.
+3.  **Monotonic Checkpoints:** A checkpoint never moves a partition backwards (a late
+    update from a previous owner is ignored).
+4.  **Ownership:** Optimistic concurrency with etags, as in the SDK's blob store; several
+    listener instances in the same consumer group split the partitions.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+from typing import Any, Dict, Iterable, List
+
+from src import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    fully_qualified_namespace TEXT NOT NULL,
+    eventhub_name TEXT NOT NULL,
+    consumer_group TEXT NOT NULL,
+    partition_id TEXT NOT NULL,
+    offset TEXT,
+    sequence_number INTEGER,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (fully_qualified_namespace, eventhub_name, consumer_group, partition_id)
+);
+CREATE TABLE IF NOT EXISTS ownership (
+    fully_qualified_namespace TEXT NOT NULL,
+    eventhub_name TEXT NOT NULL,
+    consumer_group TEXT NOT NULL,
+    partition_id TEXT NOT NULL,
+    owner_id TEXT NOT NULL,
+    last_modified_time REAL NOT NULL,
+    etag TEXT NOT NULL,
+    PRIMARY KEY (fully_qualified_namespace, eventhub_name, consumer_group, partition_id)
+);
+"""
+
+_KEY = ("fully_qualified_namespace", "eventhub_name", "consumer_group")
+
+
+class SQLiteCheckpointStore:
+    """
+    SQLite implementation of the Event Hubs checkpoint-store interface (asyncio).
+
+    Attributes:
+        db_path (str): SQLite database file.
+    """
+
+    def __init__(self, db_path: str = config.LISTENER_CHECKPOINT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        # A checkpoint is acknowledged only once it is on disk
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    def _run(self, func, *args):
+        """Runs `func(conn, *args)` in one transaction."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            result = func(conn, *args)
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _update_checkpoint(conn: sqlite3.Connection, checkpoint: Dict) -> None:
+        conn.execute(
+            "INSERT INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(fully_qualified_namespace, eventhub_name, consumer_group, partition_id) DO UPDATE SET "
+            "offset = excluded.offset, sequence_number = excluded.sequence_number, updated_at = excluded.updated_at "
+            "WHERE checkpoints.sequence_number IS NULL OR excluded.sequence_number IS NULL "
+            "OR excluded.sequence_number >= checkpoints.sequence_number",
+            (*[checkpoint[k] for k in _KEY], str(checkpoint["partition_id"]),
+             None if checkpoint.get("offset") is None else str(checkpoint["offset"]),
+             checkpoint.get("sequence_number"), time.time())
+        )
+
+    async def update_checkpoint(self, checkpoint: Dict[str, Any], **kwargs) -> None:
+        """
+        Persists the position of a partition.
+
+        Args:
+            checkpoint (dict): fully_qualified_namespace, eventhub_name, consumer_group,
+                partition_id, offset, sequence_number.
+        """
+        await asyncio.to_thread(self._run, self._update_checkpoint, checkpoint)
+
+    @staticmethod
+    def _list_checkpoints(conn: sqlite3.Connection, namespace: str, eventhub_name: str,
+                          consumer_group: str) -> List[Dict]:
+        rows = conn.execute("SELECT * FROM checkpoints WHERE fully_qualified_namespace = ? AND eventhub_name = ? "
+                            "AND consumer_group = ?", (namespace, eventhub_name, consumer_group)).fetchall()
+        return [{k: row[k] for k in (*_KEY, "partition_id", "offset", "sequence_number")} for row in rows]
+
+    async def list_checkpoints(self, fully_qualified_namespace: str, eventhub_name: str, consumer_group: str,
+                               **kwargs) -> Iterable[Dict[str, Any]]:
+        """Checkpoints of all partitions of an Event Hub / consumer group."""
+        return await asyncio.to_thread(self._run, self._list_checkpoints,
+                                       fully_qualified_namespace, eventhub_name, consumer_group)
+
+    # ------------------------------------------------------------------
+    # Ownership (load balancing between consumer instances)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _list_ownership(conn: sqlite3.Connection, namespace: str, eventhub_name: str,
+                        consumer_group: str) -> List[Dict]:
+        rows = conn.execute("SELECT * FROM ownership WHERE fully_qualified_namespace = ? AND eventhub_name = ? "
+                            "AND consumer_group = ?", (namespace, eventhub_name, consumer_group)).fetchall()
+        return [dict(row) for row in rows]
+
+    async def list_ownership(self, fully_qualified_namespace: str, eventhub_name: str, consumer_group: str,
+                             **kwargs) -> Iterable[Dict[str, Any]]:
+        """Current partition owners (owner_id, last_modified_time, etag per partition)."""
+        return await asyncio.to_thread(self._run, self._list_ownership,
+                                       fully_qualified_namespace, eventhub_name, consumer_group)
+
+    @staticmethod
+    def _claim_ownership(conn: sqlite3.Connection, ownership_list: List[Dict]) -> List[Dict]:
+        claimed = []
+        for ownership in ownership_list:
+            key = (*[ownership[k] for k in _KEY], str(ownership["partition_id"]))
+            row = conn.execute("SELECT etag FROM ownership WHERE fully_qualified_namespace = ? AND eventhub_name = ? "
+                               "AND consumer_group = ? AND partition_id = ?", key).fetchone()
+            # Optimistic concurrency: the claim must be based on the current etag (or no owner yet)
+            if row is not None and row["etag"] != ownership.get("etag"):
+                continue
+            new = dict(ownership, partition_id=key[3], etag=str(uuid.uuid4()), last_modified_time=time.time())
+            conn.execute("INSERT OR REPLACE INTO ownership VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (*key, new["owner_id"], new["last_modified_time"], new["etag"]))
+            claimed.append(new)
+        return claimed
+
+    async def claim_ownership(self, ownership_list: Iterable[Dict[str, Any]], **kwargs) -> Iterable[Dict[str, Any]]:
+        """Claims partitions; returns the successful claims (with their new etag)."""
+        return await asyncio.to_thread(self._run, self._claim_ownership, list(ownership_list))
+
+    # ------------------------------------------------------------------
+    # Inspection
+    # ------------------------------------------------------------------
+    def all_checkpoints(self) -> List[Dict]:
+        """Every stored checkpoint (any Event Hub / consumer group), with its update time."""
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute("SELECT * FROM checkpoints ORDER BY partition_id")]
+        finally:
+            conn.close()
@@ -3,37 +3,46 @@
 SIA-Meteo AI Dashboard - Main UI Application.
 
 This module implements the user interface for the meteorological monitoring and forecasting system.
-It integrates data visualization (Plotly), AI inference (TensorFlow/Keras), and real-time
-IoT connectivity (Azure IoT Hub).
+It integrates data visualization (Plotly), AI inference (TensorFlow/Keras or a TensorFlow-free
+NumPy backend), and real-time IoT connectivity (Azure IoT Hub).
 
 Key Features:
 1. **Live Monitoring:** Displays real-time data from ESP32 sensors via Azure IoT Hub.
 2. **Adaptive AI:** Enables on-demand retraining of the neural network for new geographic locations.
 3. **Forecasting:** Provides 24-hour weather predictions using LSTM neural networks.
 4. **Scenario simulation:** Allows manual input testing ("What-If" scenarios).
+5. **Country Overview:** Forecasts all major Romanian cities in a single inference batch.
 """
 
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import joblib
 import os
-import requests
 import sys
-import tensorflow as tf
 import time
 import json
 import psutil
 import subprocess
 from datetime import datetime, timedelta
-from tensorflow.keras.models import load_model
+from concurrent.futures import ThreadPoolExecutor
 from geopy.geocoders import Nominatim
 
 # Ensures project root is in the Python path for module imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from src import config
-from src.app.adaptive_training import train_adaptive_model
+from src.app.fleet import DELAYED, OFFLINE, ONLINE, get_device_fleet
+from src.app.model_cache import get_model_cache
+from src.app.model_registry import get_model_registry
+from src.app.telemetry_store import get_telemetry_store
+from src.app.training_jobs import (ACTIVE_STATES, FAILED, QUEUED, TrainingJobQueue, ensure_worker_running,
+                                   location_model_dir)
+from src.data_acquisition.weather_client import get_client
+from src.neural_network.multi_horizon import get_direct_engine, has_multi_horizon_model, is_multi_horizon
+from src.neural_network.numpy_lstm import NumpyLSTM, get_numpy_rollout_engine
+from src.neural_network.stateful import get_stateful_forecaster
+from src.preprocessing.feature_transform import load_feature_transform
+from src.preprocessing.time_features import to_epoch_seconds
 
 # =============================================================================
 #  UI CONFIGURATION & STYLING
@@ -113,7 +122,6 @@ def ensure_azure_listener_running():
 #  CORE AI FUNCTIONS (LOSS & LOADING)
 # =============================================================================
 
-@tf.keras.utils.register_keras_serializable()
 def asymmetric_precipitation_loss(y_true, y_pred):
     """
     Custom Loss Function for precipitation forecasting.
@@ -121,7 +129,12 @@ def asymmetric_precipitation_loss(y_true, y_pred):
     Implements a penalty mechanism that heavily penalizes underestimation of rainfall events,
     while being more lenient on false positives. This addresses the class imbalance issue
     where rain events are rare compared to dry periods.
+
+    Only needed to deserialise `.keras` archives (Keras backend), so TensorFlow is
+    imported here rather than at module level.
     """
+    import tensorflow as tf
+
     squared_error = tf.square(y_true - y_pred)
     overestimation_mask = tf.cast(tf.greater(y_pred, y_true), tf.float32)
 
@@ -137,45 +150,81 @@ def asymmetric_precipitation_loss(y_true, y_pred):
     return tf.reduce_mean(squared_error * penalty_factor)
 
 
-@st.cache_resource
-def load_ai_core():
+def load_keras_model(model_path):
+    """Deserialises a `.keras` archive (imports TensorFlow on first use)."""
+    from tensorflow.keras.models import load_model
+
+    # Archives saved with the registered loss reference it by its registry name
+    return load_model(model_path, custom_objects={
+        'asymmetric_precipitation_loss': asymmetric_precipitation_loss,
+        'Custom>asymmetric_precipitation_loss': asymmetric_precipitation_loss
+    })
+
+
+def load_inference_model(keras_path, numpy_path, backend):
+    """
+    Loads a model with the selected inference backend.
+
+    'numpy' runs the exported weights without TensorFlow; models without an exported
+    `.npz` (e.g., adaptive models trained before the NumPy backend) fall back to Keras.
+    """
+    if backend == 'numpy' and os.path.exists(numpy_path):
+        return NumpyLSTM.load(numpy_path)
+    return load_keras_model(keras_path)
+
+
+def load_ai_core(backend=config.INFERENCE_BACKEND, mode=config.FORECAST_MODE):
     """
-    Loads the default pre-trained model and scaler into memory.
-    Uses st.cache_resource to prevent reloading on every interaction.
+    Loads the default pre-trained model and feature transform into memory.
+    Served from the process-wide model cache (one entry per backend / mode): a retrained model
+    is hot-reloaded in the background, the previous one keeps serving until the swap.
+    mode='direct' loads the multi-horizon model (whole 24h forecast in one forward pass).
     """
-    if not os.path.exists(config.MODEL_PATH) or not os.path.exists(config.SCALER_PATH):
-        st.error("🚨 Critical Error: Model or Scaler not found. Please run 'main.py' first.")
+    if mode == 'direct':
+        keras_path, numpy_path = config.MULTI_HORIZON_MODEL_PATH, config.MULTI_HORIZON_NUMPY_MODEL_PATH
+    else:
+        keras_path, numpy_path = config.MODEL_PATH, config.NUMPY_MODEL_PATH
+
+    has_transform = os.path.exists(config.FEATURE_TRANSFORM_PATH) or os.path.exists(config.SCALER_PATH)
+    has_model = os.path.exists(numpy_path if backend == 'numpy' else keras_path)
+    if not has_model or not has_transform:
+        st.error("🚨 Critical Error: Model or Scaler not found. Please run 'main.py' first "
+                 "(NumPy backend: 'python -m src.neural_network.numpy_lstm').")
         st.stop()
 
     try:
-        model = load_model(
-            config.MODEL_PATH,
-            custom_objects={'asymmetric_precipitation_loss': asymmetric_precipitation_loss}
+        return get_model_cache().get(
+            ('core', backend, mode),
+            [keras_path, numpy_path, config.FEATURE_TRANSFORM_PATH, config.SCALER_PATH],
+            lambda: (load_inference_model(keras_path, numpy_path, backend), load_feature_transform())
         )
-        scaler = joblib.load(config.SCALER_PATH)
-        return model, scaler
     except Exception as e:
         st.error(f"Failed to load default AI core: {e}")
         st.stop()
 
 
-def load_local_ai(folder_path):
+def load_local_ai(folder_path, backend=config.INFERENCE_BACKEND):
     """
-    Loads a location-specific model and scaler for adaptive inference.
+    Loads a location-specific model and feature transform for adaptive inference.
+    Models trained before the `.npz` format fall back to their pickled scaler.
+    Cached like the default model: reruns reuse the loaded model, retraining hot-reloads it.
 
     Args:
         folder_path (str): Directory containing the custom model artifacts.
+        backend (str): 'keras' or 'numpy' (uses model.npz when it exists).
 
     Returns:
-        tuple: (model, scaler) or (None, None) if loading fails.
+        tuple: (model, transform) or (None, None) if loading fails.
     """
-    m_path = os.path.join(folder_path, "model.keras")
-    s_path = os.path.join(folder_path, "scaler.pkl")
-
+    artifacts = [os.path.join(folder_path, name) for name in ("model.keras", "model.npz", "transform.npz", "scaler.pkl")]
+    keras_path, numpy_path, transform_path, scaler_path = artifacts
     try:
-        model = load_model(m_path, custom_objects={'asymmetric_precipitation_loss': asymmetric_precipitation_loss})
-        scaler = joblib.load(s_path)
-        return model, scaler
+        return get_model_cache().get(
+            ('local', backend, os.path.abspath(folder_path)),
+            artifacts,
+            lambda: (load_inference_model(keras_path, numpy_path, backend),
+                     load_feature_transform(transform_path, scaler_path))
+        )
     except Exception as e:
         st.error(f"Could not load local model: {e}")
         return None, None
@@ -184,19 +233,6 @@ def load_local_ai(folder_path):
 #  DATA PROCESSING & UTILITIES
 # =============================================================================
 
-def calculate_time_features(timestamp):
-    """
-    Converts a timestamp into cyclical Sin/Cos features for Neural Network input.
-    Captures daily (24h) and annual (365 days) seasonality patterns.
-    """
-    day = 24 * 60 * 60
-    year = 365.2425 * day
-    ts_s = timestamp.timestamp()
-    return [
-        np.sin(ts_s * (2 * np.pi / day)), np.cos(ts_s * (2 * np.pi / day)),
-        np.sin(ts_s * (2 * np.pi / year)), np.cos(ts_s * (2 * np.pi / year))
-    ]
-
 @st.cache_data(ttl=3600)
 def get_location_name(lat, lon):
     """
@@ -220,12 +256,13 @@ def get_live_data(lat, lon):
     """
     Fetches real-time weather history (last 24h) from Open-Meteo API.
     Used for the 'Romania Live' page to initialize the LSTM sequence.
+    Goes through the shared pooled client; responses are cached with the short 'live' TTL.
     """
     url = (f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}"
            f"&past_days=1&forecast_days=1&hourly=temperature_2m,relative_humidity_2m,"
            f"surface_pressure,wind_speed_10m,precipitation&timezone=auto")
     try:
-        r = requests.get(url, timeout=5).json()
+        r = get_client().get_json(url, kind='live', timeout=5)
         data = {
             'timestamp': pd.to_datetime(r['hourly']['time']),
             'temperature': r['hourly']['temperature_2m'],
@@ -248,50 +285,14 @@ def get_live_data(lat, lon):
 #  FORECASTING LOGIC
 # =============================================================================
 
-def forecast_next_24h(model, scaler, initial_sequence_24h, start_time):
-    """
-    Generates a 24-hour hour-by-hour forecast using autoregression.
-
-    The prediction at t+1 is fed back into the input sequence to predict t+2,
-    allowing long-term forecasting from a single trained model.
-    """
+def _forecast_frame(future_times, preds_real):
+    """Formats (24, 5) real-unit predictions as the dashboard forecast table."""
     predictions = []
-    current_seq = initial_sequence_24h.copy()
-    last_timestamp = start_time
-
-    for i in range(24):
-        # 1. Predict the next step
-        input_tensor = np.array([current_seq])
-        pred_scaled_5 = model.predict(input_tensor, verbose=0)[0]
-
-        # The scaler expects 0-1 usually, but outliers can go slightly outside.
-        # Extreme values like -10 or +10 indicate model instability.
-        # I clamp conservatively to stop explosion.
-        pred_scaled_5 = np.clip(pred_scaled_5, -0.5, 1.5)
-
-        # 2. Denormalize prediction
-        dummy = np.zeros((1, 9))  # Create a dummy array to match scaler's expected shape
-        dummy[:, :5] = pred_scaled_5
-        pred_real_5 = scaler.inverse_transform(dummy)[0, :5]
-
-        # 3. Inverse Log Transform for Precipitation
-        pred_real_5[4] = np.expm1(pred_real_5[4])
-
-        # 4. Apply physical constraints
-        temp = pred_real_5[0]
-        hum = min(max(pred_real_5[1], 0), 100)  # Clamp humidity 0-100%
-        pres = pred_real_5[2]
-        wind = min(max(pred_real_5[3], 0), 8)  # Wind cannot be negative and beyond 8
-        rain = max(pred_real_5[4], 0)  # Rain cannot be negative
-
-        # Apply a noise gate to filter micro-values
-        if rain < 0.1: rain = 0.0
-
+    for next_time, (temp, hum, pres, wind, rain) in zip(future_times, preds_real):
         # Determine Weather Condition (Rain/Snow/Clear)
         is_snow = (rain > 0) and (temp <= config.SNOW_TEMP_THRESHOLD)
         precip_type = "❄️ Ninsoare" if is_snow else ("🌧️ Ploaie" if rain > 0 else "☁️ Noros/Senin")
 
-        next_time = last_timestamp + timedelta(hours=i + 1)
         predictions.append({
             'Ora': next_time.strftime('%H:%M'),
             'Temp (°C)': round(temp, 1),
@@ -302,18 +303,93 @@ def forecast_next_24h(model, scaler, initial_sequence_24h, start_time):
             'Condiție': precip_type
         })
 
-        # 5. Prepare the sequence for the next iteration (Autoregression loop)
-        pred_for_feedback = pred_real_5.copy()
-        pred_for_feedback[4] = np.log1p(pred_for_feedback[4])  # Re-apply Log for model input
+    return pd.DataFrame(predictions)
 
-        new_time_feats = calculate_time_features(next_time)
-        row_real_9 = np.concatenate([pred_for_feedback, new_time_feats])
+# Dashboard-only output bounds on top of the physics rules (Wind is capped at 8 m/s)
+FORECAST_BOUNDS = {'wind_speed': (0.0, 8.0)}
 
-        # Scale the new row and append to the sliding window
-        row_scaled_9 = scaler.transform([row_real_9])[0]
-        current_seq = np.vstack([current_seq[1:], row_scaled_9])
+def get_forecast_engine(model, transform):
+    """Cached forecast engine: direct (multi-horizon model) or rollout of the model's backend."""
+    if is_multi_horizon(model):
+        return get_direct_engine(model, transform, bounds=FORECAST_BOUNDS, horizon=24)
+    if isinstance(model, NumpyLSTM):
+        return get_numpy_rollout_engine(model, transform, bounds=FORECAST_BOUNDS)
 
-    return pd.DataFrame(predictions)
+    from src.neural_network.rollout import get_rollout_engine  # Keras backend only (imports TensorFlow)
+    return get_rollout_engine(model, transform, bounds=FORECAST_BOUNDS)
+
+def forecast_batch_24h(model, transforms, input_sequences, start_times):
+    """
+    Generates 24-hour forecasts for several origins (cities, devices) in one batch.
+
+    All origins advance together through the rollout engine of the model's backend
+    (compiled graph for Keras, see rollout.py; NumPy ring buffer, see numpy_lstm.py), one
+    model call per hour for the whole batch, so forecasting 7 cities costs about as much
+    as forecasting one. A direct multi-horizon model needs a single call instead
+    (multi_horizon.py). Every engine applies the feedback clamping, time features,
+    denormalization and physics rules (humidity 0-100%, no negative rain, noise gate for
+    micro-values) itself: in-graph for Keras, in NumPy for the other engines.
+    Wind is also capped at 8 m/s here.
+
+    Args:
+        model: Model shared by all origins (Keras, NumpyLSTM or direct multi-horizon).
+        transforms: One FeatureTransform for all origins, or a list with one per origin.
+        input_sequences: (B, 24, 9) scaled windows (or a list of (24, 9) windows).
+        start_times: B timestamps of the last window rows.
+
+    Returns:
+        list: One forecast DataFrame per origin.
+    """
+    if isinstance(transforms, (list, tuple)):
+        base_transform, per_origin = transforms[0], list(transforms)
+    else:
+        base_transform, per_origin = transforms, None
+
+    engine = get_forecast_engine(model, base_transform)
+    preds_real = engine.forecast(np.stack(input_sequences), start_times, per_origin)
+
+    return [
+        _forecast_frame([start_time + timedelta(hours=i + 1) for i in range(engine.horizon)], preds)
+        for start_time, preds in zip(start_times, preds_real)
+    ]
+
+def forecast_device_24h(model, transform, device_id, df_device):
+    """
+    Streaming 24-hour forecast of a live device (see stateful.py).
+
+    The device keeps its LSTM states between refreshes: only readings newer than the saved
+    state are consumed (one timestep each) and the forecast forks the state instead of
+    re-running the 24h history. States are persisted, so a dashboard restart resumes them.
+
+    Args:
+        df_device: Device history with 'timestamp' and TARGET_COLS (at least 24 hourly rows).
+    """
+    forecaster = get_stateful_forecaster(model, transform, bounds=FORECAST_BOUNDS)
+    if forecaster.update(device_id, df_device[config.TARGET_COLS].to_numpy(dtype=np.float64),
+                         to_epoch_seconds(df_device['timestamp'])):
+        forecaster.save_states()
+
+    start_time = df_device['timestamp'].iloc[-1]
+    if not forecaster.ready(device_id):
+        # State restarted after a long outage: use the (healed) window until 24h are streamed again
+        window = df_device.tail(24)
+        input_scaled = transform.encode(window[config.TARGET_COLS].to_numpy(dtype=np.float64),
+                                        to_epoch_seconds(window['timestamp']))
+        return forecast_next_24h(model, transform, input_scaled, start_time)
+
+    preds_real, _ = forecaster.forecast([device_id])
+    return _forecast_frame([start_time + timedelta(hours=i + 1) for i in range(forecaster.horizon)], preds_real[0])
+
+def forecast_next_24h(model, transform, initial_sequence_24h, start_time):
+    """
+    Generates a 24-hour hour-by-hour forecast using autoregression.
+
+    The prediction at t+1 is fed back into the input sequence to predict t+2,
+    allowing long-term forecasting from a single trained model (a direct multi-horizon
+    model returns all 24 hours from one pass instead). Single-origin case of
+    `forecast_batch_24h`; the engine is built once per model and reused on later calls.
+    """
+    return forecast_batch_24h(model, transform, [initial_sequence_24h], [start_time])[0]
 
 def analyze_alerts(df):
     """
@@ -446,19 +522,22 @@ def display_results(current_conditions, forecast_df, city_name, start_time):
 #  PAGE IMPLEMENTATIONS
 # =============================================================================
 
-def page_romania_live(model, scaler):
+# Major Romanian cities (lat, lon) for the live pages
+ROMANIA_CITIES = {
+    "București": (44.43, 26.10),
+    "Cluj-Napoca": (46.77, 23.60),
+    "Timișoara": (45.75, 21.23),
+    "Iași": (47.16, 27.58),
+    "Constanța": (44.18, 28.63),
+    "Brașov": (45.65, 25.60),
+    "Pitești": (44.85, 24.87)
+}
+
+def page_romania_live(model, transform):
     """Page 1: Live monitoring for major Romanian cities via Open-Meteo API."""
     st.header("🇷🇴 Monitorizare Live România")
 
-    cities = {
-        "București": (44.43, 26.10),
-        "Cluj-Napoca": (46.77, 23.60),
-        "Timișoara": (45.75, 21.23),
-        "Iași": (47.16, 27.58),
-        "Constanța": (44.18, 28.63),
-        "Brașov": (45.65, 25.60),
-        "Pitești": (44.85, 24.87)
-    }
+    cities = ROMANIA_CITIES
 
     col_sel, col_btn = st.columns([3, 1], gap="medium", vertical_alignment="bottom")
     with col_sel:
@@ -471,25 +550,82 @@ def page_romania_live(model, scaler):
             lat, lon = cities[city]
             hist_df = get_live_data(lat, lon)
 
-            # Prepare Input Sequence
+            # Prepare Input Sequence (log1p rain + time embeddings + scaling in one fused call)
             start_time = hist_df['timestamp'].iloc[-1]
-            time_feats_list = [calculate_time_features(ts) for ts in hist_df['timestamp']]
-            time_df = pd.DataFrame(time_feats_list, columns=['day_sin', 'day_cos', 'year_sin', 'year_cos'])
-
-            full_input = pd.concat([hist_df[config.TARGET_COLS], time_df], axis=1)
-
-            # Log Transform Rain
-            if 'precipitation' in full_input.columns:
-                full_input['precipitation'] = np.log1p(full_input['precipitation'])
+            input_scaled = transform.encode(hist_df[config.TARGET_COLS].to_numpy(),
+                                            to_epoch_seconds(hist_df['timestamp']))
 
             # Inference
-            input_scaled = scaler.transform(full_input)
-            forecast_df = forecast_next_24h(model, scaler, input_scaled, start_time)
+            forecast_df = forecast_next_24h(model, transform, input_scaled, start_time)
 
             display_results(hist_df, forecast_df, city, start_time)
 
-def page_manual_sim(model, scaler):
-    """Page 2: Manual simulator for testing extreme scenarios."""
+def page_romania_overview(model, transform):
+    """Page 2: Country overview - all selected cities forecast in a single batch."""
+    st.header("🗺️ Prognoză națională")
+    st.markdown("Toate orașele selectate sunt prognozate simultan, într-un singur lot de inferență.")
+
+    col_sel, col_btn = st.columns([3, 1], gap="medium", vertical_alignment="bottom")
+    with col_sel:
+        selected = st.multiselect("Orașe:", list(ROMANIA_CITIES.keys()), default=list(ROMANIA_CITIES.keys()))
+    with col_btn:
+        run_btn = st.button("Prognoză națională", type="primary", use_container_width=True,
+                            disabled=not selected)
+
+    if run_btn:
+        with st.spinner(f"Descărcare date live pentru {len(selected)} orașe..."):
+            # Live histories in parallel through the shared pooled client
+            with ThreadPoolExecutor(max_workers=len(selected)) as executor:
+                histories = list(executor.map(lambda c: get_live_data(*ROMANIA_CITIES[c]), selected))
+
+        # Only complete 24h windows can seed the model
+        ready = [(city, df) for city, df in zip(selected, histories) if len(df) >= config.SEQ_LENGTH]
+        missing = [city for city, df in zip(selected, histories) if len(df) < config.SEQ_LENGTH]
+        if missing:
+            st.warning(f"Date insuficiente pentru: {', '.join(missing)}")
+        if not ready:
+            return
+
+        with st.spinner("Inferență în lot..."):
+            t0 = time.perf_counter()
+            windows = [transform.encode(df[config.TARGET_COLS].to_numpy(), to_epoch_seconds(df['timestamp']))
+                       for _, df in ready]
+            start_times = [df['timestamp'].iloc[-1] for _, df in ready]
+            forecasts = forecast_batch_24h(model, transform, windows, start_times)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+
+        st.caption(f"⚡ {len(ready)} orașe prognozate într-un singur lot în {elapsed_ms:.0f} ms")
+
+        # Summary table: one row per city
+        summary = []
+        for (city, df), forecast_df in zip(ready, forecasts):
+            alerts = analyze_alerts(forecast_df)
+            summary.append({
+                'Oraș': city,
+                'Acum (°C)': round(float(df['temperature'].iloc[-1]), 1),
+                'Min 24h (°C)': forecast_df['Temp (°C)'].min(),
+                'Max 24h (°C)': forecast_df['Temp (°C)'].max(),
+                'Ploaie 24h (mm)': round(forecast_df['Precipitații (mm)'].sum(), 2),
+                'Vânt max (m/s)': forecast_df['Vânt (m/s)'].max(),
+                'Alerte': ", ".join(title for title, _ in alerts) if alerts else "✅"
+            })
+        st.dataframe(pd.DataFrame(summary), hide_index=True, use_container_width=True)
+
+        # Temperature evolution of all cities on one chart
+        fig = go.Figure()
+        for (city, _), forecast_df in zip(ready, forecasts):
+            fig.add_trace(go.Scatter(x=forecast_df['Ora'], y=forecast_df['Temp (°C)'], name=city, mode='lines'))
+        fig.update_layout(title='Evoluție temperatură (24h)', xaxis_title='Ora',
+                          yaxis_title='Temperatură (°C)', legend=dict(orientation='h', y=1.1), height=450)
+        st.plotly_chart(fig, use_container_width=True)
+
+        with st.expander("📄 Prognoze detaliate"):
+            for (city, _), forecast_df in zip(ready, forecasts):
+                st.markdown(f"**{city}**")
+                st.dataframe(forecast_df, hide_index=True, use_container_width=True)
+
+def page_manual_sim(model, transform):
+    """Page 3: Manual simulator for testing extreme scenarios."""
     st.header("🎛️ Simulator scenarii")
     st.markdown("Creează un scenariu manual pentru a testa reacția rețelei neuronale.")
 
@@ -514,17 +650,11 @@ def page_manual_sim(model, scaler):
 
             # Generate synthetic history (repeat current conditions backwards)
             timestamps = [current_dt - timedelta(hours=i) for i in range(24)][::-1]
-            t_feats_list = [calculate_time_features(ts) for ts in timestamps]
-
-            rain_log = np.log1p(rain)
-            phy_feats = [temp, hum, pres, wind, rain_log]
-
-            seq_data = [phy_feats + t_feat for t_feat in t_feats_list]
-            input_df = pd.DataFrame(seq_data, columns=config.FEATURE_COLS)
+            phy_feats = np.tile([temp, hum, pres, wind, rain], (len(timestamps), 1))
 
             # Inference
-            input_scaled = scaler.transform(input_df)
-            forecast_df = forecast_next_24h(model, scaler, input_scaled, current_dt)
+            input_scaled = transform.encode(phy_feats, to_epoch_seconds(timestamps))
+            forecast_df = forecast_next_24h(model, transform, input_scaled, current_dt)
 
             # Create dummy current conditions for display
             current_cond = pd.DataFrame([{
@@ -534,10 +664,109 @@ def page_manual_sim(model, scaler):
 
             display_results(current_cond, forecast_df, "Scenariu simulat", current_dt)
 
-def page_esp32_monitor(default_model, default_scaler):
-    """Page 3: Real-time IoT Dashboard with Adaptive Training capabilities."""
+@st.fragment(run_every=config.TRAINING_JOB_POLL_S)
+def training_job_progress(lat, lon):
+    """
+    Polls the background training job of a location (only this fragment reruns).
+    The whole page reruns once the job ends, so the new model is picked up.
+    """
+    job = TrainingJobQueue().latest_job(lat, lon)
+    if job is None or job['status'] not in ACTIVE_STATES:
+        st.rerun()
+    elif job['status'] == QUEUED:
+        st.progress(0, text="⏳ În coadă (așteaptă un proces de antrenare liber)...")
+    else:
+        st.progress(job['progress'], text=job['message'] or "Antrenare...")
+
+
+def load_latest_telemetry(data_file: str, device_id=None):
+    """
+    Latest state of a device (default: the last one heard): from the telemetry store,
+    else from the JSON snapshot of an older listener.
+
+    Returns:
+        tuple: (data dict with 'history', update time in epoch seconds), or (None, None).
+    """
+    data = get_telemetry_store().snapshot(device_id)
+    if data is not None:
+        return data, data['_last_seen']
+    if os.path.exists(data_file):
+        with open(data_file, 'r') as f:
+            return json.load(f), os.path.getmtime(data_file)
+    return None, None
+
+
+FLEET_STATUS_LABELS = {ONLINE: "🟢 Online", DELAYED: "🟡 Întârziat", OFFLINE: "🔴 Offline"}
+
+def fleet_model_router(default_model, default_transform, backend):
+    """Routes a device to its nearest adaptive model (model_registry.py), else to the generic model."""
+    registry = get_model_registry()
+
+    def route(device):
+        if device.lat is not None and device.lon is not None:
+            nearest = registry.nearest(device.lat, device.lon)
+            if nearest is not None:
+                model, transform = load_local_ai(nearest['path'], backend)
+                if model is not None:
+                    # The key groups the devices sharing this model into one batch
+                    return f"Local {nearest['key']}", model, transform
+        return "Generic", default_model, default_transform
+    return route
+
+def fleet_overview(fleet, default_model, default_transform, backend):
+    """
+    Fleet table: freshness, routed model, 24h forecast summary and alerts of every station.
+    Active stations are forecast in one batch per model (cached until a station reports again).
+    """
+    freshness = fleet.freshness()
+    t0 = time.perf_counter()
+    forecasts = fleet.forecast(fleet.active(), fleet_model_router(default_model, default_transform, backend),
+                               bounds=FORECAST_BOUNDS)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    temp_i, wind_i, rain_i = (config.TARGET_COLS.index(c) for c in ('temperature', 'wind_speed', 'precipitation'))
+    rows, alert_count = [], 0
+    for device in freshness.itertuples(index=False):
+        ring = fleet.devices[device.device_id].ring
+        row = {
+            'Dispozitiv': device.device_id,
+            'Stare': FLEET_STATUS_LABELS[device.status],
+            'Ultima citire (h)': round(device.reading_age_h, 1) if np.isfinite(device.reading_age_h) else None,
+            'Poziție': f"{device.lat:.4f}, {device.lon:.4f}" if pd.notna(device.lat) and pd.notna(device.lon) else "-",
+            'Acum (°C)': round(float(ring.window(1)[1][0, temp_i]), 1) if ring.size else None,
+        }
+        result = forecasts.get(device.device_id)
+        if result is not None:
+            preds = result['preds']
+            forecast_df = pd.DataFrame({'Temp (°C)': preds[:, temp_i].round(1), 'Vânt (m/s)': preds[:, wind_i].round(1),
+                                        'Precipitații (mm)': preds[:, rain_i].round(2)})
+            alerts = analyze_alerts(forecast_df)
+            alert_count += bool(alerts)
+            row.update({
+                'Model': result['model'],
+                'Min 24h (°C)': forecast_df['Temp (°C)'].min(),
+                'Max 24h (°C)': forecast_df['Temp (°C)'].max(),
+                'Ploaie 24h (mm)': round(forecast_df['Precipitații (mm)'].sum(), 2),
+                'Vânt max (m/s)': forecast_df['Vânt (m/s)'].max(),
+                'Alerte': ", ".join(title for title, _ in alerts) if alerts else "✅",
+            })
+        else:
+            row.update({'Model': '-', 'Alerte': "Date insuficiente" if device.status != OFFLINE else "-"})
+        rows.append(row)
+
+    k1, k2, k3 = st.columns(3)
+    k1.metric("Stații", len(freshness))
+    k2.metric("Online", int((freshness['status'] == ONLINE).sum()),
+              f"-{int((freshness['status'] != ONLINE).sum())} întârziate/offline", delta_color="inverse")
+    k3.metric("Stații cu alerte", alert_count)
+    st.caption(f"⚡ {sum(r is not None for r in forecasts.values())} stații prognozate "
+               f"({len({r['model'] for r in forecasts.values() if r})} modele, un lot per model) în {elapsed_ms:.0f} ms")
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+def page_esp32_monitor(default_model, default_transform, backend=config.INFERENCE_BACKEND):
+    """Page 4: Real-time IoT Dashboard with Adaptive Training capabilities."""
     st.header("📡 ESP32 Live Monitor & Adaptive AI")
-    DATA_FILE = "latest_telemetry.json"
+    DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "latest_telemetry.json")
 
     # Control Panel
     with st.container():
@@ -549,19 +778,36 @@ def page_esp32_monitor(default_model, default_scaler):
 
     st.divider()
 
+    # 1. Fleet overview (every station of the telemetry store)
+    selected_device = None
+    try:
+        fleet = get_device_fleet()
+        fleet.sync()
+    except Exception as e:
+        st.error(f"Eroare citire flotă: {e}")
+        fleet = None
+    if fleet is not None and len(fleet) > 0:
+        with st.expander(f"🛰️ Flotă ESP32 ({len(fleet)} stații)", expanded=len(fleet) > 1):
+            fleet_overview(fleet, default_model, default_transform, backend)
+        if len(fleet) > 1:
+            ordered = fleet.freshness()['device_id'].tolist()
+            selected_device = st.selectbox("📟 Dispozitiv afișat", ordered, index=0, key="fleet_device")
+
     # 2. Data Loading
-    if os.path.exists(DATA_FILE):
+    try:
+        data, updated_at = load_latest_telemetry(DATA_FILE, selected_device)
+    except Exception as e:
+        st.error(f"Eroare citire telemetrie: {e}")
+        data, updated_at = None, None
+
+    if data is not None:
         try:
-            # Check file update time for toast notification
-            file_mod_time = os.path.getmtime(DATA_FILE)
+            # Check the update time for toast notification
             if 'last_read_time' not in st.session_state: st.session_state['last_read_time'] = 0
-            if file_mod_time > st.session_state['last_read_time']:
-                st.session_state['last_read_time'] = file_mod_time
+            if updated_at > st.session_state['last_read_time']:
+                st.session_state['last_read_time'] = updated_at
                 st.toast('🔔 Date noi recepționate!', icon='📡')
 
-            with open(DATA_FILE, 'r') as f:
-                data = json.load(f)
-
             # Metadata Extraction
             device_id = data.get('deviceId', 'Unknown')
             saved_at = data.get('_local_saved_at', 'N/A')
@@ -571,7 +817,11 @@ def page_esp32_monitor(default_model, default_scaler):
 
             # Status Bar
             k1, k2, k3 = st.columns(3)
-            k1.metric("Dispozitiv", device_id, "Online")
+            status = ONLINE
+            if fleet is not None and device_id in fleet.devices:
+                status = fleet.freshness().set_index('device_id').at[device_id, 'status']
+            k1.metric("Dispozitiv", device_id, FLEET_STATUS_LABELS[status],
+                      delta_color="normal" if status == ONLINE else "inverse")
             k2.metric("Ultimul pachet", saved_at)
             k3.metric("Locație detectată", location_name, f"{esp_lat:.4f}, {esp_lon:.4f}")
 
@@ -584,37 +834,40 @@ def page_esp32_monitor(default_model, default_scaler):
                     """)
 
                 c_train_1, c_train_2 = st.columns([2, 1], gap="medium")
-                custom_model_dir = f"adaptive_models/{esp_lat}_{esp_lon}"
-                has_custom_model = os.path.exists(os.path.join(custom_model_dir, "model.keras"))
+                # Nearest trained location within the radius (GPS jitter must not miss the model)
+                nearest_model = get_model_registry().nearest(esp_lat, esp_lon)
+                has_custom_model = nearest_model is not None
+                custom_model_dir = nearest_model['path'] if has_custom_model else location_model_dir(esp_lat, esp_lon)
 
                 with c_train_1:
                     if has_custom_model:
-                        st.success(f"✅ Model optimizat disponibil pentru {location_name}.")
-                        try:
-                            with open(os.path.join(custom_model_dir, "metrics.json"), 'r') as f:
-                                m = json.load(f)
-                            st.caption(f"📊 Acuratețe (MAE): **{m['mae']:.4f}** | Antrenat: {m['trained_date']}")
-                        except:
-                            pass
+                        st.success(f"✅ Model optimizat disponibil pentru {location_name} "
+                                   f"(antrenat la {nearest_model['distance_km']:.2f} km).")
+                        m = nearest_model['metrics']
+                        if 'mae' in m:
+                            st.caption(f"📊 Acuratețe (MAE): **{m['mae']:.4f}** | Antrenat: {m.get('trained_date', '-')}"
+                                       + (f" | {m['mode']} în {m['train_seconds']:.0f} s" if 'train_seconds' in m else ""))
                     else:
                         st.warning("⚠️ Se utilizează modelul generic. Precizia poate fi afectată de micro-climat.")
 
                 with c_train_2:
-                    if st.button("🚀 Antrenează model local", use_container_width=True, help="Durată estimată: 2-5 min"):
-                        p_bar = st.progress(0, text="Inițializare...")
-                        try:
-                            def update_p(msg, val):
-                                p_bar.progress(val, text=msg)
-
-                            res = train_adaptive_model(esp_lat, esp_lon, progress_callback=update_p)
-                            if "error" in res:
-                                st.error(res["error"])
-                            else:
-                                st.success("Antrenare completă!");
-                                time.sleep(1);
-                                st.rerun()
-                        except Exception as e:
-                            st.error(f"Eroare critică: {e}")
+                    train_help = ("Durată estimată: < 1 min (fine-tuning pe modelul generic)"
+                                  if config.ADAPTIVE_TRAINING_MODE == 'finetune' else "Durată estimată: 2-5 min")
+                    # Training runs in the background worker (src/app/training_jobs.py), not in this script run
+                    job_queue = TrainingJobQueue()
+                    last_job = job_queue.latest_job(esp_lat, esp_lon)
+                    job_active = last_job is not None and last_job['status'] in ACTIVE_STATES
+                    if st.button("🚀 Antrenează model local", use_container_width=True, help=train_help,
+                                 disabled=job_active):
+                        job_queue.submit(esp_lat, esp_lon)
+                        if ensure_worker_running():
+                            st.toast("🚀 Procesul de antrenare a fost pornit!")
+                        st.rerun()
+
+                if job_active:
+                    training_job_progress(esp_lat, esp_lon)
+                elif last_job is not None and last_job['status'] == FAILED:
+                    st.error(f"Ultima antrenare a eșuat: {last_job['error']}")
 
                 use_custom = st.checkbox("Activează modelul local", value=has_custom_model,
                                          disabled=not has_custom_model)
@@ -622,10 +875,10 @@ def page_esp32_monitor(default_model, default_scaler):
 
             # 3. Model Selection Logic
             if use_custom:
-                active_model, active_scaler = load_local_ai(custom_model_dir)
-                if active_model is None: active_model, active_scaler = default_model, default_scaler
+                active_model, active_transform = load_local_ai(custom_model_dir, backend)
+                if active_model is None: active_model, active_transform = default_model, default_transform
             else:
-                active_model, active_scaler = default_model, default_scaler
+                active_model, active_transform = default_model, default_transform
 
             # 4. Data Processing & Inference
             history = data.get('history', [])
@@ -644,18 +897,9 @@ def page_esp32_monitor(default_model, default_scaler):
                         new_rows.append(r)
                     df_esp = pd.concat([pd.DataFrame(new_rows).sort_values('timestamp'), df_esp]).reset_index(drop=True)
 
-                # Feature Prep
-                time_feats = [calculate_time_features(ts) for ts in df_esp['timestamp']]
-                time_df = pd.DataFrame(time_feats, columns=['day_sin', 'day_cos', 'year_sin', 'year_cos'])
-                model_input = pd.concat([df_esp[config.TARGET_COLS], time_df], axis=1)
-
-                if 'precipitation' in model_input.columns:
-                    model_input['precipitation'] = np.log1p(model_input['precipitation'])
-
-                # Predict
-                input_scaled = active_scaler.transform(model_input)
+                # Stateful Predict: new readings cost one LSTM step, the forecast forks the state
                 start_time = df_esp['timestamp'].iloc[-1]
-                forecast_df = forecast_next_24h(active_model, active_scaler, input_scaled, start_time)
+                forecast_df = forecast_device_24h(active_model, active_transform, device_id, df_esp)
 
                 display_results(df_esp.tail(1), forecast_df, location_name, start_time)
             else:
@@ -677,13 +921,40 @@ def page_esp32_monitor(default_model, default_scaler):
 
 def main():
     ensure_azure_listener_running()
-    model, scaler = load_ai_core()
-
-    t1, t2, t3 = st.tabs(["🇷🇴 România Live", "🎛️ Simulator", "📡 ESP32 Monitor"])
-
-    with t1: page_romania_live(model, scaler)
-    with t2: page_manual_sim(model, scaler)
-    with t3: page_esp32_monitor(model, scaler)
+    backend = st.sidebar.selectbox(
+        "⚙️ Motor inferență", config.INFERENCE_BACKENDS,
+        index=config.INFERENCE_BACKENDS.index(config.INFERENCE_BACKEND),
+        format_func=lambda b: "NumPy (fără TensorFlow)" if b == 'numpy' else "Keras / TensorFlow"
+    )
+    mode = st.sidebar.selectbox(
+        "🔮 Strategie prognoză 24h", config.FORECAST_MODES,
+        index=config.FORECAST_MODES.index(config.FORECAST_MODE),
+        format_func=lambda m: "Directă (un singur pas)" if m == 'direct' else "Autoregresivă (24 pași)"
+    )
+    if mode == 'direct' and not has_multi_horizon_model(backend):
+        st.sidebar.warning("Modelul multi-orizont nu este antrenat "
+                           "('python -m src.neural_network.train --multi-horizon'); se folosește modul autoregresiv.")
+        mode = 'autoregressive'
+    model, transform = load_ai_core(backend, mode)
+
+    t1, t2, t3, t4 = st.tabs(["🇷🇴 România Live", "🗺️ România Overview", "🎛️ Simulator", "📡 ESP32 Monitor"])
+
+    with t1: page_romania_live(model, transform)
+    with t2: page_romania_overview(model, transform)
+    with t3: page_manual_sim(model, transform)
+    with t4: page_esp32_monitor(model, transform, backend)
+
+    # Weather API cache monitoring (shared pooled client)
+    api_stats = get_client().stats()
+    st.sidebar.caption(f"🌐 Cache API meteo: {api_stats['hits']} hit / {api_stats['misses']} miss "
+                       f"({api_stats['hit_ratio'] * 100:.0f}%)")
+
+    # Model cache monitoring (hot-reloaded default / adaptive models)
+    model_stats = get_model_cache().stats()
+    st.sidebar.caption(f"🧠 Cache modele: {model_stats['hits'] + model_stats['stale_hits']} hit / "
+                       f"{model_stats['misses']} miss | {model_stats['reloads']} reîncărcări "
+                       f"({model_stats['reload_errors']} erori) | {model_stats['load_seconds']:.1f} s încărcare | "
+                       f"{model_stats['size']}/{model_stats['max_entries']} modele")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,246 @@
+# src/app/fleet.py
+"""
+Multi-Device (Fleet) Ingestion and Batched Forecasting.
+
+The ESP32 page assumed a single device (one snapshot file, one deviceId, one forecast).
+This module serves a whole fleet of stations:
+
+1.  **Per-Device Ring Buffers:** Every deviceId keeps its last FLEET_RING_HOURS readings in a
+    fixed-size NumPy ring (no per-refresh DataFrame rebuilds). The rings are filled
+    incrementally from the telemetry store: one query returns the recent readings of every
+    device heard since the previous sync (`devices.last_seen` watermark).
+2.  **Model Routing:** Each device is routed to a model by a caller-provided function
+    (the dashboard: nearest adaptive model, else the generic one), and devices sharing a
+    model form one group.
+3.  **Batched Forecast:** Per group, the new readings update the per-device streaming
+    LSTM states (stateful.py, one timestep per new hour) and the devices of the group are
+    forecast in one batch: one model call per forecast hour, whatever the group size.
+    A device's forecast is cached until its state changes, so a refresh only computes the
+    devices that reported since the previous one (stations report at staggered minutes).
+4.  **Freshness:** Age of the newest reading and of the last message per device
+    (online / delayed / offline, thresholds FLEET_FRESH_HOURS / FLEET_STALE_HOURS).
+"""
+
+import time
+import weakref
+import threading
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src import config
+from src.app.singleton import process_singleton
+from src.app.telemetry_store import TelemetryStore, get_telemetry_store
+from src.neural_network.stateful import get_stateful_forecaster
+from src.preprocessing.time_features import HOUR_S
+
+ONLINE, DELAYED, OFFLINE = "online", "delayed", "offline"
+
+
+class DeviceRing:
+    """
+    Fixed-size ring buffer of the hourly readings of one device.
+
+    Attributes:
+        ts (np.ndarray): (R,) int64 epoch seconds.
+        values (np.ndarray): (R, 5) float64 readings (TARGET_COLS).
+        size (int): Number of valid rows (<= R).
+    """
+
+    __slots__ = ("ts", "values", "size", "_head")
+
+    def __init__(self, capacity: int = config.FLEET_RING_HOURS):
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, len(config.TARGET_COLS)), dtype=np.float64)
+        self.size = 0
+        self._head = 0  # Next write position
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        return int(self.ts[(self._head - 1) % len(self.ts)]) if self.size else None
+
+    def push(self, ts: np.ndarray, values: np.ndarray) -> int:
+        """Appends readings newer than the last one (ascending `ts`). Returns the number appended."""
+        if self.size:
+            fresh = ts > self.last_ts
+            ts, values = ts[fresh], values[fresh]
+        capacity = len(self.ts)
+        ts, values = ts[-capacity:], values[-capacity:]
+        positions = (self._head + np.arange(len(ts))) % capacity
+        self.ts[positions] = ts
+        self.values[positions] = values
+        self._head = (self._head + len(ts)) % capacity
+        self.size = min(self.size + len(ts), capacity)
+        return len(ts)
+
+    def window(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """The newest `n` readings (default: all), oldest first."""
+        n = self.size if n is None else min(n, self.size)
+        positions = (self._head - n + np.arange(n)) % len(self.ts)
+        return self.ts[positions], self.values[positions]
+
+
+class DeviceInfo:
+    """Metadata + ring buffer of one device."""
+
+    __slots__ = ("device_id", "lat", "lon", "last_seen", "ring")
+
+    def __init__(self, device_id: str, ring_hours: int):
+        self.device_id = device_id
+        self.lat = None
+        self.lon = None
+        self.last_seen = 0.0
+        self.ring = DeviceRing(ring_hours)
+
+
+class DeviceFleet:
+    """
+    In-memory view of every device of the telemetry store.
+
+    Attributes:
+        store (TelemetryStore): Source of the readings.
+        ring_hours (int): Ring buffer capacity per device.
+        devices (dict): device_id -> DeviceInfo.
+    """
+
+    def __init__(self, store: Optional[TelemetryStore] = None, ring_hours: int = config.FLEET_RING_HOURS):
+        if ring_hours < config.SEQ_LENGTH:
+            raise ValueError(f"The ring buffer must hold at least one window ({config.SEQ_LENGTH} hours).")
+        self.store = store or get_telemetry_store()
+        self.ring_hours = int(ring_hours)
+        self.devices: Dict[str, DeviceInfo] = {}
+        self._watermark = 0.0
+        # device_id -> (weak ref to the forecaster, last_epoch_s of its state, result); weak so
+        # that models evicted from the dashboard's model cache are not kept alive here
+        self._forecasts: Dict[str, Tuple[object, int, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def sync(self) -> int:
+        """
+        Pulls the readings of the devices heard since the previous sync into their rings.
+
+        Returns:
+            int: Number of readings appended.
+        """
+        with self._lock:
+            meta = self.store.devices_seen_after(self._watermark)
+            if meta.empty:
+                return 0
+            rows = self.store.recent_readings(self._watermark, self.ring_hours)
+
+            for device_id, lat, lon, last_seen in meta.itertuples(index=False):
+                info = self.devices.get(device_id)
+                if info is None:
+                    info = self.devices[device_id] = DeviceInfo(device_id, self.ring_hours)
+                info.lat, info.lon, info.last_seen = lat, lon, float(last_seen)
+
+            appended = 0
+            if not rows.empty:
+                ts = rows['ts'].to_numpy(dtype=np.int64)
+                values = rows[config.TARGET_COLS].to_numpy(dtype=np.float64)
+                ids = rows['device_id'].to_numpy()
+                # Rows are ordered by device: one slice per device
+                bounds = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+                heard = set(meta['device_id'])
+                for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(ids)]):
+                    # A device written between both queries is pulled by the next sync
+                    if ids[start] in heard:
+                        appended += self.devices[ids[start]].ring.push(ts[start:end], values[start:end])
+            self._watermark = float(meta['last_seen'].max())
+            return appended
+
+    def active(self, max_age_hours: float = config.FLEET_ACTIVE_HOURS, now: Optional[float] = None) -> List[str]:
+        """Devices whose newest reading is younger than `max_age_hours`, most recent first."""
+        now = time.time() if now is None else now
+        live = [d for d in self.devices.values()
+                if d.ring.size and now - d.ring.last_ts <= max_age_hours * HOUR_S]
+        return [d.device_id for d in sorted(live, key=lambda d: d.ring.last_ts, reverse=True)]
+
+    def freshness(self, now: Optional[float] = None) -> pd.DataFrame:
+        """
+        Per device: position, newest reading, its age, age of the last message and status.
+
+        Returns:
+            pd.DataFrame: device_id, lat, lon, last_reading (UTC), reading_age_h, message_age_h,
+                status (online / delayed / offline), readings (ring fill), sorted by reading age.
+        """
+        now = time.time() if now is None else now
+        rows = []
+        for d in self.devices.values():
+            reading_age = (now - d.ring.last_ts) / HOUR_S if d.ring.size else np.inf
+            status = (ONLINE if reading_age <= config.FLEET_FRESH_HOURS else
+                      DELAYED if reading_age <= config.FLEET_STALE_HOURS else OFFLINE)
+            rows.append({
+                "device_id": d.device_id, "lat": d.lat, "lon": d.lon,
+                "last_reading": pd.to_datetime(d.ring.last_ts, unit='s', utc=True) if d.ring.size else pd.NaT,
+                "reading_age_h": reading_age, "message_age_h": (now - d.last_seen) / HOUR_S,
+                "status": status, "readings": d.ring.size,
+            })
+        columns = ["device_id", "lat", "lon", "last_reading", "reading_age_h", "message_age_h", "status", "readings"]
+        return pd.DataFrame(rows, columns=columns).sort_values("reading_age_h", kind="stable").reset_index(drop=True)
+
+    def forecast(
+            self,
+            device_ids: Sequence[str],
+            route: Callable[[DeviceInfo], Tuple[str, object, object]],
+            bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+            horizon: int = 24
+    ) -> Dict[str, Dict]:
+        """
+        Forecasts several devices, one batch per routed model (cached results are reused for
+        devices without new readings on the same model).
+
+        Args:
+            device_ids: Devices to forecast (devices without a full window are skipped).
+            route (callable): DeviceInfo -> (model key, model, transform).
+            bounds (dict): Output bounds of the forecast (see StatefulForecaster).
+            horizon (int): Forecast length in hours.
+
+        Returns:
+            dict: device_id -> {'preds': (H, 5) real units, 'last_epoch_s', 'model'}.
+                Devices without a full window map to None.
+        """
+        groups: Dict[str, Tuple[object, object, List[str]]] = {}
+        for device_id in device_ids:
+            key, model, transform = route(self.devices[device_id])
+            groups.setdefault(key, (model, transform, []))[2].append(device_id)
+
+        results: Dict[str, Optional[Dict]] = {}
+        for key, (model, transform, members) in groups.items():
+            forecaster = get_stateful_forecaster(model, transform, bounds=bounds, horizon=horizon)
+            consumed = 0
+            for device_id in members:
+                ts, values = self.devices[device_id].ring.window()
+                consumed += forecaster.update(device_id, values, ts)
+            if consumed:
+                forecaster.save_states()
+
+            stale = []
+            for device_id in members:
+                if not forecaster.ready(device_id):
+                    results[device_id] = None
+                    continue
+                cached = self._forecasts.get(device_id)
+                if (cached is not None and cached[0]() is forecaster and
+                        cached[1] == forecaster.states[device_id].last_epoch_s):
+                    results[device_id] = cached[2]
+                else:
+                    stale.append(device_id)
+            if not stale:
+                continue
+
+            preds, last_epoch_s = forecaster.forecast(stale)
+            for i, device_id in enumerate(stale):
+                result = {"preds": preds[i], "last_epoch_s": int(last_epoch_s[i]), "model": key}
+                self._forecasts[device_id] = (weakref.ref(forecaster), int(last_epoch_s[i]), result)
+                results[device_id] = result
+        return results
+
+
+@process_singleton
+def get_device_fleet() -> DeviceFleet:
+    """Process-wide device fleet."""
+    return DeviceFleet()
@@ -0,0 +1,215 @@
+# src/app/model_cache.py
+"""
+Hot-Reloading LRU Cache for Model Artifacts.
+
+The dashboard used to reload adaptive models from disk on every Streamlit rerun, while the
+default model was cached for the lifetime of the process (a retrained `optimized_model.keras`
+was only picked up after a restart). This cache sits between both:
+
+1.  **Keys & Versions:** An entry is keyed by a name (e.g., ('local', backend, folder)) and
+    versioned by the (mtime, size) of its artifact files; when the stat changes, a content
+    hash decides whether the files really changed (a touch or a copy does not reload).
+2.  **Bounded LRU:** At most `max_entries` entries, the least recently used one is evicted.
+3.  **Double-Buffered Hot Reload:** A changed entry keeps serving its current value while the
+    new version loads in a background thread; the new value is swapped in atomically once
+    loaded. A failed reload (e.g., a file still being written) keeps the old value and is
+    retried when the files change again.
+4.  **Counters:** Hits, misses, stale hits (served while reloading), reloads, errors,
+    evictions and load times (`stats()`).
+
+Only the first load of an entry blocks the caller.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from src import config
+from src.app.singleton import process_singleton
+
+
+def _stat_fingerprint(paths: Sequence[str]) -> Tuple:
+    """(mtime_ns, size) per artifact, None for a missing file."""
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+def _content_hash(paths: Sequence[str]) -> str:
+    """BLAKE2 digest over the artifact contents (missing files hash as absent)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(path.encode('utf-8'))
+        if not os.path.exists(path):
+            digest.update(b'<missing>')
+            continue
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class _Entry:
+    __slots__ = ('value', 'paths', 'fingerprint', 'content_hash', 'pending', 'failed_fingerprint',
+                 'load_seconds')
+
+    def __init__(self, value, paths, fingerprint, content_hash, load_seconds):
+        self.value = value
+        self.paths = paths
+        self.fingerprint = fingerprint
+        self.content_hash = content_hash
+        self.pending: Optional[Future] = None
+        self.failed_fingerprint = None
+        self.load_seconds = load_seconds
+
+
+class ModelCache:
+    """
+    Bounded, hot-reloading cache of loaded models (or any artifact bundle).
+
+    Attributes:
+        max_entries (int): LRU capacity.
+        background (bool): Reload changed entries in a background thread (False: reload inline).
+    """
+
+    def __init__(self, max_entries: int = config.MODEL_CACHE_SIZE, background: bool = True):
+        self.max_entries = max(int(max_entries), 1)
+        self.background = background
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-reload') if background else None
+        self._counters = {"hits": 0, "misses": 0, "stale_hits": 0, "reloads": 0, "reload_errors": 0,
+                          "evictions": 0, "load_seconds": 0.0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def _count(self, name: str, amount=1) -> None:
+        self._counters[name] += amount
+
+    def _load(self, paths: Tuple[str, ...], loader: Callable[[], Any]):
+        """Runs the loader; the fingerprint is taken first, so a write during the load triggers another reload."""
+        fingerprint = _stat_fingerprint(paths)
+        t0 = time.perf_counter()
+        value = loader()
+        load_seconds = time.perf_counter() - t0
+        return value, fingerprint, _content_hash(paths), load_seconds
+
+    def get(self, key: Hashable, paths: Sequence[str], loader: Callable[[], Any]):
+        """
+        Returns the cached value of `key`, loading it on a miss.
+
+        Args:
+            key: Cache key (hashable).
+            paths (list): Artifact files the value is loaded from (their changes trigger a reload).
+            loader (callable): Loads the value (no arguments). Exceptions of a first load propagate.
+
+        Returns:
+            The current value (the previous version while a changed entry is reloading).
+        """
+        paths = tuple(paths)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.paths == paths:
+                self._entries.move_to_end(key)
+                fingerprint = _stat_fingerprint(paths)
+                if fingerprint == entry.fingerprint or fingerprint == entry.failed_fingerprint:
+                    self._count("hits")
+                    return entry.value
+                if entry.pending is None and _content_hash(paths) == entry.content_hash:
+                    # Touched / copied but identical: adopt the new stat, no reload
+                    entry.fingerprint = fingerprint
+                    self._count("hits")
+                    return entry.value
+                if self.background:
+                    if entry.pending is None:
+                        entry.pending = self._executor.submit(self._reload, key, entry, paths, loader)
+                    self._count("stale_hits")
+                    return entry.value
+
+        if entry is not None and entry.paths == paths:
+            # Inline reload (background=False)
+            self._reload(key, entry, paths, loader)
+            with self._lock:
+                return entry.value
+
+        # Miss (or the key now points to other artifacts): blocking first load
+        value, fingerprint, content_hash, load_seconds = self._load(paths, loader)
+        with self._lock:
+            self._count("misses")
+            self._count("load_seconds", load_seconds)
+            self._entries[key] = _Entry(value, paths, fingerprint, content_hash, load_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._count("evictions")
+        return value
+
+    def _reload(self, key: Hashable, entry: _Entry, paths: Tuple[str, ...], loader: Callable[[], Any]) -> None:
+        """Loads the new version of an entry and swaps it in (the old value serves meanwhile)."""
+        try:
+            value, fingerprint, content_hash, load_seconds = self._load(paths, loader)
+        except Exception as e:
+            print(f"[MODEL CACHE] Reload of {key} failed, keeping the previous version: {e}")
+            with self._lock:
+                entry.failed_fingerprint = _stat_fingerprint(paths)
+                entry.pending = None
+                self._count("reload_errors")
+            return
+
+        with self._lock:
+            # Double buffer swap: readers switch to the new value on their next `get`
+            entry.value = value
+            entry.fingerprint = fingerprint
+            entry.content_hash = content_hash
+            entry.failed_fingerprint = None
+            entry.load_seconds = load_seconds
+            entry.pending = None
+            self._count("reloads")
+            self._count("load_seconds", load_seconds)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Blocks until the pending background reloads are done (tests / benchmarks)."""
+        with self._lock:
+            pending = [e.pending for e in self._entries.values() if e.pending is not None]
+        for future in pending:
+            future.result(timeout)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drops one entry (or all of them)."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Counters plus the hit rate and the current entries (with their last load time)."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"] + self._counters["stale_hits"]
+            return {
+                **self._counters,
+                "hit_rate": (self._counters["hits"] + self._counters["stale_hits"]) / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "entries": {str(k): {"load_seconds": e.load_seconds, "reloading": e.pending is not None}
+                            for k, e in self._entries.items()},
+            }
+
+
+@process_singleton
+def get_model_cache() -> ModelCache:
+    """Process-wide model cache."""
+    return ModelCache()
@@ -0,0 +1,273 @@
+# src/app/model_registry.py
+"""
+Adaptive Model Registry with Spatial Index.
+
+Adaptive models used to be found by the exact folder name '<lat>_<lon>': a GPS fix that
+jitters by 0.0001 deg missed its model (and invited another retraining). The registry
+instead answers "which trained model is nearest to this position, within R km?":
+
+1.  **Index File:** config.ADAPTIVE_MODEL_INDEX_PATH lists every trained location (coordinates,
+    folder, metrics). It is updated whenever a model is installed (`register_model`) and can be
+    rebuilt from the model folders at any time (`rebuild_index`, also used when it is missing).
+2.  **k-d Tree:** Locations are stored as 3D unit vectors; the chord distance between two
+    unit vectors grows monotonically with the great-circle distance, so an exact Euclidean
+    k-d tree query (scipy cKDTree) returns the geographically nearest model in O(log N).
+3.  **Hot Reload:** `get_model_registry()` keeps one registry per process and rebuilds the tree
+    only when the index file changes (one `os.stat` per lookup).
+
+Index writes are read-modify-write under a lock file, so concurrent trainings (background
+jobs, batch training) do not lose each other's entries.
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+from contextlib import contextmanager
+from scipy.spatial import cKDTree
+from typing import Dict, List, Optional
+
+# Ensure the project root is in the Python path for module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src import config
+
+EARTH_RADIUS_KM = 6371.0088
+INDEX_VERSION = 1
+LOCK_STALE_S = 30.0
+MODEL_FILES = ("model.keras", "model.npz")
+
+
+def _unit_vectors(lat, lon) -> np.ndarray:
+    """(N, 3) points on the unit sphere for latitudes / longitudes in degrees."""
+    lat, lon = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord):
+    """Great-circle distance (km) of a chord between two unit vectors."""
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+def km_to_chord(km):
+    """Chord length between two unit vectors that are `km` apart on the Earth's surface."""
+    return 2.0 * np.sin(np.minimum(np.asarray(km, dtype=np.float64) / (2.0 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance (km), broadcasting over arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _parse_folder_name(name: str):
+    """(lat, lon) of a '<lat>_<lon>' model folder, None for other folders."""
+    try:
+        lat, lon = name.rsplit('_', 1)
+        return float(lat), float(lon)
+    except ValueError:
+        return None
+
+
+@contextmanager
+def _index_lock(index_path: str):
+    """Cross-process lock file around index writes (stale locks of crashed writers are broken)."""
+    lock_path = f"{index_path}.lock"
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_S:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+def _write_index(index_path: str, entries: List[Dict]) -> None:
+    """Atomic write (tmp + replace) so readers never see a partial index."""
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": INDEX_VERSION, "models": entries}, f)
+    os.replace(tmp_path, index_path)
+
+
+def _read_entries(index_path: str) -> List[Dict]:
+    with open(index_path, 'r', encoding='utf-8') as f:
+        payload = json.load(f)
+    if payload.get("version") != INDEX_VERSION:
+        raise ValueError(f"Unsupported model index version {payload.get('version')}.")
+    return payload["models"]
+
+
+def scan_models(models_dir: str = config.ADAPTIVE_MODELS_DIR) -> List[Dict]:
+    """Index entries of every '<lat>_<lon>' folder holding a model (staging / hidden folders skipped)."""
+    entries = []
+    if not os.path.isdir(models_dir):
+        return entries
+    for name in sorted(os.listdir(models_dir)):
+        folder = os.path.join(models_dir, name)
+        coords = _parse_folder_name(name)
+        if name.startswith('.') or coords is None or not os.path.isdir(folder):
+            continue
+        if not any(os.path.exists(os.path.join(folder, f)) for f in MODEL_FILES):
+            continue
+        metrics = {}
+        try:
+            with open(os.path.join(folder, "metrics.json"), 'r') as f:
+                metrics = json.load(f)
+        except (OSError, ValueError):
+            pass
+        entries.append({"key": name, "lat": coords[0], "lon": coords[1], "metrics": metrics})
+    return entries
+
+
+def rebuild_index(models_dir: str = config.ADAPTIVE_MODELS_DIR,
+                  index_path: str = config.ADAPTIVE_MODEL_INDEX_PATH) -> int:
+    """Rewrites the index from the model folders on disk. Returns the number of models."""
+    with _index_lock(index_path):
+        entries = scan_models(models_dir)
+        _write_index(index_path, entries)
+    return len(entries)
+
+
+def register_model(lat: float, lon: float, metrics: Optional[Dict] = None,
+                   index_path: str = config.ADAPTIVE_MODEL_INDEX_PATH) -> None:
+    """
+    Adds (or replaces) the model of a location in the index. Called whenever a model is installed
+    in its '<lat>_<lon>' folder.
+    """
+    key = f"{lat}_{lon}"
+    with _index_lock(index_path):
+        try:
+            entries = _read_entries(index_path)
+        except (OSError, ValueError):
+            entries = scan_models(os.path.dirname(os.path.abspath(index_path)))
+        entries = [e for e in entries if e["key"] != key]
+        entries.append({"key": key, "lat": float(lat), "lon": float(lon), "metrics": dict(metrics or {})})
+        _write_index(index_path, entries)
+
+
+class AdaptiveModelRegistry:
+    """
+    Nearest-model lookups over the trained locations.
+
+    Attributes:
+        models_dir (str): Folder of the '<lat>_<lon>' model folders.
+        index_path (str): Index file (rebuilt from `models_dir` when missing).
+        entries (List[Dict]): Indexed models ('key', 'lat', 'lon', 'metrics').
+    """
+
+    def __init__(self, models_dir: str = config.ADAPTIVE_MODELS_DIR,
+                 index_path: str = config.ADAPTIVE_MODEL_INDEX_PATH):
+        self.models_dir = models_dir
+        self.index_path = index_path
+        self.entries: List[Dict] = []
+        self._tree = None
+        self._stamp = None
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _index_stamp(self):
+        try:
+            stat = os.stat(self.index_path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reloads the index (and rebuilds the tree) if the file changed. Returns True on reload."""
+        stamp = self._index_stamp()
+        if stamp is None:
+            rebuild_index(self.models_dir, self.index_path)
+            stamp = self._index_stamp()
+        if stamp == self._stamp and not force:
+            return False
+
+        try:
+            self.load_entries(_read_entries(self.index_path))
+        except (OSError, ValueError):
+            # Unreadable / outdated index: the folders are the source of truth
+            rebuild_index(self.models_dir, self.index_path)
+            self.load_entries(_read_entries(self.index_path))
+        self._stamp = self._index_stamp()
+        return True
+
+    def load_entries(self, entries: List[Dict]) -> None:
+        """Replaces the indexed models and rebuilds the k-d tree."""
+        self.entries = list(entries)
+        if self.entries:
+            points = _unit_vectors([e["lat"] for e in self.entries], [e["lon"] for e in self.entries])
+            self._tree = cKDTree(points)
+        else:
+            self._tree = None
+
+    def model_dir(self, entry: Dict) -> str:
+        """Folder of an indexed model."""
+        return os.path.join(self.models_dir, entry["key"])
+
+    def nearest(self, lat: float, lon: float, radius_km: float = config.ADAPTIVE_MODEL_RADIUS_KM,
+                verify: bool = True) -> Optional[Dict]:
+        """
+        Nearest trained model within `radius_km`.
+
+        Args:
+            lat, lon (float): Query position.
+            radius_km (float): Search radius.
+            verify (bool): Check that the model folder still exists (the index is rebuilt
+                from disk once if it does not).
+
+        Returns:
+            dict: {'key', 'lat', 'lon', 'metrics', 'path', 'distance_km'} or None.
+        """
+        self.refresh()
+        if self._tree is None:
+            return None
+
+        chord, idx = self._tree.query(_unit_vectors(lat, lon), k=1, distance_upper_bound=float(km_to_chord(radius_km)))
+        if not np.isfinite(chord):
+            return None
+
+        entry = self.entries[int(idx)]
+        path = self.model_dir(entry)
+        if verify and not os.path.isdir(path):
+            # A model folder was removed behind the index's back
+            rebuild_index(self.models_dir, self.index_path)
+            self.refresh(force=True)
+            return self.nearest(lat, lon, radius_km, verify=False)
+
+        return {**entry, "path": path, "distance_km": float(chord_to_km(chord))}
+
+
+_registries: Dict[tuple, AdaptiveModelRegistry] = {}
+
+
+def get_model_registry(models_dir: str = config.ADAPTIVE_MODELS_DIR,
+                       index_path: str = config.ADAPTIVE_MODEL_INDEX_PATH) -> AdaptiveModelRegistry:
+    """One registry per process (reloaded by `nearest` only when the index file changes)."""
+    key = (models_dir, index_path)
+    if key not in _registries:
+        _registries[key] = AdaptiveModelRegistry(models_dir, index_path)
+    return _registries[key]
+
+
+if __name__ == "__main__":
+    print(f">>> Rebuilding the adaptive model index from {config.ADAPTIVE_MODELS_DIR}...")
+    print(f"Indexed models: {rebuild_index()}")
+    registry = get_model_registry()
+    for model in registry.entries:
+        print(f" - {model['key']}: MAE {model['metrics'].get('mae', float('nan')):.4f}")
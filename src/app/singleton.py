@@ -0,0 +1,33 @@
+# src/app/singleton.py
+"""
+Process-Wide Singletons of the App.
+
+Streamlit re-executes the dashboard script on every interaction, so objects stored in
+the script's globals are rebuilt on each rerun. Imported modules are executed only once
+per process, so shared objects that must outlive a rerun (model cache, telemetry store,
+device fleet) are created once by accessors decorated with `process_singleton`.
+"""
+
+import functools
+import threading
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def process_singleton(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Turns a zero-argument factory into a thread-safe accessor of one shared instance,
+    created on the first call.
+    """
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def accessor() -> T:
+        with lock:
+            if not instance:
+                instance.append(factory())
+            return instance[0]
+
+    return accessor
@@ -0,0 +1,315 @@
+# src/app/telemetry_pipeline.py
+"""
+Asynchronous Ingestion Pipeline of the Azure Listener.
+
+The listener used to parse, write and checkpoint every message inline, so a burst of devices
+paid one store transaction, one snapshot rename and one checkpoint round-trip per event.
+This pipeline decouples receiving from persisting:
+
+1.  **Bounded Queue:** `on_event` (the consumer callback) only decodes and parses the JSON body
+    and puts the event into an asyncio queue of LISTENER_QUEUE_SIZE. A full queue blocks the callback,
+    which pauses receiving (backpressure) instead of growing memory.
+2.  **Debounced, Coalescing Writer:** One writer task collects events for up to
+    LISTENER_FLUSH_DEBOUNCE_S (or LISTENER_FLUSH_MAX_EVENTS) and writes them to the telemetry
+    store in one transaction, plus one snapshot of the latest message per flush.
+3.  **Batched Checkpoints:** After a successful write, the last event of each partition is
+    checkpointed every LISTENER_CHECKPOINT_EVERY events or LISTENER_CHECKPOINT_INTERVAL_S
+    seconds. Checkpoints never run ahead of the store (at-least-once, the store deduplicates).
+4.  **Poison Messages:** Messages without usable readings are counted as invalid in
+    `on_event`; only transient store errors (locked database, I/O) are retried. A batch the
+    store rejects otherwise is stored message by message and the failing ones are dropped,
+    so one malformed device message never stalls the fleet (and is checkpointed past).
+5.  **Metrics:** Events/s, queue depth (current / max), flushes, checkpoints, errors.
+
+The module does not import the Azure SDK: `consume` accepts any client with the interface of
+`azure.eventhub.aio.EventHubConsumerClient` (async context manager + `receive(on_event=...)`),
+so it can run against an in-process fake (see src/benchmarks/bench_telemetry_pipeline.py).
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+from datetime import datetime
+from typing import Dict, Optional
+
+from src import config
+from src.app.telemetry_store import TelemetryStore, parse_payload
+
+_STOP = object()
+
+
+def extract_telemetry(payload) -> Optional[Dict]:
+    """
+    Returns the telemetry part of a message, or None if it has no 'history'.
+
+    Azure IoT Hub sometimes wraps the message in a "body" key, or sends it flat,
+    depending on how the ESP32 sent it.
+    """
+    if not isinstance(payload, dict):
+        return None
+    if isinstance(payload.get("body"), dict) and "history" in payload["body"]:
+        return payload["body"]
+    if "history" in payload:
+        return payload
+    return None
+
+
+def save_snapshot(data: dict, path: str) -> None:
+    """
+    Writes the latest message to `path` with the 'Atomic Write' pattern (temp file + os.replace),
+    so a reader never sees a half-written file.
+    """
+    data = dict(data, _local_saved_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    temp_file = f"{path}.{os.getpid()}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(temp_file, path)
+
+
+class ListenerMetrics:
+    """Counters of the pipeline plus the event rate since the previous report."""
+
+    def __init__(self):
+        self.received = 0
+        self.invalid = 0
+        self.written = 0
+        self.stored_readings = 0
+        self.flushes = 0
+        self.checkpoints = 0
+        self.write_errors = 0
+        self.dropped = 0
+        self.checkpoint_errors = 0
+        self.queue_depth = 0
+        self.queue_depth_max = 0
+        self.started = time.monotonic()
+        self._last_report = (self.started, 0)
+
+    def events_per_second(self, reset: bool = False) -> float:
+        """Received events per second since the previous report (`reset` starts a new window)."""
+        now = time.monotonic()
+        t0, count0 = self._last_report
+        rate = (self.received - count0) / max(now - t0, 1e-9)
+        if reset:
+            self._last_report = (now, self.received)
+        return rate
+
+    def snapshot(self) -> Dict:
+        """Current counters (uptime in seconds, overall events/s)."""
+        uptime = time.monotonic() - self.started
+        return {
+            "received": self.received, "invalid": self.invalid, "written": self.written,
+            "stored_readings": self.stored_readings, "flushes": self.flushes,
+            "checkpoints": self.checkpoints, "write_errors": self.write_errors, "dropped": self.dropped,
+            "checkpoint_errors": self.checkpoint_errors, "queue_depth": self.queue_depth,
+            "queue_depth_max": self.queue_depth_max, "uptime_s": uptime,
+            "events_per_second": self.received / max(uptime, 1e-9),
+        }
+
+
+class TelemetryPipeline:
+    """
+    Bounded queue + coalescing writer + batched checkpoints between the consumer and the store.
+
+    Attributes:
+        store (TelemetryStore): Destination of the readings.
+        snapshot_path (str): Legacy JSON snapshot of the latest message (None disables it).
+        metrics (ListenerMetrics): Live counters.
+    """
+
+    def __init__(self, store: Optional[TelemetryStore] = None, snapshot_path: Optional[str] = None,
+                 queue_size: int = config.LISTENER_QUEUE_SIZE,
+                 flush_max_events: int = config.LISTENER_FLUSH_MAX_EVENTS,
+                 debounce_s: float = config.LISTENER_FLUSH_DEBOUNCE_S,
+                 checkpoint_every: int = config.LISTENER_CHECKPOINT_EVERY,
+                 checkpoint_interval_s: float = config.LISTENER_CHECKPOINT_INTERVAL_S,
+                 report_interval_s: Optional[float] = config.LISTENER_REPORT_INTERVAL_S):
+        self.store = store or TelemetryStore()
+        self.snapshot_path = snapshot_path
+        self.flush_max_events = max(int(flush_max_events), 1)
+        self.debounce_s = debounce_s
+        self.checkpoint_every = max(int(checkpoint_every), 1)
+        self.checkpoint_interval_s = checkpoint_interval_s
+        self.report_interval_s = report_interval_s
+        self.metrics = ListenerMetrics()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(int(queue_size), 1))
+        # partition_id -> (partition_context, last persisted event), not checkpointed yet
+        self._pending: Dict[str, tuple] = {}
+        self._uncheckpointed = 0
+        self._last_checkpoint = time.monotonic()
+        self._last_report = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------------
+    async def on_event(self, partition_context, event) -> None:
+        """`on_event` callback of the consumer client: decode and enqueue (blocks when the queue is full)."""
+        if event is None:
+            # Emitted by the SDK when `max_wait_time` passes without events
+            return
+        self.metrics.received += 1
+        try:
+            payload = extract_telemetry(json.loads(event.body_as_str(encoding='UTF-8')))
+        except ValueError:
+            payload = None
+        # Parsed once here: the writer stores the parsed readings (`ingest_parsed`)
+        parsed = parse_payload(payload) if payload is not None else None
+        if parsed is None or not parsed["rows"]:
+            payload = parsed = None
+            # Still queued: the partition must be checkpointed past it
+            self.metrics.invalid += 1
+            print("⚠️ Warning: Received message with invalid format (non-JSON or no valid 'history' readings).")
+
+        await self.queue.put((partition_context, event, payload, parsed))
+        self.metrics.queue_depth = self.queue.qsize()
+        self.metrics.queue_depth_max = max(self.metrics.queue_depth_max, self.metrics.queue_depth)
+
+    # ------------------------------------------------------------------
+    # Writer side
+    # ------------------------------------------------------------------
+    async def _next_batch(self):
+        """Waits for the first event, then collects the burst for `debounce_s`. Returns (batch, stop)."""
+        try:
+            first = await asyncio.wait_for(self.queue.get(), timeout=self.checkpoint_interval_s)
+        except asyncio.TimeoutError:
+            return [], False
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = asyncio.get_running_loop().time() + self.debounce_s
+        while len(batch) < self.flush_max_events:
+            if self.queue.empty():
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self.queue.get_nowait()
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _ingest(self, parsed: list) -> int:
+        """One store transaction, retried while the error is transient (locked / busy database, I/O)."""
+        delay = 0.5
+        while True:
+            try:
+                return await asyncio.to_thread(self.store.ingest_parsed, parsed)
+            except sqlite3.OperationalError as e:
+                # The events are not checkpointed yet; keep them (the full queue pauses receiving)
+                self.metrics.write_errors += 1
+                print(f"❌ Error writing {len(parsed)} events, retrying in {delay:.1f} s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def _flush(self, batch: list) -> None:
+        """Writes a batch (one store transaction, one snapshot); messages the store rejects are dropped."""
+        messages = [(payload, parsed) for _, _, payload, parsed in batch if parsed is not None]
+        stored = 0
+        if messages:
+            try:
+                stored = await self._ingest([parsed for _, parsed in messages])
+            except Exception as e:
+                # Not transient: isolate the offending message(s) instead of retrying forever
+                self.metrics.write_errors += 1
+                print(f"❌ Batch of {len(messages)} events rejected ({e}), storing them one by one...")
+                kept = []
+                for payload, parsed in messages:
+                    try:
+                        stored += await self._ingest([parsed])
+                        kept.append((payload, parsed))
+                    except Exception as e:
+                        self.metrics.dropped += 1
+                        print(f"⚠️ Dropped message of device {parsed['device_id']}: {e}")
+                messages = kept
+        payloads = [payload for payload, _ in messages]
+
+        if payloads and self.snapshot_path:
+            try:
+                await asyncio.to_thread(save_snapshot, payloads[-1], self.snapshot_path)
+            except OSError as e:
+                # The readings are stored; the legacy snapshot is refreshed by the next flush
+                self.metrics.write_errors += 1
+                print(f"❌ Snapshot write failed: {e}")
+
+        self.metrics.written += len(payloads)
+        self.metrics.stored_readings += stored
+        self.metrics.flushes += 1
+        for partition_context, event, _, _ in batch:
+            self._pending[partition_context.partition_id] = (partition_context, event)
+        self._uncheckpointed += len(batch)
+
+    async def _checkpoint(self, force: bool = False) -> None:
+        """Checkpoints the last persisted event of each partition when N events or T seconds are reached."""
+        if not self._pending:
+            return
+        due = (self._uncheckpointed >= self.checkpoint_every or
+               time.monotonic() - self._last_checkpoint >= self.checkpoint_interval_s)
+        if not (force or due):
+            return
+        for partition_id, (partition_context, event) in list(self._pending.items()):
+            try:
+                await partition_context.update_checkpoint(event)
+            except Exception as e:
+                # Retried with the next checkpoint (a later event of the partition supersedes it)
+                self.metrics.checkpoint_errors += 1
+                print(f"❌ Checkpoint of partition {partition_id} failed: {e}")
+                continue
+            self.metrics.checkpoints += 1
+            if self._pending.get(partition_id, (None, None))[1] is event:
+                del self._pending[partition_id]
+        self._uncheckpointed = 0
+        self._last_checkpoint = time.monotonic()
+
+    def _report(self) -> None:
+        if self.report_interval_s is None or time.monotonic() - self._last_report < self.report_interval_s:
+            return
+        self._last_report = time.monotonic()
+        m = self.metrics
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] 📈 {m.events_per_second(reset=True):.1f} events/s | "
+              f"queue {self.queue.qsize()}/{self.queue.maxsize} (max {m.queue_depth_max}) | "
+              f"{m.stored_readings} readings stored | {m.checkpoints} checkpoints | "
+              f"{m.write_errors} write errors | {m.invalid} invalid / {m.dropped} dropped")
+
+    async def run_writer(self) -> None:
+        """Writer loop: flush bursts and checkpoint until `stop` is called (then drains the queue)."""
+        stop = False
+        while not stop:
+            batch, stop = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+                for _ in batch:
+                    self.queue.task_done()
+            self.metrics.queue_depth = self.queue.qsize()
+            await self._checkpoint(force=stop)
+            self._report()
+
+    async def stop(self, writer: asyncio.Task) -> None:
+        """Flushes the queued events, commits the final checkpoints and ends the writer task."""
+        await self.queue.put(_STOP)
+        await writer
+
+
+async def consume(client, pipeline: TelemetryPipeline, **receive_kwargs) -> None:
+    """
+    Receives events with `client` (EventHubConsumerClient from azure.eventhub.aio, or a fake
+    with the same interface) until it returns or is cancelled, then drains the pipeline.
+
+    Args:
+        client: Async consumer client.
+        pipeline (TelemetryPipeline): Destination of the events.
+        **receive_kwargs: Passed to `client.receive` (e.g., starting_position, max_wait_time).
+    """
+    writer = asyncio.create_task(pipeline.run_writer())
+    try:
+        async with client:
+            await client.receive(on_event=pipeline.on_event, **receive_kwargs)
+    finally:
+        await pipeline.stop(writer)
+        print(f"Pipeline stopped: {pipeline.metrics.snapshot()}")
@@ -0,0 +1,425 @@
+# src/app/telemetry_store.py
+"""
+Append-Only Telemetry Store for the ESP32 Stations.
+
+The Azure listener used to overwrite one JSON snapshot per event, so only the 24-entry
+`history` array resent by the device was ever visible. This module keeps every reading:
+
+1.  **Storage:** One SQLite database (config.TELEMETRY_DB_PATH) in WAL mode: the listener
+    writes while the dashboard and training jobs read, without blocking each other.
+2.  **Key & Deduplication:** Readings are clustered by (device_id, ts) (WITHOUT ROWID primary
+    key). Every payload resends the last 24 hours, so overlapping rows are dropped by
+    `INSERT OR IGNORE` and only new hours are stored.
+3.  **Batched Inserts:** A payload (or a list of payloads) is written in one transaction
+    with `executemany`.
+4.  **Rollups:** Hourly and daily aggregates (count, means, temperature min/max, wind max,
+    precipitation sum) are recomputed for the buckets touched by each batch only.
+5.  **Retention:** Raw readings expire after TELEMETRY_RAW_RETENTION_DAYS, hourly rollups
+    after TELEMETRY_HOURLY_RETENTION_DAYS; daily rollups are kept.
+6.  **Range Queries:** `readings` / `rollups` return DataFrames for a device and time range
+    (index range scans), `history_frame` feeds adaptive training (`train_adaptive_model(history=...)`).
+
+Usage:
+    python -m src.app.telemetry_store import src/app/latest_telemetry.json
+    python -m src.app.telemetry_store stats
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+from datetime import datetime, timezone
+import pandas as pd
+from typing import Dict, Iterable, Optional
+
+# Ensure the project root is in the Python path for module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src import config
+from src.app.singleton import process_singleton
+from src.preprocessing.time_features import HOUR_S, to_epoch_seconds
+
+DAY_S = 24 * HOUR_S
+ROLLUP_BUCKETS = {'hourly': HOUR_S, 'daily': DAY_S}
+
+_COLS = config.TARGET_COLS
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS readings (
+    device_id TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    {", ".join(f"{col} REAL" for col in _COLS)},
+    received_at REAL NOT NULL,
+    PRIMARY KEY (device_id, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS devices (
+    device_id TEXT PRIMARY KEY,
+    lat REAL,
+    lon REAL,
+    first_ts INTEGER,
+    last_ts INTEGER,
+    last_seen REAL
+);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS rollup_{name} (
+    device_id TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    {", ".join(f"{col}_mean REAL" for col in _COLS)},
+    temperature_min REAL,
+    temperature_max REAL,
+    wind_speed_max REAL,
+    precipitation_sum REAL,
+    PRIMARY KEY (device_id, bucket)
+) WITHOUT ROWID;
+""" for name in ROLLUP_BUCKETS)
+
+
+def _epoch_seconds(timestamp) -> Optional[int]:
+    """ISO-8601 device timestamp ('2026-02-02T19:05:56Z') or epoch seconds -> int epoch seconds (naive = UTC).
+
+    Returns None for a missing or malformed timestamp (the reading is skipped).
+    """
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, (int, float)):
+        # NaN / inf / out of the SQLite integer range are malformed as well
+        return int(timestamp) if math.isfinite(timestamp) and abs(timestamp) < 2 ** 62 else None
+    try:
+        parsed = datetime.fromisoformat(str(timestamp))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _value(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value
+
+
+def parse_payload(payload: Dict) -> Optional[Dict]:
+    """
+    Normalises a device message: {'deviceId', 'lat', 'lon', 'history': [...]} (flat or under 'body').
+
+    Plain Python on purpose: building a DataFrame per message cost ~20x the SQLite insert.
+
+    Returns:
+        dict: {'device_id', 'lat', 'lon', 'rows': [(ts, *TARGET_COLS), ...]}, or None if the
+            payload has no history. Readings that are not objects or have no valid timestamp
+            are skipped.
+    """
+    if not isinstance(payload, dict):
+        return None
+    if isinstance(payload.get("body"), dict) and "history" in payload["body"]:
+        payload = payload["body"]
+    history = payload.get("history")
+    if not history or not isinstance(history, list):
+        return None
+
+    rows = []
+    for reading in history:
+        if not isinstance(reading, dict):
+            continue
+        ts = _epoch_seconds(reading.get("timestamp"))
+        if ts is not None:
+            rows.append((ts, *[_value(reading.get(col)) for col in _COLS]))
+    return {
+        "device_id": str(payload.get("deviceId", "Unknown")),
+        "lat": _value(payload.get("lat")),
+        "lon": _value(payload.get("lon")),
+        "rows": rows,
+    }
+
+
+class TelemetryStore:
+    """
+    Embedded time-series store of the ESP32 readings.
+
+    Every call opens its own connection (WAL), so the store can be shared by threads
+    and by the listener / dashboard / training processes.
+
+    Attributes:
+        db_path (str): SQLite database file.
+    """
+
+    def __init__(self, db_path: str = config.TELEMETRY_DB_PATH):
+        self.db_path = db_path
+        self._last_retention = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        # WAL + NORMAL: durable at checkpoints, no fsync per transaction
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def ingest(self, payloads) -> int:
+        """
+        Appends one payload or a list of payloads in a single transaction.
+
+        Args:
+            payloads: Device message dict(s) (see `parse_payload`).
+
+        Returns:
+            int: Number of new readings (overlapping history rows are deduplicated).
+        """
+        if isinstance(payloads, dict):
+            payloads = [payloads]
+        return self.ingest_parsed([parse_payload(p) for p in payloads])
+
+    def ingest_parsed(self, batches) -> int:
+        """`ingest` for messages already normalised by `parse_payload` (None entries are ignored)."""
+        batches = [b for b in batches if b is not None and b["rows"]]
+        if not batches:
+            return 0
+
+        placeholders = ", ".join("?" for _ in range(len(_COLS) + 3))
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Taken inside the write lock: last_seen grows in commit order (incremental readers
+            # polling `last_seen > watermark` never miss a device)
+            now = time.time()
+            before = conn.total_changes
+            conn.executemany(f"INSERT OR IGNORE INTO readings VALUES ({placeholders})",
+                             [(b["device_id"], *row, now) for b in batches for row in b["rows"]])
+            inserted = conn.total_changes - before
+
+            # One device update / rollup refresh per device and batch (not per message)
+            devices = {}
+            for b in batches:
+                first_ts = min(row[0] for row in b["rows"])
+                last_ts = max(row[0] for row in b["rows"])
+                lat, lon, lo, hi = devices.get(b["device_id"], (None, None, first_ts, last_ts))
+                devices[b["device_id"]] = (b["lat"] if b["lat"] is not None else lat,
+                                           b["lon"] if b["lon"] is not None else lon,
+                                           min(lo, first_ts), max(hi, last_ts))
+            for device_id, (lat, lon, first_ts, last_ts) in devices.items():
+                conn.execute(
+                    "INSERT INTO devices (device_id, lat, lon, first_ts, last_ts, last_seen) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(device_id) DO UPDATE SET lat = COALESCE(excluded.lat, lat), "
+                    "lon = COALESCE(excluded.lon, lon), first_ts = MIN(first_ts, excluded.first_ts), "
+                    "last_ts = MAX(last_ts, excluded.last_ts), last_seen = excluded.last_seen",
+                    (device_id, lat, lon, first_ts, last_ts, now)
+                )
+                for name, width in ROLLUP_BUCKETS.items():
+                    self._refresh_rollup(conn, name, width, device_id, first_ts, last_ts)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        if now - self._last_retention >= config.TELEMETRY_RETENTION_INTERVAL_S:
+            self.apply_retention()
+        return inserted
+
+    @staticmethod
+    def _refresh_rollup(conn: sqlite3.Connection, name: str, width: int, device_id: str,
+                        first_ts: int, last_ts: int) -> None:
+        """Recomputes the rollup buckets overlapping [first_ts, last_ts] from the raw readings."""
+        start = first_ts - first_ts % width
+        end = last_ts - last_ts % width + width
+        means = ", ".join(f"AVG({col})" for col in _COLS)
+        conn.execute(
+            f"INSERT OR REPLACE INTO rollup_{name} "
+            f"SELECT device_id, ts - ts % {width}, COUNT(*), {means}, MIN(temperature), MAX(temperature), "
+            f"MAX(wind_speed), SUM(precipitation) "
+            f"FROM readings WHERE device_id = ? AND ts >= ? AND ts < ? GROUP BY ts - ts % {width}",
+            (device_id, start, end)
+        )
+
+    def apply_retention(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Drops expired raw readings and hourly rollups. Returns the deleted row counts."""
+        now = time.time() if now is None else now
+        raw_cutoff = int(now - config.TELEMETRY_RAW_RETENTION_DAYS * DAY_S)
+        hourly_cutoff = int(now - config.TELEMETRY_HOURLY_RETENTION_DAYS * DAY_S)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = {
+                "readings": conn.execute("DELETE FROM readings WHERE ts < ?", (raw_cutoff,)).rowcount,
+                "rollup_hourly": conn.execute("DELETE FROM rollup_hourly WHERE bucket < ?", (hourly_cutoff,)).rowcount,
+            }
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        self._last_retention = now
+        return deleted
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def _query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _bounds(start, end):
+        """Inclusive epoch-second bounds of a range (None = open, naive timestamps are UTC)."""
+        lo = int(to_epoch_seconds(pd.Timestamp(start))[0]) if start is not None else -2 ** 62
+        hi = int(to_epoch_seconds(pd.Timestamp(end))[0]) if end is not None else 2 ** 62
+        return lo, hi
+
+    def devices(self) -> pd.DataFrame:
+        """Known devices with position, covered range and last contact, most recent first."""
+        df = self._query("SELECT * FROM devices ORDER BY last_seen DESC")
+        for col in ('first_ts', 'last_ts'):
+            df[col] = pd.to_datetime(df[col], unit='s', utc=True)
+        df['last_seen'] = pd.to_datetime(df['last_seen'], unit='s', utc=True)
+        return df
+
+    def devices_seen_after(self, seen_after: float) -> pd.DataFrame:
+        """Devices heard after `seen_after` (epoch seconds): device_id, lat, lon, last_seen (epoch seconds)."""
+        return self._query("SELECT device_id, lat, lon, last_seen FROM devices WHERE last_seen > ?",
+                           (float(seen_after),))
+
+    def recent_readings(self, seen_after: float, hours: int) -> pd.DataFrame:
+        """
+        Readings stored after `seen_after`, within `hours` of each device's newest reading
+        (one query for the whole fleet; incremental readers pass their previous watermark).
+
+        Args:
+            seen_after (float): Epoch seconds watermark on `devices.last_seen` / `received_at`.
+            hours (int): Per device, only readings within this many hours of its newest one.
+
+        Returns:
+            pd.DataFrame: device_id, ts (int epoch s) and TARGET_COLS, ordered by device and time.
+        """
+        return self._query(
+            f"SELECT r.device_id, r.ts, {', '.join('r.' + col for col in _COLS)} FROM devices d "
+            f"JOIN readings r ON r.device_id = d.device_id AND r.ts > d.last_ts - ? "
+            f"WHERE d.last_seen > ? AND r.received_at > ? ORDER BY r.device_id, r.ts",
+            (int(hours) * HOUR_S, float(seen_after), float(seen_after))
+        )
+
+    def readings(self, device_id: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Raw readings of a device in [start, end] (inclusive, UTC unless tz-aware), oldest first.
+
+        Returns:
+            pd.DataFrame: 'timestamp' (UTC) + TARGET_COLS.
+        """
+        lo, hi = self._bounds(start, end)
+        df = self._query(f"SELECT ts, {', '.join(_COLS)} FROM readings "
+                         f"WHERE device_id = ? AND ts BETWEEN ? AND ? ORDER BY ts", (device_id, lo, hi))
+        df.insert(0, 'timestamp', pd.to_datetime(df.pop('ts'), unit='s', utc=True))
+        return df
+
+    def latest(self, device_id: str, n: int = config.SEQ_LENGTH) -> pd.DataFrame:
+        """The `n` most recent readings of a device, oldest first."""
+        df = self._query(f"SELECT ts, {', '.join(_COLS)} FROM readings WHERE device_id = ? "
+                         f"ORDER BY ts DESC LIMIT ?", (device_id, int(n)))
+        df = df.iloc[::-1].reset_index(drop=True)
+        df.insert(0, 'timestamp', pd.to_datetime(df.pop('ts'), unit='s', utc=True))
+        return df
+
+    def rollups(self, device_id: str, freq: str = 'hourly', start=None, end=None) -> pd.DataFrame:
+        """Hourly or daily aggregates of a device in [start, end], oldest first ('timestamp' = bucket start)."""
+        if freq not in ROLLUP_BUCKETS:
+            raise ValueError(f"Unknown rollup '{freq}'. Expected one of {tuple(ROLLUP_BUCKETS)}.")
+        lo, hi = self._bounds(start, end)
+        df = self._query(f"SELECT * FROM rollup_{freq} WHERE device_id = ? AND bucket BETWEEN ? AND ? "
+                         f"ORDER BY bucket", (device_id, lo, hi))
+        df.insert(0, 'timestamp', pd.to_datetime(df.pop('bucket'), unit='s', utc=True))
+        return df.drop(columns='device_id')
+
+    def history_frame(self, device_id: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Hourly training table of a device ('timestamp' + TARGET_COLS, one row per hour): the hourly
+        means, in the layout of `fetch_open_meteo_history` (accepted by `train_adaptive_model(history=...)`).
+        """
+        df = self.rollups(device_id, 'hourly', start, end)
+        df = df.rename(columns={f"{col}_mean": col for col in _COLS})
+        df['precipitation'] = df.pop('precipitation_sum')
+        return df[['timestamp'] + _COLS]
+
+    def snapshot(self, device_id: Optional[str] = None, n: int = config.SEQ_LENGTH) -> Optional[Dict]:
+        """
+        Latest state of a device (default: the last one heard) in the layout of the legacy
+        `latest_telemetry.json` ('deviceId', 'lat', 'lon', '_local_saved_at', 'history').
+        """
+        devices = self.devices()
+        if device_id is not None:
+            devices = devices[devices['device_id'] == device_id]
+        if devices.empty:
+            return None
+        device = devices.iloc[0]
+        history = self.latest(device['device_id'], n)
+        history['timestamp'] = history['timestamp'].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+        return {
+            "deviceId": device['device_id'],
+            "lat": device['lat'],
+            "lon": device['lon'],
+            "_local_saved_at": datetime.fromtimestamp(device['last_seen'].timestamp()).strftime("%Y-%m-%d %H:%M:%S"),
+            "_last_seen": float(device['last_seen'].timestamp()),
+            "history": history.to_dict('records'),
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Row counts per table."""
+        conn = self._connect()
+        try:
+            return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ('devices', 'readings', 'rollup_hourly', 'rollup_daily')}
+        finally:
+            conn.close()
+
+
+@process_singleton
+def get_telemetry_store() -> TelemetryStore:
+    """Process-wide telemetry store."""
+    return TelemetryStore()
+
+
+def import_json_files(paths: Iterable[str], store: Optional[TelemetryStore] = None) -> int:
+    """Backfills the store from saved device payloads (e.g., the legacy latest_telemetry.json)."""
+    store = store or TelemetryStore()
+    payloads = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            payloads.append(json.load(f))
+    return store.ingest(payloads)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SIA-Meteo telemetry store")
+    parser.add_argument('--db', default=config.TELEMETRY_DB_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_cmd = commands.add_parser('import', help="Backfill from saved JSON payloads.")
+    import_cmd.add_argument('files', nargs='+')
+    commands.add_parser('stats', help="Row counts and devices.")
+    commands.add_parser('retention', help="Apply the retention policy now.")
+    args = parser.parse_args()
+
+    telemetry = TelemetryStore(args.db)
+    if args.command == 'import':
+        print(f"Imported {import_json_files(args.files, telemetry)} new readings.")
+    elif args.command == 'retention':
+        print(f"Deleted: {telemetry.apply_retention()}")
+    else:
+        print(telemetry.stats())
+        print(telemetry.devices().to_string(index=False))
@@ -0,0 +1,501 @@
+# src/app/training_jobs.py
+"""
+Background Job Queue for Adaptive Training.
+
+Training a location model inside the Streamlit script run blocks the session, loads
+TensorFlow graphs into the dashboard process and lets two sessions train the same
+location into the same folder at once. This module moves training out of the request:
+
+1.  **Persistent Queue:** Jobs live in a SQLite table (config.TRAINING_JOBS_DB_PATH, WAL mode),
+    so they survive dashboard restarts and are shared by every session and process.
+2.  **Deduplication:** At most one queued/running job per location (partial unique index):
+    submitting a location that is already being trained returns the existing job.
+3.  **Concurrency Limit:** A job is only claimed while fewer than config.TRAINING_MAX_CONCURRENT_JOBS
+    jobs are running (checked inside the claiming transaction, so it holds across workers).
+4.  **Process Isolation:** The worker runs each job in a fresh 'spawn' process (TensorFlow never
+    enters the dashboard, and its memory is returned when the job ends).
+5.  **Atomic Swap-In:** Artifacts are written to a staging folder next to the target and moved
+    into place only after training succeeded, so readers never see a half-written model.
+6.  **Progress & Recovery:** Jobs report progress to the queue (polled by the dashboard); running
+    jobs are heartbeated by the worker and re-queued if their worker disappears.
+
+Usage:
+    python -m src.app.training_jobs worker [--idle-exit 300]
+    python -m src.app.training_jobs submit 45.64 25.59 [--mode scratch]
+    python -m src.app.training_jobs status
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+import pandas as pd
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Ensure the project root is in the Python path for module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src import config
+from src.app.model_registry import register_model
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    location TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS one_active_job_per_location
+    ON jobs(location) WHERE status IN ('{QUEUED}', '{RUNNING}');
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs(status, id);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+
+def location_key(lat: float, lon: float) -> str:
+    """Folder / deduplication key of a location (same '<lat>_<lon>' naming as the model folders)."""
+    return f"{lat}_{lon}"
+
+
+def location_model_dir(lat: float, lon: float) -> str:
+    """Folder holding the adaptive model artifacts of a location."""
+    return os.path.join(config.ADAPTIVE_MODELS_DIR, location_key(lat, lon))
+
+
+def adaptive_history_range(mode: str) -> Tuple[str, str]:
+    """Download range ('YYYY-MM-DD', inclusive) of the local history used by a training mode."""
+    if mode == 'finetune':
+        span = pd.DateOffset(days=config.ADAPTIVE_FINETUNE_DAYS)
+    else:
+        span = pd.DateOffset(years=config.ADAPTIVE_HISTORY_YEARS)
+    now = datetime.now()
+    return (now - span).strftime("%Y-%m-%d"), now.strftime("%Y-%m-%d")
+
+
+def swap_directory(new_dir: str, final_dir: str) -> None:
+    """
+    Moves a complete artifact folder into place.
+
+    Both folders live in the same parent, so the swap is two renames: the previous model stays
+    complete until the new one is in place and readers never observe a partially written folder.
+    """
+    parent, name = os.path.split(final_dir)
+    backup_dir = None
+    if os.path.exists(final_dir):
+        backup_dir = os.path.join(parent, f".replaced_{name}_{os.getpid()}")
+        os.replace(final_dir, backup_dir)
+    try:
+        os.replace(new_dir, final_dir)
+    except OSError:
+        if backup_dir is not None:
+            os.replace(backup_dir, final_dir)
+        raise
+    if backup_dir is not None:
+        shutil.rmtree(backup_dir, ignore_errors=True)
+
+
+class TrainingJobQueue:
+    """
+    Persistent, process-safe queue of adaptive training jobs (SQLite).
+
+    Every call opens its own short-lived connection, so one instance can be shared by
+    Streamlit threads and the worker can live in another process.
+
+    Attributes:
+        db_path (str): SQLite database file.
+        max_concurrent (int): Maximum number of jobs in the 'running' state.
+        stale_after_s (float): Heartbeat age after which a running job is considered orphaned.
+    """
+
+    def __init__(
+            self,
+            db_path: str = config.TRAINING_JOBS_DB_PATH,
+            max_concurrent: int = config.TRAINING_MAX_CONCURRENT_JOBS,
+            stale_after_s: float = config.TRAINING_JOB_STALE_S
+    ):
+        self.db_path = db_path
+        self.max_concurrent = max(int(max_concurrent), 1)
+        self.stale_after_s = stale_after_s
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            # WAL: the dashboard keeps reading while a training process writes its progress
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: multi-statement updates use explicit BEGIN IMMEDIATE transactions
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+
+    def _fetch(self, sql: str, params: tuple = ()) -> List[Dict]:
+        conn = self._connect()
+        try:
+            return [self._to_dict(row) for row in conn.execute(sql, params).fetchall()]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        if job.get('result'):
+            job['result'] = json.loads(job['result'])
+        return job
+
+    # ------------------------------------------------------------------
+    # Producer side (dashboard / CLI)
+    # ------------------------------------------------------------------
+    def submit(self, lat: float, lon: float, mode: Optional[str] = None) -> Tuple[int, bool]:
+        """
+        Queues a training job unless the location already has an active one.
+
+        Returns:
+            tuple: (job id, True if a new job was created / False if an active job was reused).
+        """
+        mode = mode or config.ADAPTIVE_TRAINING_MODE
+        if mode not in config.ADAPTIVE_TRAINING_MODES:
+            raise ValueError(f"Unknown adaptive training mode '{mode}'. Expected one of {config.ADAPTIVE_TRAINING_MODES}.")
+
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO jobs (location, lat, lon, mode, status, message, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (location_key(lat, lon), float(lat), float(lon), mode, QUEUED, "Queued", time.time())
+            )
+            return int(cursor.lastrowid), True
+        except sqlite3.IntegrityError:
+            # The partial unique index rejected a second active job for this location
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE location = ? AND status IN ('{QUEUED}', '{RUNNING}')",
+                (location_key(lat, lon),)
+            ).fetchone()
+            if row is None:  # Finished between the insert and the lookup
+                return self.submit(lat, lon, mode)
+            return int(row['id']), False
+        finally:
+            conn.close()
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """Job record as a dict (None if unknown)."""
+        rows = self._fetch("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def latest_job(self, lat: float, lon: float) -> Optional[Dict]:
+        """Most recent job of a location, whatever its state."""
+        rows = self._fetch("SELECT * FROM jobs WHERE location = ? ORDER BY id DESC LIMIT 1", (location_key(lat, lon),))
+        return rows[0] if rows else None
+
+    def jobs(self, limit: int = 20) -> List[Dict]:
+        """Most recent jobs, newest first."""
+        return self._fetch("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+
+    # ------------------------------------------------------------------
+    # Consumer side (worker / training process)
+    # ------------------------------------------------------------------
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """
+        Atomically moves the oldest queued job to 'running' if the concurrency limit allows it.
+
+        Orphaned running jobs (no heartbeat for `stale_after_s`) are re-queued first.
+
+        Returns:
+            dict: The claimed job, or None if nothing can be started now.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE takes the write lock up front: the count and the claim are atomic
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, worker = NULL WHERE status = ? AND heartbeat_at < ?",
+                (QUEUED, "Re-queued (worker lost)", RUNNING, now - self.stale_after_s)
+            )
+            running = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (RUNNING,)).fetchone()[0]
+            row = None
+            if running < self.max_concurrent:
+                row = conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, progress = 0, message = ?, "
+                    "started_at = ?, heartbeat_at = ? WHERE id = ?",
+                    (RUNNING, worker_id, "Starting...", now, now, row['id'])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(row['id']) if row is not None else None
+
+    def heartbeat(self, job_id: int) -> None:
+        """Marks a running job as alive."""
+        self._execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ?", (time.time(), job_id, RUNNING))
+
+    def update_progress(self, job_id: int, message: str, progress: float) -> None:
+        """Progress report of a running job (also a heartbeat)."""
+        self._execute(
+            "UPDATE jobs SET message = ?, progress = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+            (message, float(progress), time.time(), job_id, RUNNING)
+        )
+
+    def finish(self, job_id: int, result: Dict) -> None:
+        """Marks a job as done with its training metrics."""
+        self._execute(
+            "UPDATE jobs SET status = ?, progress = 1, message = ?, result = ?, finished_at = ? WHERE id = ?",
+            (DONE, "Process Complete!", json.dumps(result), time.time(), job_id)
+        )
+
+    def fail(self, job_id: int, error: str) -> None:
+        """Marks a job as failed."""
+        self._execute(
+            "UPDATE jobs SET status = ?, message = ?, error = ?, finished_at = ? WHERE id = ?",
+            (FAILED, "Failed", error, time.time(), job_id)
+        )
+
+    def requeue(self, job_id: int) -> None:
+        """Puts an interrupted running job back into the queue."""
+        self._execute("UPDATE jobs SET status = ?, message = ?, worker = NULL WHERE id = ? AND status = ?",
+                      (QUEUED, "Re-queued (worker stopped)", job_id, RUNNING))
+
+    # ------------------------------------------------------------------
+    # Worker liveness
+    # ------------------------------------------------------------------
+    def touch_worker(self, worker_id: str) -> None:
+        """Registers / heartbeats a worker process."""
+        self._execute("INSERT OR REPLACE INTO workers (id, pid, heartbeat_at) VALUES (?, ?, ?)",
+                      (worker_id, os.getpid(), time.time()))
+
+    def remove_worker(self, worker_id: str) -> None:
+        self._execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def worker_alive(self) -> bool:
+        """True if some worker heartbeated within `stale_after_s`."""
+        rows = self._fetch("SELECT id FROM workers WHERE heartbeat_at >= ?", (time.time() - self.stale_after_s,))
+        return bool(rows)
+
+
+# =============================================================================
+#  TRAINING PROCESS
+# =============================================================================
+def train_location(
+        lat: float,
+        lon: float,
+        mode: Optional[str] = None,
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+        history: Optional[pd.DataFrame] = None
+) -> Dict:
+    """
+    Trains a location model into a staging folder and swaps it into place on success.
+
+    Imports TensorFlow (via `adaptive_training`), so it is meant for training processes.
+
+    Args:
+        lat, lon (float): Location.
+        mode (str, optional): 'finetune' or 'scratch' (default: config.ADAPTIVE_TRAINING_MODE).
+        progress_callback (func, optional): Progress reports, capped at 95% until the swap.
+        history (pd.DataFrame, optional): Pre-fetched local history (skips the download).
+
+    Returns:
+        dict: Training metrics, or {'error': ...}.
+    """
+    from src.app.adaptive_training import train_adaptive_model
+
+    # Staging folder in the same parent: the final rename never crosses filesystems
+    os.makedirs(config.ADAPTIVE_MODELS_DIR, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=f".staging_{location_key(lat, lon)}_", dir=config.ADAPTIVE_MODELS_DIR)
+
+    def report(message, progress):
+        # 100% is only reported once the artifacts are in place
+        if progress_callback:
+            progress_callback(message, min(progress, 0.95))
+
+    try:
+        result = train_adaptive_model(lat, lon, progress_callback=report, mode=mode,
+                                      model_dir=staging_dir, history=history)
+        if "error" not in result:
+            report("Installing the new model...", 0.97)
+            swap_directory(staging_dir, location_model_dir(lat, lon))
+            register_model(lat, lon, result)
+        return result
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def _run_job(db_path: str, job_id: int) -> None:
+    """Entry point of a training process ('spawn' child, so TensorFlow is only imported here)."""
+    queue = TrainingJobQueue(db_path)
+    job = queue.get(job_id)
+    try:
+        result = train_location(job['lat'], job['lon'], mode=job['mode'],
+                                progress_callback=lambda message, progress: queue.update_progress(job_id, message, progress))
+        if "error" in result:
+            queue.fail(job_id, result["error"])
+        else:
+            queue.finish(job_id, result)
+    except Exception as e:
+        queue.fail(job_id, f"{type(e).__name__}: {e}")
+
+
+def run_worker(
+        db_path: str = config.TRAINING_JOBS_DB_PATH,
+        max_concurrent: int = config.TRAINING_MAX_CONCURRENT_JOBS,
+        poll_s: float = config.TRAINING_JOB_POLL_S,
+        idle_exit_s: Optional[float] = None
+) -> None:
+    """
+    Worker loop: claims queued jobs and runs each one in its own process.
+
+    Args:
+        db_path (str): Queue database.
+        max_concurrent (int): Maximum number of simultaneous trainings.
+        poll_s (float): Queue polling / heartbeat interval.
+        idle_exit_s (float, optional): Exit after this long without queued or running jobs
+            (0 drains the queue and exits; None runs forever).
+    """
+    queue = TrainingJobQueue(db_path, max_concurrent=max_concurrent)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    ctx = multiprocessing.get_context('spawn')
+    children: Dict[int, multiprocessing.Process] = {}
+    idle_since = time.time()
+
+    print(f"[TRAINING WORKER] {worker_id} started (max {queue.max_concurrent} concurrent jobs, db: {db_path})")
+    try:
+        while True:
+            queue.touch_worker(worker_id)
+
+            # 1. Heartbeat live trainings, reap finished ones
+            for job_id, proc in list(children.items()):
+                if proc.is_alive():
+                    queue.heartbeat(job_id)
+                    continue
+                proc.join()
+                del children[job_id]
+                job = queue.get(job_id)
+                if job is not None and job['status'] == RUNNING:
+                    queue.fail(job_id, f"Training process exited with code {proc.exitcode}.")
+                print(f"[TRAINING WORKER] Job {job_id} finished: {job['status'] if job else 'unknown'}")
+
+            # 2. Start queued jobs up to the concurrency limit
+            while len(children) < queue.max_concurrent:
+                job = queue.claim(worker_id)
+                if job is None:
+                    break
+                proc = ctx.Process(target=_run_job, args=(db_path, job['id']), name=f"train-{job['location']}")
+                proc.start()
+                children[job['id']] = proc
+                print(f"[TRAINING WORKER] Job {job['id']} started: {job['location']} ({job['mode']}, pid {proc.pid})")
+
+            # 3. Idle shutdown
+            if children or any(j['status'] == QUEUED for j in queue.jobs(limit=50)):
+                idle_since = time.time()
+            elif idle_exit_s is not None and time.time() - idle_since >= idle_exit_s:
+                break
+
+            time.sleep(poll_s)
+    finally:
+        # Interrupted trainings go back to the queue instead of staying 'running'
+        for job_id, proc in children.items():
+            proc.terminate()
+            proc.join()
+            queue.requeue(job_id)
+        queue.remove_worker(worker_id)
+        print(f"[TRAINING WORKER] {worker_id} stopped.")
+
+
+def ensure_worker_running(db_path: str = config.TRAINING_JOBS_DB_PATH,
+                          idle_exit_s: float = 300.0) -> bool:
+    """
+    Starts a detached worker process unless one is heartbeating already.
+
+    Returns:
+        bool: True if a new worker was launched.
+    """
+    if TrainingJobQueue(db_path).worker_alive():
+        return False
+
+    command = [sys.executable, '-m', 'src.app.training_jobs', '--db', db_path,
+               'worker', '--idle-exit', str(idle_exit_s)]
+    # A new session keeps the worker (and its trainings) alive across dashboard reruns/restarts
+    kwargs = {'start_new_session': True} if os.name != 'nt' else {}
+    subprocess.Popen(command, cwd=config.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs)
+    return True
+
+
+def _format_job(job: Dict) -> str:
+    created = datetime.fromtimestamp(job['created_at']).strftime("%Y-%m-%d %H:%M:%S")
+    line = f"#{job['id']:<4} {job['location']:<22} {job['mode']:<9} {job['status']:<8} " \
+           f"{job['progress'] * 100:5.1f}%  {created}  {job['message'] or ''}"
+    if job['status'] == FAILED:
+        line += f" ({job['error']})"
+    elif job['status'] == DONE and job['result']:
+        line += f" (MAE {job['result'].get('mae', float('nan')):.4f}, {job['result'].get('train_seconds', '?')} s)"
+    return line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SIA-Meteo adaptive training jobs")
+    parser.add_argument('--db', default=config.TRAINING_JOBS_DB_PATH, help="Queue database path.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    worker_cmd = commands.add_parser('worker', help="Run the worker loop.")
+    worker_cmd.add_argument('--max-concurrent', type=int, default=config.TRAINING_MAX_CONCURRENT_JOBS)
+    worker_cmd.add_argument('--poll', type=float, default=config.TRAINING_JOB_POLL_S)
+    worker_cmd.add_argument('--idle-exit', type=float, default=None,
+                            help="Exit after this many idle seconds (0: drain the queue and exit).")
+
+    submit_cmd = commands.add_parser('submit', help="Queue a training job for a location.")
+    submit_cmd.add_argument('lat', type=float)
+    submit_cmd.add_argument('lon', type=float)
+    submit_cmd.add_argument('--mode', choices=config.ADAPTIVE_TRAINING_MODES, default=None)
+
+    status_cmd = commands.add_parser('status', help="List the most recent jobs.")
+    status_cmd.add_argument('--limit', type=int, default=20)
+
+    args = parser.parse_args()
+    if args.command == 'worker':
+        run_worker(args.db, max_concurrent=args.max_concurrent, poll_s=args.poll, idle_exit_s=args.idle_exit)
+    elif args.command == 'submit':
+        new_id, created = TrainingJobQueue(args.db).submit(args.lat, args.lon, args.mode)
+        print(f"Job #{new_id} {'queued' if created else 'already active for this location'}.")
+    else:
+        for queued_job in TrainingJobQueue(args.db).jobs(args.limit):
+            print(_format_job(queued_job))
@@ -0,0 +1,105 @@
+# src/benchmarks/bench_adaptive_training.py
+"""
+Adaptive Training Benchmark: Fine-Tuning vs Training From Scratch.
+
+Trains a location model both ways on the same local history and scores both on the
+same held-out period (the most recent `holdout_days`):
+- 'scratch': Fresh LSTM on every earlier row (up to ADAPTIVE_HISTORY_YEARS), local scaler.
+- 'finetune': Warm start from config.MODEL_PATH on the last ADAPTIVE_FINETUNE_DAYS before
+  the holdout (first LSTM layer frozen unless `--no-freeze`), project scaler.
+
+Reported per mode: wall-clock fit time, epochs run, validation MAE per target (real units).
+
+Data source: By default the offline raw history (data/raw/weather_history_raw.csv). Note
+that this is the location the base model was trained on, which flatters the warm start;
+pass `--lat/--lon` to download the history of another location instead.
+
+Usage:
+    python -m src.benchmarks.bench_adaptive_training [--lat 45.64 --lon 25.59] [--no-freeze]
+"""
+
+import os
+import sys
+import json
+import argparse
+import pandas as pd
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.app.adaptive_training import fit_location_model, location_features
+from src.data_acquisition.data_loader import fetch_open_meteo_history, parse_open_meteo_csv
+
+HOLDOUT_DAYS = 30
+RAW_HISTORY_PATH = os.path.join(config.DATA_DIR, 'raw', 'weather_history_raw.csv')
+
+
+def load_history(lat=None, lon=None) -> pd.DataFrame:
+    """Local hourly history: downloaded for (lat, lon), or the offline raw CSV."""
+    if lat is None or lon is None:
+        return parse_open_meteo_csv(RAW_HISTORY_PATH)
+
+    end = datetime.now()
+    start = end - pd.DateOffset(years=config.ADAPTIVE_HISTORY_YEARS)
+    return fetch_open_meteo_history(lat, lon, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+
+
+def benchmark_adaptive_training(df: pd.DataFrame, holdout_days: int = HOLDOUT_DAYS,
+                                freeze_first_lstm: bool = config.ADAPTIVE_FREEZE_FIRST_LSTM) -> dict:
+    """
+    Trains both adaptive modes on `df` and scores them on its last `holdout_days`.
+
+    Returns:
+        dict: Per-mode metrics from `fit_location_model` plus the table sizes.
+    """
+    data_real = location_features(df)
+    data_real = data_real[-(config.ADAPTIVE_HISTORY_YEARS * 365 * 24):]
+
+    split = len(data_real) - holdout_days * 24
+    context = config.SEQ_LENGTH + config.PREDICT_HORIZON
+    val_real = data_real[split - context:]
+
+    recent = config.ADAPTIVE_FINETUNE_DAYS * 24
+    train_tables = {"scratch": data_real[:split], "finetune": data_real[max(split - recent, 0):split]}
+
+    results = {"holdout_hours": holdout_days * 24}
+    for mode, train_real in train_tables.items():
+        print(f"  -> {mode}: {len(train_real)} training rows...")
+        _, _, metrics = fit_location_model(train_real, val_real, mode=mode, freeze_first_lstm=freeze_first_lstm)
+        results[mode] = {"train_rows": len(train_real), **metrics}
+    return results
+
+
+def print_report(results: dict) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print(f"\nAdaptive training ({results['holdout_hours']} held-out hours, MAE in real units)")
+    print("| Mode | Train rows | Epochs | Fit time (s) | " + " | ".join(config.TARGET_COLS) + " |")
+    print("|------|------------|--------|--------------|" + "|".join("------" for _ in config.TARGET_COLS) + "|")
+    for mode in config.ADAPTIVE_TRAINING_MODES:
+        r = results[mode]
+        label = f"{mode} (frozen LSTM 1)" if r["frozen_first_lstm"] else mode
+        print(f"| {label} | {r['train_rows']} | {r['epochs_run']} | {r['train_seconds']:.1f} | "
+              + " | ".join(f"{r['val_mae_real'][col]:.3f}" for col in config.TARGET_COLS) + " |")
+
+    speedup = results["scratch"]["train_seconds"] / max(results["finetune"]["train_seconds"], 1e-9)
+    print(f"\nFine-tuning is {speedup:.1f}x faster than training from scratch.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Adaptive training benchmark (fine-tune vs scratch)")
+    parser.add_argument('--lat', type=float, default=None)
+    parser.add_argument('--lon', type=float, default=None)
+    parser.add_argument('--holdout-days', type=int, default=HOLDOUT_DAYS)
+    parser.add_argument('--no-freeze', action='store_true', help="Fine-tune every layer.")
+    args = parser.parse_args()
+
+    print(">>> Benchmarking adaptive training (fine-tune vs scratch)...")
+    bench_results = benchmark_adaptive_training(load_history(args.lat, args.lon), args.holdout_days,
+                                                freeze_first_lstm=not args.no_freeze)
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'adaptive_training.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
@@ -0,0 +1,232 @@
+# src/benchmarks/bench_checkpoint_store.py
+"""
+Listener Restart Benchmark (replayed events with and without a durable checkpoint store).
+
+A local fake Event Hub holds LISTENER_REPLAY_HOURS of ESP32 messages over several partitions.
+Its consumer client behaves like `azure.eventhub.aio.EventHubConsumerClient` with respect to
+checkpoints: partitions with a checkpoint in the `checkpoint_store` resume after it, the
+others start at `starting_position`; without a store, checkpoints only live in memory.
+
+Scenarios (the listener stops after STOP_FRACTION of the events, then restarts and drains the hub):
+- 'memory, crash' / 'memory, graceful': Previous listener (no checkpoint store).
+- 'sqlite, crash': `SQLiteCheckpointStore`, process killed during the burst (the queued,
+  not yet stored events and the final checkpoint are lost, so they are replayed).
+- 'sqlite, crash when idle': Killed after the writer caught up, before the final checkpoint
+  (replays at most the events since the last periodic checkpoint).
+- 'sqlite, graceful': `SQLiteCheckpointStore`, clean shutdown (queue drained, final checkpoint).
+
+Replayed = events delivered again after the restart. Every scenario must end with all readings stored.
+
+Usage:
+    python -m src.benchmarks.bench_checkpoint_store
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.app.checkpoint_store import SQLiteCheckpointStore
+from src.app.telemetry_pipeline import TelemetryPipeline, consume
+from src.app.telemetry_store import TelemetryStore
+from src.benchmarks.bench_telemetry_pipeline import make_events
+
+PARTITIONS = 4
+DEVICES = 24
+MESSAGES_PER_DEVICE = 72   # One message every 5 minutes over 6 hours
+STOP_FRACTION = 0.6
+
+
+class FakeHubPartitionContext:
+    """Partition context: checkpoints go to the checkpoint store, or to memory without one."""
+
+    def __init__(self, client, partition_id: str):
+        self._client = client
+        self.partition_id = partition_id
+        self.fully_qualified_namespace = client.fully_qualified_namespace
+        self.eventhub_name = client.eventhub_name
+        self.consumer_group = client.consumer_group
+
+    async def update_checkpoint(self, event) -> None:
+        checkpoint = {
+            "fully_qualified_namespace": self.fully_qualified_namespace, "eventhub_name": self.eventhub_name,
+            "consumer_group": self.consumer_group, "partition_id": self.partition_id,
+            "offset": event.offset, "sequence_number": event.sequence_number,
+        }
+        self._client.checkpoint_writes += 1
+        if self._client.checkpoint_store is None:
+            self._client.memory_checkpoints[self.partition_id] = checkpoint
+        else:
+            await self._client.checkpoint_store.update_checkpoint(checkpoint)
+
+
+class FakeHubClient:
+    """
+    Consumer client of a local fake hub (`partitions`: partition_id -> events with sequence_number,
+    offset and enqueued_time). `stop_after` ends `receive` after that many events in total.
+    """
+
+    fully_qualified_namespace = "fake-hub.servicebus.windows.net"
+    eventhub_name = "esp32-telemetry"
+
+    def __init__(self, partitions: dict, checkpoint_store=None, consumer_group: str = "python_dashboard",
+                 stop_after: int = None):
+        self.partitions = partitions
+        self.checkpoint_store = checkpoint_store
+        self.consumer_group = consumer_group
+        self.stop_after = stop_after
+        self.memory_checkpoints = {}
+        self.delivered = []   # (partition_id, sequence_number)
+        self.checkpoint_writes = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def _start_positions(self, starting_position: datetime) -> dict:
+        checkpoints = self.memory_checkpoints
+        if self.checkpoint_store is not None:
+            owner_id = str(uuid.uuid4())
+            await self.checkpoint_store.claim_ownership([
+                {"fully_qualified_namespace": self.fully_qualified_namespace, "eventhub_name": self.eventhub_name,
+                 "consumer_group": self.consumer_group, "partition_id": pid, "owner_id": owner_id}
+                for pid in self.partitions
+            ])
+            checkpoints = {c["partition_id"]: c for c in await self.checkpoint_store.list_checkpoints(
+                self.fully_qualified_namespace, self.eventhub_name, self.consumer_group)}
+
+        starts = {}
+        for pid, events in self.partitions.items():
+            if pid in checkpoints:
+                starts[pid] = checkpoints[pid]["sequence_number"] + 1
+            else:
+                starts[pid] = next((e.sequence_number for e in events if e.enqueued_time >= starting_position),
+                                   len(events))
+        return starts
+
+    async def receive(self, on_event, starting_position: datetime = None, **kwargs) -> None:
+        starts = await self._start_positions(starting_position)
+        contexts = {pid: FakeHubPartitionContext(self, pid) for pid in self.partitions}
+
+        async def pump(pid):
+            for event in self.partitions[pid][starts[pid]:]:
+                if self.stop_after is not None and len(self.delivered) >= self.stop_after:
+                    return
+                self.delivered.append((pid, event.sequence_number))
+                await on_event(contexts[pid], event)
+                await asyncio.sleep(0)
+        await asyncio.gather(*(pump(pid) for pid in self.partitions))
+
+
+def make_hub() -> dict:
+    """Fake hub content: the benchmark ESP32 messages spread evenly over the replay window."""
+    partitions = make_events(PARTITIONS, DEVICES, MESSAGES_PER_DEVICE)
+    # 10 minutes of margin, so no event leaves the window while the benchmark runs
+    window = timedelta(hours=config.LISTENER_REPLAY_HOURS) - timedelta(minutes=10)
+    start = datetime.now(timezone.utc) - window
+    for events in partitions.values():
+        step = window / len(events)
+        for event in events:
+            event.enqueued_time = start + event.sequence_number * step
+    return partitions
+
+
+async def _run(client: FakeHubClient, pipeline: TelemetryPipeline, mode: str) -> None:
+    starting_position = datetime.now(timezone.utc) - timedelta(hours=config.LISTENER_REPLAY_HOURS)
+    if mode == "graceful":
+        await consume(client, pipeline, starting_position=starting_position)
+        return
+    # Crash: stop receiving and kill the writer (queued events and the final checkpoint are lost)
+    writer = asyncio.create_task(pipeline.run_writer())
+    await client.receive(on_event=pipeline.on_event, starting_position=starting_position)
+    if mode == "crash when idle":
+        await pipeline.queue.join()
+    writer.cancel()
+    try:
+        await writer
+    except asyncio.CancelledError:
+        pass
+
+
+def benchmark_checkpoint_store() -> dict:
+    """
+    Runs every restart scenario on the same fake hub.
+
+    Returns:
+        dict: Per scenario: events delivered before / after the restart, replayed events,
+            restart duration, checkpoint writes and whether all readings were stored.
+    """
+    hub = make_hub()
+    n_events = sum(len(events) for events in hub.values())
+    tmp_dir = tempfile.mkdtemp(prefix="checkpoint_bench_")
+    results = {"events": n_events, "scenarios": {}}
+    try:
+        reference = TelemetryStore(os.path.join(tmp_dir, "reference.sqlite"))
+        reference.ingest([json.loads(e.body) for events in hub.values() for e in events])
+        expected_readings = reference.stats()["readings"]
+
+        for scenario in ("memory, crash", "memory, graceful", "sqlite, crash", "sqlite, crash when idle",
+                         "sqlite, graceful"):
+            backend, mode = scenario.split(", ")
+            folder = os.path.join(tmp_dir, scenario.replace(", ", "_").replace(" ", "_"))
+            os.makedirs(folder)
+            store = TelemetryStore(os.path.join(folder, "telemetry.sqlite"))
+
+            runs = []
+            for stop_after in (int(n_events * STOP_FRACTION), None):
+                # A restart builds a new process state: new pipeline, client and checkpoint store object
+                checkpoint_store = SQLiteCheckpointStore(os.path.join(folder, "checkpoints.sqlite")) \
+                    if backend == "sqlite" else None
+                client = FakeHubClient(hub, checkpoint_store, stop_after=stop_after)
+                pipeline = TelemetryPipeline(store, report_interval_s=None)
+                t0 = time.perf_counter()
+                asyncio.run(_run(client, pipeline, mode if stop_after is not None else "graceful"))
+                runs.append((client, time.perf_counter() - t0))
+
+            (first, _), (second, restart_s) = runs
+            before = set(first.delivered)
+            results["scenarios"][scenario] = {
+                "delivered_before_stop": len(first.delivered),
+                "delivered_after_restart": len(second.delivered),
+                "replayed": sum(1 for item in second.delivered if item in before),
+                "restart_seconds": restart_s,
+                "checkpoint_writes": first.checkpoint_writes + second.checkpoint_writes,
+                "all_readings_stored": store.stats()["readings"] == expected_readings,
+            }
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def print_report(results: dict) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print(f"\nListener restart after {STOP_FRACTION:.0%} of {results['events']} events "
+          f"({config.LISTENER_REPLAY_HOURS} h replay window, checkpoint every {config.LISTENER_CHECKPOINT_EVERY} events)")
+    print("| Scenario | Delivered before stop | Delivered after restart | Replayed | Restart catch-up (s) | "
+          "Checkpoint writes | All readings stored |")
+    print("|----------|-----------------------|-------------------------|----------|----------------------|"
+          "-------------------|---------------------|")
+    for name, r in results["scenarios"].items():
+        print(f"| {name} | {r['delivered_before_stop']} | {r['delivered_after_restart']} | {r['replayed']} | "
+              f"{r['restart_seconds']:.2f} | {r['checkpoint_writes']} | {r['all_readings_stored']} |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking listener restarts...")
+    bench_results = benchmark_checkpoint_store()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'checkpoint_store.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
@@ -0,0 +1,165 @@
+# src/benchmarks/bench_fleet.py
+"""
+ESP32 Fleet Refresh Benchmark (ring-buffer sync + batched per-device forecasting).
+
+For fleets of 1 to 500 stations (temporary telemetry store, FLEET_RING_HOURS of history each):
+
+After every device sent a new hour:
+- 'sync': `DeviceFleet.sync` (one incremental store query for the whole fleet).
+- 'per-device': The previous single-device path repeated for every device (update the
+  streaming state + one forecast call per device).
+- 'batched': State updates + one batched forecast for all devices (must be identical).
+
+Dashboard refreshes through `DeviceFleet.sync` + `DeviceFleet.forecast` (cached forecasts):
+- 'idle': No device reported since the previous refresh.
+- '10% reported': A tenth of the fleet sent a new hour (stations report at staggered minutes).
+
+Usage:
+    python -m src.benchmarks.bench_fleet
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.app.fleet import DeviceFleet
+from src.app.telemetry_store import TelemetryStore
+from src.neural_network.numpy_lstm import NumpyLSTM
+from src.neural_network.stateful import StatefulForecaster
+from src.preprocessing.feature_transform import load_feature_transform
+
+SIZES = (1, 10, 100, 500)
+BOUNDS = {'wind_speed': (0.0, 8.0)}
+
+
+def _payloads(n_devices: int, hours: int, end: pd.Timestamp, rng: np.random.Generator, prefix: str) -> list:
+    stamps = pd.date_range(end=end, periods=hours, freq='h') + pd.Timedelta(seconds=356)
+    day = np.sin(2 * np.pi * (stamps.hour.to_numpy() - 9) / 24)
+    payloads = []
+    for d in range(n_devices):
+        temperature = 10 + 6 * day + rng.normal(0, 0.5, hours)
+        history = [{"timestamp": ts.strftime("%Y-%m-%dT%H:%M:%SZ"), "temperature": float(t),
+                    "humidity": float(70 - 15 * s), "pressure": 1013.0, "wind_speed": 3.0, "precipitation": 0.0}
+                   for ts, t, s in zip(stamps, temperature, day)]
+        payloads.append({"deviceId": f"{prefix}-{d:03d}", "lat": 44.4 + d * 1e-3, "lon": 26.1, "history": history})
+    return payloads
+
+
+def benchmark_fleet(sizes=SIZES) -> dict:
+    """
+    Benchmarks one fleet refresh per fleet size.
+
+    Returns:
+        dict: Per size: sync / per-device / batched milliseconds and the forecast agreement.
+    """
+    model = NumpyLSTM.load(config.NUMPY_MODEL_PATH)
+    transform = load_feature_transform()
+    tmp_dir = tempfile.mkdtemp(prefix="fleet_bench_")
+    rng = np.random.default_rng(0)
+    end = pd.Timestamp.now(tz='UTC').floor('h')
+    results = {}
+    state_dir = config.STREAM_STATE_DIR
+    config.STREAM_STATE_DIR = os.path.join(tmp_dir, "stream_state")
+    try:
+        for n in sizes:
+            prefix = f"esp32-{n}"
+            store = TelemetryStore(os.path.join(tmp_dir, f"fleet_{n}.sqlite"))
+            store.ingest(_payloads(n, config.FLEET_RING_HOURS, end - pd.Timedelta(hours=1), rng, prefix))
+            fleet = DeviceFleet(store)
+            fleet.sync()
+            devices = fleet.active()
+
+            # Warm streaming states on two identical forecasters (one per method)
+            forecasters = [StatefulForecaster(model, transform, bounds=BOUNDS) for _ in range(2)]
+            for forecaster in forecasters:
+                for d in devices:
+                    ts, values = fleet.devices[d].ring.window()
+                    forecaster.update(d, values, ts)
+
+            # New hour from every device
+            store.ingest(_payloads(n, 24, end, rng, prefix))
+            t0 = time.perf_counter()
+            fleet.sync()
+            sync_ms = (time.perf_counter() - t0) * 1000
+
+            # Previous path: one update + one forecast call per device
+            loop_fc = forecasters[0]
+            t0 = time.perf_counter()
+            per_device = []
+            for d in devices:
+                ts, values = fleet.devices[d].ring.window()
+                loop_fc.update(d, values, ts)
+                per_device.append(loop_fc.forecast([d])[0][0])
+            loop_ms = (time.perf_counter() - t0) * 1000
+
+            batch_fc = forecasters[1]
+            route = lambda info: ("generic", model, transform)
+            t0 = time.perf_counter()
+            for d in devices:
+                ts, values = fleet.devices[d].ring.window()
+                batch_fc.update(d, values, ts)
+            batched, _ = batch_fc.forecast(devices)
+            batch_ms = (time.perf_counter() - t0) * 1000
+
+            # Dashboard refreshes (process-wide forecaster, cached forecasts)
+            def refresh():
+                t0 = time.perf_counter()
+                fleet.sync()
+                forecasts = fleet.forecast(fleet.active(), route, bounds=BOUNDS)
+                return (time.perf_counter() - t0) * 1000, forecasts
+
+            refresh()
+            idle_ms, _ = refresh()
+            store.ingest(_payloads(max(n // 10, 1), 24, end + pd.Timedelta(hours=1), rng, prefix))
+            partial_ms, fleet_results = refresh()
+
+            results[str(n)] = {
+                "sync_ms": sync_ms,
+                "per_device_ms": loop_ms,
+                "batched_ms": batch_ms,
+                "refresh_idle_ms": idle_ms,
+                "refresh_10pct_ms": partial_ms,
+                "max_abs_diff": float(np.max(np.abs(np.stack(per_device) - batched))),
+                "forecast_devices": sum(r is not None for r in fleet_results.values()),
+            }
+    finally:
+        config.STREAM_STATE_DIR = state_dir
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def print_report(results: dict) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print("\nFleet refresh after a new hour from every device")
+    print("| Devices | Sync (ms) | Per-device forecasts (ms) | Batched forecast (ms) | Batched per device (ms) | "
+          "Speedup | Max abs diff |")
+    print("|---------|-----------|---------------------------|-----------------------|-------------------------|"
+          "---------|--------------|")
+    for n, r in results.items():
+        print(f"| {n} | {r['sync_ms']:.1f} | {r['per_device_ms']:.1f} | {r['batched_ms']:.1f} | "
+              f"{r['batched_ms'] / int(n):.2f} | {r['per_device_ms'] / r['batched_ms']:.1f}x | {r['max_abs_diff']:.1e} |")
+
+    print("\nDashboard refresh (sync + cached fleet forecast)")
+    print("| Devices | No new data (ms) | 10% reported (ms) | Devices forecast |")
+    print("|---------|------------------|-------------------|------------------|")
+    for n, r in results.items():
+        print(f"| {n} | {r['refresh_idle_ms']:.1f} | {r['refresh_10pct_ms']:.1f} | {r['forecast_devices']} |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking the ESP32 fleet refresh...")
+    bench_results = benchmark_fleet()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'fleet.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
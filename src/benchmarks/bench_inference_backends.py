@@ -0,0 +1,193 @@
+# src/benchmarks/bench_inference_backends.py
+"""
+Inference Backend Benchmark (Keras vs NumPy).
+
+Compares what one dashboard process pays for each inference backend:
+- 'keras': import TensorFlow, deserialise the `.keras` archive (compile=False, i.e. a
+  lower bound of the dashboard's load), forecast through the compiled RolloutEngine.
+- 'numpy': load the exported `.npz` weights, forecast through NumpyRolloutEngine
+  (TensorFlow is never imported).
+
+Every backend runs in a fresh Python subprocess, so the cold-start numbers are real:
+- Startup: import time, model load time, first 24h forecast (includes graph tracing).
+- Memory: RSS after the first forecast and peak RSS (VmHWM), from /proc/self/status.
+- Latency: Median / p95 of the steady-state 24h forecast (single origin).
+
+Parity: Max abs difference between both backends on one-step predictions (scaled) and on
+the 24h forecast (real units), measured in the parent process.
+
+Usage:
+    python -m src.benchmarks.bench_inference_backends
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+import numpy as np
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+
+REPEATS = 50
+PARITY_WINDOWS = 256
+START_TIME = datetime(2025, 3, 1, 12)
+DASHBOARD_BOUNDS = {'wind_speed': (0.0, 8.0)}
+
+
+def _memory_mb() -> dict:
+    """Current and peak resident set size of this process (Linux /proc), in MB."""
+    values = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    key, amount = line.split(':')
+                    values[key] = int(amount.split()[0]) / 1024
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        values = {'VmRSS': peak, 'VmHWM': peak}
+    return {"rss_mb": values.get('VmRSS', 0.0), "peak_rss_mb": values.get('VmHWM', 0.0)}
+
+
+def _sample_window(transform, seed: int = 0) -> np.ndarray:
+    """Random scaled (SEQ_LENGTH, 9) window with consistent time columns, ending at START_TIME."""
+    from src.preprocessing.time_features import to_epoch_seconds
+
+    rng = np.random.default_rng(seed)
+    window = rng.uniform(0.1, 0.9, (config.SEQ_LENGTH, len(config.FEATURE_COLS)))
+    times = [START_TIME - timedelta(hours=config.SEQ_LENGTH - 1 - i) for i in range(config.SEQ_LENGTH)]
+    window[:, transform.time_index] = transform.encode_time(to_epoch_seconds(times))
+    return window
+
+
+def _worker(backend: str, repeats: int) -> dict:
+    """Runs inside the subprocess: cold start + steady-state latency of one backend."""
+    baseline = _memory_mb()
+    t0 = time.perf_counter()
+    if backend == 'keras':
+        import tensorflow as tf
+        from src.neural_network.rollout import get_rollout_engine as get_engine
+    else:
+        from src.neural_network.numpy_lstm import load_numpy_model, get_numpy_rollout_engine as get_engine
+    from src.preprocessing.feature_transform import load_feature_transform
+    t_import = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if backend == 'keras':
+        model = tf.keras.models.load_model(config.MODEL_PATH, compile=False)
+    else:
+        model = load_numpy_model()
+    transform = load_feature_transform()
+    t_load = time.perf_counter() - t0
+
+    window = _sample_window(transform)
+    engine = get_engine(model, transform, bounds=DASHBOARD_BOUNDS)
+    t0 = time.perf_counter()
+    engine.rollout(window, START_TIME)
+    t_first = time.perf_counter() - t0
+    memory = _memory_mb()
+
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        engine.rollout(window, START_TIME)
+        samples.append(time.perf_counter() - t0)
+    samples = np.array(samples) * 1000
+
+    return {
+        "import_s": t_import,
+        "load_s": t_load,
+        "first_forecast_s": t_first,
+        "startup_s": t_import + t_load + t_first,
+        "baseline_rss_mb": baseline["rss_mb"],
+        "rss_mb": memory["rss_mb"],
+        "peak_rss_mb": memory["peak_rss_mb"],
+        "median_ms": float(np.median(samples)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "tensorflow_imported": 'tensorflow' in sys.modules,
+    }
+
+
+def _run_worker(backend: str, repeats: int) -> dict:
+    """Launches a fresh interpreter for one backend and parses its JSON report."""
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='2')
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-m', 'src.benchmarks.bench_inference_backends', '--worker', backend, str(repeats)],
+        cwd=config.BASE_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_wall_s"] = time.perf_counter() - t0
+    return result
+
+
+def benchmark_parity() -> dict:
+    """Max abs difference Keras vs NumPy (one-step scaled outputs and 24h real-unit forecasts)."""
+    import tensorflow as tf
+    from src.neural_network.numpy_lstm import load_numpy_model, NumpyRolloutEngine
+    from src.neural_network.rollout import RolloutEngine
+    from src.preprocessing.feature_transform import load_feature_transform
+
+    keras_model = tf.keras.models.load_model(config.MODEL_PATH, compile=False)
+    numpy_model = load_numpy_model()
+    transform = load_feature_transform()
+
+    windows = np.random.default_rng(1).uniform(-0.2, 1.2, (PARITY_WINDOWS,) + keras_model.input_shape[1:])
+    one_step = np.abs(keras_model.predict(windows, verbose=0) - numpy_model.predict(windows, batch_size=64)).max()
+
+    window = _sample_window(transform)
+    keras_forecast = RolloutEngine(keras_model, transform, bounds=DASHBOARD_BOUNDS).rollout(window, START_TIME)
+    numpy_forecast = NumpyRolloutEngine(numpy_model, transform, bounds=DASHBOARD_BOUNDS).rollout(window, START_TIME)
+    return {
+        "one_step_max_abs_error": float(one_step),
+        "forecast_24h_max_abs_error": float(np.abs(keras_forecast - numpy_forecast).max()),
+    }
+
+
+def benchmark_backends(repeats: int = REPEATS) -> dict:
+    """
+    Benchmarks both backends in isolated processes plus their numerical parity.
+
+    Returns:
+        dict: Per-backend startup / memory / latency statistics and the parity errors.
+    """
+    results = {backend: _run_worker(backend, repeats) for backend in config.INFERENCE_BACKENDS}
+    results["parity"] = benchmark_parity()
+    return results
+
+
+def print_report(results: dict) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print("\n| Backend | Import (s) | Load (s) | 1st forecast (s) | Startup (s) | RSS (MB) | Peak RSS (MB) "
+          "| Median (ms) | p95 (ms) | TF imported |")
+    print("|---------|------------|----------|------------------|-------------|----------|---------------"
+          "|-------------|----------|-------------|")
+    for backend in config.INFERENCE_BACKENDS:
+        r = results[backend]
+        print(f"| {backend} | {r['import_s']:.2f} | {r['load_s']:.2f} | {r['first_forecast_s']:.2f} | "
+              f"{r['startup_s']:.2f} | {r['rss_mb']:.0f} | {r['peak_rss_mb']:.0f} | {r['median_ms']:.2f} | "
+              f"{r['p95_ms']:.2f} | {r['tensorflow_imported']} |")
+
+    parity = results["parity"]
+    print(f"\nParity: one-step {parity['one_step_max_abs_error']:.1e} (scaled), "
+          f"24h forecast {parity['forecast_24h_max_abs_error']:.1e} (real units)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        print(json.dumps(_worker(sys.argv[2], int(sys.argv[3]))))
+        sys.exit(0)
+
+    print(">>> Benchmarking inference backends (fresh process per backend)...")
+    bench_results = benchmark_backends()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'inference_backends.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
@@ -0,0 +1,135 @@
+# src/benchmarks/bench_model_cache.py
+"""
+Model Cache Benchmark (dashboard rerun cost and hot reload).
+
+Works on a temporary copy of the default model artifacts:
+- 'disk': Loading the model + feature transform on every rerun (previous `load_local_ai`).
+- 'cache': `ModelCache.get` on an unchanged entry (stat check only), per backend.
+- Touch: Rewriting identical bytes must not reload (content hash check).
+- Change: After a new model is written, `get` keeps returning the previous model without
+  blocking (stale hit) until the background reload has swapped the new one in.
+
+Usage:
+    python -m src.benchmarks.bench_model_cache
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import numpy as np
+import tensorflow as tf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.app.model_cache import ModelCache
+from src.neural_network.numpy_lstm import NumpyLSTM, export_weights
+from src.preprocessing.feature_transform import load_feature_transform
+
+REPEATS = 20
+
+
+def _median_ms(func, repeats: int = REPEATS) -> float:
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def _loader(folder: str, backend: str):
+    def load():
+        if backend == 'numpy':
+            model = NumpyLSTM.load(os.path.join(folder, "model.npz"))
+        else:
+            model = tf.keras.models.load_model(os.path.join(folder, "model.keras"), compile=False)
+        return model, load_feature_transform(os.path.join(folder, "transform.npz"))
+    return load
+
+
+def benchmark_model_cache(repeats: int = REPEATS) -> dict:
+    """
+    Benchmarks cached vs uncached model access and the hot-reload path.
+
+    Returns:
+        dict: Per-backend latencies (ms) and the hot-reload observations.
+    """
+    folder = tempfile.mkdtemp(prefix="model_cache_bench_")
+    try:
+        base = tf.keras.models.load_model(config.MODEL_PATH, compile=False)
+        base.save(os.path.join(folder, "model.keras"))
+        export_weights(base, os.path.join(folder, "model.npz"))
+        load_feature_transform().save(os.path.join(folder, "transform.npz"))
+        paths = [os.path.join(folder, name) for name in ("model.keras", "model.npz", "transform.npz")]
+
+        cache = ModelCache(max_entries=4)
+        results = {"latency": {}}
+        for backend in config.INFERENCE_BACKENDS:
+            loader = _loader(folder, backend)
+            cache.get(backend, paths, loader)
+            results["latency"][backend] = {
+                "disk_ms": _median_ms(loader, repeats),
+                "cache_ms": _median_ms(lambda: cache.get(backend, paths, loader), repeats * 10),
+            }
+
+        # Touch: identical bytes, new mtime -> no reload
+        keras_loader = _loader(folder, 'keras')
+        before = cache.get('keras', paths, keras_loader)[0]
+        shutil.copyfile(paths[0], paths[0] + ".copy")
+        os.replace(paths[0] + ".copy", paths[0])
+        touched_same = cache.get('keras', paths, keras_loader)[0] is before
+
+        # Change: new weights -> stale hit without blocking, then background swap
+        changed = tf.keras.models.clone_model(base)
+        changed.set_weights([w * 0.5 for w in base.get_weights()])
+        changed.save(paths[0])
+        t0 = time.perf_counter()
+        stale = cache.get('keras', paths, keras_loader)[0]
+        stale_ms = (time.perf_counter() - t0) * 1000
+        cache.wait()
+        swapped = cache.get('keras', paths, keras_loader)[0]
+
+        x = np.random.default_rng(0).uniform(0.1, 0.9, (1, config.SEQ_LENGTH, len(config.FEATURE_COLS)))
+        results["hot_reload"] = {
+            "touch_kept_model": bool(touched_same),
+            "stale_hit_ms": stale_ms,
+            "stale_value_was_previous": stale is before,
+            "swapped_to_new_weights": bool(np.allclose(swapped.predict(x, verbose=0), changed.predict(x, verbose=0))),
+        }
+        results["stats"] = {k: v for k, v in cache.stats().items() if k != "entries"}
+        return results
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def print_report(results: dict) -> None:
+    """Prints markdown tables of the benchmark results."""
+    print("\nModel access per dashboard rerun")
+    print("| Backend | Load from disk (ms) | Cache hit (ms) | Speedup |")
+    print("|---------|---------------------|----------------|---------|")
+    for backend, r in results["latency"].items():
+        print(f"| {backend} | {r['disk_ms']:.2f} | {r['cache_ms']:.4f} | {r['disk_ms'] / max(r['cache_ms'], 1e-9):.0f}x |")
+
+    hot = results["hot_reload"]
+    print("\nHot reload")
+    print(f"- Identical rewrite kept the loaded model: {hot['touch_kept_model']}")
+    print(f"- Changed model: get() returned the previous model in {hot['stale_hit_ms']:.2f} ms "
+          f"({hot['stale_value_was_previous']}), background swap to the new weights: {hot['swapped_to_new_weights']}")
+    stats = results["stats"]
+    print(f"- Counters: {stats['hits']} hits, {stats['stale_hits']} stale hits, {stats['misses']} misses, "
+          f"{stats['reloads']} reloads, {stats['load_seconds']:.2f} s total load time")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking the model cache...")
+    bench_results = benchmark_model_cache()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'model_cache.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
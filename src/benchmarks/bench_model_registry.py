@@ -0,0 +1,132 @@
+# src/benchmarks/bench_model_registry.py
+"""
+Nearest Adaptive-Model Lookup Benchmark.
+
+Compares, for registries of 100 to 10 000 trained locations (random points over Romania):
+- 'kdtree': `AdaptiveModelRegistry.nearest` (cKDTree over unit vectors, incl. the index-file
+  change check done on every lookup).
+- 'brute': Vectorised haversine distance to every model + argmin.
+
+Queries are GPS fixes jittered by up to ~50 m around known locations (all must hit the right
+model) plus uniformly random positions; both methods must return the same model.
+
+The exact folder-name lookup used before the registry misses every jittered fix.
+
+Usage:
+    python -m src.benchmarks.bench_model_registry
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.app.model_registry import AdaptiveModelRegistry, _write_index, haversine_km
+
+SIZES = (100, 1000, 10000)
+QUERIES = 2000
+LAT_RANGE, LON_RANGE = (43.6, 48.3), (20.2, 29.7)
+JITTER_DEG = 0.0005
+
+
+def _entries(n: int, rng: np.random.Generator) -> list:
+    lats = np.round(rng.uniform(*LAT_RANGE, n), 4)
+    lons = np.round(rng.uniform(*LON_RANGE, n), 4)
+    return [{"key": f"{lat}_{lon}", "lat": float(lat), "lon": float(lon), "metrics": {"mae": 0.02}}
+            for lat, lon in zip(lats, lons)]
+
+
+def _brute_nearest(lats: np.ndarray, lons: np.ndarray, lat: float, lon: float, radius_km: float):
+    distances = haversine_km(lat, lon, lats, lons)
+    i = int(np.argmin(distances))
+    return (i, float(distances[i])) if distances[i] <= radius_km else (None, None)
+
+
+def _per_query_us(func, queries) -> float:
+    t0 = time.perf_counter()
+    for lat, lon in queries:
+        func(lat, lon)
+    return (time.perf_counter() - t0) / len(queries) * 1e6
+
+
+def benchmark_model_registry(sizes=SIZES, n_queries: int = QUERIES,
+                             radius_km: float = config.ADAPTIVE_MODEL_RADIUS_KM) -> dict:
+    """
+    Benchmarks nearest-model lookups.
+
+    Returns:
+        dict: Per registry size, median lookup time per method (microseconds) and hit statistics.
+    """
+    rng = np.random.default_rng(0)
+    tmp_dir = tempfile.mkdtemp(prefix="registry_bench_")
+    results = {}
+    try:
+        for n in sizes:
+            entries = _entries(n, rng)
+            index_path = os.path.join(tmp_dir, f"index_{n}.json")
+            _write_index(index_path, entries)
+            registry = AdaptiveModelRegistry(tmp_dir, index_path)
+            lats = np.array([e["lat"] for e in entries])
+            lons = np.array([e["lon"] for e in entries])
+
+            # Half jittered fixes of trained locations, half random positions
+            known = rng.integers(0, n, n_queries // 2)
+            jittered = np.stack([lats[known], lons[known]], axis=1) + rng.uniform(-JITTER_DEG, JITTER_DEG, (len(known), 2))
+            random = np.stack([rng.uniform(*LAT_RANGE, n_queries // 2), rng.uniform(*LON_RANGE, n_queries // 2)], axis=1)
+            queries = np.concatenate([jittered, random])
+
+            kdtree_us = [_per_query_us(lambda la, lo: registry.nearest(la, lo, radius_km, verify=False), queries)
+                         for _ in range(3)]
+            brute_us = [_per_query_us(lambda la, lo: _brute_nearest(lats, lons, la, lo, radius_km), queries)
+                        for _ in range(3)]
+
+            # Correctness: same model as the brute force, jittered fixes find their own location
+            agree, jitter_hits, max_dist_err = 0, 0, 0.0
+            for q, (lat, lon) in enumerate(queries):
+                hit = registry.nearest(lat, lon, radius_km, verify=False)
+                i, dist = _brute_nearest(lats, lons, lat, lon, radius_km)
+                same = (hit is None and i is None) or (hit is not None and i is not None and
+                                                       abs(hit["distance_km"] - dist) < 1e-6)
+                agree += same
+                if hit is not None and i is not None:
+                    max_dist_err = max(max_dist_err, abs(hit["distance_km"] - dist))
+                if q < len(known) and hit is not None and hit["key"] == entries[known[q]]["key"]:
+                    jitter_hits += 1
+
+            results[str(n)] = {
+                "kdtree_us": float(np.median(kdtree_us)),
+                "brute_us": float(np.median(brute_us)),
+                "agreement": agree / len(queries),
+                "jitter_hit_rate": jitter_hits / len(known),
+                "max_distance_error_km": max_dist_err,
+            }
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def print_report(results: dict) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print("\nNearest adaptive-model lookup (per query)")
+    print("| Models | k-d tree (us) | Brute force (us) | Speedup | Same result | Jittered fixes matched |")
+    print("|--------|---------------|------------------|---------|-------------|------------------------|")
+    for n, r in results.items():
+        print(f"| {n} | {r['kdtree_us']:.1f} | {r['brute_us']:.1f} | {r['brute_us'] / r['kdtree_us']:.1f}x | "
+              f"{r['agreement'] * 100:.1f}% | {r['jitter_hit_rate'] * 100:.1f}% |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking nearest adaptive-model lookups...")
+    bench_results = benchmark_model_registry()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'model_registry.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
@@ -0,0 +1,180 @@
+# src/benchmarks/bench_multi_horizon.py
+"""
+Direct Multi-Horizon vs Autoregressive 24h Forecast Benchmark.
+
+Compares the two ways of producing a 24h forecast:
+- 'autoregressive': The one-step project model chained 24 times with clipped feedback
+  (RolloutEngine for Keras, NumpyRolloutEngine for NumPy).
+- 'direct': The multi-horizon model (`train --multi-horizon`), one forward pass
+  (DirectForecastEngine).
+
+Latency: Median / p95 per call for 1 origin (dashboard) and 64 origins (batch), per backend.
+
+Accuracy: MAE per target and lead time on test windows whose 24h input + 24h label span
+contains no time gap (both methods are scored against the same (N, 24, 5) label blocks,
+see `TimeSeriesGenerator(horizon=...)`).
+
+Usage:
+    python -m src.benchmarks.bench_multi_horizon [path/to/multi_horizon_model.keras]
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+import tensorflow as tf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.neural_network.data_generator import TimeSeriesGenerator
+from src.neural_network.evaluate import lead_time_mae
+from src.neural_network.multi_horizon import DirectForecastEngine
+from src.neural_network.numpy_lstm import NumpyLSTM, NumpyRolloutEngine
+from src.neural_network.rollout import RolloutEngine
+from src.preprocessing.feature_transform import load_feature_transform
+from src.preprocessing.sequence_store import load_split, load_split_timestamps, target_indices
+from src.preprocessing.time_features import HOUR_S
+
+REPEATS = 20
+BATCH_SIZES = (1, 64)
+MAX_ORIGINS = 1024
+REPORT_LEADS = (1, 6, 12, 24)
+
+
+def _latency(func, repeats: int) -> dict:
+    """Steady-state latency statistics (milliseconds) after one warm-up call."""
+    func()
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    samples = np.array(samples) * 1000
+    return {"median_ms": float(np.median(samples)), "p95_ms": float(np.percentile(samples, 95))}
+
+
+def _load_models(multi_horizon_path: str) -> dict:
+    """One-step and multi-horizon models for both backends (NumPy copies converted in memory)."""
+    if not os.path.exists(multi_horizon_path):
+        raise FileNotFoundError(f"Multi-horizon model missing: {multi_horizon_path}. "
+                                f"Run 'python -m src.neural_network.train --multi-horizon' first.")
+    one_step = tf.keras.models.load_model(config.MODEL_PATH, compile=False)
+    direct = tf.keras.models.load_model(multi_horizon_path, compile=False)
+    return {
+        "keras": {"autoregressive": one_step, "direct": direct},
+        "numpy": {"autoregressive": NumpyLSTM.from_keras(one_step), "direct": NumpyLSTM.from_keras(direct)},
+    }
+
+
+def _engine(backend: str, method: str, model, transform, horizon: int):
+    if method == "direct":
+        return DirectForecastEngine(model, transform, horizon=horizon)
+    if backend == "numpy":
+        return NumpyRolloutEngine(model, transform, horizon=horizon)
+    return RolloutEngine(model, transform, horizon=horizon)
+
+
+def _test_origins(horizon: int, max_origins: int = MAX_ORIGINS):
+    """Gap-free test windows, their (N, H, 5) label blocks and the epoch of their last input row."""
+    data = load_split('test')
+    stamps = load_split_timestamps('test')
+    gen = TimeSeriesGenerator(
+        input_width=config.SEQ_LENGTH,
+        label_width=config.PREDICT_HORIZON,
+        feature_cols=config.FEATURE_COLS,
+        target_cols=config.TARGET_COLS,
+        mode='view',
+        horizon=horizon
+    )
+    X, y = gen.create_sequences_from_arrays(data, data[:, target_indices()])
+
+    # Keep windows whose input + label rows are consecutive hours
+    span = gen.input_width + gen.label_width + horizon
+    hourly = np.diff(stamps) == HOUR_S
+    consecutive = np.convolve(hourly, np.ones(span - 1, dtype=int), mode='valid') == span - 1
+    valid = np.flatnonzero(consecutive[:len(X)])
+    picked = valid[np.linspace(0, len(valid) - 1, min(max_origins, len(valid))).astype(int)]
+    return np.asarray(X[picked]), np.asarray(y[picked]), stamps[picked + gen.input_width - 1]
+
+
+def benchmark_latency(models: dict, transform, horizon: int, repeats: int = REPEATS) -> dict:
+    """Median / p95 forecast latency per backend, method and batch size."""
+    rng = np.random.default_rng(0)
+    windows = rng.uniform(0.1, 0.9, (max(BATCH_SIZES), config.SEQ_LENGTH, len(config.FEATURE_COLS)))
+    start_s = 1740830400 + np.arange(len(windows)) * HOUR_S
+
+    results = {}
+    for backend, backend_models in models.items():
+        for method, model in backend_models.items():
+            engine = _engine(backend, method, model, transform, horizon)
+            for batch in BATCH_SIZES:
+                results[f"{backend}/{method}/{batch}"] = _latency(
+                    lambda: engine.run(windows[:batch], start_s[:batch]), repeats)
+    return results
+
+
+def benchmark_accuracy(models: dict, transform, horizon: int) -> dict:
+    """Per-lead-time MAE (real units) of both methods on the same test origins (NumPy backend)."""
+    X, y, start_s = _test_origins(horizon)
+    y_true = transform.inverse_transform(y, constrain=False)
+
+    results = {"origins": int(len(X))}
+    for method, model in models["numpy"].items():
+        _, preds_real = _engine("numpy", method, model, transform, horizon).run(X, start_s)
+        results[method] = lead_time_mae(y_true, preds_real)
+    return results
+
+
+def benchmark_multi_horizon(multi_horizon_path: str = config.MULTI_HORIZON_MODEL_PATH,
+                            repeats: int = REPEATS) -> dict:
+    """
+    Benchmarks the direct multi-horizon head against the autoregressive rollout.
+
+    Returns:
+        dict: Latency statistics and per-lead-time MAE per method.
+    """
+    models = _load_models(multi_horizon_path)
+    transform = load_feature_transform()
+    horizon = int(models["keras"]["direct"].output_shape[1])
+    return {
+        "horizon": horizon,
+        "latency": benchmark_latency(models, transform, horizon, repeats),
+        "accuracy": benchmark_accuracy(models, transform, horizon),
+    }
+
+
+def print_report(results: dict) -> None:
+    """Prints markdown tables of the benchmark results."""
+    print(f"\n{results['horizon']}h forecast latency")
+    print("| Backend | Origins | Autoregressive (ms) | Direct (ms) | Speedup |")
+    print("|---------|---------|---------------------|-------------|---------|")
+    latency = results["latency"]
+    for backend in config.INFERENCE_BACKENDS:
+        for batch in BATCH_SIZES:
+            ar, direct = latency[f"{backend}/autoregressive/{batch}"], latency[f"{backend}/direct/{batch}"]
+            print(f"| {backend} | {batch} | {ar['median_ms']:.2f} | {direct['median_ms']:.2f} | "
+                  f"{ar['median_ms'] / max(direct['median_ms'], 1e-9):.1f}x |")
+
+    accuracy = results["accuracy"]
+    leads = [lead for lead in REPORT_LEADS if lead <= results["horizon"]]
+    print(f"\nMAE per lead time ({accuracy['origins']} test origins, real units)")
+    print("| Target | Method | " + " | ".join(f"t+{lead}" for lead in leads) + " | Mean |")
+    print("|--------|--------|" + "|".join("------" for _ in leads) + "|------|")
+    for col in config.TARGET_COLS:
+        for method in ("autoregressive", "direct"):
+            errors = accuracy[method][col]
+            print(f"| {col} | {method} | " + " | ".join(f"{errors[lead - 1]:.3f}" for lead in leads)
+                  + f" | {np.mean(errors):.3f} |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking direct multi-horizon vs autoregressive forecasts...")
+    bench_results = benchmark_multi_horizon(sys.argv[1] if len(sys.argv) > 1 else config.MULTI_HORIZON_MODEL_PATH)
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'multi_horizon.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
@@ -0,0 +1,180 @@
+# src/benchmarks/bench_rollout.py
+"""
+24h Rollout Latency Benchmark.
+
+Compares the ways of producing the dashboard's 24-step autoregressive forecast:
+- 'predict_loop': 24 x `model.predict` with NumPy feedback (`np.vstack`), the former
+  `forecast_next_24h` loop.
+- 'rollout_graph': `RolloutEngine` (one tf.function / tf.while_loop call, ring buffer,
+  in-graph feedback and post-processing).
+
+Reports the first-call time (graph tracing), the steady-state latency (median / p95) and
+the max abs deviation of the real-unit forecast from the predict loop.
+
+Batch scaling: Rolls out B origins (different windows and start times) in one call and
+reports the latency per origin against B sequential single-origin rollouts.
+
+Usage:
+    python -m src.benchmarks.bench_rollout
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+import tensorflow as tf
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.neural_network.rollout import FEEDBACK_CLIP, RolloutEngine
+from src.preprocessing.feature_transform import load_feature_transform
+from src.preprocessing.time_features import to_epoch_seconds
+
+HORIZON = 24
+REPEATS = 20
+BATCH_SIZES = (1, 2, 4, 7, 16, 32, 64)
+DASHBOARD_BOUNDS = {'wind_speed': (0.0, 8.0)}
+
+
+def _sample_window(transform, start_time: datetime, seed: int = 0) -> np.ndarray:
+    """Plausible scaled (SEQ_LENGTH, 9) window ending at `start_time`."""
+    rng = np.random.default_rng(seed)
+    n = config.SEQ_LENGTH
+    times = [start_time - timedelta(hours=n - 1 - i) for i in range(n)]
+    physics = np.column_stack([
+        10 + rng.normal(0, 2, n),           # temperature
+        70 + rng.normal(0, 5, n),           # humidity
+        1013 + rng.normal(0, 2, n),         # pressure
+        np.abs(rng.normal(3, 1, n)),        # wind_speed
+        np.abs(rng.normal(0, 0.5, n)),      # precipitation
+    ])
+    return transform.encode(physics, to_epoch_seconds(times))
+
+
+def _predict_loop(model, transform, window: np.ndarray, start_time: datetime) -> np.ndarray:
+    """Reference: one `model.predict` per step, feedback rebuilt in NumPy."""
+    future_time_scaled = transform.encode_time(
+        to_epoch_seconds([start_time + timedelta(hours=i + 1) for i in range(HORIZON)]))
+    current_seq = window.copy()
+    preds_scaled = np.empty((HORIZON, len(config.TARGET_COLS)))
+    for i in range(HORIZON):
+        preds_scaled[i] = np.clip(model.predict(np.array([current_seq]), verbose=0)[0], *FEEDBACK_CLIP)
+        current_seq = np.vstack([current_seq[1:], np.concatenate([preds_scaled[i], future_time_scaled[i]])])
+    return transform.with_bounds(**DASHBOARD_BOUNDS).inverse_transform(preds_scaled)
+
+
+def _latency(func, repeats: int) -> dict:
+    """First-call time plus steady-state latency statistics (milliseconds)."""
+    t0 = time.perf_counter()
+    result = func()
+    first = time.perf_counter() - t0
+
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - t0)
+    samples = np.array(samples) * 1000
+    return {
+        "first_call_ms": first * 1000,
+        "median_ms": float(np.median(samples)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "result": result,
+    }
+
+
+def benchmark_rollout(repeats: int = REPEATS) -> dict:
+    """
+    Benchmarks the rollout implementations on the project model.
+
+    Returns:
+        dict: Latency statistics and max abs error (real units) per method.
+    """
+    model = tf.keras.models.load_model(config.MODEL_PATH, compile=False)
+    transform = load_feature_transform()
+    start_time = datetime(2025, 3, 1, 12)
+    window = _sample_window(transform, start_time)
+
+    # The predict loop is slow, so it gets fewer timed runs
+    reference = _latency(lambda: _predict_loop(model, transform, window, start_time), max(repeats // 4, 3))
+    expected = reference.pop("result")
+    results = {"horizon": HORIZON, "repeats": repeats, "predict_loop": reference}
+
+    engine = RolloutEngine(model, transform, horizon=HORIZON, bounds=DASHBOARD_BOUNDS)
+    graph = _latency(lambda: engine.rollout(window, start_time), repeats)
+    graph["max_abs_error"] = float(np.abs(graph.pop("result") - expected).max())
+    results["rollout_graph"] = graph
+
+    reference["max_abs_error"] = 0.0
+    for name in ("predict_loop", "rollout_graph"):
+        results[name]["speedup_vs_predict_loop"] = reference["median_ms"] / max(results[name]["median_ms"], 1e-9)
+
+    return results
+
+
+def benchmark_batch_scaling(batch_sizes=BATCH_SIZES, repeats: int = REPEATS) -> dict:
+    """
+    Measures how the multi-origin rollout scales with the number of origins.
+
+    Returns:
+        dict: Per batch size, the median batch latency, latency per origin and the speedup
+            over rolling the same origins out one by one.
+    """
+    model = tf.keras.models.load_model(config.MODEL_PATH, compile=False)
+    transform = load_feature_transform()
+    engine = RolloutEngine(model, transform, horizon=HORIZON, bounds=DASHBOARD_BOUNDS)
+
+    n_max = max(batch_sizes)
+    start_times = [datetime(2025, 3, 1, 12) + timedelta(hours=k) for k in range(n_max)]
+    windows = np.stack([_sample_window(transform, t, seed=k) for k, t in enumerate(start_times)])
+
+    single_ms = _latency(lambda: engine.forecast(windows[:1], start_times[:1]), repeats)["median_ms"]
+    results = {"single_origin_ms": single_ms, "batches": {}}
+    for batch in batch_sizes:
+        r = _latency(lambda: engine.forecast(windows[:batch], start_times[:batch]), repeats)
+        results["batches"][str(batch)] = {
+            "median_ms": r["median_ms"],
+            "ms_per_origin": r["median_ms"] / batch,
+            "origins_per_s": batch / (r["median_ms"] / 1000),
+            "speedup_vs_sequential": batch * single_ms / r["median_ms"],
+        }
+    return results
+
+
+def print_report(results: dict) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print(f"\n{results['horizon']}-step rollout, {results['repeats']} timed runs")
+    print("| Method | First call (ms) | Median (ms) | p95 (ms) | Speedup | Max abs error |")
+    print("|--------|-----------------|-------------|----------|---------|---------------|")
+    for name in ("predict_loop", "rollout_graph"):
+        r = results[name]
+        print(f"| {name} | {r['first_call_ms']:.1f} | {r['median_ms']:.2f} | {r['p95_ms']:.2f} | "
+              f"{r['speedup_vs_predict_loop']:.1f}x | {r['max_abs_error']:.1e} |")
+
+
+def print_scaling_report(results: dict) -> None:
+    """Prints a markdown table of the batch-scaling results."""
+    print(f"\nMulti-origin rollout (single origin: {results['single_origin_ms']:.2f} ms)")
+    print("| Origins | Batch (ms) | ms / origin | Origins / s | Speedup vs sequential |")
+    print("|---------|------------|-------------|-------------|-----------------------|")
+    for batch, r in results["batches"].items():
+        print(f"| {batch} | {r['median_ms']:.2f} | {r['ms_per_origin']:.2f} | {r['origins_per_s']:.0f} | "
+              f"{r['speedup_vs_sequential']:.1f}x |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking 24h rollout implementations...")
+    bench_results = benchmark_rollout()
+    print_report(bench_results)
+
+    print("\n>>> Benchmarking multi-origin batch scaling...")
+    bench_results["batch_scaling"] = benchmark_batch_scaling()
+    print_scaling_report(bench_results["batch_scaling"])
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'rollout.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
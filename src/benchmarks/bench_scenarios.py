@@ -0,0 +1,70 @@
+# src/benchmarks/bench_scenarios.py
+"""
+Scenario Engine Scaling Benchmark.
+
+Runs `generate_scenarios` for increasing numbers of synthetic hours (split evenly over
+the scenarios of config.EXTREME_SCENARIOS) and reports the wall-clock time and the
+throughput, to verify that the batched engine scales linearly.
+
+Usage:
+    python -m src.benchmarks.bench_scenarios
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.data_acquisition.synthetic_generator import generate_scenarios
+
+HOUR_COUNTS = (10_000, 100_000, 1_000_000, 5_000_000)
+
+
+def benchmark_scenarios(hour_counts=HOUR_COUNTS) -> list:
+    """
+    Times the scenario engine for each requested number of hours.
+
+    Returns:
+        list: One result dict per hour count.
+    """
+    names = list(config.EXTREME_SCENARIOS)
+    results = []
+
+    for hours in hour_counts:
+        per_scenario = {name: hours // len(names) for name in names}
+        t0 = time.perf_counter()
+        df = generate_scenarios(per_scenario, rng=np.random.default_rng(config.SYNTHETIC_SEED))
+        elapsed = time.perf_counter() - t0
+
+        results.append({
+            "hours": len(df),
+            "seconds": elapsed,
+            "hours_per_second": len(df) / max(elapsed, 1e-9),
+            "episodes": int((np.diff(df.index.as_unit('s').asi8) != 3600).sum()) + 1,
+        })
+        del df
+
+    return results
+
+
+def print_report(results: list) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print("\n| Hours | Episodes (approx.) | Time (s) | Hours / s |")
+    print("|-------|--------------------|----------|-----------|")
+    for r in results:
+        print(f"| {r['hours']:,} | {r['episodes']:,} | {r['seconds']:.3f} | {r['hours_per_second']:,.0f} |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking the Black Swan scenario engine...")
+    bench_results = benchmark_scenarios()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'scenarios.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
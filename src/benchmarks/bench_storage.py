@@ -0,0 +1,109 @@
+# src/benchmarks/bench_storage.py
+"""
+Storage Format Benchmark (CSV vs Parquet).
+
+For every dataset that exists as CSV in the repository, a partitioned Parquet copy is
+written into a temporary directory (the pipeline artifacts are not touched) and compared on:
+- Disk size (CSV file vs. sum of Parquet fragments).
+- Full load time (pd.read_csv + timestamp parsing vs. typed Parquet read).
+- Projected load time (2 columns of a single month, via projection + partition pruning).
+
+Usage:
+    python -m src.benchmarks.bench_storage
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.data_acquisition import parquet_store
+from src.data_acquisition.data_loader import parse_open_meteo_csv
+
+REPEATS = 5
+
+
+def _best_of(fn, repeats: int = REPEATS) -> float:
+    """Best wall-clock time over several runs (filters out page-cache warm-up noise)."""
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def _read_legacy_csv(name: str, path: str) -> pd.DataFrame:
+    """Reads a CSV exactly like the pre-Parquet pipeline did."""
+    if name == 'raw':
+        return parse_open_meteo_csv(path)
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+
+def benchmark_storage() -> list:
+    """
+    Runs the CSV vs Parquet comparison for all CSV datasets found on disk.
+
+    Returns:
+        list: One result dict per dataset.
+    """
+    csv_sources = {'raw': config.RAW_DATA_PATH}
+    csv_sources.update(parquet_store.CSV_EXPORT_PATHS)
+
+    results = []
+    original_dir = config.PARQUET_DIR
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config.PARQUET_DIR = tmp_dir
+        try:
+            for name, csv_path in csv_sources.items():
+                if not os.path.exists(csv_path):
+                    continue
+
+                df = _read_legacy_csv(name, csv_path)
+                parquet_store.write_dataset(df, name, export_csv=False)
+
+                first = df['timestamp'].iloc[0]
+                column = 'temperature'
+
+                results.append({
+                    "dataset": name,
+                    "rows": len(df),
+                    "csv_mb": os.path.getsize(csv_path) / 1e6,
+                    "parquet_mb": sum(os.path.getsize(p) for p in parquet_store.dataset_files(name)) / 1e6,
+                    "csv_load_s": _best_of(lambda: _read_legacy_csv(name, csv_path)),
+                    "parquet_load_s": _best_of(lambda: parquet_store.read_dataset(name)),
+                    "parquet_projected_s": _best_of(lambda: parquet_store.read_dataset(
+                        name, columns=['timestamp', column], years=[first.year], months=[first.month])),
+                })
+        finally:
+            config.PARQUET_DIR = original_dir
+
+    return results
+
+
+def print_report(results: list) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print("\n| Dataset | Rows | CSV (MB) | Parquet (MB) | CSV load (s) | Parquet load (s) | Projected 1 month (s) |")
+    print("|---------|------|----------|--------------|--------------|------------------|-----------------------|")
+    for r in results:
+        print(f"| {r['dataset']} | {r['rows']:,} | {r['csv_mb']:.2f} | {r['parquet_mb']:.2f} | "
+              f"{r['csv_load_s']:.3f} | {r['parquet_load_s']:.3f} | {r['parquet_projected_s']:.4f} |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking dataset storage (CSV vs Parquet)...")
+    bench_results = benchmark_storage()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'storage.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
@@ -0,0 +1,141 @@
+# src/benchmarks/bench_streaming.py
+"""
+Streaming (Stateful) Inference Benchmark.
+
+Simulates the live page receiving one new hourly reading per device and refreshing the
+24h forecast, with the NumPy backend:
+- 'window_recompute': rebuild + rescale the trailing 24h window and run the windowed
+  rollout (NumpyRolloutEngine), the former per-refresh cost.
+- 'stateful': `StatefulForecaster.update` (one LSTM timestep) + `forecast` (fork of the
+  saved staggered states).
+
+Reports per-refresh latency (median / p95), the ingest-only cost of one reading, the
+max abs deviation between both forecasts (real units), and the save / restore time of
+the persisted device states.
+
+Usage:
+    python -m src.benchmarks.bench_streaming
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import numpy as np
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.neural_network.numpy_lstm import load_numpy_model, NumpyRolloutEngine
+from src.neural_network.stateful import StatefulForecaster
+from src.preprocessing.feature_transform import load_feature_transform
+from src.preprocessing.time_features import HOUR_S
+
+READINGS = 48
+DEVICES = (1, 8, 32)
+START_EPOCH_S = int(datetime(2025, 3, 1, 12, tzinfo=timezone.utc).timestamp())
+DASHBOARD_BOUNDS = {'wind_speed': (0.0, 8.0)}
+
+
+def _sample_stream(n: int, seed: int = 0):
+    """Plausible real-unit hourly readings (TARGET_COLS) with epoch timestamps."""
+    rng = np.random.default_rng(seed)
+    physics = np.column_stack([
+        10 + rng.normal(0, 2, n),           # temperature
+        70 + rng.normal(0, 5, n),           # humidity
+        1013 + rng.normal(0, 2, n),         # pressure
+        np.abs(rng.normal(3, 1, n)),        # wind_speed
+        np.abs(rng.normal(0, 0.5, n)),      # precipitation
+    ])
+    return physics, START_EPOCH_S + np.arange(n, dtype=np.int64) * HOUR_S
+
+
+def _stats(samples) -> dict:
+    samples = np.array(samples) * 1000
+    return {"median_ms": float(np.median(samples)), "p95_ms": float(np.percentile(samples, 95))}
+
+
+def benchmark_streaming(devices=DEVICES, readings: int = READINGS) -> dict:
+    """
+    Replays `readings` hourly readings per device after a 24h warm-up.
+
+    Returns:
+        dict: Per device count, refresh latency of both methods, ingest latency, max abs
+            error and the persistence timings.
+    """
+    model = load_numpy_model()
+    transform = load_feature_transform()
+    engine = NumpyRolloutEngine(model, transform, bounds=DASHBOARD_BOUNDS)
+    seq = config.SEQ_LENGTH
+
+    results = {"readings": readings, "devices": {}}
+    for n_devices in devices:
+        streams = [_sample_stream(seq + readings, seed=k) for k in range(n_devices)]
+        ids = [f"esp32-{k}" for k in range(n_devices)]
+
+        with tempfile.TemporaryDirectory() as state_dir:
+            forecaster = StatefulForecaster(model, transform, bounds=DASHBOARD_BOUNDS, state_dir=state_dir)
+            for device_id, (physics, stamps) in zip(ids, streams):
+                forecaster.update(device_id, physics[:seq], stamps[:seq])
+
+            window_t, stateful_t, ingest_t, max_err = [], [], [], 0.0
+            for n in range(seq, seq + readings):
+                t0 = time.perf_counter()
+                windows = np.stack([transform.encode(p[n - seq + 1:n + 1], s[n - seq + 1:n + 1]) for p, s in streams])
+                _, expected = engine.run(windows, np.array([s[n] for _, s in streams]))
+                window_t.append(time.perf_counter() - t0)
+
+                t0 = time.perf_counter()
+                for device_id, (physics, stamps) in zip(ids, streams):
+                    forecaster.update(device_id, physics[n:n + 1], stamps[n:n + 1])
+                t_ingest = time.perf_counter() - t0
+                preds, _ = forecaster.forecast(ids)
+                stateful_t.append(time.perf_counter() - t0)
+                ingest_t.append(t_ingest / n_devices)
+                max_err = max(max_err, float(np.abs(preds - expected).max()))
+
+            t0 = time.perf_counter()
+            forecaster.save_states()
+            t_save = time.perf_counter() - t0
+            restored = StatefulForecaster(model, transform, bounds=DASHBOARD_BOUNDS, state_dir=state_dir)
+            t0 = time.perf_counter()
+            restored.load_states()
+            t_load = time.perf_counter() - t0
+
+        window, stateful = _stats(window_t), _stats(stateful_t)
+        results["devices"][str(n_devices)] = {
+            "window_recompute": window,
+            "stateful": stateful,
+            "ingest_per_reading_ms": _stats(ingest_t)["median_ms"],
+            "speedup": window["median_ms"] / max(stateful["median_ms"], 1e-9),
+            "max_abs_error": max_err,
+            "save_ms": t_save * 1000,
+            "load_ms": t_load * 1000,
+        }
+    return results
+
+
+def print_report(results: dict) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print(f"\nNew reading + 24h forecast refresh, {results['readings']} readings per device")
+    print("| Devices | Window recompute (ms) | Stateful (ms) | p95 (ms) | Ingest / reading (ms) | Speedup "
+          "| Max abs error | Save (ms) | Load (ms) |")
+    print("|---------|-----------------------|---------------|----------|-----------------------|---------"
+          "|---------------|-----------|-----------|")
+    for n_devices, r in results["devices"].items():
+        print(f"| {n_devices} | {r['window_recompute']['median_ms']:.2f} | {r['stateful']['median_ms']:.2f} | "
+              f"{r['stateful']['p95_ms']:.2f} | {r['ingest_per_reading_ms']:.3f} | {r['speedup']:.1f}x | "
+              f"{r['max_abs_error']:.1e} | {r['save_ms']:.1f} | {r['load_ms']:.1f} |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking stateful streaming inference...")
+    bench_results = benchmark_streaming()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'streaming.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
@@ -0,0 +1,186 @@
+# src/benchmarks/bench_telemetry_pipeline.py
+"""
+Azure Listener Ingestion Benchmark (in-process fake Event Hub).
+
+A fake consumer client with the interface of `azure.eventhub.aio.EventHubConsumerClient`
+delivers a burst of ESP32 messages (24-reading histories, several devices per partition).
+Checkpoints cost a simulated storage round-trip (CHECKPOINT_LATENCY_S). Compared:
+- 'inline': The previous listener (parse, store + pretty-printed snapshot and checkpoint
+  for every event, synchronously).
+- 'pipeline': `TelemetryPipeline` (bounded queue, debounced coalescing writer,
+  checkpoints every N events / T seconds).
+
+Both must store the same readings and leave every partition checkpointed at its last event.
+
+Usage:
+    python -m src.benchmarks.bench_telemetry_pipeline
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.app.telemetry_pipeline import TelemetryPipeline, consume, extract_telemetry
+from src.app.telemetry_store import TelemetryStore
+
+PARTITIONS = 4
+DEVICES = 32
+HOURS = 48
+CHECKPOINT_LATENCY_S = 0.005
+
+
+class FakeEvent:
+    """Event Hub event (body + position in the partition)."""
+
+    def __init__(self, body: str, offset: int):
+        self.body = body
+        self.offset = str(offset)
+        self.sequence_number = offset
+
+    def body_as_str(self, encoding: str = 'UTF-8') -> str:
+        return self.body
+
+
+class FakePartitionContext:
+    """Partition context whose checkpoints cost a simulated round-trip."""
+
+    def __init__(self, partition_id: str, latency_s: float = CHECKPOINT_LATENCY_S):
+        self.partition_id = partition_id
+        self.latency_s = latency_s
+        self.checkpoint = None
+        self.calls = 0
+
+    async def update_checkpoint(self, event) -> None:
+        await asyncio.sleep(self.latency_s)
+        self.calls += 1
+        self.checkpoint = event.sequence_number
+
+
+class FakeConsumerClient:
+    """
+    In-process stand-in of `EventHubConsumerClient` (aio): `receive` delivers the given
+    events partition by partition, round-robin, like a burst after a reconnect, and returns.
+    """
+
+    def __init__(self, partitions: dict):
+        self.partitions = partitions  # partition_id -> list of FakeEvent
+        self.contexts = {pid: FakePartitionContext(pid) for pid in partitions}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def receive(self, on_event, **kwargs) -> None:
+        # One receiving task per partition, as in the SDK
+        async def pump(pid):
+            for event in self.partitions[pid]:
+                await on_event(self.contexts[pid], event)
+        await asyncio.gather(*(pump(pid) for pid in self.partitions))
+
+
+def make_events(partitions: int = PARTITIONS, devices: int = DEVICES, hours: int = HOURS) -> dict:
+    """Hourly messages of every device (each with the last 24 readings), devices spread over partitions."""
+    rng = np.random.default_rng(0)
+    stamps = (pd.date_range(end=pd.Timestamp.now(tz='UTC').floor('h'), periods=hours + 23, freq='h')
+              .strftime("%Y-%m-%dT%H:%M:%SZ"))
+    events = {str(p): [] for p in range(partitions)}
+    for d in range(devices):
+        readings = [{"timestamp": ts, "temperature": float(t), "humidity": 55.0, "pressure": 1011.0,
+                     "wind_speed": 2.5, "precipitation": 0.0} for ts, t in zip(stamps, rng.normal(8, 4, len(stamps)))]
+        for h in range(hours):
+            events[str(d % partitions)].append(
+                (h, {"deviceId": f"esp32-{d}", "lat": 44.4, "lon": 26.1, "history": readings[h:h + 24]}))
+    return {pid: [FakeEvent(json.dumps(message), i) for i, (_, message) in enumerate(sorted(items, key=lambda x: x[0]))]
+            for pid, items in events.items()}
+
+
+async def _inline_listener(client: FakeConsumerClient, store: TelemetryStore, snapshot: str) -> None:
+    """The previous `on_event_received`: everything synchronous, per event."""
+    async def on_event(partition_context, event):
+        payload = extract_telemetry(json.loads(event.body_as_str(encoding='UTF-8')))
+        if payload:
+            store.ingest(payload)
+            with open(snapshot + ".tmp", 'w') as f:
+                json.dump(payload, f, indent=4)
+            os.replace(snapshot + ".tmp", snapshot)
+            await partition_context.update_checkpoint(event)
+
+    async with client:
+        await client.receive(on_event=on_event)
+
+
+def benchmark_telemetry_pipeline() -> dict:
+    """
+    Benchmarks the inline listener against the pipeline on the same fake burst.
+
+    Returns:
+        dict: Per method: seconds, events/s, checkpoint calls, stored readings, correctness checks.
+    """
+    events = make_events()
+    n_events = sum(len(v) for v in events.values())
+    tmp_dir = tempfile.mkdtemp(prefix="pipeline_bench_")
+    results = {"events": n_events, "partitions": len(events)}
+    try:
+        for name in ("inline", "pipeline"):
+            store = TelemetryStore(os.path.join(tmp_dir, f"{name}.sqlite"))
+            snapshot = os.path.join(tmp_dir, f"{name}.json")
+            client = FakeConsumerClient(events)
+            pipeline = None
+            t0 = time.perf_counter()
+            if name == "inline":
+                asyncio.run(_inline_listener(client, store, snapshot))
+            else:
+                pipeline = TelemetryPipeline(store, snapshot_path=snapshot, report_interval_s=None)
+                asyncio.run(consume(client, pipeline))
+            seconds = time.perf_counter() - t0
+
+            results[name] = {
+                "seconds": seconds,
+                "events_per_second": n_events / seconds,
+                "checkpoint_calls": sum(c.calls for c in client.contexts.values()),
+                "stored_readings": store.stats()["readings"],
+                "checkpointed_to_last_event": all(client.contexts[pid].checkpoint == len(evts) - 1
+                                                  for pid, evts in events.items()),
+            }
+            if pipeline is not None:
+                m = pipeline.metrics.snapshot()
+                results[name].update(flushes=m["flushes"], queue_depth_max=m["queue_depth_max"])
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def print_report(results: dict) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print(f"\nBurst of {results['events']} events over {results['partitions']} partitions "
+          f"(checkpoint round-trip {CHECKPOINT_LATENCY_S * 1000:.0f} ms)")
+    print("| Listener | Total (s) | Events/s | Store writes | Checkpoints | Readings stored | Checkpointed to last event |")
+    print("|----------|-----------|----------|--------------|-------------|-----------------|----------------------------|")
+    for name in ("inline", "pipeline"):
+        r = results[name]
+        writes = r.get("flushes", results["events"])
+        print(f"| {name} | {r['seconds']:.2f} | {r['events_per_second']:.0f} | {writes} | {r['checkpoint_calls']} | "
+              f"{r['stored_readings']} | {r['checkpointed_to_last_event']} |")
+    print(f"\nPipeline max queue depth: {results['pipeline']['queue_depth_max']} / {config.LISTENER_QUEUE_SIZE}")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking the Azure listener pipeline...")
+    bench_results = benchmark_telemetry_pipeline()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'telemetry_pipeline.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
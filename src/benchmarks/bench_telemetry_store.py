@@ -0,0 +1,134 @@
+# src/benchmarks/bench_telemetry_store.py
+"""
+Telemetry Store Benchmark (ingestion and range queries).
+
+Simulates a fleet of ESP32 stations that send one message per hour, each message carrying
+the last 24 hourly readings (the real payload layout), and compares:
+- 'json': The previous listener (pretty-printed JSON snapshot rewritten per message; only the
+  last 24 readings survive).
+- 'store': `TelemetryStore.ingest` per message (one transaction each).
+- 'store_batched': `TelemetryStore.ingest` on batches of messages (one transaction per batch).
+
+Then times the dashboard / retraining range queries on the filled store.
+
+Usage:
+    python -m src.benchmarks.bench_telemetry_store
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.app.telemetry_store import TelemetryStore
+
+DEVICES = 4
+DAYS = 30
+BATCH = 64
+REPEATS = 20
+
+
+def _messages(devices: int, days: int, rng: np.random.Generator) -> list:
+    """Hourly messages of every device (interleaved in arrival order), 24 readings each."""
+    end = pd.Timestamp.now(tz='UTC').floor('h')
+    hours = pd.date_range(end=end, periods=days * 24 + 23, freq='h') + pd.Timedelta(seconds=356)
+    stamps = hours.strftime("%Y-%m-%dT%H:%M:%SZ")
+    messages = []
+    for d in range(devices):
+        readings = [{"timestamp": ts, "temperature": float(t), "humidity": 60.0, "pressure": 1012.0,
+                     "wind_speed": 3.0, "precipitation": 0.0} for ts, t in zip(stamps, rng.normal(10, 5, len(stamps)))]
+        for i in range(days * 24):
+            messages.append((i, {"deviceId": f"esp32-{d}", "lat": 44.4 + d / 100, "lon": 26.1,
+                                 "history": readings[i:i + 24]}))
+    return [m for _, m in sorted(messages, key=lambda item: item[0])]
+
+
+def _median_ms(func, repeats: int = REPEATS) -> float:
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def benchmark_telemetry_store(devices: int = DEVICES, days: int = DAYS, batch: int = BATCH) -> dict:
+    """
+    Benchmarks telemetry ingestion and queries.
+
+    Returns:
+        dict: Ingestion throughput / stored rows per method and range query latencies (ms).
+    """
+    messages = _messages(devices, days, np.random.default_rng(0))
+    tmp_dir = tempfile.mkdtemp(prefix="telemetry_bench_")
+    results = {"messages": len(messages), "readings_received": len(messages) * 24, "ingest": {}}
+    try:
+        # Previous listener: rewrite one pretty-printed snapshot per message
+        snapshot = os.path.join(tmp_dir, "latest_telemetry.json")
+        t0 = time.perf_counter()
+        for message in messages:
+            with open(snapshot + ".tmp", 'w') as f:
+                json.dump(message, f, indent=4)
+            os.replace(snapshot + ".tmp", snapshot)
+        results["ingest"]["json"] = {"seconds": time.perf_counter() - t0, "readings_kept": 24}
+
+        for name, size in (("store", 1), ("store_batched", batch)):
+            store = TelemetryStore(os.path.join(tmp_dir, f"{name}.sqlite"))
+            inserted = 0
+            t0 = time.perf_counter()
+            for i in range(0, len(messages), size):
+                inserted += store.ingest(messages[i:i + size])
+            results["ingest"][name] = {"seconds": time.perf_counter() - t0, "readings_kept": inserted}
+        db_path = store.db_path
+        results["db_mb"] = sum(os.path.getsize(db_path + suffix) for suffix in ("", "-wal")
+                               if os.path.exists(db_path + suffix)) / 1e6
+
+        now = pd.Timestamp.now(tz='UTC')
+        queries = {
+            "latest 24 readings (dashboard)": lambda: store.latest("esp32-0", 24),
+            "raw, last 7 days": lambda: store.readings("esp32-0", now - pd.Timedelta(days=7), now),
+            "raw, last 30 days": lambda: store.readings("esp32-0", now - pd.Timedelta(days=30), now),
+            "daily rollup, 30 days": lambda: store.rollups("esp32-0", 'daily', now - pd.Timedelta(days=30), now),
+            "training table (hourly), all": lambda: store.history_frame("esp32-0"),
+            "snapshot (dashboard)": lambda: store.snapshot(),
+        }
+        results["queries"] = {name: {"ms": _median_ms(query), "rows": len(query()) if name != "snapshot (dashboard)"
+                                     else len(query()["history"])}
+                              for name, query in queries.items()}
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def print_report(results: dict) -> None:
+    """Prints markdown tables of the benchmark results."""
+    print(f"\nIngestion of {results['messages']} messages ({results['readings_received']} readings incl. overlap)")
+    print("| Method | Total (s) | Messages/s | Readings kept |")
+    print("|--------|-----------|------------|---------------|")
+    for name, r in results["ingest"].items():
+        print(f"| {name} | {r['seconds']:.2f} | {results['messages'] / r['seconds']:.0f} | {r['readings_kept']} |")
+    print(f"\nDatabase size: {results['db_mb']:.2f} MB")
+
+    print("\nRange queries (one device)")
+    print("| Query | Median (ms) | Rows |")
+    print("|-------|-------------|------|")
+    for name, r in results["queries"].items():
+        print(f"| {name} | {r['ms']:.2f} | {r['rows']} |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking the telemetry store...")
+    bench_results = benchmark_telemetry_store()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'telemetry_store.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
@@ -0,0 +1,109 @@
+# src/benchmarks/bench_time_features.py
+"""
+Time-Embedding Benchmark.
+
+Compares the ways the cyclical time features have been computed:
+- 'per_row': `Timestamp.timestamp()` + 4 scalar sin/cos inside a list comprehension
+  (the former `calculate_time_features` of the dashboard / adaptive training).
+- 'index_map': `index.map(pd.Timestamp.timestamp)` + vectorised sin/cos
+  (the former `add_time_features`).
+- 'kernel': `time_embedding` on int64 epoch seconds (direct sin/cos).
+- 'kernel_lut': `time_embedding` with the precomputed lookup tables.
+
+Reports wall-clock time and the max absolute deviation from the per-row reference.
+
+Usage:
+    python -m src.benchmarks.bench_time_features
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.preprocessing.time_features import (
+    DAY_S, YEAR_S, TIME_FEATURE_COLS, build_time_lut, time_embedding, to_epoch_seconds
+)
+
+N_TIMESTAMPS = 1_000_000
+
+
+def _per_row(index: pd.DatetimeIndex) -> np.ndarray:
+    rows = []
+    for ts in index:
+        ts_s = ts.timestamp()
+        rows.append([np.sin(ts_s * (2 * np.pi / DAY_S)), np.cos(ts_s * (2 * np.pi / DAY_S)),
+                     np.sin(ts_s * (2 * np.pi / YEAR_S)), np.cos(ts_s * (2 * np.pi / YEAR_S))])
+    return np.array(rows)
+
+
+def _index_map(index: pd.DatetimeIndex) -> np.ndarray:
+    timestamp_s = np.asarray(index.map(pd.Timestamp.timestamp))
+    return np.stack([np.sin(timestamp_s * (2 * np.pi / DAY_S)), np.cos(timestamp_s * (2 * np.pi / DAY_S)),
+                     np.sin(timestamp_s * (2 * np.pi / YEAR_S)), np.cos(timestamp_s * (2 * np.pi / YEAR_S))], axis=1)
+
+
+def _timed(func, *args, repeats: int = 1):
+    """Best-of-`repeats` wall-clock time and the result of the last run."""
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+
+def benchmark_time_features(n: int = N_TIMESTAMPS) -> dict:
+    """
+    Benchmarks all implementations on `n` hourly timestamps.
+
+    Returns:
+        dict: Seconds and max abs error per method.
+    """
+    index = pd.date_range("1990-01-01", periods=n, freq="h", name="timestamp")
+
+    reference, t_per_row = _timed(_per_row, index)
+    results = {"timestamps": n, "per_row": {"seconds": t_per_row, "max_abs_error": 0.0}}
+
+    mapped, t_map = _timed(_index_map, index, repeats=3)
+    results["index_map"] = {"seconds": t_map, "max_abs_error": float(np.abs(mapped - reference).max())}
+
+    # The epoch conversion is part of the cost, so it is timed together with the kernel
+    lut, t_lut_build = _timed(build_time_lut)
+    for name, table in (("kernel", None), ("kernel_lut", lut)):
+        block, seconds = _timed(lambda idx: time_embedding(to_epoch_seconds(idx), table), index, repeats=5)
+        assert block.shape == (n, len(TIME_FEATURE_COLS)) and block.dtype == np.float32
+        results[name] = {"seconds": seconds, "max_abs_error": float(np.abs(block - reference).max())}
+    results["kernel_lut"]["lut_build_seconds"] = t_lut_build
+
+    for name in ("index_map", "kernel", "kernel_lut"):
+        results[name]["speedup_vs_per_row"] = t_per_row / max(results[name]["seconds"], 1e-9)
+
+    return results
+
+
+def print_report(results: dict) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print(f"\n{results['timestamps']:,} timestamps")
+    print("| Method | Time (s) | Speedup vs per-row | Max abs error |")
+    print("|--------|----------|--------------------|---------------|")
+    for name in ("per_row", "index_map", "kernel", "kernel_lut"):
+        r = results[name]
+        speedup = f"{r['speedup_vs_per_row']:.0f}x" if "speedup_vs_per_row" in r else "1x"
+        print(f"| {name} | {r['seconds']:.4f} | {speedup} | {r['max_abs_error']:.1e} |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking time-embedding implementations...")
+    bench_results = benchmark_time_features()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'time_features.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
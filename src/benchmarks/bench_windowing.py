@@ -0,0 +1,116 @@
+# src/benchmarks/bench_windowing.py
+"""
+Sliding-Window Benchmark.
+
+Compares the two windowing modes of `TimeSeriesGenerator`:
+- 'copy': Python loop + list of slices + np.array (original path).
+- 'view': Zero-copy strided view for X, fancy-indexed gather for y.
+
+For every table size it reports wall-clock time, peak traced memory (tracemalloc)
+and whether both modes produce identical tensors.
+
+Usage:
+    python -m src.benchmarks.bench_windowing
+"""
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src import config
+from src.neural_network.data_generator import TimeSeriesGenerator
+
+ROW_COUNTS = (50_000, 500_000, 5_000_000)
+
+# The 'copy' path needs ~3x the final tensor (list of slices + np.array).
+# Above this budget it is skipped instead of swapping the machine to death.
+COPY_MEMORY_BUDGET_GB = 8.0
+
+
+def _run_mode(mode: str, df: pd.DataFrame):
+    """Runs one windowing pass and returns (X, y, seconds, peak_mb)."""
+    gen = TimeSeriesGenerator(
+        input_width=config.SEQ_LENGTH,
+        label_width=config.PREDICT_HORIZON,
+        feature_cols=config.FEATURE_COLS,
+        target_cols=config.TARGET_COLS,
+        mode=mode
+    )
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    X, y = gen.create_sequences(df)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return X, y, elapsed, peak / 1e6
+
+
+def benchmark_windowing(row_counts=ROW_COUNTS, copy_budget_gb: float = COPY_MEMORY_BUDGET_GB) -> list:
+    """
+    Benchmarks both windowing modes on random tables of the requested sizes.
+
+    Returns:
+        list: One result dict per row count.
+    """
+    results = []
+    n_features = len(config.FEATURE_COLS)
+
+    for rows in row_counts:
+        df = pd.DataFrame(np.random.rand(rows, n_features), columns=config.FEATURE_COLS)
+
+        X_view, y_view, t_view, mem_view = _run_mode('view', df)
+        row = {
+            "rows": rows,
+            "view_seconds": t_view,
+            "view_peak_mb": mem_view,
+            "tensor_mb": X_view.size * X_view.itemsize / 1e6,
+        }
+
+        est_copy_gb = 3 * row["tensor_mb"] / 1e3
+        if est_copy_gb <= copy_budget_gb:
+            X_copy, y_copy, t_copy, mem_copy = _run_mode('copy', df)
+            row.update({
+                "copy_seconds": t_copy,
+                "copy_peak_mb": mem_copy,
+                "speedup": t_copy / max(t_view, 1e-9),
+                "identical": bool(np.array_equal(X_copy, X_view) and np.array_equal(y_copy, y_view)),
+            })
+            del X_copy, y_copy
+        else:
+            print(f"   [SKIP] 'copy' mode at {rows} rows (estimated {est_copy_gb:.1f} GB > {copy_budget_gb} GB budget)")
+
+        results.append(row)
+        del df, X_view, y_view
+
+    return results
+
+
+def print_report(results: list) -> None:
+    """Prints a markdown table of the benchmark results."""
+    print("\n| Rows | Copy (s) | View (s) | Speedup | Copy peak (MB) | View peak (MB) | Identical |")
+    print("|------|----------|----------|---------|----------------|----------------|-----------|")
+    for r in results:
+        if "copy_seconds" in r:
+            print(f"| {r['rows']:,} | {r['copy_seconds']:.3f} | {r['view_seconds']:.5f} | {r['speedup']:.0f}x | "
+                  f"{r['copy_peak_mb']:.1f} | {r['view_peak_mb']:.1f} | {r['identical']} |")
+        else:
+            print(f"| {r['rows']:,} | skipped | {r['view_seconds']:.5f} | - | - | {r['view_peak_mb']:.1f} | - |")
+
+
+if __name__ == "__main__":
+    print(">>> Benchmarking sliding-window generation ('copy' vs 'view')...")
+    bench_results = benchmark_windowing()
+    print_report(bench_results)
+
+    out_path = os.path.join(config.BASE_DIR, 'results', 'benchmarks', 'windowing.json')
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(bench_results, f, indent=4)
+    print(f"\n[OUTPUT] Benchmark results saved to: {out_path}")
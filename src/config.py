@@ -26,10 +26,64 @@ RAW_DATA_PATH = os.path.join(DATA_DIR, 'raw', 'weather_history_raw.csv')
 GENERATED_DATA_PATH = os.path.join(DATA_DIR, 'generated', 'synthetic_extremes.csv')
 HYBRID_DATA_PATH = os.path.join(DATA_DIR, 'generated', 'hybrid_dataset.csv')
 # Note: Processed data is split into train/val/test CSVs in their respective folders
+# Typed, year/month partitioned Parquet copies of every dataset (CSV is an optional export)
+PARQUET_DIR = os.path.join(DATA_DIR, 'parquet')
+EXPORT_CSV = True
+# Out-of-core splitting: two passes over row chunks instead of loading the hybrid dataset at once
+SPLIT_STREAMING = False
+SPLIT_CHUNK_ROWS = 100_000
+# Memory-mapped .npy copies of the scaled splits (+ JSON manifests) shared by train/evaluate/docs
+SEQUENCE_STORE_DIR = os.path.join(DATA_DIR, 'sequence_store')
+# Persisted per-device LSTM states of the streaming (stateful) ESP32 inference
+STREAM_STATE_DIR = os.path.join(DATA_DIR, 'stream_state')
+# Append-only ESP32 telemetry store (SQLite WAL, see src/app/telemetry_store.py)
+TELEMETRY_DB_PATH = os.path.join(DATA_DIR, 'telemetry', 'telemetry.sqlite')
+TELEMETRY_RAW_RETENTION_DAYS = 90         # Raw readings older than this are dropped...
+TELEMETRY_HOURLY_RETENTION_DAYS = 730     # ...hourly rollups live longer, daily rollups are kept
+TELEMETRY_RETENTION_INTERVAL_S = 3600     # How often the writer applies the retention policy
+
+# Azure listener pipeline (src/app/telemetry_pipeline.py)
+LISTENER_QUEUE_SIZE = 1024                # Bounded event queue (a full queue pauses receiving)
+LISTENER_FLUSH_MAX_EVENTS = 256           # Max events coalesced into one store transaction
+LISTENER_FLUSH_DEBOUNCE_S = 0.25          # A burst is collected for this long before writing
+LISTENER_CHECKPOINT_EVERY = 100           # Commit partition checkpoints every N events...
+LISTENER_CHECKPOINT_INTERVAL_S = 10.0     # ...or after T seconds, whichever comes first
+LISTENER_REPORT_INTERVAL_S = 60.0         # Events/s and queue depth log interval
+LISTENER_REPLAY_HOURS = 6                 # Start position of partitions without a checkpoint
+LISTENER_CHECKPOINT_DB_PATH = os.path.join(DATA_DIR, 'telemetry', 'checkpoints.sqlite')
+
+# ESP32 fleet view (src/app/fleet.py)
+FLEET_RING_HOURS = 48                     # Per-device in-memory ring buffer (>= SEQ_LENGTH)
+FLEET_FRESH_HOURS = 2                     # Newest reading younger than this: online...
+FLEET_STALE_HOURS = 6                     # ...younger than this: delayed, older: offline
+FLEET_ACTIVE_HOURS = 24                   # Devices heard within this window are forecast
 
 # Model Artifacts
 SCALER_PATH = os.path.join(CONFIG_DIR, 'preprocessing_params.pkl')
+# Pickle-free compiled transform (scaling + log + physics rules) used by the inference paths
+FEATURE_TRANSFORM_PATH = os.path.join(CONFIG_DIR, 'feature_transform.npz')
 MODEL_PATH = os.path.join(BASE_DIR, 'models', 'optimized_model.keras')
+# Same weights exported for the TensorFlow-free NumPy backend (src/neural_network/numpy_lstm.py)
+NUMPY_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'optimized_model.npz')
+# Direct multi-horizon model (`python -m src.neural_network.train --multi-horizon`) + its NumPy export
+MULTI_HORIZON_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'multi_horizon_model.keras')
+MULTI_HORIZON_NUMPY_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'multi_horizon_model.npz')
+# Location-specific models (one '<lat>_<lon>' folder each) + the queue of their training jobs
+ADAPTIVE_MODELS_DIR = os.path.join(BASE_DIR, 'src', 'app', 'adaptive_models')
+TRAINING_JOBS_DB_PATH = os.path.join(ADAPTIVE_MODELS_DIR, 'training_jobs.sqlite')
+# Spatial index of the trained locations (nearest model within ADAPTIVE_MODEL_RADIUS_KM is used)
+ADAPTIVE_MODEL_INDEX_PATH = os.path.join(ADAPTIVE_MODELS_DIR, 'model_index.json')
+ADAPTIVE_MODEL_RADIUS_KM = 5.0
+# Loaded models kept by the dashboard (LRU, hot-reloaded when their files change, see src/app/model_cache.py)
+MODEL_CACHE_SIZE = 8
+
+# Inference backend of the dashboard and the evaluation: 'keras' (TensorFlow) or 'numpy'
+INFERENCE_BACKEND = 'keras'
+INFERENCE_BACKENDS = ('keras', 'numpy')
+
+# 24h forecast strategy: 'autoregressive' (24 chained one-step passes) or 'direct' (multi-horizon model)
+FORECAST_MODE = 'autoregressive'
+FORECAST_MODES = ('autoregressive', 'direct')
 
 # =============================================================================
 #  LOCATION & API SETTINGS
@@ -55,6 +109,16 @@ API_URL_TEMPLATE = (
     "timezone={timezone}&format=csv&wind_speed_unit=ms"
 )
 
+# Shared weather API client: on-disk response cache (historical = immutable, live = short TTL)
+API_CACHE_DIR = os.path.join(DATA_DIR, 'api_cache')
+API_CACHE_LIVE_TTL_S = 600
+
+# Chunked downloader: the date range is fetched as parallel, resumable chunks
+DOWNLOAD_CHUNK_FREQ = "year"   # 'month' or 'year'
+DOWNLOAD_WORKERS = 4           # Bounded thread pool (be polite to the free API)
+DOWNLOAD_MAX_RETRIES = 4       # Per chunk, with exponential backoff
+DOWNLOAD_BACKOFF_S = 1.0       # Base delay: 1s, 2s, 4s, 8s...
+
 # =============================================================================
 #  DATASET CONTROL
 # =============================================================================
@@ -65,30 +129,60 @@ USE_SYNTHETIC_DATA = True
 # =============================================================================
 #  SYNTHETIC DATA GENERATION (Black Swan Events)
 # =============================================================================
-# Constraints used to generate physically plausible extreme weather events
+# Constraints used to generate physically plausible extreme weather events.
+# Each scenario is generated as contiguous episodes of `duration_hours` (inclusive range),
+# starting inside `months`, until the scenario totals `n_hours` (the 2000/2000/1000 hours
+# mix the thesis model was trained on; `occurrence_prob` is descriptive only and does not
+# size the scenario). Variables are declared as:
+#   ("uniform", low, high) | ("normal", mean, std) | ("constant", value)
 EXTREME_SCENARIOS = {
     "heatwave": {
-        "temp_min": 40.0,
-        "temp_max": 44.0,
+        "months": [6, 7, 8],
         "duration_hours": (48, 120),
-        "occurrence_prob": 0.05
+        "n_hours": 2000,
+        "occurrence_prob": 0.05,
+        "variables": {
+            "temperature": ("uniform", 40.0, 44.0),
+            "humidity": ("uniform", 20.0, 40.0),       # Dry
+            "pressure": ("normal", 1010.0, 5.0),
+            "wind_speed": ("uniform", 0.0, 10.0),
+            "precipitation": ("constant", 0.0),
+        },
     },
     "storm": {
-        "wind_speed_min": 20.0,
-        "wind_speed_max": 30.0,
-        "pressure_drop": 15.0,
+        "months": [3, 4, 5, 9, 10, 11],                # Mostly Spring/Autumn
         "duration_hours": (2, 6),
-        "occurrence_prob": 0.03
+        "n_hours": 2000,
+        "occurrence_prob": 0.03,
+        "variables": {
+            "temperature": ("uniform", 10.0, 25.0),
+            "humidity": ("uniform", 80.0, 100.0),
+            "pressure": ("uniform", 970.0, 990.0),     # ~15 hPa drop below normal
+            "wind_speed": ("uniform", 20.0, 30.0),
+            "precipitation": ("uniform", 1.0, 15.0),
+        },
     },
     "late_frost": {
-        "temp_min": -3.0,
-        "temp_max": 0.0,
         "months": [4, 5],
         "duration_hours": (4, 10),
-        "occurrence_prob": 0.10
-    }
+        "n_hours": 1000,
+        "occurrence_prob": 0.10,
+        "variables": {
+            "temperature": ("uniform", -3.0, 0.0),
+            "humidity": ("uniform", 40.0, 70.0),
+            "pressure": ("uniform", 1015.0, 1030.0),   # High pressure (clear sky frost)
+            "wind_speed": ("uniform", 0.0, 5.0),
+            "precipitation": ("constant", 0.0),
+        },
+    },
 }
 
+# Share of each synthetic hour taken from its episode-level draw (the rest is drawn hourly),
+# so values evolve coherently within an event instead of jumping randomly every hour.
+SCENARIO_EPISODE_COHERENCE = 0.7
+SCENARIO_REFERENCE_YEAR = 2022   # Calendar year the synthetic episodes are placed in
+SYNTHETIC_SEED = 42
+
 # Target size for the synthetic dataset (approx 25k hours)
 SYNTHETIC_SAMPLES_TARGET = 25000
 
@@ -99,9 +193,13 @@ SYNTHETIC_SAMPLES_TARGET = 25000
 SEQ_LENGTH = 24
 
 # Prediction Horizon: I predict the NEXT hour (t+1).
-# Multistep forecasting (e.g., 24h ahead) is handled via autoregression in the UI.
+# Multistep forecasting (e.g., 24h ahead) is handled via autoregression in the UI,
+# or in one forward pass by the direct multi-horizon model (FORECAST_HORIZON lead times).
 PREDICT_HORIZON = 1
 
+# Direct multi-horizon head: (N, FORECAST_HORIZON, 5) outputs, no compounding feedback
+FORECAST_HORIZON = 24
+
 # Input Features (9 Total)
 # Includes 5 Physical parameters + 4 Cyclical Time Embeddings
 FEATURE_COLS = [
@@ -114,6 +212,18 @@ FEATURE_COLS = [
     'year_sin', 'year_cos'  # Seasonality (Annual rhythm)
 ]
 
+# Columns stored as log1p(x) in model space (heavy-tailed rainfall)
+LOG_TRANSFORM_COLS = ['precipitation']
+
+# Physical post-processing of predictions (real units): (lower, upper), None = unbounded
+PHYSICS_BOUNDS = {
+    'humidity': (0.0, 100.0),     # Saturation
+    'wind_speed': (0.0, None),
+    'precipitation': (0.0, None),
+}
+# Values below the gate are treated as model noise and set to 0 ("constant drizzle" fix)
+NOISE_GATES = {'precipitation': 0.1}
+
 # Output Targets (5 Total)
 # I only predict the physical state of the atmosphere
 TARGET_COLS = [
@@ -132,6 +242,34 @@ EPOCHS = 50            # Number of complete passes through the dataset
 LEARNING_RATE = 0.001  # Step size for the optimizer
 PATIENCE = 5           # Early stopping patience (stop if no improvement after 5 epochs)
 
+# Adaptive (per-location) training from the dashboard
+# 'finetune': Warm start from MODEL_PATH on a recent slice of local history (well under a minute)
+# 'scratch':  Fresh LSTM trained on ADAPTIVE_HISTORY_YEARS of local history (several minutes)
+ADAPTIVE_TRAINING_MODE = 'finetune'
+ADAPTIVE_TRAINING_MODES = ('finetune', 'scratch')
+ADAPTIVE_HISTORY_YEARS = 5
+ADAPTIVE_FINETUNE_DAYS = 180          # Recent local history used for fine-tuning
+ADAPTIVE_FREEZE_FIRST_LSTM = True     # Keep the generic temporal features, adapt the upper layers
+ADAPTIVE_FINETUNE_LR = 3e-4
+ADAPTIVE_FINETUNE_EPOCHS = 5
+ADAPTIVE_FINETUNE_PATIENCE = 2
+ADAPTIVE_SCRATCH_LR = 0.001
+ADAPTIVE_SCRATCH_EPOCHS = 15
+ADAPTIVE_SCRATCH_PATIENCE = 3
+ADAPTIVE_BATCH_SIZE = 32
+ADAPTIVE_VAL_FRACTION = 0.1           # Most recent share of the history held out for validation
+
+# Background training jobs (src/app/training_jobs.py)
+TRAINING_MAX_CONCURRENT_JOBS = 1      # Trainings running at once (each one is a separate process)
+TRAINING_JOB_POLL_S = 2.0             # Worker queue polling / dashboard progress refresh interval
+TRAINING_JOB_STALE_S = 60.0           # A 'running' job without heartbeat for this long is re-queued
+
+# Batch training of many locations (src/app/batch_training.py)
+BATCH_TRAINING_WORKERS = None         # Training processes (None: one per BATCH_TRAINING_TF_THREADS cores)
+BATCH_TRAINING_TF_THREADS = 2         # TF intra-op threads per process (inter-op: 1), avoids oversubscription
+BATCH_DOWNLOAD_CONCURRENCY = 2        # Locations downloading at once (each uses DOWNLOAD_WORKERS threads)
+BATCH_TRAINING_RETRIES = 2            # Extra attempts per failed location (download or training)
+
 
 # =============================================================================
 #  LOGIC CONSTANTS
@@ -139,3 +277,7 @@ PATIENCE = 5           # Early stopping patience (stop if no improvement after 5
 # Threshold to distinguish Rain vs Snow in the UI/Logic layer
 # If Precip > 0 and Temp <= SNOW_TEMP_THRESHOLD, we classify as SNOW.
 SNOW_TEMP_THRESHOLD = 0.5
+
+# Autoregressive forecasts: scaled predictions are clamped to this range before being fed
+# back (values far outside 0-1 indicate model instability)
+FORECAST_FEEDBACK_CLIP = (-0.5, 1.5)
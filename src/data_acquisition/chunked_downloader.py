@@ -0,0 +1,167 @@
+# src/data_acquisition/chunked_downloader.py
+"""
+Concurrent, Resumable Chunked Downloader for the Open-Meteo archive.
+
+Pulling a five-year range in a single request means one slow response kills the
+whole run and a failure restarts from zero. This module instead:
+
+1. Splits the date range into month or year chunks.
+2. Fetches the chunks in parallel through a bounded thread pool.
+3. Retries transient failures (timeouts, connection errors, HTTP 429/5xx) with
+   exponential backoff.
+4. Persists every finished chunk in the shared on-disk API cache (weather_client),
+   so an interrupted run resumes where it stopped.
+5. Merges the chunks in chronological order into a single Open-Meteo CSV
+   (identical layout to a one-shot download: 2 metadata lines + header + rows).
+
+The URL template is injectable, so the downloader can be exercised against a local
+stub HTTP server (e.g., `http.server` on 127.0.0.1) without touching the real API.
+"""
+
+import time
+import random
+import requests
+import pandas as pd
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from src import config
+from src.data_acquisition.weather_client import WeatherApiClient, get_client
+
+# Archive data of the last days is still being finalised by Open-Meteo (ERA5 delay),
+# so chunks overlapping this window are cached as 'live' (short TTL) instead of 'historical'.
+ARCHIVE_DELAY_DAYS = 7
+
+# HTTP status codes worth retrying (rate limiting & server-side hiccups)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ChunkDownloadError(RuntimeError):
+    """Raised when a chunk still fails after all retries."""
+
+
+def split_date_range(start_date: str, end_date: str, freq: str = 'year') -> List[Tuple[str, str]]:
+    """
+    Splits an inclusive [start, end] date range into calendar-aligned chunks.
+
+    Args:
+        start_date (str): 'YYYY-MM-DD'.
+        end_date (str): 'YYYY-MM-DD'.
+        freq (str): 'month' or 'year'.
+
+    Returns:
+        list: Ordered (chunk_start, chunk_end) string pairs, both inclusive.
+    """
+    if freq not in ('month', 'year'):
+        raise ValueError(f"Unknown chunk frequency '{freq}'. Expected 'month' or 'year'.")
+
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    offset = pd.offsets.MonthBegin(1) if freq == 'month' else pd.offsets.YearBegin(1)
+
+    chunks = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + offset - pd.Timedelta(days=1), end)
+        chunks.append((chunk_start.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d')))
+        chunk_start = chunk_end + pd.Timedelta(days=1)
+    return chunks
+
+
+def _is_final(chunk_end: str) -> bool:
+    """True if the chunk lies entirely in the finalised part of the archive."""
+    return pd.Timestamp(chunk_end).date() < date.today() - timedelta(days=ARCHIVE_DELAY_DAYS)
+
+
+def _fetch_with_retry(client: WeatherApiClient, url: str, kind: str, timeout: float,
+                      max_retries: int, backoff_s: float) -> str:
+    """GET through the shared client with exponential backoff (+ jitter) on transient errors."""
+    last_error: Optional[Exception] = None
+
+    for attempt in range(max_retries + 1):
+        try:
+            return client.get_text(url, kind=kind, timeout=timeout)
+
+        except requests.exceptions.RequestException as e:
+            # Client errors (bad coordinates, bad dates) will not fix themselves
+            response = getattr(e, 'response', None)
+            status = response.status_code if response is not None else None
+            if status is not None and status not in RETRYABLE_STATUS:
+                raise ChunkDownloadError(f"Non-retryable error for {url}: {e}") from e
+
+            last_error = e
+            if attempt < max_retries:
+                delay = backoff_s * (2 ** attempt) * (1 + random.random() * 0.1)
+                print(f"   [Retry {attempt + 1}/{max_retries}] {e} -> waiting {delay:.1f}s")
+                time.sleep(delay)
+
+    raise ChunkDownloadError(f"Chunk failed after {max_retries} retries: {url} ({last_error})")
+
+
+def _split_csv(text: str) -> Tuple[List[str], List[str]]:
+    """Splits an Open-Meteo CSV into (preamble incl. column header, data rows)."""
+    lines = text.splitlines()
+    header_idx = next(i for i, line in enumerate(lines) if line.startswith('time,'))
+    rows = [line for line in lines[header_idx + 1:] if line.strip()]
+    return lines[:header_idx + 1], rows
+
+
+def download_range(
+        lat,
+        lon,
+        start_date: str,
+        end_date: str,
+        timezone: str,
+        client: Optional[WeatherApiClient] = None,
+        freq: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_s: Optional[float] = None,
+        timeout: float = 30,
+        url_template: Optional[str] = None
+) -> str:
+    """
+    Downloads [start_date, end_date] as parallel chunks and returns the merged CSV text.
+
+    Args:
+        lat, lon: Coordinates.
+        start_date, end_date (str): Inclusive range, 'YYYY-MM-DD'.
+        timezone (str): Already URL-encoded timezone (e.g., 'Europe%2FBucharest' or 'auto').
+        client (WeatherApiClient, optional): Pooled, caching client (default: the shared one).
+        freq (str, optional): 'month' or 'year' (default config.DOWNLOAD_CHUNK_FREQ).
+        max_workers (int, optional): Thread pool bound (default config.DOWNLOAD_WORKERS).
+        max_retries (int, optional): Retries per chunk (default config.DOWNLOAD_MAX_RETRIES).
+        backoff_s (float, optional): Base backoff delay (default config.DOWNLOAD_BACKOFF_S).
+        timeout (float): Per-request timeout in seconds.
+        url_template (str, optional): Endpoint template (default config.API_URL_TEMPLATE).
+
+    Returns:
+        str: Open-Meteo CSV (metadata + header from the first chunk, rows of all chunks in order).
+    """
+    client = client or get_client()
+    freq = freq or config.DOWNLOAD_CHUNK_FREQ
+    max_workers = max_workers or config.DOWNLOAD_WORKERS
+    max_retries = config.DOWNLOAD_MAX_RETRIES if max_retries is None else max_retries
+    backoff_s = config.DOWNLOAD_BACKOFF_S if backoff_s is None else backoff_s
+    url_template = url_template or config.API_URL_TEMPLATE
+
+    chunks = split_date_range(start_date, end_date, freq)
+    urls = [url_template.format(lat=lat, lon=lon, start=chunk_start, end=chunk_end, timezone=timezone)
+            for chunk_start, chunk_end in chunks]
+    kinds = ['historical' if _is_final(chunk_end) else 'live' for _, chunk_end in chunks]
+
+    def fetch_chunk(i: int) -> str:
+        # Resume: finished chunks are served from the on-disk cache
+        return _fetch_with_retry(client, urls[i], kinds[i], timeout, max_retries, backoff_s)
+
+    done = sum(client.is_cached(url, kind) for url, kind in zip(urls, kinds))
+    print(f"Downloading {len(chunks)} {freq} chunks ({done} already on disk, {max_workers} workers)...")
+
+    # executor.map preserves the input order, so the merge is chronological
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        texts = list(executor.map(fetch_chunk, range(len(chunks))))
+
+    preamble, _ = _split_csv(texts[0])
+    rows = [row for text in texts for row in _split_csv(text)[1]]
+
+    return "\n".join(preamble + rows) + "\n"
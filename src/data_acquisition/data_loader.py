@@ -13,9 +13,22 @@ import requests
 import os
 import sys
 import pandas as pd
-import numpy as np
 from io import StringIO
 from src import config
+from src.data_acquisition.parquet_store import write_dataset, read_dataset, dataset_exists
+from src.data_acquisition.chunked_downloader import download_range, ChunkDownloadError
+from src.data_acquisition.weather_client import get_client
+from src.preprocessing.time_features import TIME_FEATURE_COLS, to_epoch_seconds, time_embedding
+
+# Mapping raw API column names to our internal schema
+OPEN_METEO_RENAME_MAP = {
+    'time': 'timestamp',
+    'temperature_2m (°C)': 'temperature',
+    'relative_humidity_2m (%)': 'humidity',
+    'surface_pressure (hPa)': 'pressure',
+    'wind_speed_10m (m/s)': 'wind_speed',
+    'precipitation (mm)': 'precipitation'
+}
 
 
 def get_api_url() -> str:
@@ -32,30 +45,61 @@ def get_api_url() -> str:
     )
 
 
-def download_data() -> None:
+def parse_open_meteo_csv(source) -> pd.DataFrame:
+    """
+    Parses an Open-Meteo CSV export (file path or buffer) into the internal schema.
+    Returns a flat frame with a typed 'timestamp' column and the 5 physical parameters.
+    """
+    # Open-Meteo CSVs usually have 2 lines of metadata before the header
+    df = pd.read_csv(source, skiprows=2)
+    df.rename(columns=OPEN_METEO_RENAME_MAP, inplace=True)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+
+def convert_raw_to_parquet() -> None:
+    """Converts the downloaded raw CSV into the partitioned 'raw' Parquet dataset."""
+    df = parse_open_meteo_csv(config.RAW_DATA_PATH)
+    write_dataset(df[['timestamp'] + config.TARGET_COLS], 'raw')
+    print(f"Raw data converted to Parquet (year/month partitions).")
+
+
+def download_data(force: bool = False) -> None:
     """
     Downloads historical weather data with a caching mechanism.
-    If the file already exists, it skips the download to save bandwidth.
+    If the file already exists, it skips the download to save bandwidth
+    (unless `force` is set, e.g., when the API settings changed).
+    The raw CSV is kept as the original API export; stages read the Parquet copy.
     """
-    if os.path.exists(config.RAW_DATA_PATH):
+    if os.path.exists(config.RAW_DATA_PATH) and not force:
         print(f"Raw data cache found at: {config.RAW_DATA_PATH}")
+        if not dataset_exists('raw'):
+            convert_raw_to_parquet()
         return
 
-    url = get_api_url()
     print(f"Downloading data for {config.LOCATION['name']}...")
-    print(f"Endpoint: {url}")
+    print(f"Endpoint: {get_api_url()}")
 
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
+        # Parallel, resumable chunks (an interrupted run restarts from the missing chunks only)
+        csv_text = download_range(
+            lat=config.LOCATION['lat'],
+            lon=config.LOCATION['lon'],
+            start_date=config.API_START_DATE,
+            end_date=config.API_END_DATE,
+            timezone=config.LOCATION['timezone'].replace("/", "%2F")
+        )
 
         os.makedirs(os.path.dirname(config.RAW_DATA_PATH), exist_ok=True)
-        with open(config.RAW_DATA_PATH, 'wb') as f:
-            f.write(response.content)
+        with open(config.RAW_DATA_PATH, 'w', encoding='utf-8') as f:
+            f.write(csv_text)
 
-        print(f"Raw data saved.")
+        stats = get_client().stats()
+        print(f"Raw data saved. (API cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['bytes_downloaded'] / 1e6:.1f} MB downloaded)")
+        convert_raw_to_parquet()
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ChunkDownloadError) as e:
         print(f"API connection failed: {e}")
         sys.exit(1)
 
@@ -73,27 +117,18 @@ def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     df = df.copy()
 
-    # Seconds in a day/year
-    day = 24 * 60 * 60
-    year = (365.2425) * day
-
-    # Convert timestamp to seconds
+    # Timestamps -> int64 epoch seconds in one vectorised pass
     # Check if index is datetime, otherwise convert
     if not isinstance(df.index, pd.DatetimeIndex):
         if 'timestamp' in df.columns:
-            timestamp_s = pd.to_datetime(df['timestamp']).map(pd.Timestamp.timestamp)
+            epoch_s = to_epoch_seconds(pd.to_datetime(df['timestamp']))
         else:
             raise ValueError("DataFrame must have a DatetimeIndex or a 'timestamp' column.")
     else:
-        timestamp_s = df.index.map(pd.Timestamp.timestamp)
-
-    # 1. Daily Cycle (Morning/Night)
-    df['day_sin'] = np.sin(timestamp_s * (2 * np.pi / day))
-    df['day_cos'] = np.cos(timestamp_s * (2 * np.pi / day))
+        epoch_s = to_epoch_seconds(df.index)
 
-    # 2. Yearly Cycle (Summer/Winter)
-    df['year_sin'] = np.sin(timestamp_s * (2 * np.pi / year))
-    df['year_cos'] = np.cos(timestamp_s * (2 * np.pi / year))
+    # Daily Cycle (Morning/Night) + Yearly Cycle (Summer/Winter) as one float32 (N, 4) block
+    df[TIME_FEATURE_COLS] = time_embedding(epoch_s)
 
     return df
 
@@ -101,27 +136,16 @@ def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
 def load_raw_data() -> pd.DataFrame:
     """
     ETL Process: Extract, Transform, Load.
-    Used for the main pipeline (reads from CSV).
+    Used for the main pipeline (reads the typed 'raw' Parquet dataset).
     """
     try:
-        # Open-Meteo CSVs usually have 2 lines of metadata before the header
-        df = pd.read_csv(config.RAW_DATA_PATH, skiprows=2)
-
-        # Mapping raw API column names to our internal schema
-        rename_map = {
-            'time': 'timestamp',
-            'temperature_2m (°C)': 'temperature',
-            'relative_humidity_2m (%)': 'humidity',
-            'surface_pressure (hPa)': 'pressure',
-            'wind_speed_10m (m/s)': 'wind_speed',
-            'precipitation (mm)': 'precipitation'
-        }
-
-        # Rename columns
-        df.rename(columns=rename_map, inplace=True)
-
-        # Datetime Conversion
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        # Typed Parquet copy is preferred; the CSV is only parsed once to build it
+        if not dataset_exists('raw'):
+            if not os.path.exists(config.RAW_DATA_PATH):
+                raise FileNotFoundError(config.RAW_DATA_PATH)
+            convert_raw_to_parquet()
+
+        df = read_dataset('raw')
         df.set_index('timestamp', inplace=True)
 
         # Validation: Check if all 5 physical parameters exist
@@ -153,38 +177,20 @@ def fetch_open_meteo_history(lat, lon, start_date, end_date):
     Downloads data for a specific location dynamically and returns a DataFrame.
     Does NOT save to the main raw file to avoid overwriting the thesis dataset.
     """
-    # 1. Build Dynamic URL
-    url = config.API_URL_TEMPLATE.format(
-        lat=lat,
-        lon=lon,
-        start=start_date,
-        end=end_date,
-        timezone="auto"  # Auto-detect timezone for the new location
-    )
-
-    print(f"Fetching adaptive data from: {url}")
+    print(f"Fetching adaptive data for ({lat}, {lon}) from {start_date} to {end_date}...")
 
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-
-        # 2. Parse CSV directly from memory string
-        csv_data = StringIO(response.text)
-        df = pd.read_csv(csv_data, skiprows=2)
-
-        # 3. Standardize Columns (Reuse logic)
-        rename_map = {
-            'time': 'timestamp',
-            'temperature_2m (°C)': 'temperature',
-            'relative_humidity_2m (%)': 'humidity',
-            'surface_pressure (hPa)': 'pressure',
-            'wind_speed_10m (m/s)': 'wind_speed',
-            'precipitation (mm)': 'precipitation'
-        }
-        df.rename(columns=rename_map, inplace=True)
-
-        # 4. Datetime Conversion
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        # 1. Parallel chunked download (cached responses are reused across calls)
+        csv_text = download_range(
+            lat=lat,
+            lon=lon,
+            start_date=start_date,
+            end_date=end_date,
+            timezone="auto"  # Auto-detect timezone for the new location
+        )
+
+        # 2. Parse CSV directly from memory string & standardize columns (Reuse logic)
+        df = parse_open_meteo_csv(StringIO(csv_text))
 
         # We do NOT set index here yet, to keep it flexible for further processing
 
@@ -0,0 +1,263 @@
+# src/data_acquisition/parquet_store.py
+"""
+Columnar Dataset Storage Module.
+
+Every pipeline stage used to round-trip through CSV, re-parsing text floats and
+timestamps on each read. This module stores the Raw, Synthetic, Hybrid and split
+(Train/Validation/Test) tables as typed, ZSTD-compressed Parquet datasets,
+hive-partitioned by year/month:
+
+    data/parquet/<name>/year=2024/month=2/part-0.parquet
+
+Readers benefit from:
+1. Column Projection: Only the requested columns are decoded.
+2. Predicate Pushdown: Year/month filters prune whole partitions before any I/O.
+3. Typed Columns: Timestamps come back as datetime64, no string parsing.
+
+CSV remains available as an export format (config.EXPORT_CSV) for manual inspection
+and the thesis documentation.
+"""
+
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from typing import Iterator, List, Optional, Sequence
+
+from src import config
+
+# Hidden column preserving the original row order (partitions are read back in path order)
+ROW_ID_COL = '_row_id'
+PARTITION_COLS = ['year', 'month']
+PARTITIONING = ds.partitioning(pa.schema([('year', pa.int16()), ('month', pa.int8())]), flavor='hive')
+
+# CSV export targets (the raw CSV is the original API download and is never re-exported)
+CSV_EXPORT_PATHS = {
+    'synthetic': config.GENERATED_DATA_PATH,
+    'hybrid': config.HYBRID_DATA_PATH,
+    'train': os.path.join(config.DATA_DIR, 'train', 'train.csv'),
+    'validation': os.path.join(config.DATA_DIR, 'validation', 'validation.csv'),
+    'test': os.path.join(config.DATA_DIR, 'test', 'test.csv'),
+}
+
+
+def dataset_path(name: str) -> str:
+    """Root directory of a partitioned dataset."""
+    return os.path.join(config.PARQUET_DIR, name)
+
+
+def dataset_exists(name: str) -> bool:
+    """True if the dataset has at least one Parquet fragment on disk."""
+    return len(dataset_files(name)) > 0
+
+
+def dataset_files(name: str) -> List[str]:
+    """Sorted list of the Parquet files belonging to a dataset."""
+    root = dataset_path(name)
+    files = []
+    for dir_path, _, file_names in os.walk(root):
+        files.extend(os.path.join(dir_path, f) for f in file_names if f.endswith('.parquet'))
+    return sorted(files)
+
+
+def _to_storage_frame(df: pd.DataFrame, row_ids: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Normalizes a frame for storage: 'timestamp' becomes a regular typed column,
+    partition keys are derived from it and the row order is captured
+    (0..N-1, or the explicit `row_ids` when a dataset is written chunk by chunk).
+    """
+    if 'timestamp' not in df.columns:
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("DataFrame must have a DatetimeIndex or a 'timestamp' column.")
+        df = df.reset_index().rename(columns={df.index.name or 'index': 'timestamp'})
+    else:
+        df = df.reset_index(drop=True)
+
+    out = df.copy()
+    out['timestamp'] = pd.to_datetime(out['timestamp'])
+    out[PARTITION_COLS[0]] = out['timestamp'].dt.year.astype(np.int16)
+    out[PARTITION_COLS[1]] = out['timestamp'].dt.month.astype(np.int8)
+    out[ROW_ID_COL] = np.arange(len(out), dtype=np.int64) if row_ids is None else np.asarray(row_ids, dtype=np.int64)
+
+    if 'is_simulated' in out.columns:
+        out['is_simulated'] = out['is_simulated'].astype(np.int8)
+
+    return out
+
+
+def _write_fragments(frame: pd.DataFrame, root: str, basename_template: str = 'part-{i}.parquet') -> None:
+    """Writes a storage frame into the partition directories below `root`."""
+    ds.write_dataset(
+        pa.Table.from_pandas(frame, preserve_index=False),
+        root,
+        format='parquet',
+        partitioning=PARTITIONING,
+        basename_template=basename_template,
+        file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+        existing_data_behavior='overwrite_or_ignore'
+    )
+
+
+def write_dataset(df: pd.DataFrame, name: str, export_csv: Optional[bool] = None) -> str:
+    """
+    Writes a table as a year/month partitioned Parquet dataset (full overwrite).
+
+    Args:
+        df (pd.DataFrame): Table with a 'timestamp' column or a DatetimeIndex.
+        name (str): Dataset name (e.g., 'hybrid', 'train').
+        export_csv (bool, optional): Also export a CSV copy. Defaults to config.EXPORT_CSV.
+
+    Returns:
+        str: Root directory of the written dataset.
+    """
+    root = dataset_path(name)
+    frame = _to_storage_frame(df)
+
+    # Write to a sibling directory and swap, so readers never observe a half-written dataset
+    tmp_root = root + ".tmp"
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    _write_fragments(frame, tmp_root)
+    shutil.rmtree(root, ignore_errors=True)
+    os.replace(tmp_root, root)
+
+    if export_csv is None:
+        export_csv = config.EXPORT_CSV
+    if export_csv and name in CSV_EXPORT_PATHS:
+        export_dataset_csv(name, frame.drop(columns=PARTITION_COLS + [ROW_ID_COL]))
+
+    return root
+
+
+def read_dataset(
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        years: Optional[Sequence[int]] = None,
+        months: Optional[Sequence[int]] = None
+) -> pd.DataFrame:
+    """
+    Reads a partitioned dataset with column projection and partition pruning.
+
+    Args:
+        name (str): Dataset name.
+        columns (list, optional): Columns to decode (None = all stored columns).
+        years (list, optional): Only read these years.
+        months (list, optional): Only read these months (1-12).
+
+    Returns:
+        pd.DataFrame: Rows in their original order, with a RangeIndex.
+    """
+    if not dataset_exists(name):
+        raise FileNotFoundError(f"Parquet dataset '{name}' not found at {dataset_path(name)}.")
+
+    dataset = ds.dataset(dataset_path(name), format='parquet', partitioning=PARTITIONING)
+
+    predicate = None
+    if years is not None:
+        predicate = ds.field('year').isin([int(y) for y in years])
+    if months is not None:
+        month_filter = ds.field('month').isin([int(m) for m in months])
+        predicate = month_filter if predicate is None else predicate & month_filter
+
+    stored_cols = [c for c in dataset.schema.names if c not in PARTITION_COLS + [ROW_ID_COL]]
+    projected = list(columns) if columns is not None else stored_cols
+
+    table = dataset.to_table(columns=projected + [ROW_ID_COL], filter=predicate)
+    table = table.sort_by(ROW_ID_COL).drop_columns([ROW_ID_COL])
+
+    return table.to_pandas()
+
+
+def iter_dataset_batches(
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        batch_rows: int = 100_000
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams a dataset as DataFrames of at most `batch_rows` rows (out-of-core processing).
+
+    Batches come in fragment order, NOT in the original row order: every batch carries the
+    ROW_ID_COL column, so chunked writers can preserve the original order (see ChunkedDatasetWriter).
+    Only one batch is decoded at a time (no read-ahead), which bounds peak memory.
+    """
+    if not dataset_exists(name):
+        raise FileNotFoundError(f"Parquet dataset '{name}' not found at {dataset_path(name)}.")
+
+    dataset = ds.dataset(dataset_path(name), format='parquet', partitioning=PARTITIONING)
+    stored_cols = [c for c in dataset.schema.names if c not in PARTITION_COLS + [ROW_ID_COL]]
+    projected = list(columns) if columns is not None else stored_cols
+
+    for batch in dataset.to_batches(columns=projected + [ROW_ID_COL], batch_size=batch_rows,
+                                    batch_readahead=0, fragment_readahead=0):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+class ChunkedDatasetWriter:
+    """
+    Writes a partitioned dataset chunk by chunk, with explicit row ids.
+
+    `read_dataset` sorts by ROW_ID_COL, so chunks may be written in any order: the dataset
+    reads back exactly as if it had been written in one `write_dataset` call with the rows
+    ordered by their ids. Ids only need to be unique and ordered, not contiguous.
+    The dataset is built in a sibling directory and swapped in by `close()`.
+
+    Usage:
+        with ChunkedDatasetWriter('train') as writer:
+            writer.write(chunk_df, row_ids)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.root = dataset_path(name)
+        self.tmp_root = self.root + ".tmp"
+        self.rows_written = 0
+        self._chunks = 0
+        shutil.rmtree(self.tmp_root, ignore_errors=True)
+        os.makedirs(self.tmp_root, exist_ok=True)
+
+    def write(self, df: pd.DataFrame, row_ids: np.ndarray) -> None:
+        """Appends one chunk (a frame with a 'timestamp' column or a DatetimeIndex)."""
+        if len(df) == 0:
+            return
+        frame = _to_storage_frame(df, row_ids)
+        _write_fragments(frame, self.tmp_root, basename_template=f'part-{self._chunks}-{{i}}.parquet')
+        self._chunks += 1
+        self.rows_written += len(frame)
+
+    def close(self) -> str:
+        """Publishes the dataset (atomic swap) and returns its root directory."""
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.replace(self.tmp_root, self.root)
+        return self.root
+
+    def abort(self) -> None:
+        """Discards the partially written dataset; the previous version stays in place."""
+        shutil.rmtree(self.tmp_root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def export_dataset_csv(name: str, df: Optional[pd.DataFrame] = None) -> str:
+    """
+    Exports a dataset to its legacy CSV location (same layout as the pre-Parquet pipeline).
+
+    Returns:
+        str: Path of the written CSV.
+    """
+    path = CSV_EXPORT_PATHS[name]
+    if df is None:
+        df = read_dataset(name)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False)
+    return path
@@ -6,107 +6,169 @@ This module implements statistical augmentation strategies to create "Black Swan
 events (extreme weather scenarios) that are historically rare but critical for
 training robust Neural Networks.
 
-Scenarios generated:
+Scenarios (declared in config.EXTREME_SCENARIOS):
 1. Heatwaves (high temp, low humidity)
 2. Severe storms (high wind, pressure drop, heavy rain)
 3. Late frost (negative temp in Spring)
+
+Scenario Engine:
+Every scenario is generated as contiguous multi-hour episodes (`duration_hours`)
+starting inside its season. All episodes of all scenarios are produced in ONE batched
+NumPy pass (per-hour parameter gather + vectorised sampling + one time-embedding call),
+driven by a seeded generator, so the cost is linear in the number of synthetic hours.
 """
 
-import pandas as pd
 import numpy as np
-import os
+import pandas as pd
+from typing import Optional, Tuple
 from src import config
-from src.data_acquisition.data_loader import load_raw_data, add_time_features
-
-def generate_random_timestamps(n_samples: int, months: list) -> pd.DatetimeIndex:
-    """
-    Generates random hourly timestamps within specific months.
-    Used to place synthetic events in the correct season (e.g., Snow in Winter).
-    """
-    # Create a generic year timeframe (e.g., 2022)
-    dates = pd.date_range(start='2022-01-01', end='2022-12-31', freq='h')
-    # Filter by desired months
-    filtered = dates[dates.month.isin(months)]
-    # Sample randomly
-    timestamps = pd.DatetimeIndex(np.random.choice(filtered, size=n_samples))
-    timestamps.name = 'timestamp'
-    return timestamps
-
-def generate_heatwave(base_df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Simulates extreme heatwaves (>40°C).
-    Physics: Temperature rises, Humidity drops, Zero precipitation.
-    """
-    print("Generating heatwaves...")
+from src.data_acquisition.data_loader import load_raw_data
+from src.data_acquisition.parquet_store import write_dataset, dataset_path
+from src.preprocessing.time_features import TIME_FEATURE_COLS, time_embedding
 
-    # Summer months: June, July, August
-    n = 2000
-    timestamps = generate_random_timestamps(n, [6, 7, 8])
+# Distribution codes of the declarative variable specs
+DISTRIBUTIONS = {"constant": 0, "uniform": 1, "normal": 2}
 
-    # Creates base dataframe
-    summer_data = pd.DataFrame(index=timestamps)
+HOUR_S = 3600
 
-    # Physics
-    summer_data['temperature'] = np.random.uniform(40.0, 44.0, size=n)
-    summer_data['humidity'] = np.random.uniform(20.0, 40.0, size=n)  # Dry
-    summer_data['pressure'] = np.random.normal(1010, 5, size=n)
-    summer_data['wind_speed'] = np.random.uniform(0, 10, size=n)
-    summer_data['precipitation'] = 0.0
 
-    # Add Time Features
-    summer_data = add_time_features(summer_data)
-
-    summer_data['is_simulated'] = 1
-    return summer_data[config.FEATURE_COLS + ['is_simulated']]
-
-def generate_storm(base_df: pd.DataFrame) -> pd.DataFrame:
+def _season_calendar(months: list, year: int) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Simulates severe storms.
-    Physics: High wind, Sharp pressure drop, Heavy precipitation, High humidity.
+    Hourly calendar of a season inside the reference year.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Epoch seconds (int64) of every in-season hour, and for
+        each of them the number of consecutive in-season hours left (incl. itself).
     """
-    print("Generating severe storms...")
+    hours = pd.date_range(start=f'{year}-01-01', end=f'{year}-12-31 23:00', freq='h')
+    in_season = hours.month.isin(months)
+    epoch_s = hours.as_unit('s').asi8
+
+    # Run length to the end of each in-season block (a season has at most a few blocks)
+    flags = np.r_[0, in_season.astype(np.int8), 0]
+    block_starts = np.flatnonzero(np.diff(flags) == 1)
+    block_ends = np.flatnonzero(np.diff(flags) == -1)  # Exclusive
+    run_left = np.zeros(len(hours), dtype=np.int64)
+    for start, end in zip(block_starts, block_ends):
+        run_left[start:end] = np.arange(end - start, 0, -1)
 
-    # Storms can happen anytime, mostly Spring/Autumn
-    n = 2000
-    timestamps = generate_random_timestamps(n, [3, 4, 5, 9, 10, 11])
+    return epoch_s[in_season], run_left[in_season]
 
-    storm_base = pd.DataFrame(index=timestamps)
 
-    # Extreme wind
-    storm_base['temperature'] = np.random.uniform(10.0, 25.0, size=n)
-    storm_base['wind_speed'] = np.random.uniform(20.0, 30.0, size=n)
-    storm_base['pressure'] = np.random.uniform(970.0, 990.0, size=n)  # Low pressure
-    storm_base['precipitation'] = np.random.uniform(1.0, 15.0, size=n)
-    storm_base['humidity'] = np.random.uniform(80.0, 100.0, size=n)
+def _episode_durations(target_hours: int, duration_range: tuple, rng: np.random.Generator) -> np.ndarray:
+    """Draws episode lengths until `target_hours` is covered (the last episode is truncated)."""
+    low, high = duration_range
+    if target_hours <= 0:
+        return np.zeros(0, dtype=np.int64)
 
-    storm_base = add_time_features(storm_base)
+    # Upper bound on the number of episodes needed, drawn in one call
+    durations = rng.integers(low, high + 1, size=int(np.ceil(target_hours / low)))
+    cumulative = np.cumsum(durations)
+    n_episodes = int(np.searchsorted(cumulative, target_hours)) + 1
+    durations = durations[:n_episodes]
+    durations[-1] -= cumulative[n_episodes - 1] - target_hours
+    return durations
 
-    storm_base['is_simulated'] = 1
-    return storm_base[config.FEATURE_COLS + ['is_simulated']]
 
-def generate_late_frost(base_df: pd.DataFrame) -> pd.DataFrame:
+def _episode_starts(months: list, durations: np.ndarray, year: int, rng: np.random.Generator) -> np.ndarray:
     """
-    Simulates agricultural frost in spring.
-    Physics: Sub-zero temperature in April/May, zero rain (clear sky frost).
+    Draws a start hour (epoch seconds) per episode so that the whole episode stays inside the season.
+    Invalid draws (episode would leave the season) are redrawn in vectorised rounds.
     """
-    print("Generating late frost events...")
+    season_s, run_left = _season_calendar(months, year)
+    positions = rng.integers(0, len(season_s), size=len(durations))
 
-    # April/May
-    n = 1000
-    timestamps = generate_random_timestamps(n, [4, 5])
+    # Episodes longer than the longest season block can only be clipped; accept them as-is
+    feasible = durations <= run_left.max()
+    invalid = np.flatnonzero((run_left[positions] < durations) & feasible)
+    while invalid.size:
+        positions[invalid] = rng.integers(0, len(season_s), size=invalid.size)
+        invalid = invalid[run_left[positions[invalid]] < durations[invalid]]
 
-    frost_base = pd.DataFrame(index=timestamps)
+    return season_s[positions]
 
-    frost_base['temperature'] = np.random.uniform(-3.0, 0.0, size=n)
-    frost_base['precipitation'] = 0.0
-    frost_base['humidity'] = np.random.uniform(40.0, 70.0, size=n)
-    frost_base['pressure'] = np.random.uniform(1015.0, 1030.0, size=n)  # High pressure
-    frost_base['wind_speed'] = np.random.uniform(0.0, 5.0, size=n)
 
-    frost_base = add_time_features(frost_base)
+def generate_scenarios(
+        total_hours: Optional[dict] = None,
+        scenarios: Optional[dict] = None,
+        rng: Optional[np.random.Generator] = None,
+        year: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Generates every Black Swan scenario in one batched pass.
+
+    Args:
+        total_hours (dict, optional): Hours per scenario. Defaults to the `n_hours` of each scenario.
+        scenarios (dict, optional): Scenario spec (default config.EXTREME_SCENARIOS).
+        rng (np.random.Generator, optional): Seeded generator (default seeded with config.SYNTHETIC_SEED).
+        year (int, optional): Calendar year of the episodes (default config.SCENARIO_REFERENCE_YEAR).
+
+    Returns:
+        pd.DataFrame: FEATURE_COLS + ['is_simulated', 'scenario'] indexed by 'timestamp'.
+            Episodes are contiguous blocks of rows in chronological order.
+    """
+    scenarios = scenarios or config.EXTREME_SCENARIOS
+    rng = rng or np.random.default_rng(config.SYNTHETIC_SEED)
+    year = year or config.SCENARIO_REFERENCE_YEAR
+    if total_hours is None:
+        total_hours = {name: int(spec["n_hours"]) for name, spec in scenarios.items()}
+
+    names = list(scenarios)
+    physics_cols = config.TARGET_COLS
+
+    # 1. Episode layout (per scenario: durations + season-constrained starts)
+    durations, starts, scenario_ids = [], [], []
+    for sid, name in enumerate(names):
+        spec = scenarios[name]
+        d = _episode_durations(total_hours.get(name, 0), spec["duration_hours"], rng)
+        durations.append(d)
+        starts.append(_episode_starts(spec.get("months", list(range(1, 13))), d, year, rng))
+        scenario_ids.append(np.full(len(d), sid, dtype=np.int64))
+        print(f"   -> {name}: {len(d)} episodes, {int(d.sum())} hours")
+
+    durations = np.concatenate(durations)
+    starts = np.concatenate(starts)
+    scenario_ids = np.concatenate(scenario_ids)
+    n_hours = int(durations.sum())
+
+    # 2. Expand episodes to hours (episode id + offset within the episode)
+    hour_episode = np.repeat(np.arange(len(durations)), durations)
+    episode_first_row = np.cumsum(durations) - durations
+    hour_offset = np.arange(n_hours) - np.repeat(episode_first_row, durations)
+    epoch_s = starts[hour_episode] + hour_offset * HOUR_S
+    hour_scenario = scenario_ids[hour_episode]
+
+    # 3. Parameter tables: (scenarios, variables) -> gathered per hour
+    codes = np.zeros((len(names), len(physics_cols)), dtype=np.int64)
+    param_a = np.zeros((len(names), len(physics_cols)))
+    param_b = np.zeros((len(names), len(physics_cols)))
+    for sid, name in enumerate(names):
+        for vid, col in enumerate(physics_cols):
+            dist, *params = scenarios[name]["variables"][col]
+            codes[sid, vid] = DISTRIBUTIONS[dist]
+            param_a[sid, vid] = params[0]
+            param_b[sid, vid] = params[1] if len(params) > 1 else 0.0
+
+    # 4. Sampling: episode-level draw blended with an hourly draw (coherent events)
+    def sample(index: np.ndarray) -> np.ndarray:
+        a, b, code = param_a[index], param_b[index], codes[index]
+        uniform = a + (b - a) * rng.random(a.shape)
+        normal = a + b * rng.standard_normal(a.shape)
+        return np.select([code == DISTRIBUTIONS["uniform"], code == DISTRIBUTIONS["normal"]], [uniform, normal], a)
+
+    coherence = config.SCENARIO_EPISODE_COHERENCE
+    episode_values = sample(scenario_ids)
+    physics = coherence * episode_values[hour_episode] + (1 - coherence) * sample(hour_scenario)
+
+    # 5. One time-embedding call for all synthetic hours
+    frame = pd.DataFrame(physics, columns=physics_cols)
+    frame[TIME_FEATURE_COLS] = time_embedding(epoch_s)
+    frame['is_simulated'] = 1
+    frame['scenario'] = pd.Categorical.from_codes(hour_scenario, categories=names)
+    frame.index = pd.DatetimeIndex(epoch_s.astype('datetime64[s]'), name='timestamp')
+
+    return frame[config.FEATURE_COLS + ['is_simulated', 'scenario']]
 
-    frost_base['is_simulated'] = 1
-    return frost_base[config.FEATURE_COLS + ['is_simulated']]
 
 def generate_synthetic_data():
     """
@@ -116,25 +178,25 @@ def generate_synthetic_data():
     print(f"Starting synthetic data pipeline. Target: ~{config.SYNTHETIC_SAMPLES_TARGET} samples.")
 
     real_df = load_raw_data()
+    rng = np.random.default_rng(config.SYNTHETIC_SEED)
 
-    # Generate specific scenarios
-    df_heat = generate_heatwave(real_df)
-    df_storm = generate_storm(real_df)
-    df_frost = generate_late_frost(real_df)
+    # Generate all Black Swan scenarios (contiguous episodes, one batched pass)
+    print("Generating extreme scenarios...")
+    df_scenarios = generate_scenarios(rng=rng).drop(columns='scenario')
 
     # Noise injection (general data augmentation)
     # I create slightly modified versions of real data to improve model robustness
     # against sensor noise (e.g., from the ESP32)
-    current_count = len(df_heat) + len(df_storm) + len(df_frost)
+    current_count = len(df_scenarios)
     remaining = config.SYNTHETIC_SAMPLES_TARGET - current_count
 
     if remaining > 0:
         print(f"[GEN] Augmenting with {remaining} noise samples...")
-        noise_df = real_df.sample(n=remaining, replace=True).copy()
+        noise_df = real_df.sample(n=remaining, replace=True, random_state=rng).copy()
 
         # Add noise only to physical columns, not time columns
-        noise_df['temperature'] += np.random.normal(0, 0.5, size=len(noise_df))
-        noise_df['humidity'] = (noise_df['humidity'] + np.random.normal(0, 2.0, size=len(noise_df))).clip(0, 100)
+        noise_df['temperature'] += rng.normal(0, 0.5, size=len(noise_df))
+        noise_df['humidity'] = (noise_df['humidity'] + rng.normal(0, 2.0, size=len(noise_df))).clip(0, 100)
 
         noise_df['is_simulated'] = 1
 
@@ -144,23 +206,22 @@ def generate_synthetic_data():
         noise_df = pd.DataFrame()
 
     # Combine all
-    synthetic_df = pd.concat([df_heat, df_storm, df_frost, noise_df])
+    synthetic_df = pd.concat([df_scenarios, noise_df])
 
     # Ensure the index is named before merge/save
     synthetic_df.index.name = 'timestamp'
 
-    # Save synthetic only
-    os.makedirs(os.path.dirname(config.GENERATED_DATA_PATH), exist_ok=True)
-    synthetic_df.to_csv(config.GENERATED_DATA_PATH)
-    print(f"Synthetic dataset saved to: {config.GENERATED_DATA_PATH}")
+    # Save synthetic only (Parquet + optional CSV export)
+    write_dataset(synthetic_df, 'synthetic')
+    print(f"Synthetic dataset saved to: {dataset_path('synthetic')}")
 
     # Create the hybrid dataset (real + synthetic)
     print("Creating the hybrid dataset (real + synthetic)...")
     hybrid_df = pd.concat([real_df, synthetic_df])
     hybrid_df.index.name = 'timestamp'
-    hybrid_df.to_csv(config.HYBRID_DATA_PATH)
+    write_dataset(hybrid_df, 'hybrid')
 
-    print(f"Hybrid dataset generated at: {config.HYBRID_DATA_PATH}")
+    print(f"Hybrid dataset generated at: {dataset_path('hybrid')}")
     print(f"   > Total Samples: {len(hybrid_df)}")
     print(f"   > Real: {len(real_df)} | Synthetic: {len(synthetic_df)}")
     print(f"   > Columns: {len(hybrid_df.columns)} (Expected 10: 9 Features + 1 Flag)")
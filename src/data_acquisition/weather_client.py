@@ -0,0 +1,173 @@
+# src/data_acquisition/weather_client.py
+"""
+Shared Weather API Client.
+
+All Open-Meteo traffic (historical archive downloads, adaptive retraining, dashboard
+live data) goes through a single client that provides:
+
+1. Connection Pooling: One `requests.Session` with a sized `HTTPAdapter`, so repeated
+   calls reuse TCP/TLS connections instead of re-handshaking every time.
+2. On-Disk Response Cache: Keyed by endpoint + query (coordinates, date range, variables).
+   - 'historical' entries are immutable (archive data never changes) and never expire.
+   - 'live' entries expire after a short TTL (config.API_CACHE_LIVE_TTL_S).
+3. Statistics: Hit / miss / expired / error counters for monitoring.
+
+Usage:
+    client = get_client()
+    text = client.get_text(url, kind='historical')
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from typing import Optional
+
+from src import config
+
+# 'historical' entries never expire, 'live' entries use a short TTL
+CACHE_KINDS = ('historical', 'live')
+
+
+class WeatherApiClient:
+    """
+    Pooled HTTP client with a TTL-aware on-disk response cache.
+
+    Attributes:
+        cache_dir (str): Root directory of the response cache.
+        live_ttl_s (float): Expiry of 'live' entries in seconds.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, live_ttl_s: Optional[float] = None, pool_size: int = 8):
+        self.cache_dir = cache_dir or config.API_CACHE_DIR
+        self.live_ttl_s = config.API_CACHE_LIVE_TTL_S if live_ttl_s is None else live_ttl_s
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "errors": 0, "bytes_downloaded": 0}
+
+    # ------------------------------------------------------------------
+    # Cache helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def cache_key(url: str) -> str:
+        """Stable key: endpoint + query parameters sorted (order-insensitive)."""
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        canonical = f"{parts.scheme}://{parts.netloc}{parts.path}?{query}"
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _entry_path(self, url: str) -> str:
+        key = self.cache_key(url)
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _ttl(self, kind: str) -> Optional[float]:
+        if kind not in CACHE_KINDS:
+            raise ValueError(f"Unknown cache kind '{kind}'. Expected one of {CACHE_KINDS}.")
+        return None if kind == 'historical' else self.live_ttl_s
+
+    def _read_entry(self, url: str, kind: str) -> Optional[str]:
+        """Returns the cached body if present and not expired."""
+        path = self._entry_path(url)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        ttl = self._ttl(kind)
+        if ttl is not None and time.time() - entry.get("fetched_at", 0) > ttl:
+            self._count("expired")
+            return None
+
+        return entry["body"]
+
+    def _write_entry(self, url: str, kind: str, body: str) -> None:
+        """Atomic write (tmp + replace) so concurrent readers never see partial JSON."""
+        path = self._entry_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # pid + thread: the cache is shared by the threads of every process (e.g., batch training)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"url": url, "kind": kind, "fetched_at": time.time(), "body": body}, f)
+        os.replace(tmp_path, path)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def is_cached(self, url: str, kind: str = 'historical') -> bool:
+        """True if a valid (non-expired) entry exists, without touching the statistics."""
+        path = self._entry_path(url)
+        if not os.path.exists(path):
+            return False
+        ttl = self._ttl(kind)
+        return ttl is None or time.time() - os.path.getmtime(path) <= ttl
+
+    def get_text(self, url: str, kind: str = 'historical', timeout: float = 30) -> str:
+        """
+        GET with caching. Only successful (2xx) responses are cached.
+
+        Raises:
+            requests.exceptions.RequestException: Network errors and HTTP error statuses.
+        """
+        cached = self._read_entry(url, kind)
+        if cached is not None:
+            self._count("hits")
+            return cached
+
+        self._count("misses")
+        try:
+            response = self.session.get(url, timeout=timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            self._count("errors")
+            raise
+
+        # Open-Meteo CSV headers contain non-ASCII units (°C); prefer UTF-8 over requests' guess
+        try:
+            body = response.content.decode('utf-8')
+        except UnicodeDecodeError:
+            body = response.text
+        self._count("bytes_downloaded", len(response.content))
+        self._write_entry(url, kind, body)
+        return body
+
+    def get_json(self, url: str, kind: str = 'live', timeout: float = 30):
+        """JSON variant of `get_text`."""
+        return json.loads(self.get_text(url, kind=kind, timeout=timeout))
+
+    def stats(self) -> dict:
+        """Snapshot of the cache counters (+ hit ratio)."""
+        with self._lock:
+            snapshot = dict(self._stats)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_ratio"] = snapshot["hits"] / lookups if lookups else 0.0
+        return snapshot
+
+
+_shared_client: Optional[WeatherApiClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_client() -> WeatherApiClient:
+    """Process-wide shared client (one connection pool, one cache)."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = WeatherApiClient()
+        return _shared_client
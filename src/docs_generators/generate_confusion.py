@@ -2,16 +2,16 @@
 import os
 import sys
 import numpy as np
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import tensorflow as tf
-import joblib
 from sklearn.metrics import confusion_matrix, classification_report, f1_score
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from src import config
+from src.preprocessing.feature_transform import load_feature_transform
+from src.preprocessing.sequence_store import load_sequences
 
 
 # Definim functia custom loss
@@ -32,56 +32,22 @@ def generate_matrix():
     print("🚀 Analiză Performanță Precipitații (Threshold Tuning)...")
 
     # 1. Incarcare Date
-    test_df = pd.read_csv(config.BASE_DIR + '/data/test/test.csv')
-
-    # Feature Engineering
-    day = 24 * 60 * 60
-    year = 365.2425 * day
-    test_df['timestamp'] = pd.to_datetime(test_df['timestamp'])
-    ts_s = test_df['timestamp'].map(pd.Timestamp.timestamp)
-
-    test_df['day_sin'] = np.sin(ts_s * (2 * np.pi / day))
-    test_df['day_cos'] = np.cos(ts_s * (2 * np.pi / day))
-    test_df['year_sin'] = np.sin(ts_s * (2 * np.pi / year))
-    test_df['year_cos'] = np.cos(ts_s * (2 * np.pi / year))
-
-    # Log Transform Input
-    if 'precipitation' in test_df.columns:
-        test_df['precipitation'] = np.log1p(test_df['precipitation'])
-
-    # 2. Scalare
-    scaler = joblib.load(config.SCALER_PATH)
-    feature_cols = config.TARGET_COLS + ['day_sin', 'day_cos', 'year_sin', 'year_cos']
-    data_values = test_df[feature_cols].values
-    data_scaled = scaler.transform(data_values)
-
-    # 3. Secvente
-    X, y_true_scaled = [], []
-    win_size = config.SEQ_LENGTH
-    horizon = config.PREDICT_HORIZON
-    target_indices = [0, 1, 2, 3, 4]
-
-    for i in range(win_size, len(data_scaled) - horizon):
-        X.append(data_scaled[i - win_size:i])
-        y_true_scaled.append(data_scaled[i + horizon, target_indices])
-
-    X = np.array(X)
-    y_true_scaled = np.array(y_true_scaled)
-
-    # 4. Predictie
+    # Setul de test este deja scalat (split_data.py); il mapam direct din sequence store,
+    # fara a reciti CSV-ul si fara a reconstrui ferestrele.
+    transform = load_feature_transform()
+
+    # 2. Secvente (view read-only peste memmap)
+    X, y_true_scaled = load_sequences('test')
+
+    # 3. Predictie
     model = tf.keras.models.load_model(config.MODEL_PATH,
                                        custom_objects={'asymmetric_precipitation_loss': asymmetric_precipitation_loss})
     y_pred_scaled = model.predict(X, verbose=0)
 
-    # 5. Denormalizare & Analiza Valori
-    def denormalize_rain(scaled_rain_col):
-        dummy = np.zeros((len(scaled_rain_col), 9))
-        dummy[:, 4] = scaled_rain_col
-        real = scaler.inverse_transform(dummy)[:, 4]
-        return np.expm1(real)  # Inverse Log
-
-    rain_true = denormalize_rain(y_true_scaled[:, 4])
-    rain_pred = denormalize_rain(y_pred_scaled[:, 4])
+    # 4. Denormalizare & Analiza Valori
+    # Transformarea compilata inverseaza scalarea + log1p direct pe cele 5 coloane (fara matrice dummy)
+    rain_true = transform.inverse_transform(y_true_scaled, constrain=False)[:, 4]
+    rain_pred = transform.inverse_transform(y_pred_scaled, constrain=False)[:, 4]
 
     # --- DEBUGGING CRITIC ---
     print(f"\n📊 Statistici Predicții:")
@@ -90,7 +56,7 @@ def generate_matrix():
     print(f"  Media Pred: {rain_pred.mean():.4f} mm")
     print(f"  Median Pred: {np.median(rain_pred):.4f} mm")
 
-    # 6. Căutare Prag Optim (Threshold Tuning)
+    # 5. Căutare Prag Optim (Threshold Tuning)
     best_thresh = 0.1
     best_f1 = 0
 
@@ -110,7 +76,7 @@ def generate_matrix():
 
     print(f"✅ Prag Optim Identificat: {best_thresh:.2f} mm (F1 Score: {best_f1:.2f})")
 
-    # 7. Generare Matrice Finală cu Pragul Optim
+    # 6. Generare Matrice Finală cu Pragul Optim
     y_class_true = (rain_true > 0.1).astype(int)
     y_class_pred = (rain_pred > best_thresh).astype(int)
 
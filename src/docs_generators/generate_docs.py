@@ -15,21 +15,24 @@ import seaborn as sns
 import os
 import sys
 from src import config
+from src.data_acquisition.parquet_store import read_dataset, dataset_exists, dataset_path
+
+# Only these columns are decoded from the Parquet dataset (column projection)
+DOCS_COLUMNS = ['timestamp', 'is_simulated', 'temperature', 'wind_speed', 'pressure', 'precipitation']
 
 def load_hybrid_data() -> pd.DataFrame:
     """
     Loads the hybrid dataset and ensures the timestamp is properly typed.
     :return: pd.DataFrame: The loaded dataset with datetime index.
     """
-    if not os.path.exists(config.HYBRID_DATA_PATH):
-        print(f"Hybrid dataset not found at {config.HYBRID_DATA_PATH}")
+    if not dataset_exists('hybrid'):
+        print(f"Hybrid dataset not found at {dataset_path('hybrid')}")
         print("Please run 'main.py' fisrt to generate the data.")
         sys.exit(1)
 
     try:
-        df = pd.read_csv(config.HYBRID_DATA_PATH)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-        return df
+        # Timestamps are stored typed (datetime64), no parsing needed
+        return read_dataset('hybrid', columns=DOCS_COLUMNS)
     except Exception as e:
         print(f"Failed to load data: {e}")
         sys.exit(1)
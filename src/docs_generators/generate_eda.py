@@ -21,40 +21,26 @@ import sys
 # Ensure project root is in path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 from src import config
+from src.data_acquisition.data_loader import convert_raw_to_parquet
+from src.data_acquisition.parquet_store import read_dataset, dataset_exists
 
 
 def load_and_clean_data() -> pd.DataFrame:
     """
-    Loads raw weather data and cleans column names for analysis.
-    Mimics the logic in data_loader.py but for analysis purposes.
+    Loads raw weather data (already renamed to the internal schema) for analysis.
+    Reads the typed 'raw' Parquet dataset; it is built from the raw CSV on first use.
     """
-    if not os.path.exists(config.RAW_DATA_PATH):
+    if not os.path.exists(config.RAW_DATA_PATH) and not dataset_exists('raw'):
         print(f"[ERROR] Raw data not found at {config.RAW_DATA_PATH}")
         print("Please run 'main.py --force-data' first.")
         sys.exit(1)
 
     try:
-        # Open-Meteo CSVs usually have 2 lines of metadata before header
-        df = pd.read_csv(config.RAW_DATA_PATH, skiprows=2)
-
-        # Rename raw columns to clean, professional names
-        # We use a flexible map in case specific units differ slightly
-        rename_map = {
-            'time': 'timestamp',
-            'temperature_2m (°C)': 'temperature',
-            'relative_humidity_2m (%)': 'humidity',
-            'surface_pressure (hPa)': 'pressure',
-            'wind_speed_10m (m/s)': 'wind_speed',
-            'precipitation (mm)': 'precipitation'
-        }
-
-        # Rename available columns
-        df.rename(columns=rename_map, inplace=True)
-
-        # Handle Timestamp
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df.set_index('timestamp', inplace=True)
+        if not dataset_exists('raw'):
+            convert_raw_to_parquet()
+
+        df = read_dataset('raw')
+        df.set_index('timestamp', inplace=True)
 
         return df
 
@@ -5,11 +5,22 @@ Time series data generator module.
 This module provides a utility class to transform flat, 2D tabular data (pandas DataFrame)
 into 3D sequences (Samples, TimeSteps, Features) required for LSTM training.
 It handles the 'Sliding Window' logic crucial for temporal forecasting.
+
+Two windowing modes are available:
+- 'copy' (default): Every window is materialised as an independent array.
+- 'view': Windows are read-only strided views over the feature array (zero-copy).
+  Both modes produce identical values; 'view' avoids holding ~3x the final tensor in RAM.
+
+Label blocks: With `horizon=H` every window is paired with the next H target rows,
+y of shape (N, H, 5), for the direct multi-horizon head (one forward pass = full forecast).
 """
 
 import numpy as np
 import pandas as pd
-from typing import Tuple, List
+from numpy.lib.stride_tricks import as_strided
+from typing import Tuple, List, Optional
+
+WINDOW_MODES = ('copy', 'view')
 
 class TimeSeriesGenerator:
     """
@@ -20,13 +31,33 @@ class TimeSeriesGenerator:
         label_width (int): Forecast horizon (offset into the future).
         feature_cols (List[str]): Input feature names.
         target_cols (List[str]): Target feature names to predict.
+        mode (str): Windowing strategy, 'copy' (materialised) or 'view' (zero-copy strided).
+        horizon (int, optional): Number of consecutive target rows per label block, starting at
+            the 'label_width' offset. None keeps single target vectors (N, Targets).
     """
 
-    def __init__(self, input_width: int, label_width: int, feature_cols: List[str], target_cols: List[str]):
+    def __init__(self, input_width: int, label_width: int, feature_cols: List[str], target_cols: List[str],
+                 mode: str = 'copy', horizon: Optional[int] = None):
+        if mode not in WINDOW_MODES:
+            raise ValueError(f"Unknown windowing mode '{mode}'. Expected one of {WINDOW_MODES}.")
+        if horizon is not None and horizon < 1:
+            raise ValueError(f"Label horizon must be >= 1, got {horizon}.")
+
         self.input_width = input_width
         self.label_width = label_width
         self.feature_cols = feature_cols
         self.target_cols = target_cols
+        self.mode = mode
+        self.horizon = horizon
+
+    @property
+    def label_span(self) -> int:
+        """Number of target rows per label (1 for single vectors)."""
+        return self.horizon or 1
+
+    def num_sequences(self, num_rows: int) -> int:
+        """Number of (X, y) pairs that fit in a table of `num_rows` rows."""
+        return max(num_rows - self.input_width - self.label_width - (self.label_span - 1), 0)
 
     def create_sequences(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -34,7 +65,8 @@ class TimeSeriesGenerator:
 
         Logic:
             At time 't', 'X' contains data from [t - input_width] to [t].
-            'y' contains the target vector at [t + label_width].
+            'y' contains the target vector at [t + label_width]
+            (with `horizon`: the H vectors from [t + label_width] to [t + label_width + H - 1]).
 
         Args:
             df (pd.DataFrame): Normalized source dataframe.
@@ -46,11 +78,14 @@ class TimeSeriesGenerator:
         data_array = df[self.feature_cols].values
         target_array = df[self.target_cols].values
 
+        if self.mode == 'view':
+            return self.create_sequences_from_arrays(data_array, target_array)
+
         X, y = [], []
 
         # Iterate ensuring boundary safety for both history lookback and future forecast
         # Stop condition: len(df) - label_width ensures not indexing out of bounds in the future
-        for i in range(self.input_width, len(df) - self.label_width):
+        for i in range(self.input_width, len(df) - self.label_width - (self.label_span - 1)):
 
             # Extract the window of the past data
             # Shape: (input_width, num_features) -> e.g., (24, 5)
@@ -58,22 +93,76 @@ class TimeSeriesGenerator:
 
             # Extract the target value in the future
             # Shape: (num_targets,) -> e.g., (5,) vector [Temp, Hum, Pres, Wind, Rain]
-            target = target_array[i + self.label_width]
+            # or (horizon, num_targets) -> e.g., (24, 5) block for the multi-horizon head
+            if self.horizon is None:
+                target = target_array[i + self.label_width]
+            else:
+                target = target_array[i + self.label_width:i + self.label_width + self.horizon]
 
             X.append(window)
             y.append(target)
 
         return np.array(X), np.array(y)
 
+    def create_sequences_from_arrays(self, data_array: np.ndarray, target_array: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Zero-copy variant of `create_sequences` operating on raw 2D arrays.
+
+        X is a read-only strided view of shape (N, input_width, num_features): window 'k'
+        starts at row 'k', so consecutive windows share memory with the source array.
+        y is gathered with fancy indexing (one small copy of shape (N, num_targets)); label
+        blocks (N, horizon, num_targets) are a read-only strided view of the target array as well.
+
+        Args:
+            data_array (np.ndarray): 2D feature matrix (Rows, Features).
+            target_array (np.ndarray): 2D target matrix (Rows, Targets).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: X (read-only view), y (Labels).
+        """
+        num_rows, num_features = data_array.shape
+        n = self.num_sequences(num_rows)
+
+        # Identical boundaries to the loop: t runs over [input_width, num_rows - label_width)
+        row_stride, col_stride = data_array.strides
+        X = as_strided(
+            data_array,
+            shape=(n, self.input_width, num_features),
+            strides=(row_stride, row_stride, col_stride),
+            writeable=False
+        )
+
+        first_target = self.input_width + self.label_width
+        if self.horizon is None:
+            y = target_array[np.arange(first_target, first_target + n)]
+        else:
+            target_row_stride, target_col_stride = target_array.strides
+            y = as_strided(
+                target_array[first_target:],
+                shape=(n, self.horizon, target_array.shape[1]),
+                strides=(target_row_stride, target_row_stride, target_col_stride),
+                writeable=False
+            )
+
+        return X, y
+
 if __name__ == "__main__":
     # Unit test
     print("Returning data generator test...")
     cols_in = ['T', 'H', 'P', 'W', 'R', 'D_sin', 'D_cos', 'Y_sin', 'Y_cos']
     cols_out = ['T', 'H', 'P', 'W', 'R']
-    mock_data = pd.DataFrame(np.random.rand(100, 9), columns=cols)
+    mock_data = pd.DataFrame(np.random.rand(100, 9), columns=cols_in)
 
     gen = TimeSeriesGenerator(24, 1, cols_in, cols_out)
     X, y = gen.create_sequences(mock_data)
 
     print(f"Input Shape: {X.shape} (Expected: (75, 24, 9))")
     print(f"Target Shape: {y.shape} (Expected: (75, 5))")
+
+    X_view, y_view = TimeSeriesGenerator(24, 1, cols_in, cols_out, mode='view').create_sequences(mock_data)
+    print(f"Zero-copy mode identical: {np.array_equal(X, X_view) and np.array_equal(y, y_view)}")
+
+    X_block, y_block = TimeSeriesGenerator(24, 1, cols_in, cols_out, horizon=24).create_sequences(mock_data)
+    _, y_block_view = TimeSeriesGenerator(24, 1, cols_in, cols_out, mode='view', horizon=24).create_sequences(mock_data)
+    print(f"Label blocks: {y_block.shape} (Expected: (52, 24, 5)), "
+          f"zero-copy identical: {np.array_equal(y_block, y_block_view)}")
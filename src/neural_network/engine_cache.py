@@ -0,0 +1,53 @@
+# src/neural_network/engine_cache.py
+"""
+Per-Model Engine Cache.
+
+The forecast engines (rollout.py, numpy_lstm.py, multi_horizon.py) and the streaming
+forecasters (stateful.py) are costly to build (traced graphs, stacked weights, restored
+device states), so one is kept per model object and reused across calls.
+
+The cache lives on the model itself. A module-level WeakKeyDictionary cannot be used:
+its value (the engine) references its key (`engine.model`), so no entry would ever be
+collected and every model would stay alive for the life of the process. Stored on the
+model, model and engine only form a cycle that the garbage collector frees together.
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+
+_CACHE_ATTR = "_sia_engine_cache"
+
+
+def cached_engine(
+        model,
+        kind: str,
+        transform,
+        bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]],
+        horizon: Optional[int],
+        build: Callable[[], object]
+):
+    """
+    Returns the `kind` engine cached on `model`, building a new one with `build()` when
+    there is none yet or the transform, bounds or horizon changed.
+
+    Args:
+        model: Keras model or NumpyLSTM the engine runs.
+        kind (str): Engine family (a model can hold one engine per family).
+        transform: FeatureTransform of the engine (compared by identity).
+        bounds (dict): Output bounds of the engine.
+        horizon (int): Forecast length of the engine.
+        build (callable): Creates the engine.
+    """
+    key = (sorted((bounds or {}).items()), horizon)
+    cache = getattr(model, _CACHE_ATTR, None)
+    if cache is None:
+        cache = {}
+        # object.__setattr__: Keras layers would otherwise track the dict as model state
+        object.__setattr__(model, _CACHE_ATTR, cache)
+
+    cached = cache.get(kind)
+    if cached is not None and cached[1] is transform and cached[2] == key:
+        return cached[0]
+
+    engine = build()
+    cache[kind] = (engine, transform, key)
+    return engine
@@ -9,20 +9,24 @@ and computes standard regression metrics.
 Key Features:
 - Physics-Informed Post-Processing: Applies domain constraints (e.g., non-negative rain).
 - Asymmetric Loss Support: Registers custom loss functions for model loading.
-- Advanced Denormalization: Handles shape mismatches between scaler inputs and model outputs.
+- Fused Denormalization: The compiled FeatureTransform inverts scaling + log1p directly on 5-column outputs.
+- Selectable Backend: Keras (TensorFlow) or the exported NumPy forward pass (`--backend numpy`).
 - Visualization: Generates comparative time-series plots for qualitative analysis.
+- Multi-Horizon Mode (`--multi-horizon`): Evaluates the direct 24h model on (N, 24, 5) label
+  blocks and reports the error per lead time (t+1 ... t+24).
 """
 
 import os
+import time
+import argparse
 import warnings
 import json
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import joblib
 import tensorflow as tf
 from tensorflow.keras.models import load_model
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from typing import Optional
 
 # --- Environment Setup (Clean Console) ---
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
@@ -30,7 +34,13 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 warnings.filterwarnings("ignore")
 
 from src import config
+from src.data_acquisition.parquet_store import dataset_path
 from src.neural_network.data_generator import TimeSeriesGenerator
+from src.neural_network.multi_horizon import multi_horizon_model_path
+from src.neural_network.numpy_lstm import load_numpy_model
+from src.neural_network.streaming import create_streaming_dataset_from_arrays
+from src.preprocessing.feature_transform import load_feature_transform
+from src.preprocessing.sequence_store import load_split, split_exists, target_indices
 
 
 # -------------------------------------------------------------------------
@@ -62,136 +72,107 @@ def asymmetric_precipitation_loss(y_true, y_pred):
     return tf.reduce_mean(squared_error * penalty_factor)
 
 
-# -------------------------------------------------------------------------
-# POST-PROCESSING LOGIC
-# -------------------------------------------------------------------------
-def apply_physics_constraints(data: np.ndarray, feature_names: list) -> np.ndarray:
+def lead_time_mae(y_true_real: np.ndarray, y_pred_real: np.ndarray) -> dict:
     """
-    Applies domain-specific physical constraints to the raw model predictions.
-    Deep Learning models are purely mathematical and may produce physically
-    impossible values (e.g., negative rain). This filter corrects them.
-
-    Applied Rules:
-    1. Non-Negativity: Scalar quantities (Wind, Rain, Humidity) cannot be < 0.
-    2. Saturation: Relative Humidity cannot exceed 100%.
-    3. Noise Gating: Precipitations < 0.1mm are treated as sensor/model noise and clamped to 0.
-    """
-    corrected_data = data.copy()
-
-    for i, name in enumerate(feature_names):
-        # Rule 1: Clip negative values for physical scalars
-        if name in ['humidity', 'wind_speed', 'precipitation']:
-            corrected_data[:, i] = np.maximum(corrected_data[:, i], 0.0)
-
-        # Rule 2: Cap humidity at saturation point
-        if name == 'humidity':
-            corrected_data[:, i] = np.minimum(corrected_data[:, i], 100.0)
-
-        # Rule 3: Precipitation Noise Gate (The "Zero-Inflation" Fix)
-        # This eliminates the "constant drizzle" artifact in regression models.
-        if name == 'precipitation':
-            threshold_mm = 0.1
-            mask_noise = corrected_data[:, i] < threshold_mm
-            corrected_data[mask_noise, i] = 0.0
-
-            count_filtered = np.sum(mask_noise)
-            if count_filtered > 0:
-                print(f"   [Physics] Filtered {count_filtered} micro-rain events (<{threshold_mm}mm) to 0.0mm.")
+    MAE per target and lead time of (N, H, 5) real-unit forecasts.
 
-    return corrected_data
-
-
-def denormalize_targets(pred_array: np.ndarray, scaler) -> np.ndarray:
-    """
-    Handles dimension mismatch during inverse transformation.
-    The Scaler expects 9 features (Inputs), but the Model outputs 5 features (Targets).
-    We create a dummy matrix to satisfy the Scaler's API.
+    Returns:
+        dict: {target: [MAE at t+1, ..., MAE at t+H]} ordered as config.TARGET_COLS.
     """
-    # Create a placeholder matrix (N_samples, 9_features)
-    dummy = np.zeros((pred_array.shape[0], scaler.n_features_in_))
-
-    # Fill the first 5 columns with our predictions
-    # (Assuming targets are the first 5 columns in FEATURE_COLS)
-    num_targets = pred_array.shape[1]
-    dummy[:, :num_targets] = pred_array
-
-    # Perform inverse transform
-    inversed_matrix = scaler.inverse_transform(dummy)
-
-    # Extract only the relevant columns back
-    return inversed_matrix[:, :num_targets]
+    errors = np.abs(y_true_real - y_pred_real).mean(axis=0)  # (H, 5)
+    return {col: errors[:, i].tolist() for i, col in enumerate(config.TARGET_COLS)}
 
 
 # -------------------------------------------------------------------------
 # MAIN EVALUATION PIPELINE
 # -------------------------------------------------------------------------
-def evaluate_model():
+def evaluate_model(backend: Optional[str] = None, multi_horizon: bool = False):
+    """
+    Evaluates the project model on the test split.
+
+    Args:
+        backend (str, optional): 'keras' or 'numpy' (default config.INFERENCE_BACKEND).
+        multi_horizon (bool): Evaluate the direct multi-horizon model instead (see `evaluate_multi_horizon`).
+    """
+    backend = backend or config.INFERENCE_BACKEND
+    if backend not in config.INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}'. Expected one of {config.INFERENCE_BACKENDS}.")
+    if multi_horizon:
+        return evaluate_multi_horizon(backend)
+
     print("==========================================")
     print("   STARTING MODEL EVALUATION (TEST SET)   ")
     print("==========================================")
 
     # 1. Prerequisite Checks
-    test_data_path = os.path.join(config.DATA_DIR, 'test', 'test.csv')
-
-    if not os.path.exists(config.MODEL_PATH):
-        raise FileNotFoundError(f"Model artifact missing: {config.MODEL_PATH}")
-    if not os.path.exists(config.SCALER_PATH):
-        raise FileNotFoundError(f"Scaler artifact missing: {config.SCALER_PATH}")
+    model_path = config.NUMPY_MODEL_PATH if backend == 'numpy' else config.MODEL_PATH
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model artifact missing: {model_path}")
+    if not os.path.exists(config.FEATURE_TRANSFORM_PATH) and not os.path.exists(config.SCALER_PATH):
+        raise FileNotFoundError(f"Feature transform missing: {config.FEATURE_TRANSFORM_PATH}")
+    if not split_exists('test'):
+        raise FileNotFoundError(f"Split 'test' not found at {dataset_path('test')}. Run main.py --force-data first.")
 
     # 2. Load Artifacts
-    print("Loading model and scaler...")
+    print(f"Loading model ({backend} backend) and feature transform...")
     # We pass custom_objects explicitly to ensure robust loading
     try:
-        model = load_model(config.MODEL_PATH, custom_objects={
-            'asymmetric_precipitation_loss': asymmetric_precipitation_loss
-        })
+        if backend == 'numpy':
+            model = load_numpy_model()
+        else:
+            model = load_model(config.MODEL_PATH, custom_objects={
+                'asymmetric_precipitation_loss': asymmetric_precipitation_loss
+            })
     except Exception as e:
         print(f"[CRITICAL] Model loading failed. Error: {e}")
         return
 
-    scaler = joblib.load(config.SCALER_PATH)
+    transform = load_feature_transform()
 
     # 3. Load & Prepare Data
-    print(f"Loading test data from {test_data_path}...")
-    df_test = pd.read_csv(test_data_path)
+    print(f"Loading test data from the sequence store ({config.SEQUENCE_STORE_DIR})...")
+    test_data = load_split('test')
+    test_targets = test_data[:, target_indices()]
 
     print("Initializing test generator...")
     gen = TimeSeriesGenerator(
         input_width=config.SEQ_LENGTH,
         label_width=config.PREDICT_HORIZON,
         feature_cols=config.FEATURE_COLS,
-        target_cols=config.TARGET_COLS
+        target_cols=config.TARGET_COLS,
+        mode='view'
     )
 
-    X_test, y_test = gen.create_sequences(df_test)
-    print(f"   -> Inference Batch Size: {X_test.shape[0]} samples")
+    # Labels are a cheap 2D gather; the 3D windows are streamed per batch
+    # (tf.data for Keras, zero-copy strided views for the NumPy backend)
+    X_test, y_test = gen.create_sequences_from_arrays(test_data, test_targets)
+    print(f"   -> Inference Batch Size: {y_test.shape[0]} samples")
 
     # 4. Run Inference
     print("Running inference on test set...")
-    y_pred_scaled = model.predict(X_test, verbose=0)
+    t0 = time.perf_counter()
+    if backend == 'numpy':
+        y_pred_scaled = model.predict(X_test, batch_size=config.BATCH_SIZE)
+    else:
+        test_ds = create_streaming_dataset_from_arrays(gen, test_data, test_targets, batch_size=config.BATCH_SIZE)
+        y_pred_scaled = model.predict(test_ds, verbose=0)
+    print(f"   -> Inference time: {time.perf_counter() - t0:.2f}s")
 
     # 5. Denormalization & Post-Processing
     print("Denormalizing and applying physics constraints...")
 
-    # Handle scaler dimension mismatch safely
-    if scaler.n_features_in_ != y_pred_scaled.shape[1]:
-        y_pred_real = denormalize_targets(y_pred_scaled, scaler)
-        y_true_real = denormalize_targets(y_test, scaler)
-    else:
-        y_pred_real = scaler.inverse_transform(y_pred_scaled)
-        y_true_real = scaler.inverse_transform(y_test)
-
-    # We must revert the log1p operation to get back to real 'mm'.
-    # Precipitation is at index 4.
+    # Scaling + log1p are inverted directly on the 5 target columns (no dummy 9-column matrix)
     print("   -> [Experiment] Reverting Log-Transform (np.expm1)...")
-    rain_idx = 4
-
-    # Apply expm1 to both Truth and Prediction columns for rain
-    y_pred_real[:, rain_idx] = np.expm1(y_pred_real[:, rain_idx])
-    y_true_real[:, rain_idx] = np.expm1(y_true_real[:, rain_idx])
+    y_true_real = transform.inverse_transform(y_test, constrain=False)
+    y_pred_real = transform.inverse_transform(y_pred_scaled, constrain=False)
 
     # Apply the noise gate and non-negativity rules
-    y_pred_final = apply_physics_constraints(y_pred_real, config.TARGET_COLS)
+    rain_idx = config.TARGET_COLS.index('precipitation')
+    gate_mm = transform.noise_gate.get('precipitation', 0.0)
+    count_filtered = int(np.sum(y_pred_real[:, rain_idx] < gate_mm))
+    y_pred_final = transform.apply_constraints(y_pred_real)
+    if count_filtered > 0:
+        print(f"   [Physics] Filtered {count_filtered} micro-rain events (<{gate_mm}mm) to 0.0mm.")
 
     # 6. Metrics Calculation & Reporting
     metrics_json = {}
@@ -259,5 +240,95 @@ def evaluate_model():
     print(f"[OUTPUT] Metrics exported to: {metrics_path}")
 
 
+def evaluate_multi_horizon(backend: str):
+    """
+    Evaluates the direct multi-horizon model on (N, FORECAST_HORIZON, 5) test label blocks.
+
+    Every test window is forecast in one forward pass; metrics are reported per target
+    (over all lead times) and per lead time, so the error growth with the horizon can be
+    compared with the autoregressive path (see src/benchmarks/bench_multi_horizon.py).
+    """
+    print("==========================================")
+    print(" EVALUATING MULTI-HORIZON MODEL (TEST SET)")
+    print("==========================================")
+
+    model_path = multi_horizon_model_path(backend)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model artifact missing: {model_path}. "
+                                f"Run 'python -m src.neural_network.train --multi-horizon' first.")
+
+    print(f"Loading multi-horizon model ({backend} backend) and feature transform...")
+    if backend == 'numpy':
+        model = load_numpy_model(model_path)
+    else:
+        model = load_model(model_path, compile=False)
+    transform = load_feature_transform()
+    horizon = model.output_shape[1]
+
+    test_data = load_split('test')
+    test_targets = test_data[:, target_indices()]
+    gen = TimeSeriesGenerator(
+        input_width=config.SEQ_LENGTH,
+        label_width=config.PREDICT_HORIZON,
+        feature_cols=config.FEATURE_COLS,
+        target_cols=config.TARGET_COLS,
+        mode='view',
+        horizon=horizon
+    )
+    X_test, y_test = gen.create_sequences_from_arrays(test_data, test_targets)
+    print(f"   -> {y_test.shape[0]} windows x {horizon} lead times")
+
+    print("Running inference on test set...")
+    t0 = time.perf_counter()
+    if backend == 'numpy':
+        y_pred_scaled = model.predict(X_test, batch_size=config.BATCH_SIZE)
+    else:
+        test_ds = create_streaming_dataset_from_arrays(gen, test_data, test_targets, batch_size=config.BATCH_SIZE)
+        y_pred_scaled = model.predict(test_ds, verbose=0)
+    print(f"   -> Inference time: {time.perf_counter() - t0:.2f}s")
+
+    # Same post-processing as the one-step evaluation (fused inverse + physics rules)
+    y_true_real = transform.inverse_transform(y_test, constrain=False)
+    y_pred_final = transform.inverse_transform(y_pred_scaled)
+
+    metrics_json = {"horizon": int(horizon), "lead_time_mae": lead_time_mae(y_true_real, y_pred_final)}
+    print("\n   PARAMETER        MAE (all)   MAE t+1   MAE t+%d" % horizon)
+    for i, col_name in enumerate(config.TARGET_COLS):
+        truth, pred = y_true_real[..., i].ravel(), y_pred_final[..., i].ravel()
+        metrics_json[f"{col_name}_mae"] = float(mean_absolute_error(truth, pred))
+        metrics_json[f"{col_name}_rmse"] = float(np.sqrt(mean_squared_error(truth, pred)))
+        metrics_json[f"{col_name}_r2"] = float(r2_score(truth, pred))
+        per_lead = metrics_json["lead_time_mae"][col_name]
+        print(f"   {col_name:<15}  {metrics_json[f'{col_name}_mae']:9.4f}  {per_lead[0]:8.4f}  {per_lead[-1]:8.4f}")
+
+    # Error growth with the lead time
+    fig, axes = plt.subplots(len(config.TARGET_COLS), 1, figsize=(10, 14), sharex=True)
+    leads = np.arange(1, horizon + 1)
+    for ax, col_name in zip(axes, config.TARGET_COLS):
+        ax.plot(leads, metrics_json["lead_time_mae"][col_name], marker='o', color='red', label='Direct multi-horizon')
+        ax.set_ylabel(f'MAE {col_name}')
+        ax.legend(loc='upper left')
+        ax.grid(True, alpha=0.3)
+    axes[-1].set_xlabel('Lead time (hours)')
+    plt.tight_layout()
+
+    plot_path = os.path.join(config.BASE_DIR, 'docs', 'lead_time_error.png')
+    os.makedirs(os.path.dirname(plot_path), exist_ok=True)
+    plt.savefig(plot_path)
+    print(f"\n[OUTPUT] Lead-time error plot saved to: {plot_path}")
+
+    metrics_path = os.path.join(config.BASE_DIR, 'results', 'test_metrics_multi_horizon.json')
+    os.makedirs(os.path.dirname(metrics_path), exist_ok=True)
+    with open(metrics_path, 'w') as f:
+        json.dump(metrics_json, f, indent=4)
+    print(f"[OUTPUT] Metrics exported to: {metrics_path}")
+
+
 if __name__ == "__main__":
-    evaluate_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="SIA-Meteo Test Set Evaluation")
+    parser.add_argument('--backend', choices=config.INFERENCE_BACKENDS, default=config.INFERENCE_BACKEND,
+                        help="Inference backend (numpy = exported weights, no Keras model loading).")
+    parser.add_argument('--multi-horizon', action='store_true',
+                        help=f"Evaluate the direct {config.FORECAST_HORIZON}h multi-horizon model per lead time.")
+    cli_args = parser.parse_args()
+    evaluate_model(cli_args.backend, multi_horizon=cli_args.multi_horizon)
\ No newline at end of file
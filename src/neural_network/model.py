@@ -5,13 +5,18 @@ Neural Network architecture definition.
 Defines the topology of the LSTM model used for multi-target regression.
 Designed to capture temporal dependencies via stacked LSTM layers and
 prevent overfitting via Dropout.
+
+The output head is either one-step (t+1, chained autoregressively for longer forecasts)
+or direct multi-horizon: a single forward pass emits all `horizon` hours at once.
 """
 
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
+from tensorflow.keras.layers import LSTM, Dense, Dropout, Input, Reshape
 from tensorflow.keras.optimizers import Adam
+from typing import Optional
 
-def build_lstm_model(input_shape: tuple, learning_rate: float = 0.001, output_units: int = 5) -> Sequential:
+def build_lstm_model(input_shape: tuple, learning_rate: float = 0.001, output_units: int = 5,
+                     horizon: Optional[int] = None) -> Sequential:
     """
     Constructs and compiles the LSTM Neural Network.
 
@@ -22,16 +27,19 @@ def build_lstm_model(input_shape: tuple, learning_rate: float = 0.001, output_un
     4. LSTM Layer 2: 64 units, aggregates temporal features.
     5. Dropout (0.3): Further regularization.
     6. Dense (output_units): Final regression vector (Multi-Target).
+       Multi-horizon: Dense (horizon * output_units) + Reshape -> (horizon, output_units),
+       one row per lead time (t+1 ... t+horizon).
 
     Args:
         input_shape (tuple): Shape of input sequences (TimeSteps, Features).
         learning_rate (float): Optimizer step size.
         output_units (int): Number of predicted parameters (5).
+        horizon (int, optional): Lead times of the direct multi-horizon head (None = one-step head).
 
     Returns:
         Sequential: Compiled Keras Model.
     """
-    model = Sequential([
+    layers = [
         # Explicit Input Layer for visualization
         Input(shape=input_shape),
 
@@ -46,8 +54,12 @@ def build_lstm_model(input_shape: tuple, learning_rate: float = 0.001, output_un
         Dropout(rate=0.3),
 
         # Output Layer: Multi-Target Regression
-        Dense(units=output_units)
-    ])
+        Dense(units=output_units * (horizon or 1))
+    ]
+    if horizon is not None:
+        # Multi-Horizon Head: the flat vector is read as one 5-target row per lead time
+        layers.append(Reshape((horizon, output_units)))
+    model = Sequential(layers)
 
     # Compilation
     # MSE (Mean Squared Error) is optimal for regression tasks where large errors should be penalized
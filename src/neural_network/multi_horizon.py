@@ -0,0 +1,136 @@
+# src/neural_network/multi_horizon.py
+"""
+Direct Multi-Horizon Forecasting.
+
+The one-step model needs 24 dependent forward passes per 24h forecast (rollout.py,
+numpy_lstm.py), and every pass is fed its own clipped prediction, so errors compound
+with the lead time. A model built with `build_lstm_model(..., horizon=H)` emits all H
+hours in one forward pass instead: (B, 24, 9) windows -> (B, H, 5) scaled predictions.
+
+`DirectForecastEngine` exposes the same interface as the rollout engines (`run`,
+`forecast`, `rollout`, `horizon`), so the dashboard, the ESP32 page and the benchmarks
+switch strategy by switching the model. It works with Keras models and with NumPy
+exports (TensorFlow is not imported by this module).
+
+Post-processing is identical to the rollout engines: predictions are clipped to the
+feedback range and mapped back to real units with the physics rules of the transform.
+"""
+
+import os
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+
+from src import config
+from src.neural_network.engine_cache import cached_engine
+from src.neural_network.numpy_lstm import NumpyLSTM
+from src.preprocessing.feature_transform import FeatureTransform
+from src.preprocessing.time_features import to_epoch_seconds
+
+
+def model_horizon(model) -> Optional[int]:
+    """Lead times of a multi-horizon model ((None, H, 5) output), None for a one-step model."""
+    output_shape = model.output_shape
+    return int(output_shape[1]) if len(output_shape) == 3 else None
+
+
+def is_multi_horizon(model) -> bool:
+    """True if one forward pass of `model` yields a whole forecast (direct head)."""
+    return model_horizon(model) is not None
+
+
+class DirectForecastEngine:
+    """
+    Multi-origin forecaster on a direct multi-horizon model (Keras or NumPy).
+
+    Attributes:
+        model: Keras model or NumpyLSTM with a (None, H, 5) output.
+        transform (FeatureTransform): Denormalization + physics rules (with `bounds` applied).
+        horizon (int): Returned lead times (at most the model's H).
+    """
+
+    def __init__(
+            self,
+            model,
+            transform: FeatureTransform,
+            horizon: Optional[int] = None,
+            bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+            clip_range: Tuple[float, float] = config.FORECAST_FEEDBACK_CLIP
+    ):
+        model_h = model_horizon(model)
+        if model_h is None:
+            raise ValueError(f"Expected a multi-horizon model (None, H, 5), got output shape {model.output_shape}.")
+        if horizon is not None and horizon > model_h:
+            raise ValueError(f"The model forecasts {model_h} hours, {horizon} were requested.")
+
+        self.model = model
+        self.bounds = dict(bounds or {})
+        self.transform = transform.with_bounds(**bounds) if bounds else transform
+        self.horizon = int(horizon or model_h)
+        self.clip_range = clip_range
+
+    def _predict(self, windows: np.ndarray) -> np.ndarray:
+        if isinstance(self.model, NumpyLSTM):
+            return self.model.predict(windows)
+        # Keras: the compiled predict function, without the per-call tf.data setup of `predict`
+        return np.asarray(self.model.predict_on_batch(windows))
+
+    def run(
+            self,
+            windows,
+            start_epoch_s=None,
+            transforms: Optional[Sequence[FeatureTransform]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Forecasts a batch of origins with one forward pass.
+
+        Args:
+            windows: (B, SEQ_LENGTH, 9) scaled windows.
+            start_epoch_s: Unused (the time of every lead is implicit in the window);
+                accepted for interface parity with the rollout engines.
+            transforms: Optional per-origin FeatureTransforms (e.g., adaptive models).
+
+        Returns:
+            tuple: (B, H, 5) clipped scaled predictions (float32) and
+                (B, H, 5) real-unit predictions with physics rules applied (float64).
+        """
+        windows = np.asarray(windows, dtype=np.float32)
+        if transforms is not None and len(transforms) != windows.shape[0]:
+            raise ValueError(f"Got {windows.shape[0]} windows but {len(transforms)} transforms.")
+
+        preds_scaled = np.clip(self._predict(windows)[:, :self.horizon], *self.clip_range).astype(np.float32)
+        if transforms is None:
+            preds_real = self.transform.inverse_transform(preds_scaled)
+        else:
+            if self.bounds:
+                transforms = [t.with_bounds(**self.bounds) for t in transforms]
+            preds_real = np.stack([t.inverse_transform(p) for t, p in zip(transforms, preds_scaled)])
+        return preds_scaled, preds_real
+
+    def forecast(self, windows, start_times, transforms: Optional[Sequence[FeatureTransform]] = None) -> np.ndarray:
+        """Multi-origin forecast in real units, (B, H, 5) ordered as TARGET_COLS."""
+        return self.run(windows, to_epoch_seconds(list(start_times)), transforms)[1]
+
+    def rollout(self, window, start_time) -> np.ndarray:
+        """Forecasts the next `horizon` hours from a single (SEQ_LENGTH, 9) window: (H, 5) real units."""
+        return self.run(np.asarray(window)[np.newaxis], to_epoch_seconds(start_time))[1][0]
+
+
+def get_direct_engine(
+        model,
+        transform: FeatureTransform,
+        bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        horizon: Optional[int] = None
+) -> DirectForecastEngine:
+    """Direct counterpart of `get_rollout_engine`: one cached engine per model."""
+    return cached_engine(model, "direct", transform, bounds, horizon,
+                         lambda: DirectForecastEngine(model, transform, horizon=horizon, bounds=bounds))
+
+
+def multi_horizon_model_path(backend: str = config.INFERENCE_BACKEND) -> str:
+    """Artifact of the direct model for an inference backend ('keras' or 'numpy')."""
+    return config.MULTI_HORIZON_NUMPY_MODEL_PATH if backend == 'numpy' else config.MULTI_HORIZON_MODEL_PATH
+
+
+def has_multi_horizon_model(backend: str = config.INFERENCE_BACKEND) -> bool:
+    """True if the direct model has been trained (see `python -m src.neural_network.train --multi-horizon`)."""
+    return os.path.exists(multi_horizon_model_path(backend))
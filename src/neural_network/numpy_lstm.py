@@ -0,0 +1,443 @@
+# src/neural_network/numpy_lstm.py
+"""
+Pure-NumPy LSTM Inference Backend.
+
+Serving the dashboard through Keras means importing TensorFlow and deserialising a `.keras`
+archive just to evaluate a 2-layer LSTM (128 -> 64) and a Dense layer: seconds of cold
+start and hundreds of MB of RSS per Streamlit process. This module runs the same network
+with NumPy only (TensorFlow is never imported):
+
+1. Exporter (`export_weights`): Dumps the kernels of a `build_lstm_model` network into a
+   small `.npz` (arrays + layer metadata, loaded without unpickling).
+2. Forward Pass (`NumpyLSTM`): Batched float32 evaluation.
+   - The input projection x @ W + b of a layer is one matmul over all timesteps.
+   - Gate columns are reordered at load time from Keras' [i, f, c, o] to [i, f, o, c],
+     so the three sigmoid gates form one contiguous block.
+   - Gate, state and sequence buffers are preallocated per (timesteps, batch) and reused
+     (per thread, since Streamlit sessions share the cached model).
+3. Rollout (`NumpyRolloutEngine`): The 24h autoregressive forecast with the same mirrored
+   ring buffer, feedback and post-processing as the graph engine in rollout.py.
+4. Single Steps (`step`, `head`): Advance sequences one timestep at a time from saved
+   (h, c) states, for streaming inference (see stateful.py).
+
+Dropout layers are inference no-ops and are skipped by the exporter. A trailing Reshape
+(the direct multi-horizon head, see model.py) is kept as the output shape, e.g. (24, 5).
+"""
+
+import os
+import hashlib
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src import config
+from src.neural_network.engine_cache import cached_engine
+from src.preprocessing.feature_transform import FeatureTransform
+from src.preprocessing.time_features import HOUR_S, to_epoch_seconds
+
+NUMPY_MODEL_FORMAT_VERSION = 1
+
+# Maximum number of (timesteps, batch) buffer sets kept per thread
+_MAX_BUFFER_SETS = 8
+
+
+def _collect_weights(model) -> Dict[str, np.ndarray]:
+    """
+    Extracts the arrays of a Keras LSTM stack (LSTM* -> Dense [-> Reshape], Dropout ignored) in the `.npz` layout.
+
+    Raises:
+        ValueError: If the model contains layers or activations the NumPy engine does not implement.
+    """
+    arrays, lstm_units, return_sequences = {}, [], []
+    dense = None
+
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == 'Dropout':
+            continue
+        if kind == 'Reshape' and dense is not None:
+            continue
+        if dense is not None:
+            raise ValueError(f"Layer '{layer.name}' follows the output Dense layer.")
+
+        if kind == 'LSTM':
+            activation = layer.activation.__name__
+            recurrent_activation = layer.recurrent_activation.__name__
+            if (activation, recurrent_activation) != ('tanh', 'sigmoid') or not layer.use_bias:
+                raise ValueError(f"LSTM '{layer.name}' uses {activation}/{recurrent_activation} "
+                                 f"(bias={layer.use_bias}); only tanh/sigmoid with bias is supported.")
+            kernel, recurrent_kernel, bias = layer.get_weights()
+            k = len(lstm_units)
+            arrays[f"lstm_{k}_kernel"] = kernel
+            arrays[f"lstm_{k}_recurrent_kernel"] = recurrent_kernel
+            arrays[f"lstm_{k}_bias"] = bias
+            lstm_units.append(layer.units)
+            return_sequences.append(bool(layer.return_sequences))
+
+        elif kind == 'Dense':
+            if layer.activation.__name__ != 'linear':
+                raise ValueError(f"Dense '{layer.name}' must be linear, got '{layer.activation.__name__}'.")
+            dense = layer.get_weights()
+            arrays["dense_kernel"], arrays["dense_bias"] = dense
+
+        else:
+            raise ValueError(f"Unsupported layer '{layer.name}' ({kind}) for the NumPy backend.")
+
+    if not lstm_units or dense is None:
+        raise ValueError("Expected at least one LSTM layer followed by a Dense output layer.")
+    if return_sequences[-1] or not all(return_sequences[:-1]):
+        raise ValueError("Only the last LSTM layer may (and must) return a single vector.")
+
+    arrays = {name: np.asarray(value, dtype=np.float32) for name, value in arrays.items()}
+    arrays["version"] = np.int64(NUMPY_MODEL_FORMAT_VERSION)
+    arrays["input_shape"] = np.array(model.input_shape[1:], dtype=np.int64)
+    arrays["lstm_units"] = np.array(lstm_units, dtype=np.int64)
+    arrays["output_shape"] = np.array(model.output_shape[1:], dtype=np.int64)
+    return arrays
+
+
+def export_weights(model, path: str) -> str:
+    """
+    Exports a Keras LSTM stack (LSTM* -> Dense [-> Reshape], Dropout ignored) to a pickle-free `.npz`.
+
+    Args:
+        model: Keras model built by `build_lstm_model` (or the same topology).
+        path (str): Destination file.
+
+    Returns:
+        str: The written path.
+
+    Raises:
+        ValueError: If the model contains layers or activations the NumPy engine does not implement.
+    """
+    arrays = _collect_weights(model)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+class NumpyLSTM:
+    """
+    NumPy forward pass of an exported LSTM stack.
+
+    Attributes:
+        input_shape (tuple): (None, timesteps, features), as in Keras.
+        output_units (int): Width of the Dense output.
+        output_shape (tuple): (None, 5) for the one-step head, (None, horizon, 5) for the
+            direct multi-horizon head, as in Keras.
+    """
+
+    def __init__(self, layers: List[Dict[str, np.ndarray]], dense_kernel: np.ndarray, dense_bias: np.ndarray,
+                 input_shape: Tuple[int, int], output_shape: Optional[Tuple[int, ...]] = None):
+        self.layers = layers
+        self.dense_kernel = dense_kernel
+        self.dense_bias = dense_bias
+        self.input_shape = (None,) + tuple(int(v) for v in input_shape)
+        self.output_units = int(dense_bias.shape[0])
+        self.output_shape = (None,) + tuple(int(v) for v in (output_shape or (self.output_units,)))
+        self._local = threading.local()
+
+    @staticmethod
+    def _gate_order(array: np.ndarray, units: int) -> np.ndarray:
+        """Keras [i, f, c, o] columns -> [i, f, o, c] (contiguous sigmoid block)."""
+        i, f, c, o = (array[..., k * units:(k + 1) * units] for k in range(4))
+        return np.ascontiguousarray(np.concatenate([i, f, o, c], axis=-1), dtype=np.float32)
+
+    @classmethod
+    def _from_arrays(cls, data, source: str) -> "NumpyLSTM":
+        version = int(data["version"])
+        if version != NUMPY_MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported NumPy model version {version} in {source}.")
+        layers = []
+        for k, units in enumerate(int(u) for u in data["lstm_units"]):
+            layers.append({
+                "units": units,
+                "kernel": cls._gate_order(data[f"lstm_{k}_kernel"], units),
+                "recurrent_kernel": cls._gate_order(data[f"lstm_{k}_recurrent_kernel"], units),
+                "bias": cls._gate_order(data[f"lstm_{k}_bias"], units),
+            })
+        # Exports written before multi-horizon support have no "output_shape" (one-step head)
+        output_shape = tuple(data["output_shape"]) if "output_shape" in data else None
+        return cls(layers, data["dense_kernel"].astype(np.float32), data["dense_bias"].astype(np.float32),
+                   tuple(data["input_shape"]), output_shape)
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyLSTM":
+        """Loads weights written by `export_weights` (allow_pickle stays disabled)."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls._from_arrays(data, path)
+
+    @classmethod
+    def from_keras(cls, model) -> "NumpyLSTM":
+        """In-memory conversion of an already loaded Keras model (no file round-trip)."""
+        return cls._from_arrays(_collect_weights(model), type(model).__name__)
+
+    def signature(self) -> str:
+        """Short hash of the weights (e.g., to tie persisted LSTM states to the model that produced them)."""
+        digest = hashlib.sha256()
+        for layer in self.layers:
+            for name in ("kernel", "recurrent_kernel", "bias"):
+                digest.update(layer[name].tobytes())
+        digest.update(self.dense_kernel.tobytes())
+        digest.update(self.dense_bias.tobytes())
+        return digest.hexdigest()[:16]
+
+    # ------------------------------------------------------------------
+    # Buffers
+    # ------------------------------------------------------------------
+    def _buffers(self, timesteps: int, batch: int) -> dict:
+        """Preallocated per-thread work buffers for one (timesteps, batch) shape."""
+        cache = getattr(self._local, "buffers", None)
+        if cache is None:
+            cache = self._local.buffers = {}
+
+        key = (timesteps, batch)
+        if key not in cache:
+            if len(cache) >= _MAX_BUFFER_SETS:
+                cache.pop(next(iter(cache)))
+            n_features = self.input_shape[2]
+            cache[key] = {
+                "x": np.empty((timesteps, batch, n_features), dtype=np.float32),
+                "layers": [{
+                    "xw": np.empty((timesteps, batch, 4 * layer["units"]), dtype=np.float32),
+                    "z": np.empty((batch, 4 * layer["units"]), dtype=np.float32),
+                    "h": np.empty((batch, layer["units"]), dtype=np.float32),
+                    "c": np.empty((batch, layer["units"]), dtype=np.float32),
+                    "tmp": np.empty((batch, layer["units"]), dtype=np.float32),
+                    "seq": np.empty((timesteps, batch, layer["units"]), dtype=np.float32),
+                } for layer in self.layers],
+            }
+        return cache[key]
+
+    # ------------------------------------------------------------------
+    # Forward pass
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _sigmoid_(v: np.ndarray) -> None:
+        """In-place logistic function via tanh (no exp overflow for large |v|)."""
+        v *= 0.5
+        np.tanh(v, out=v)
+        v *= 0.5
+        v += 0.5
+
+    @classmethod
+    def _cell(cls, z: np.ndarray, h: np.ndarray, c: np.ndarray, tmp: np.ndarray, units: int) -> None:
+        """LSTM cell update from the pre-activations z = x W + b + h U (all arrays updated in place)."""
+        cls._sigmoid_(z[:, :3 * units])
+        np.tanh(z[:, 3 * units:], out=z[:, 3 * units:])
+
+        gate_i, gate_f = z[:, :units], z[:, units:2 * units]
+        gate_o, candidate = z[:, 2 * units:3 * units], z[:, 3 * units:]
+        # c = f * c + i * g ; h = o * tanh(c)
+        c *= gate_f
+        np.multiply(gate_i, candidate, out=tmp)
+        c += tmp
+        np.tanh(c, out=tmp)
+        np.multiply(gate_o, tmp, out=h)
+
+    def _forward(self, x_tbf: np.ndarray, buf: dict) -> np.ndarray:
+        seq = x_tbf
+        last = len(self.layers) - 1
+        for k, (layer, b) in enumerate(zip(self.layers, buf["layers"])):
+            units = layer["units"]
+            xw, z, h, c, tmp = b["xw"], b["z"], b["h"], b["c"], b["tmp"]
+
+            # Input projection of all timesteps at once: (T, B, F) @ (F, 4U) + b
+            np.matmul(seq, layer["kernel"], out=xw)
+            xw += layer["bias"]
+            h.fill(0.0)
+            c.fill(0.0)
+
+            for t in range(xw.shape[0]):
+                np.matmul(h, layer["recurrent_kernel"], out=z)
+                z += xw[t]
+                self._cell(z, h, c, tmp, units)
+                if k < last:
+                    b["seq"][t] = h
+
+            seq = b["seq"]
+
+        return self.head(h)
+
+    def step(self, x: np.ndarray, states: List[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        """
+        Advances N independent sequences by one timestep (stateful / streaming inference).
+
+        Args:
+            x: (N, features) float32 inputs of this timestep.
+            states: One (h, c) pair of (N, units) float32 arrays per LSTM layer, updated in place.
+
+        Returns:
+            np.ndarray: (N, units) hidden state of the last LSTM layer (feed it to `head`).
+        """
+        inp = np.asarray(x, dtype=np.float32)
+        for layer, (h, c) in zip(self.layers, states):
+            z = h @ layer["recurrent_kernel"]
+            z += inp @ layer["kernel"] + layer["bias"]
+            self._cell(z, h, c, np.empty_like(h), layer["units"])
+            inp = h
+        return inp
+
+    def head(self, h: np.ndarray) -> np.ndarray:
+        """Dense output layer on last-layer hidden states: (N, output_units) float32."""
+        return h @ self.dense_kernel + self.dense_bias
+
+    def forward_time_major(self, x_tbf: np.ndarray) -> np.ndarray:
+        """
+        Forward pass on a time-major (timesteps, batch, features) float32 block
+        (e.g., a ring-buffer slice, no transpose needed).
+
+        Returns:
+            np.ndarray: (batch, output_units) float32.
+        """
+        return self._forward(x_tbf, self._buffers(x_tbf.shape[0], x_tbf.shape[1]))
+
+    def predict(self, x, batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Keras-style prediction on (N, timesteps, features) windows (arrays or strided views).
+
+        Args:
+            x: Input windows.
+            batch_size (int, optional): Windows per forward pass (default: all at once).
+
+        Returns:
+            np.ndarray: (N, output_units) float32, or (N, horizon, 5) for a multi-horizon head.
+        """
+        x = np.asarray(x)
+        n = x.shape[0]
+        batch_size = batch_size or max(n, 1)
+        out = np.empty((n, self.output_units), dtype=np.float32)
+
+        for start in range(0, n, batch_size):
+            chunk = x[start:start + batch_size]
+            buf = self._buffers(chunk.shape[1], chunk.shape[0])
+            # Batch-major -> time-major copy into the preallocated input buffer
+            np.copyto(buf["x"], chunk.transpose(1, 0, 2), casting='same_kind')
+            out[start:start + chunk.shape[0]] = self._forward(buf["x"], buf)
+        return out.reshape((n,) + self.output_shape[1:])
+
+    def __call__(self, x) -> np.ndarray:
+        return self.predict(x)
+
+
+class NumpyRolloutEngine:
+    """
+    Autoregressive multi-origin forecaster on the NumPy backend.
+    Same interface and results as `RolloutEngine` (rollout.py), without TensorFlow.
+    """
+
+    def __init__(
+            self,
+            model: NumpyLSTM,
+            transform: FeatureTransform,
+            horizon: int = 24,
+            bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+            clip_range: Tuple[float, float] = config.FORECAST_FEEDBACK_CLIP
+    ):
+        self.model = model
+        self.bounds = dict(bounds or {})
+        self.transform = transform.with_bounds(**bounds) if bounds else transform
+        self.horizon = int(horizon)
+        self.seq_length = int(model.input_shape[1] or config.SEQ_LENGTH)
+        self.clip_range = clip_range
+        self._target_idx = self.transform.target_index
+        self._time_idx = self.transform.time_index
+
+    def run(
+            self,
+            windows,
+            start_epoch_s,
+            transforms: Optional[Sequence[FeatureTransform]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rolls out a batch of origins together (see `RolloutEngine.run`).
+
+        Returns:
+            tuple: (B, H, 5) clipped scaled predictions (float32) and
+                (B, H, 5) real-unit predictions with physics rules applied (float64).
+        """
+        windows = np.asarray(windows, dtype=np.float32)
+        start_epoch_s = np.asarray(start_epoch_s, dtype=np.int64).reshape(-1)
+        batch, seq_length = windows.shape[0], self.seq_length
+        if start_epoch_s.shape[0] != batch:
+            raise ValueError(f"Got {batch} windows but {start_epoch_s.shape[0]} start timestamps.")
+        if transforms is not None and len(transforms) != batch:
+            raise ValueError(f"Got {batch} windows but {len(transforms)} transforms.")
+        if transforms is not None and self.bounds:
+            transforms = [t.with_bounds(**self.bounds) for t in transforms]
+
+        # Scaled time columns of every future hour of every origin: (B, H, 4)
+        future_s = start_epoch_s[:, np.newaxis] + np.arange(1, self.horizon + 1) * HOUR_S
+        if transforms is None:
+            future_time = self.transform.encode_time(future_s)
+        else:
+            future_time = np.stack([t.encode_time(s) for t, s in zip(transforms, future_s)])
+
+        # Mirrored, time-major ring buffer: (2 * SEQ_LENGTH, B, F)
+        ring = np.empty((2 * seq_length, batch, windows.shape[2]), dtype=np.float32)
+        ring[:seq_length] = windows.transpose(1, 0, 2)
+        ring[seq_length:] = ring[:seq_length]
+
+        clip_low, clip_high = self.clip_range
+        preds_scaled = np.empty((batch, self.horizon, len(self._target_idx)), dtype=np.float32)
+        head = 0
+        for i in range(self.horizon):
+            pred = self.model.forward_time_major(ring[head:head + seq_length])
+            np.clip(pred, clip_low, clip_high, out=preds_scaled[:, i])
+
+            # Row of the next hour overwrites the oldest row (and its mirror)
+            row = ring[head]
+            row[:, self._target_idx] = preds_scaled[:, i]
+            row[:, self._time_idx] = future_time[:, i]
+            ring[head + seq_length] = row
+            head = (head + 1) % seq_length
+
+        if transforms is None:
+            preds_real = self.transform.inverse_transform(preds_scaled)
+        else:
+            preds_real = np.stack([t.inverse_transform(p) for t, p in zip(transforms, preds_scaled)])
+        return preds_scaled, preds_real
+
+    def forecast(self, windows, start_times, transforms: Optional[Sequence[FeatureTransform]] = None) -> np.ndarray:
+        """Multi-origin forecast in real units, (B, H, 5) ordered as TARGET_COLS."""
+        return self.run(windows, to_epoch_seconds(list(start_times)), transforms)[1]
+
+    def rollout(self, window, start_time) -> np.ndarray:
+        """Forecasts the next `horizon` hours from a single (SEQ_LENGTH, 9) window: (H, 5) real units."""
+        _, preds_real = self.run(np.asarray(window)[np.newaxis], to_epoch_seconds(start_time))
+        return preds_real[0]
+
+
+def get_numpy_rollout_engine(
+        model: NumpyLSTM,
+        transform: FeatureTransform,
+        bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        horizon: int = 24
+) -> NumpyRolloutEngine:
+    """NumPy counterpart of `get_rollout_engine`: one cached engine per model."""
+    return cached_engine(model, "numpy_rollout", transform, bounds, horizon,
+                         lambda: NumpyRolloutEngine(model, transform, horizon=horizon, bounds=bounds))
+
+
+def load_numpy_model(npz_path: Optional[str] = None) -> NumpyLSTM:
+    """Loads the exported project model (default config.NUMPY_MODEL_PATH)."""
+    npz_path = npz_path or config.NUMPY_MODEL_PATH
+    if not os.path.exists(npz_path):
+        raise FileNotFoundError(f"NumPy weights missing: {npz_path}. "
+                                f"Run 'python -m src.neural_network.numpy_lstm' to export them.")
+    return NumpyLSTM.load(npz_path)
+
+
+if __name__ == "__main__":
+    # Export the project model and check it against Keras
+    import tensorflow as tf
+
+    keras_model = tf.keras.models.load_model(config.MODEL_PATH, compile=False)
+    print(f"Saved NumPy weights to: {export_weights(keras_model, config.NUMPY_MODEL_PATH)}")
+
+    sample = np.random.default_rng(0).uniform(-0.2, 1.2, (256,) + keras_model.input_shape[1:]).astype(np.float32)
+    reference = keras_model.predict(sample, verbose=0)
+    max_error = np.abs(load_numpy_model().predict(sample, batch_size=64) - reference).max()
+    print(f"Max abs error vs Keras: {max_error:.2e}")
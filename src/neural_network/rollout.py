@@ -0,0 +1,256 @@
+# src/neural_network/rollout.py
+"""
+Graph-Compiled Autoregressive Rollout.
+
+The 24h forecast used to call `model.predict` once per hour. Every call pays the Keras
+predict-loop setup (data adapter, callbacks, step-function dispatch), and every step
+round-tripped the window through NumPy (`np.vstack`, list rebuilds), so one forecast cost
+far more than the 24 LSTM evaluations it contains.
+
+`RolloutEngine` runs the whole horizon as a single `tf.function`:
+
+1. Ring Buffer: The input window lives in a preallocated, mirrored buffer of
+   2 x SEQ_LENGTH rows (time-major). Each new row is written at `head` and
+   `head + SEQ_LENGTH`, so the current window is always the contiguous slice
+   [head, head + SEQ_LENGTH) - nothing is shifted or re-concatenated.
+2. In-graph Feedback: Predictions are clipped to the stable range and joined with the
+   scaled time embedding of the next hour, computed in the graph from int64 epoch
+   seconds (same integer-phase arithmetic as time_features.py).
+3. tf.while_loop: All steps run in one graph call; predictions accumulate in a TensorArray.
+4. In-graph Post-processing: Inverse scaling, expm1 and the physics bounds / noise gates
+   of the FeatureTransform are applied once to all steps.
+
+Batched Multi-Origin Rollout:
+All origins (cities, devices) advance together - one model call per step for the whole
+batch, so the cost per origin falls as the batch grows. Every origin has its own start
+timestamp and may bring its own FeatureTransform (e.g., an adaptive model's scaler); the
+per-origin scaling / post-processing vectors are graph inputs of shape (B, k), so mixing
+transforms does not retrace the graph.
+"""
+
+import numpy as np
+import tensorflow as tf
+from typing import Dict, Optional, Sequence, Tuple
+
+from src import config
+from src.neural_network.engine_cache import cached_engine
+from src.preprocessing.feature_transform import FeatureTransform
+from src.preprocessing.time_features import DAY_S, YEAR_S, HOUR_S, TIME_FEATURE_COLS, to_epoch_seconds
+
+# Predictions outside this (scaled) range indicate model instability; they are clamped
+# before being fed back so a single outlier cannot make the rollout explode.
+FEEDBACK_CLIP = config.FORECAST_FEEDBACK_CLIP
+
+# Per-origin vectors passed to the graph, all (B, k) float64
+ORIGIN_PARAMS = ("time_scale", "time_offset", "inv_scale", "inv_offset", "lower", "upper", "gate")
+
+
+class RolloutEngine:
+    """
+    Compiled multi-step forecaster for one model + feature transform.
+
+    Attributes:
+        model: Keras model mapping (Batch, SEQ_LENGTH, 9) -> (Batch, 5).
+        transform (FeatureTransform): Transform used for feedback and post-processing
+            (with the `bounds` overrides applied).
+        horizon (int): Number of autoregressive steps per call.
+        seq_length (int): Window length expected by the model.
+    """
+
+    def __init__(
+            self,
+            model,
+            transform: FeatureTransform,
+            horizon: int = 24,
+            bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+            clip_range: Tuple[float, float] = FEEDBACK_CLIP
+    ):
+        self.model = model
+        self.bounds = dict(bounds or {})
+        self.transform = transform.with_bounds(**bounds) if bounds else transform
+        self.horizon = int(horizon)
+        self.seq_length = int(model.input_shape[1] or config.SEQ_LENGTH)
+        self.clip_range = clip_range
+
+        self._n_features = len(self.transform.feature_cols)
+        self._n_targets = len(self.transform.target_cols)
+
+        # Feedback rows are assembled as [targets | time] and permuted into FEATURE_COLS order
+        time_idx = self.transform.time_index
+        order = np.concatenate([self.transform.target_index, time_idx])
+        if len(time_idx) != len(TIME_FEATURE_COLS) or sorted(order) != list(range(self._n_features)):
+            raise ValueError("FEATURE_COLS must consist of TARGET_COLS plus all time-embedding columns.")
+        self._perm = tf.constant(np.argsort(order), dtype=tf.int32)
+
+        # The log mask is structural (shared by all origins); the numeric vectors are per origin
+        self._log_mask = tf.constant(self.transform.vectors(self._n_targets)["log"])
+        self._default_params = self._origin_params([self.transform])
+
+        param_specs = [tf.TensorSpec(shape=(None, values.shape[1]), dtype=tf.float64)
+                       for values in self._default_params.values()]
+        self._rollout = tf.function(
+            self._rollout_graph,
+            input_signature=[
+                tf.TensorSpec(shape=(None, self.seq_length, self._n_features), dtype=tf.float32),
+                tf.TensorSpec(shape=(None,), dtype=tf.int64),
+            ] + param_specs
+        )
+
+    def _origin_params(self, transforms: Sequence[FeatureTransform]) -> Dict[str, np.ndarray]:
+        """Stacks the scaling / post-processing vectors of each origin into (B, k) arrays."""
+        time_idx = self.transform.time_index
+        rows = {name: [] for name in ORIGIN_PARAMS}
+        for transform in transforms:
+            if (transform.feature_cols != self.transform.feature_cols
+                    or transform.target_cols != self.transform.target_cols
+                    or transform.log_cols != self.transform.log_cols):
+                raise ValueError("All origin transforms must share the column layout and log columns.")
+            if self.bounds:
+                transform = transform.with_bounds(**self.bounds)
+            full, target = transform.vectors(self._n_features), transform.vectors(self._n_targets)
+            rows["time_scale"].append(full["scale"][time_idx])
+            rows["time_offset"].append(full["offset"][time_idx])
+            for name in ORIGIN_PARAMS[2:]:
+                rows[name].append(target[name])
+        return {name: np.stack(values) for name, values in rows.items()}
+
+    # ------------------------------------------------------------------
+    # Graph
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _scaled_time(epoch_s: tf.Tensor, p: Dict[str, tf.Tensor]) -> tf.Tensor:
+        """(B,) int64 epoch seconds -> (B, 4) scaled time columns (float32)."""
+        day = tf.cast(tf.math.floormod(epoch_s, DAY_S), tf.float64) * (2 * np.pi / DAY_S)
+        year = tf.cast(tf.math.floormod(epoch_s, YEAR_S), tf.float64) * (2 * np.pi / YEAR_S)
+        embedding = tf.stack([tf.sin(day), tf.cos(day), tf.sin(year), tf.cos(year)], axis=-1)
+        # Same float32 rounding as time_embedding before scaling
+        embedding = tf.cast(tf.cast(embedding, tf.float32), tf.float64)
+        return tf.cast(embedding * p["time_scale"] + p["time_offset"], tf.float32)
+
+    def _postprocess(self, preds_scaled: tf.Tensor, p: Dict[str, tf.Tensor]) -> tf.Tensor:
+        """(B, H, 5) scaled predictions -> real units + physics bounds and noise gates (float64)."""
+        p = {name: p[name][:, tf.newaxis, :] for name in ORIGIN_PARAMS[2:]}  # Broadcast over H
+        y = tf.cast(preds_scaled, tf.float64) * p["inv_scale"] + p["inv_offset"]
+        y = tf.where(self._log_mask, tf.math.expm1(y), y)
+        y = tf.minimum(tf.maximum(y, p["lower"]), p["upper"])
+        return tf.where(y < p["gate"], tf.zeros_like(y), y)
+
+    def _rollout_graph(self, window: tf.Tensor, start_epoch_s: tf.Tensor, *params: tf.Tensor):
+        seq_length, horizon = self.seq_length, self.horizon
+        p = dict(zip(ORIGIN_PARAMS, params))
+        clip_low, clip_high = self.clip_range
+
+        # Mirrored, time-major ring buffer: (2 * SEQ_LENGTH, B, F)
+        frames = tf.transpose(window, [1, 0, 2])
+        ring = tf.concat([frames, frames], axis=0)
+        preds = tf.TensorArray(tf.float32, size=horizon, element_shape=tf.TensorShape([None, self._n_targets]))
+
+        def step(i, head, ring, preds):
+            current = tf.transpose(ring[head:head + seq_length], [1, 0, 2])
+            current = tf.ensure_shape(current, [None, seq_length, self._n_features])
+            pred = tf.clip_by_value(tf.cast(self.model(current, training=False), tf.float32),
+                                    clip_low, clip_high)
+            preds = preds.write(i, pred)
+
+            # Row of the next hour overwrites the oldest row (and its mirror)
+            next_time = self._scaled_time(start_epoch_s + tf.cast(i + 1, tf.int64) * HOUR_S, p)
+            row = tf.gather(tf.concat([pred, next_time], axis=-1), self._perm, axis=-1)
+            ring = tf.tensor_scatter_nd_update(ring, [[head], [head + seq_length]], tf.stack([row, row]))
+            return i + 1, (head + 1) % seq_length, ring, preds
+
+        _, _, _, preds = tf.while_loop(
+            lambda i, *_: i < horizon,
+            step,
+            (tf.constant(0), tf.constant(0), ring, preds),
+            maximum_iterations=horizon
+        )
+
+        preds_scaled = tf.transpose(preds.stack(), [1, 0, 2])  # (B, H, 5)
+        return preds_scaled, self._postprocess(preds_scaled, p)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def run(
+            self,
+            windows,
+            start_epoch_s,
+            transforms: Optional[Sequence[FeatureTransform]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rolls out a batch of origins together (one model call per step for the whole batch).
+
+        Args:
+            windows: (B, SEQ_LENGTH, 9) scaled inputs, each encoded with its origin's transform.
+            start_epoch_s: (B,) int64 epoch seconds of the last row of each window.
+            transforms (list, optional): One FeatureTransform per origin (default: the engine's
+                transform for all). The engine's `bounds` overrides apply to each of them.
+
+        Returns:
+            tuple: (B, H, 5) clipped scaled predictions (float32) and
+                (B, H, 5) real-unit predictions with physics rules applied (float64).
+        """
+        windows = np.asarray(windows, dtype=np.float32)
+        start_epoch_s = np.asarray(start_epoch_s, dtype=np.int64).reshape(-1)
+        batch = windows.shape[0]
+        if start_epoch_s.shape[0] != batch:
+            raise ValueError(f"Got {batch} windows but {start_epoch_s.shape[0]} start timestamps.")
+
+        if transforms is None:
+            params = {name: np.broadcast_to(values, (batch, values.shape[1]))
+                      for name, values in self._default_params.items()}
+        else:
+            if len(transforms) != batch:
+                raise ValueError(f"Got {batch} windows but {len(transforms)} transforms.")
+            params = self._origin_params(transforms)
+
+        preds_scaled, preds_real = self._rollout(
+            tf.constant(windows), tf.constant(start_epoch_s), *(tf.constant(params[name]) for name in ORIGIN_PARAMS))
+        return preds_scaled.numpy(), preds_real.numpy()
+
+    def forecast(self, windows, start_times, transforms: Optional[Sequence[FeatureTransform]] = None) -> np.ndarray:
+        """
+        Multi-origin forecast in real units.
+
+        Args:
+            windows: (B, SEQ_LENGTH, 9) scaled inputs.
+            start_times: B timestamps of the last window rows (datetimes, Timestamps or epoch seconds).
+            transforms (list, optional): Per-origin transforms (see `run`).
+
+        Returns:
+            np.ndarray: (B, H, 5) real-unit predictions ordered as TARGET_COLS.
+        """
+        return self.run(windows, to_epoch_seconds(list(start_times)), transforms)[1]
+
+    def rollout(self, window, start_time) -> np.ndarray:
+        """
+        Forecasts the next `horizon` hours from a single (SEQ_LENGTH, 9) window.
+
+        Args:
+            window: Scaled input window ordered as FEATURE_COLS.
+            start_time: Timestamp of the last window row (datetime, Timestamp or epoch seconds).
+
+        Returns:
+            np.ndarray: (H, 5) real-unit predictions ordered as TARGET_COLS.
+        """
+        _, preds_real = self.run(np.asarray(window)[np.newaxis], to_epoch_seconds(start_time))
+        return preds_real[0]
+
+    def warmup(self) -> "RolloutEngine":
+        """Traces the graph once (the first call is the slow one)."""
+        self.run(np.zeros((1, self.seq_length, self._n_features), dtype=np.float32), [0])
+        return self
+
+
+def get_rollout_engine(
+        model,
+        transform: FeatureTransform,
+        bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        horizon: int = 24
+) -> RolloutEngine:
+    """
+    Returns a compiled engine for `model`, reusing the previous one (and its traced graph)
+    as long as the transform, bounds and horizon are unchanged.
+    """
+    return cached_engine(model, "rollout", transform, bounds, horizon,
+                         lambda: RolloutEngine(model, transform, horizon=horizon, bounds=bounds))
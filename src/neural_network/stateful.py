@@ -0,0 +1,324 @@
+# src/neural_network/stateful.py
+"""
+Stateful Streaming Inference for Live Telemetry.
+
+The ESP32 page used to rebuild and rescale the full 24h window on every refresh and
+rerun the LSTM over all 24 timesteps, and every autoregressive forecast step
+recomputed a whole window again (24 x 24 timesteps per forecast).
+
+The model was trained on 24-step windows that start from a zero state, so simply
+carrying one (h, c) state forward forever would change its semantics. Instead every
+device keeps SEQ_LENGTH *staggered* states (one per window start, "slots"):
+
+    reading n : slot (n mod SEQ_LENGTH) is reset to zero, then all slots consume reading n
+    after it  : slot ((n + 1) mod SEQ_LENGTH) has consumed exactly the last SEQ_LENGTH
+                readings -> its output is the windowed model's prediction
+
+Consequences:
+1. Ingest: A new hourly reading costs one timestep (all slots in one batched step).
+2. Forecast: Forks the saved slots; hour 1 is read directly from the complete slot and
+   every later hour advances only the slots still needed (276 slot-steps for 24h instead
+   of 24 x 24 window timesteps). The results equal the windowed rollout (same clipping,
+   feedback and post-processing as rollout.py).
+3. Many devices are forecast together (their slots are stacked into one batch).
+   With a direct multi-horizon model the forecast is a single head evaluation.
+4. Persistence: The states are saved as a pickle-free `.npz` named after a signature
+   of the weights + transform, so they survive dashboard restarts and are never
+   reused with a different model.
+
+Telemetry hygiene: Readings not newer than the device state are skipped, gaps of a few
+hours are forward-filled hour by hour, and a gap longer than the window restarts the state.
+"""
+
+import os
+import hashlib
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src import config
+from src.neural_network.engine_cache import cached_engine
+from src.neural_network.numpy_lstm import NumpyLSTM
+from src.preprocessing.feature_transform import FeatureTransform
+from src.preprocessing.time_features import HOUR_S
+
+STATE_FORMAT_VERSION = 1
+
+
+class DeviceState:
+    """
+    Staggered LSTM states of one device.
+
+    Attributes:
+        h, c (list): Per LSTM layer, (SEQ_LENGTH, units) float32 arrays (one row per slot).
+        count (int): Readings consumed so far (hourly steps, including forward-filled ones).
+        last_epoch_s (int): Timestamp of the last consumed reading.
+        last_real (np.ndarray): Last consumed reading in real units (TARGET_COLS), for gap filling.
+    """
+
+    __slots__ = ("h", "c", "count", "last_epoch_s", "last_real")
+
+    def __init__(self, h: List[np.ndarray], c: List[np.ndarray], count: int = 0,
+                 last_epoch_s: int = 0, last_real: Optional[np.ndarray] = None):
+        self.h = h
+        self.c = c
+        self.count = count
+        self.last_epoch_s = last_epoch_s
+        self.last_real = last_real
+
+
+class StatefulForecaster:
+    """
+    Per-device streaming inference on top of a (NumPy) LSTM.
+
+    Attributes:
+        model (NumpyLSTM): Forward pass (Keras models are converted in memory).
+        transform (FeatureTransform): Scaling + post-processing (with `bounds` applied).
+        seq_length (int): Window length of the model = number of slots per device.
+        horizon (int): Forecast length in hours.
+        signature (str): Hash of weights + transform; names the persisted state file.
+    """
+
+    def __init__(
+            self,
+            model,
+            transform: FeatureTransform,
+            horizon: int = 24,
+            bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+            clip_range: Tuple[float, float] = config.FORECAST_FEEDBACK_CLIP,
+            state_dir: Optional[str] = None
+    ):
+        self.model = model if isinstance(model, NumpyLSTM) else NumpyLSTM.from_keras(model)
+        self.transform = transform.with_bounds(**bounds) if bounds else transform
+        self.horizon = int(horizon)
+        self.seq_length = int(self.model.input_shape[1] or config.SEQ_LENGTH)
+        self.clip_range = clip_range
+        # Multi-horizon models (see multi_horizon.py) need no feedback steps at all
+        self.direct = len(self.model.output_shape) == 3
+        if self.direct and self.horizon > self.model.output_shape[1]:
+            raise ValueError(f"The model forecasts {self.model.output_shape[1]} hours, {self.horizon} were requested.")
+        self.state_dir = state_dir or config.STREAM_STATE_DIR
+
+        digest = hashlib.sha256(self.model.signature().encode())
+        digest.update(transform.scale.tobytes())
+        digest.update(transform.offset.tobytes())
+        self.signature = digest.hexdigest()[:16]
+
+        self.states: Dict[str, DeviceState] = {}
+        self._target_idx = self.transform.target_index
+        self._time_idx = self.transform.time_index
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # State primitives
+    # ------------------------------------------------------------------
+    def _new_state(self) -> DeviceState:
+        shape = lambda layer: (self.seq_length, layer["units"])
+        return DeviceState(h=[np.zeros(shape(layer), dtype=np.float32) for layer in self.model.layers],
+                           c=[np.zeros(shape(layer), dtype=np.float32) for layer in self.model.layers])
+
+    def _consume(self, state: DeviceState, x_scaled: np.ndarray) -> None:
+        """One hourly step: resets the slot whose window starts now, then every slot consumes the reading."""
+        slot = state.count % self.seq_length
+        for layer_h, layer_c in zip(state.h, state.c):
+            layer_h[slot] = 0.0
+            layer_c[slot] = 0.0
+        self.model.step(np.broadcast_to(x_scaled.astype(np.float32), (self.seq_length, x_scaled.size)),
+                        list(zip(state.h, state.c)))
+        state.count += 1
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def update(self, device_id: str, physics_real, epoch_s) -> int:
+        """
+        Feeds new hourly readings of a device (older / duplicate readings are skipped).
+
+        Args:
+            device_id (str): Device key.
+            physics_real: (N, 5) readings in real units, ordered as TARGET_COLS.
+            epoch_s: (N,) int64 epoch seconds, ascending.
+
+        Returns:
+            int: Number of hourly steps consumed (including forward-filled hours).
+        """
+        physics_real = np.asarray(physics_real, dtype=np.float64).reshape(-1, len(self._target_idx))
+        epoch_s = np.asarray(epoch_s, dtype=np.int64).reshape(-1)
+
+        with self._lock:
+            state = self.states.get(device_id)
+            fresh = epoch_s > state.last_epoch_s if state is not None else np.ones(len(epoch_s), dtype=bool)
+            if not fresh.any():
+                return 0
+            physics_real, epoch_s = physics_real[fresh], epoch_s[fresh]
+
+            # Hourly grid: forward-fill missing hours, restart after a gap longer than the window
+            rows, stamps = [], []
+            previous = (state.last_epoch_s, state.last_real) if state is not None else None
+            for reading, ts in zip(physics_real, epoch_s):
+                if previous is not None:
+                    missing = int(round((ts - previous[0]) / HOUR_S)) - 1
+                    if missing >= self.seq_length:
+                        state, rows, stamps = None, [], []
+                    else:
+                        for k in range(1, missing + 1):
+                            rows.append(previous[1])
+                            stamps.append(previous[0] + k * HOUR_S)
+                rows.append(reading)
+                stamps.append(ts)
+                previous = (ts, reading)
+
+            if state is None:
+                state = self._new_state()
+            x_scaled = self.transform.encode(np.array(rows), np.array(stamps, dtype=np.int64))
+            for x in x_scaled:
+                self._consume(state, x)
+            state.last_epoch_s, state.last_real = int(stamps[-1]), np.asarray(rows[-1], dtype=np.float64)
+            self.states[device_id] = state
+            return len(rows)
+
+    def ready(self, device_id: str) -> bool:
+        """True once the device has a full window of readings."""
+        state = self.states.get(device_id)
+        return state is not None and state.count >= self.seq_length
+
+    def forecast(self, device_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Forecasts the next `horizon` hours of several devices in one batch, from forks of their states.
+
+        Returns:
+            tuple: (D, H, 5) real-unit predictions (TARGET_COLS, physics rules applied) and
+                (D,) int64 epoch seconds of the last reading of each device.
+        """
+        with self._lock:
+            missing = [d for d in device_ids if not self.ready(d)]
+            if missing:
+                raise ValueError(f"Devices without a full {self.seq_length}h window: {missing}")
+            states = [self.states[d] for d in device_ids]
+
+            # Fork: slot-major copies ordered by need, row k * D + d = slot (count_d + k) mod SEQ_LENGTH
+            # of device d, i.e. the slot that emits forecast hour k (stacked (SEQ_LENGTH * D, units))
+            n, seq = len(states), self.seq_length
+            order = (np.array([s.count for s in states])[:, np.newaxis] + np.arange(seq)) % seq
+            fork = lambda per_layer: np.ascontiguousarray(np.stack(
+                [layer[order[d]] for d, layer in enumerate(per_layer)], axis=1)).reshape(seq * n, -1)
+            h = [fork([s.h[k] for s in states]) for k in range(len(self.model.layers))]
+            c = [fork([s.c[k] for s in states]) for k in range(len(self.model.layers))]
+            last_epoch_s = np.array([s.last_epoch_s for s in states], dtype=np.int64)
+
+        future_s = last_epoch_s[:, np.newaxis] + np.arange(1, self.horizon + 1) * HOUR_S
+        future_time = self.transform.encode_time(future_s)
+
+        clip_low, clip_high = self.clip_range
+        if self.direct:
+            # Direct multi-horizon head: the complete slot already encodes the whole forecast
+            preds_scaled = self.model.head(h[-1][:n]).reshape((n,) + self.model.output_shape[1:])
+            preds_scaled = np.clip(preds_scaled[:, :self.horizon], clip_low, clip_high)
+            return self.transform.inverse_transform(preds_scaled), last_epoch_s
+
+        preds_scaled = np.empty((n, self.horizon, len(self._target_idx)), dtype=np.float32)
+        x_scaled = np.empty((n, len(self.transform.feature_cols)), dtype=np.float32)
+        # Hour i only needs the slots of hours > i, so the active block shrinks every step
+        # (H(H-1)/2 slot-steps instead of H * SEQ_LENGTH); longer horizons recycle the slots.
+        shrink = self.horizon <= seq
+        for i in range(self.horizon):
+            block = slice((i % seq) * n, (i % seq + 1) * n)
+            np.clip(self.model.head(h[-1][block]), clip_low, clip_high, out=preds_scaled[:, i])
+            if i == self.horizon - 1:
+                break
+
+            # Feedback: the prediction + time embedding of its hour becomes the next reading
+            x_scaled[:, self._target_idx] = preds_scaled[:, i]
+            x_scaled[:, self._time_idx] = future_time[:, i]
+            if shrink:
+                rows = slice((i + 1) * n, None)
+            else:
+                rows = slice(None)
+                for layer_h, layer_c in zip(h, c):
+                    layer_h[block] = 0.0
+                    layer_c[block] = 0.0
+            n_rows = len(h[0][rows]) // n
+            self.model.step(np.tile(x_scaled, (n_rows, 1)), [(layer_h[rows], layer_c[rows]) for layer_h, layer_c in zip(h, c)])
+
+        return self.transform.inverse_transform(preds_scaled), last_epoch_s
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.state_dir, f"stream_state_{self.signature}.npz")
+
+    def save_states(self, path: Optional[str] = None) -> str:
+        """Writes all device states (atomic replace, pickle-free)."""
+        path = path or self.state_path
+        with self._lock:
+            devices = list(self.states)
+            arrays = {
+                "version": np.int64(STATE_FORMAT_VERSION),
+                "signature": np.array(self.signature),
+                "device_ids": np.array(devices, dtype=str),
+                "counts": np.array([self.states[d].count for d in devices], dtype=np.int64),
+                "last_epoch_s": np.array([self.states[d].last_epoch_s for d in devices], dtype=np.int64),
+                "last_real": np.array([self.states[d].last_real for d in devices], dtype=np.float64)
+                .reshape(len(devices), len(self._target_idx)),
+            }
+            for k, layer in enumerate(self.model.layers):
+                empty = np.empty((0, self.seq_length, layer["units"]), dtype=np.float32)
+                arrays[f"h_{k}"] = np.stack([self.states[d].h[k] for d in devices]) if devices else empty
+                arrays[f"c_{k}"] = np.stack([self.states[d].c[k] for d in devices]) if devices else empty
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    def load_states(self, path: Optional[str] = None) -> int:
+        """
+        Restores device states saved by `save_states` for the same model + transform.
+
+        Returns:
+            int: Number of restored devices (0 if there is no matching state file).
+        """
+        path = path or self.state_path
+        if not os.path.exists(path):
+            return 0
+
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != STATE_FORMAT_VERSION or str(data["signature"]) != self.signature:
+                print(f"[Stream] Ignoring {path}: saved for a different model or format.")
+                return 0
+            states = {}
+            for i, device_id in enumerate(str(d) for d in data["device_ids"]):
+                states[device_id] = DeviceState(
+                    h=[data[f"h_{k}"][i].copy() for k in range(len(self.model.layers))],
+                    c=[data[f"c_{k}"][i].copy() for k in range(len(self.model.layers))],
+                    count=int(data["counts"][i]),
+                    last_epoch_s=int(data["last_epoch_s"][i]),
+                    last_real=data["last_real"][i].copy()
+                )
+
+        with self._lock:
+            self.states.update(states)
+        return len(states)
+
+
+def get_stateful_forecaster(
+        model,
+        transform: FeatureTransform,
+        bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        horizon: int = 24
+) -> StatefulForecaster:
+    """
+    Returns the process-wide forecaster of `model` (one per model object), restoring its
+    persisted device states on first use.
+    """
+    def build() -> StatefulForecaster:
+        forecaster = StatefulForecaster(model, transform, horizon=horizon, bounds=bounds)
+        restored = forecaster.load_states()
+        if restored:
+            print(f"[Stream] Restored LSTM states of {restored} device(s) from {forecaster.state_path}")
+        return forecaster
+
+    return cached_engine(model, "stateful", transform, bounds, horizon, build)
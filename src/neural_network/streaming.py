@@ -0,0 +1,120 @@
+# src/neural_network/streaming.py
+"""
+Streaming input pipeline module.
+
+Materialising every sliding window up front produces a (N, SEQ_LENGTH, 9) tensor,
+i.e. SEQ_LENGTH times the size of the source table. This module instead keeps only
+the 2D scaled array (Rows, Features) in memory and builds the windows batch by batch
+inside a `tf.data` pipeline, so memory stays O(rows x features).
+
+Pipeline stages:
+1. Window start indices (int64) are shuffled (cheap, no feature data involved).
+2. Indices are batched and expanded into windows with a single `tf.gather`.
+3. Optional in-memory cache of the built batches (trades RAM for CPU on small sets).
+4. Prefetch overlaps window construction with the training step.
+"""
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from typing import Optional
+
+from src.neural_network.data_generator import TimeSeriesGenerator
+
+
+def create_streaming_dataset(
+        gen: TimeSeriesGenerator,
+        df: pd.DataFrame,
+        batch_size: int,
+        shuffle: bool = False,
+        cache: bool = False,
+        seed: Optional[int] = None,
+        indices: Optional[np.ndarray] = None
+) -> tf.data.Dataset:
+    """
+    Builds a `tf.data.Dataset` yielding (X, y) batches identical to `gen.create_sequences`.
+
+    Args:
+        gen (TimeSeriesGenerator): Provides window size, horizon and column selection.
+        df (pd.DataFrame): Normalized source dataframe.
+        batch_size (int): Number of windows per batch.
+        shuffle (bool): Reshuffle the window order on every epoch.
+        cache (bool): Keep the built batches in memory after the first epoch.
+            When combined with shuffle, whole batches are shuffled instead of windows.
+        seed (int, optional): Seed for reproducible shuffling.
+        indices (np.ndarray, optional): Subset of window indices to use (e.g., a train/val split).
+
+    Returns:
+        tf.data.Dataset: Batches of X (Batch, input_width, Features) and y (Batch, Targets),
+            or y (Batch, horizon, Targets) for a generator with label blocks.
+    """
+    return create_streaming_dataset_from_arrays(
+        gen,
+        df[gen.feature_cols].to_numpy(dtype=np.float32),
+        df[gen.target_cols].to_numpy(dtype=np.float32),
+        batch_size=batch_size,
+        shuffle=shuffle,
+        cache=cache,
+        seed=seed,
+        indices=indices
+    )
+
+
+def create_streaming_dataset_from_arrays(
+        gen: TimeSeriesGenerator,
+        data_array: np.ndarray,
+        target_array: np.ndarray,
+        batch_size: int,
+        shuffle: bool = False,
+        cache: bool = False,
+        seed: Optional[int] = None,
+        indices: Optional[np.ndarray] = None
+) -> tf.data.Dataset:
+    """
+    Array variant of `create_streaming_dataset` (e.g., for memory-mapped split arrays).
+
+    Args:
+        gen (TimeSeriesGenerator): Provides window size and horizon.
+        data_array (np.ndarray): 2D feature matrix (Rows, Features).
+        target_array (np.ndarray): 2D target matrix (Rows, Targets).
+        batch_size, shuffle, cache, seed, indices: See `create_streaming_dataset`.
+
+    Returns:
+        tf.data.Dataset: Batches of X (Batch, input_width, Features) and y (Batch, Targets),
+            or y (Batch, horizon, Targets) for a generator with label blocks.
+    """
+    # Only the 2D tables live in memory, the 3D windows are built lazily
+    features = tf.constant(np.asarray(data_array, dtype=np.float32))
+    targets = tf.constant(np.asarray(target_array, dtype=np.float32))
+
+    if indices is None:
+        indices = np.arange(gen.num_sequences(len(data_array)), dtype=np.int64)
+
+    window_offsets = tf.range(gen.input_width, dtype=tf.int64)
+    label_offset = tf.constant(gen.input_width + gen.label_width, dtype=tf.int64)
+    block_offsets = tf.range(gen.label_span, dtype=tf.int64)
+
+    def build_windows(start_idx):
+        # Window 'k' covers rows [k, k + input_width) and predicts row k + input_width + label_width
+        # (label blocks: the `horizon` rows starting there)
+        X = tf.gather(features, start_idx[:, None] + window_offsets[None, :])
+        if gen.horizon is None:
+            y = tf.gather(targets, start_idx + label_offset)
+        else:
+            y = tf.gather(targets, (start_idx + label_offset)[:, None] + block_offsets[None, :])
+        return X, y
+
+    ds = tf.data.Dataset.from_tensor_slices(np.asarray(indices, dtype=np.int64))
+
+    if shuffle and not cache:
+        ds = ds.shuffle(buffer_size=len(indices), seed=seed, reshuffle_each_iteration=True)
+
+    ds = ds.batch(batch_size).map(build_windows, num_parallel_calls=tf.data.AUTOTUNE)
+
+    if cache:
+        ds = ds.cache()
+        if shuffle:
+            num_batches = -(-len(indices) // batch_size)
+            ds = ds.shuffle(buffer_size=max(num_batches, 1), seed=seed, reshuffle_each_iteration=True)
+
+    return ds.prefetch(tf.data.AUTOTUNE)
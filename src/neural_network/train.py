@@ -10,14 +10,19 @@ Key Features:
 - Asymmetric Loss Function: Custom logic to handle zero-inflated precipitation data.
 - Artifact Management: Autosaves best models and training history for analysis.
 - Robust Error Handling: Ensures data prerequisites are met before execution.
+- Streaming Input: Windows are built per batch (tf.data), memory stays O(rows x features).
+- Direct Multi-Horizon Mode (`--multi-horizon`): Trains the (N, 24, 5) head on label blocks
+  and saves it to config.MULTI_HORIZON_MODEL_PATH (plus its NumPy export).
 """
 
 import os
+import argparse
 import warnings
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import tensorflow as tf
+from typing import Optional
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 
 # --- Environment Setup (Clean Console) ---
@@ -26,8 +31,12 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 warnings.filterwarnings("ignore")
 
 from src import config
+from src.data_acquisition.parquet_store import dataset_path
 from src.neural_network.data_generator import TimeSeriesGenerator
 from src.neural_network.model import build_lstm_model
+from src.neural_network.numpy_lstm import export_weights
+from src.neural_network.streaming import create_streaming_dataset_from_arrays
+from src.preprocessing.sequence_store import load_split, split_exists, target_indices
 
 
 # -------------------------------------------------------------------------
@@ -63,12 +72,11 @@ def asymmetric_precipitation_loss(y_true, y_pred):
     # 3. Target specific column (Precipitation is at Index 4)
     # We create a mask [0, 0, 0, 0, 1] broadcasted across the batch
     # config.TARGET_COLS has 5 elements; index 4 is rain.
+    # The mask broadcasts over the last axis, so (Batch, Features) and multi-horizon
+    # (Batch, Horizon, Features) labels are handled alike.
     rain_col_idx = 4
     feature_count = 5
-    rain_column_mask = tf.one_hot(indices=[rain_col_idx] * tf.shape(y_true)[0], depth=feature_count)
-
-    # Reshape might be necessary to ensure broadcasting matches (Batch, Features)
-    rain_column_mask = tf.reshape(rain_column_mask, tf.shape(y_true))
+    rain_column_mask = tf.one_hot(indices=rain_col_idx, depth=feature_count)
 
     # 4. Calculate Penalty Factor
     # If it is the Rain Column AND it is Overestimated -> Apply Penalty (e.g., 20x)
@@ -83,49 +91,67 @@ def asymmetric_precipitation_loss(y_true, y_pred):
 # -------------------------------------------------------------------------
 # MAIN TRAINING PIPELINE
 # -------------------------------------------------------------------------
-def train_pipeline():
+def train_pipeline(horizon: Optional[int] = None):
+    """
+    Trains the LSTM on the train split (validated on the validation split).
+
+    Args:
+        horizon (int, optional): Lead times of a direct multi-horizon head (e.g. config.FORECAST_HORIZON).
+            None trains the one-step model used by the autoregressive forecast.
+    """
     print("==========================================")
     print("     STARTING NEURAL NETWORK TRAINING     ")
     print("     (Strategy: Asymmetric Custom Loss)   ")
+    if horizon is not None:
+        print(f"     (Head: Direct {horizon}h multi-horizon)  ")
     print("==========================================")
 
     # 1. Load Data Artifacts
     # Data must be processed by 'split_data.py' before reaching this stage.
-    train_path = os.path.join(config.DATA_DIR, 'train', 'train.csv')
-    val_path = os.path.join(config.DATA_DIR, 'validation', 'validation.csv')
-
-    if not os.path.exists(train_path):
-        raise FileNotFoundError(f"Train file not found at {train_path}. Run main.py --force-data first.")
-
-    print(f"Loading datasets from {config.DATA_DIR}...")
-    df_train = pd.read_csv(train_path)
-    df_val = pd.read_csv(val_path)
+    # The scaled splits are the Parquet datasets; their CSV exports are optional (config.EXPORT_CSV)
+    for split in ('train', 'validation'):
+        if not split_exists(split):
+            raise FileNotFoundError(f"Split '{split}' not found at {dataset_path(split)}. "
+                                    f"Run main.py --force-data first.")
+
+    # The scaled splits are memory-mapped from the sequence store (rebuilt if stale)
+    print(f"Loading datasets from {config.SEQUENCE_STORE_DIR}...")
+    train_data = load_split('train')
+    val_data = load_split('validation')
+    target_idx = target_indices()
 
     # 2. Data Generators (Sliding Window)
     # Transforms 2D tabular data into 3D sequences (Samples, TimeSteps, Features)
+    # The windows are streamed per batch instead of being materialised up front.
     print(f"Initializing data generators (Lookback: {config.SEQ_LENGTH}h)...")
 
     gen = TimeSeriesGenerator(
         input_width=config.SEQ_LENGTH,
         label_width=config.PREDICT_HORIZON,
         feature_cols=config.FEATURE_COLS,
-        target_cols=config.TARGET_COLS
+        target_cols=config.TARGET_COLS,
+        horizon=horizon
     )
 
-    X_train, y_train = gen.create_sequences(df_train)
-    X_val, y_val = gen.create_sequences(df_val)
+    train_ds = create_streaming_dataset_from_arrays(
+        gen, train_data, train_data[:, target_idx], batch_size=config.BATCH_SIZE, shuffle=True
+    )
+    val_ds = create_streaming_dataset_from_arrays(
+        gen, val_data, val_data[:, target_idx], batch_size=config.BATCH_SIZE, cache=True
+    )
 
-    print(f"  -> Training tensor shape:   {X_train.shape}")
-    print(f"  -> Validation tensor shape: {X_val.shape}")
+    print(f"  -> Training sequences:   {gen.num_sequences(len(train_data))}")
+    print(f"  -> Validation sequences: {gen.num_sequences(len(val_data))}")
 
     # 3. Model Initialization
-    input_shape = (X_train.shape[1], X_train.shape[2])  # e.g., (24, 9)
+    input_shape = (config.SEQ_LENGTH, len(config.FEATURE_COLS))  # e.g., (24, 9)
     output_units = len(config.TARGET_COLS)  # e.g., 5
 
     model = build_lstm_model(
         input_shape=input_shape,
         learning_rate=config.LEARNING_RATE,
-        output_units=output_units
+        output_units=output_units,
+        horizon=horizon
     )
 
     # 4. Compilation with Custom Loss
@@ -150,7 +176,10 @@ def train_pipeline():
     )
 
     # ModelCheckpoint: Always saves the best version of the model
-    model_save_path = os.path.join(config.BASE_DIR, 'models', 'trained_model.keras')
+    if horizon is None:
+        model_save_path = os.path.join(config.BASE_DIR, 'models', 'trained_model.keras')
+    else:
+        model_save_path = config.MULTI_HORIZON_MODEL_PATH
     os.makedirs(os.path.dirname(model_save_path), exist_ok=True)
 
     checkpoint = ModelCheckpoint(
@@ -163,10 +192,9 @@ def train_pipeline():
     # 6. Execution Loop
     print(f"\nStarting training loop for {config.EPOCHS} epochs (Batch size: {config.BATCH_SIZE})...")
     history = model.fit(
-        X_train, y_train,
-        validation_data=(X_val, y_val),
+        train_ds,
+        validation_data=val_ds,
         epochs=config.EPOCHS,
-        batch_size=config.BATCH_SIZE,
         callbacks=[early_stop, checkpoint],
         verbose=1
     )
@@ -178,10 +206,16 @@ def train_pipeline():
     results_dir = os.path.join(config.BASE_DIR, 'results')
     os.makedirs(results_dir, exist_ok=True)
 
+    # The direct model has no separate optimisation step: export its NumPy weights right away
+    if horizon is not None:
+        numpy_path = export_weights(model, config.MULTI_HORIZON_NUMPY_MODEL_PATH)
+        print(f"   -> NumPy weights exported to: {numpy_path}")
+
     # Save History to CSV
+    suffix = '' if horizon is None else '_multi_horizon'
     history_df = pd.DataFrame(history.history)
     history_df.index.name = 'epoch'
-    history_csv_path = os.path.join(results_dir, 'training_history.csv')
+    history_csv_path = os.path.join(results_dir, f'training_history{suffix}.csv')
     history_df.to_csv(history_csv_path)
     print(f"   -> History saved to: {history_csv_path}")
 
@@ -195,7 +229,7 @@ def train_pipeline():
     plt.legend()
     plt.grid(True, alpha=0.3)
 
-    loss_img_path = os.path.join(config.BASE_DIR, 'docs', 'loss_curve.png')
+    loss_img_path = os.path.join(config.BASE_DIR, 'docs', f'loss_curve{suffix}.png')
     os.makedirs(os.path.dirname(loss_img_path), exist_ok=True)
     plt.savefig(loss_img_path)
     print(f"   -> Loss curve saved to: {loss_img_path}")
@@ -203,4 +237,8 @@ def train_pipeline():
 
 
 if __name__ == "__main__":
-    train_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="SIA-Meteo Model Training")
+    parser.add_argument('--multi-horizon', action='store_true',
+                        help=f"Train the direct {config.FORECAST_HORIZON}h multi-horizon head instead of the one-step model.")
+    cli_args = parser.parse_args()
+    train_pipeline(config.FORECAST_HORIZON if cli_args.multi_horizon else None)
\ No newline at end of file
@@ -0,0 +1,319 @@
+# src/preprocessing/feature_transform.py
+"""
+Fused Feature Transform (pickle-free).
+
+Inference used to round-trip through the pickled sklearn `MinMaxScaler` on every
+autoregressive step, padding the 5 model outputs into a dummy 9-column matrix just
+to satisfy `inverse_transform`, with log1p/expm1 and the physics clamps applied by
+hand around it (dashboard, evaluation, confusion analysis, adaptive training).
+
+`FeatureTransform` compiles the whole chain into precomputed vectors:
+
+    forward : x_real -> log1p (precipitation) -> x * scale + offset
+    inverse : y      -> y * inv_scale + inv_offset -> expm1 (precipitation) -> clamps + noise gate
+    encode  : (physics_real, epoch seconds) -> time embedding + forward, one (N, 9) block
+
+Every operation works directly on 9-column (FEATURE_COLS) or 5-column (TARGET_COLS)
+arrays of any leading shape, e.g., (N, 5) predictions or (B, T, 9) windows.
+
+Persistence: A small `.npz` (numbers + column names only), loaded without unpickling.
+"""
+
+import os
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+
+from src import config
+from src.preprocessing.time_features import TIME_FEATURE_COLS, time_embedding
+
+TRANSFORM_FORMAT_VERSION = 1
+
+
+class FeatureTransform:
+    """
+    Precomputed scaling + log + physics post-processing for the 9 model inputs.
+
+    Attributes:
+        feature_cols (list): Column order of the 9-feature matrix (config.FEATURE_COLS).
+        target_cols (list): Column order of the model outputs (config.TARGET_COLS).
+        scale, offset (np.ndarray): Min-max parameters, x_scaled = x * scale + offset
+            (identical to sklearn's `scale_` and `min_`).
+    """
+
+    def __init__(
+            self,
+            scale: np.ndarray,
+            offset: np.ndarray,
+            feature_cols: Sequence[str],
+            target_cols: Sequence[str],
+            log_cols: Sequence[str] = (),
+            bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+            noise_gate: Optional[Dict[str, float]] = None
+    ):
+        self.feature_cols = list(feature_cols)
+        self.target_cols = list(target_cols)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.offset = np.asarray(offset, dtype=np.float64)
+        if self.scale.shape != (len(self.feature_cols),) or self.offset.shape != self.scale.shape:
+            raise ValueError(f"Expected scale/offset of shape ({len(self.feature_cols)},), "
+                             f"got {self.scale.shape} / {self.offset.shape}.")
+
+        self.log_cols = [col for col in log_cols if col in self.feature_cols]
+        self.bounds = dict(bounds or {})
+        self.noise_gate = dict(noise_gate or {})
+
+        # Per-width parameter sets: 9 columns (FEATURE_COLS) or 5 columns (TARGET_COLS)
+        target_idx = np.array([self.feature_cols.index(col) for col in self.target_cols])
+        self._params = {
+            len(self.feature_cols): self._compile(np.arange(len(self.feature_cols))),
+            len(self.target_cols): self._compile(target_idx),
+        }
+        self._target_idx = target_idx
+        self._time_idx = np.array([self.feature_cols.index(col) for col in TIME_FEATURE_COLS
+                                   if col in self.feature_cols])
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    def _compile(self, idx: np.ndarray) -> dict:
+        """Precomputes every vector needed for a column subset."""
+        names = [self.feature_cols[i] for i in idx]
+        low, high = zip(*(self.bounds.get(n, (None, None)) for n in names))
+        return {
+            "scale": self.scale[idx],
+            "offset": self.offset[idx],
+            "inv_scale": 1.0 / self.scale[idx],
+            "inv_offset": -self.offset[idx] / self.scale[idx],
+            "log": np.array([n in self.log_cols for n in names]),
+            "lower": np.array([-np.inf if v is None else v for v in low], dtype=np.float64),
+            "upper": np.array([np.inf if v is None else v for v in high], dtype=np.float64),
+            "gate": [(i, self.noise_gate[n]) for i, n in enumerate(names) if n in self.noise_gate],
+        }
+
+    @classmethod
+    def from_scaler(
+            cls,
+            scaler,
+            feature_cols: Optional[Sequence[str]] = None,
+            target_cols: Optional[Sequence[str]] = None
+    ) -> "FeatureTransform":
+        """
+        Compiles a fitted sklearn MinMaxScaler (fitted on log1p'd precipitation, as in split_data.py)
+        together with the project's log / physics settings.
+        """
+        return cls(
+            scale=scaler.scale_,
+            offset=scaler.min_,
+            feature_cols=feature_cols or config.FEATURE_COLS,
+            target_cols=target_cols or config.TARGET_COLS,
+            log_cols=config.LOG_TRANSFORM_COLS,
+            bounds=config.PHYSICS_BOUNDS,
+            noise_gate=config.NOISE_GATES
+        )
+
+    @classmethod
+    def fit(cls, x_real, feature_cols: Optional[Sequence[str]] = None,
+            target_cols: Optional[Sequence[str]] = None) -> "FeatureTransform":
+        """
+        Fits the min-max parameters on real-unit data (precipitation in mm) without sklearn.
+        Same arithmetic as `MinMaxScaler(feature_range=(0, 1)).fit` on the log1p'd data.
+        """
+        feature_cols = list(feature_cols or config.FEATURE_COLS)
+        x = np.array(x_real, dtype=np.float64)
+        log_mask = np.array([col in config.LOG_TRANSFORM_COLS for col in feature_cols])
+        x[:, log_mask] = np.log1p(x[:, log_mask])
+
+        data_min, data_max = np.nanmin(x, axis=0), np.nanmax(x, axis=0)
+        data_range = data_max - data_min
+        scale = 1.0 / np.where(data_range < 10 * np.finfo(np.float64).eps, 1.0, data_range)
+        return cls(
+            scale=scale,
+            offset=-data_min * scale,
+            feature_cols=feature_cols,
+            target_cols=target_cols or config.TARGET_COLS,
+            log_cols=config.LOG_TRANSFORM_COLS,
+            bounds=config.PHYSICS_BOUNDS,
+            noise_gate=config.NOISE_GATES
+        )
+
+    def with_bounds(self, **bounds: Tuple[Optional[float], Optional[float]]) -> "FeatureTransform":
+        """Copy with some physics bounds overridden (e.g., `wind_speed=(0.0, 8.0)` for the dashboard)."""
+        merged = dict(self.bounds)
+        merged.update(bounds)
+        return FeatureTransform(self.scale, self.offset, self.feature_cols, self.target_cols,
+                                self.log_cols, merged, self.noise_gate)
+
+    # ------------------------------------------------------------------
+    # Compiled parameters (e.g., for embedding them as graph constants)
+    # ------------------------------------------------------------------
+    @property
+    def target_index(self) -> np.ndarray:
+        """Positions of TARGET_COLS inside FEATURE_COLS."""
+        return self._target_idx.copy()
+
+    @property
+    def time_index(self) -> np.ndarray:
+        """Positions of the time-embedding columns inside FEATURE_COLS (TIME_FEATURE_COLS order)."""
+        return self._time_idx.copy()
+
+    def vectors(self, width: int) -> Dict[str, np.ndarray]:
+        """
+        Precomputed vectors for a 9- or 5-column block: scale, offset, inv_scale, inv_offset,
+        log (bool mask), lower, upper and gate (noise threshold per column, -inf if none).
+        """
+        if width not in self._params:
+            raise ValueError(f"Expected {len(self.feature_cols)} or {len(self.target_cols)} columns, got {width}.")
+        p = self._params[width]
+        gate = np.full(width, -np.inf)
+        for col, threshold in p["gate"]:
+            gate[col] = threshold
+        vectors = {name: p[name].copy() for name in ("scale", "offset", "inv_scale", "inv_offset",
+                                                     "log", "lower", "upper")}
+        vectors["gate"] = gate
+        return vectors
+
+    # ------------------------------------------------------------------
+    # Hot path
+    # ------------------------------------------------------------------
+    def _params_for(self, array: np.ndarray) -> dict:
+        try:
+            return self._params[array.shape[-1]]
+        except KeyError:
+            raise ValueError(f"Expected {len(self.feature_cols)} or {len(self.target_cols)} columns, "
+                             f"got {array.shape[-1]}.") from None
+
+    def transform(self, x_real) -> np.ndarray:
+        """Real units (precipitation in mm) -> scaled model space."""
+        x = np.array(x_real, dtype=np.float64)
+        p = self._params_for(x)
+        if p["log"].any():
+            x[..., p["log"]] = np.log1p(x[..., p["log"]])
+        x *= p["scale"]
+        x += p["offset"]
+        return x
+
+    def inverse_transform(self, y_scaled, constrain: bool = True) -> np.ndarray:
+        """Scaled model space -> real units (+ physics clamps and noise gates if `constrain`)."""
+        y = np.array(y_scaled, dtype=np.float64)
+        p = self._params_for(y)
+        y *= p["inv_scale"]
+        y += p["inv_offset"]
+        if p["log"].any():
+            y[..., p["log"]] = np.expm1(y[..., p["log"]])
+        return self._constrain(y, p) if constrain else y
+
+    def apply_constraints(self, x_real) -> np.ndarray:
+        """
+        Physics rules on real-unit values: bounds (e.g., humidity in [0, 100], no negative
+        wind/rain) and noise gates (e.g., rain < 0.1 mm -> 0, the "constant drizzle" fix).
+        """
+        x = np.array(x_real, dtype=np.float64)
+        return self._constrain(x, self._params_for(x))
+
+    @staticmethod
+    def _constrain(x: np.ndarray, p: dict) -> np.ndarray:
+        np.clip(x, p["lower"], p["upper"], out=x)
+        for col, threshold in p["gate"]:
+            column = x[..., col]
+            column[column < threshold] = 0.0
+        return x
+
+    def encode(self, physics_real, epoch_s) -> np.ndarray:
+        """
+        Builds scaled model inputs from real-unit physics and timestamps in one pass.
+
+        Args:
+            physics_real: (..., 5) values ordered as TARGET_COLS (precipitation in mm).
+            epoch_s: int64 epoch seconds with the leading shape of `physics_real`.
+
+        Returns:
+            np.ndarray: (..., 9) scaled rows ordered as FEATURE_COLS.
+        """
+        physics_real = np.asarray(physics_real, dtype=np.float64)
+        x = np.empty(physics_real.shape[:-1] + (len(self.feature_cols),), dtype=np.float64)
+        x[..., self._target_idx] = physics_real
+        if self._time_idx.size:
+            epoch_s = np.asarray(epoch_s, dtype=np.int64)
+            x[..., self._time_idx] = time_embedding(epoch_s.reshape(-1)).reshape(epoch_s.shape + (-1,))
+        return self.transform(x)
+
+    def encode_time(self, epoch_s) -> np.ndarray:
+        """Scaled time-embedding columns only: (..., 4), ordered as in FEATURE_COLS."""
+        epoch_s = np.asarray(epoch_s, dtype=np.int64)
+        embedding = time_embedding(epoch_s.reshape(-1)).reshape(epoch_s.shape + (-1,))
+        return embedding * self.scale[self._time_idx] + self.offset[self._time_idx]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self, path: str) -> str:
+        """Writes the transform as a small, pickle-free `.npz` (atomic replace)."""
+        names = list(self.bounds)
+        bounds = np.array([[np.nan if v is None else v for v in self.bounds[n]] for n in names],
+                          dtype=np.float64).reshape(-1, 2)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            version=np.int64(TRANSFORM_FORMAT_VERSION),
+            scale=self.scale,
+            offset=self.offset,
+            feature_cols=np.array(self.feature_cols, dtype=str),
+            target_cols=np.array(self.target_cols, dtype=str),
+            log_cols=np.array(self.log_cols, dtype=str),
+            bound_cols=np.array(names, dtype=str),
+            bounds=bounds,
+            gate_cols=np.array(list(self.noise_gate), dtype=str),
+            gate_values=np.array(list(self.noise_gate.values()), dtype=np.float64),
+        )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureTransform":
+        """Loads a transform written by `save` (allow_pickle stays disabled)."""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != TRANSFORM_FORMAT_VERSION:
+                raise ValueError(f"Unsupported feature transform version {version} in {path}.")
+            bounds = {
+                str(name): tuple(None if np.isnan(v) else float(v) for v in row)
+                for name, row in zip(data["bound_cols"], data["bounds"])
+            }
+            return cls(
+                scale=data["scale"],
+                offset=data["offset"],
+                feature_cols=[str(c) for c in data["feature_cols"]],
+                target_cols=[str(c) for c in data["target_cols"]],
+                log_cols=[str(c) for c in data["log_cols"]],
+                bounds=bounds,
+                noise_gate={str(c): float(v) for c, v in zip(data["gate_cols"], data["gate_values"])}
+            )
+
+
+def load_feature_transform(npz_path: Optional[str] = None, scaler_path: Optional[str] = None) -> FeatureTransform:
+    """
+    Loads the compiled transform, falling back to compiling a legacy pickled scaler
+    (e.g., adaptive models trained before the `.npz` format existed).
+
+    Args:
+        npz_path (str, optional): Transform file (default config.FEATURE_TRANSFORM_PATH).
+        scaler_path (str, optional): Legacy scaler pickle (default config.SCALER_PATH).
+    """
+    npz_path = npz_path or config.FEATURE_TRANSFORM_PATH
+    if os.path.exists(npz_path):
+        return FeatureTransform.load(npz_path)
+
+    scaler_path = scaler_path or config.SCALER_PATH
+    if not os.path.exists(scaler_path):
+        raise FileNotFoundError(f"Neither {npz_path} nor the legacy scaler {scaler_path} exists.")
+
+    import joblib  # Legacy path only
+    return FeatureTransform.from_scaler(joblib.load(scaler_path))
+
+
+if __name__ == "__main__":
+    # Compile the project scaler into the pickle-free format
+    import joblib
+    transform = FeatureTransform.from_scaler(joblib.load(config.SCALER_PATH))
+    print(f"Saved feature transform to: {transform.save(config.FEATURE_TRANSFORM_PATH)}")
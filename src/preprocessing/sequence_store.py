@@ -0,0 +1,234 @@
+# src/preprocessing/sequence_store.py
+"""
+Persistent Sequence Store module.
+
+Training, evaluation and the confusion analysis all consume the same scaled
+Train/Validation/Test tables. Instead of re-parsing the CSVs and rebuilding the
+sliding windows in every consumer, the scaled split arrays are written ONCE as
+`.npy` files and memory-mapped read-only afterwards (near-zero load time).
+
+Each split is accompanied by a JSON manifest:
+- feature_cols / target_cols: Column order of the stored matrix.
+- seq_length / horizon: Windowing parameters the store was built for.
+- scaler_sha256: Hash of the fitted scaler artifact.
+- source_sha256 (+ size, mtime): Hash of the split dataset (Parquet, or legacy CSV) it was built from.
+
+If any of these no longer match the current configuration, the store is rebuilt
+automatically on the next access.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Tuple, Optional
+
+from src import config
+from src.data_acquisition.parquet_store import dataset_exists, dataset_files, read_dataset
+from src.neural_network.data_generator import TimeSeriesGenerator
+from src.preprocessing.time_features import to_epoch_seconds
+
+# Split name -> legacy CSV produced by split_data.py (used when no Parquet dataset exists)
+SPLIT_SOURCES = {
+    'train': os.path.join(config.DATA_DIR, 'train', 'train.csv'),
+    'validation': os.path.join(config.DATA_DIR, 'validation', 'validation.csv'),
+    'test': os.path.join(config.DATA_DIR, 'test', 'test.csv'),
+}
+
+STORE_DTYPE = 'float32'  # Keras computes in float32 anyway; halves disk and page-cache footprint
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Streams a file through SHA-256 without loading it fully in memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_files(split: str) -> list:
+    """Files the split array is derived from: the Parquet fragments, or the legacy CSV."""
+    if dataset_exists(split):
+        return dataset_files(split)
+    source = SPLIT_SOURCES[split]
+    return [source] if os.path.exists(source) else []
+
+
+def _source_fingerprint(files: list, with_hash: bool = True) -> dict:
+    """Aggregated size / newest mtime (cheap) and SHA-256 (exact) over the source files."""
+    stats = [os.stat(path) for path in files]
+    fingerprint = {
+        "source_size": sum(st.st_size for st in stats),
+        "source_mtime_ns": max(st.st_mtime_ns for st in stats),
+    }
+    if with_hash:
+        digest = hashlib.sha256()
+        for path in files:
+            digest.update(file_sha256(path).encode())
+        fingerprint["source_sha256"] = digest.hexdigest()
+    return fingerprint
+
+
+def _store_paths(split: str) -> Tuple[str, str]:
+    """Returns (array_path, manifest_path) for a split."""
+    return (os.path.join(config.SEQUENCE_STORE_DIR, f"{split}.npy"),
+            os.path.join(config.SEQUENCE_STORE_DIR, f"{split}.manifest.json"))
+
+
+def _expected_manifest(split: str) -> dict:
+    """Describes the configuration a valid store must have been built with."""
+    return {
+        "split": split,
+        "feature_cols": list(config.FEATURE_COLS),
+        "target_cols": list(config.TARGET_COLS),
+        "seq_length": config.SEQ_LENGTH,
+        "horizon": config.PREDICT_HORIZON,
+        "dtype": STORE_DTYPE,
+        "scaler_sha256": file_sha256(config.SCALER_PATH) if os.path.exists(config.SCALER_PATH) else None,
+    }
+
+
+def _is_manifest_valid(split: str, manifest: dict) -> bool:
+    """
+    Compares a stored manifest against the current configuration and source files.
+    The (cheap) size/mtime check short-circuits hashing the sources when they are untouched.
+    """
+    expected = _expected_manifest(split)
+    if any(manifest.get(key) != value for key, value in expected.items()):
+        return False
+
+    files = _source_files(split)
+    if not files:
+        # The sources may have been cleaned up; the store itself is still consistent.
+        return True
+
+    quick = _source_fingerprint(files, with_hash=False)
+    if all(manifest.get(key) == value for key, value in quick.items()):
+        return True
+
+    return manifest.get("source_sha256") == _source_fingerprint(files)["source_sha256"]
+
+
+def build_split(split: str) -> dict:
+    """
+    Converts one scaled split (Parquet dataset or legacy CSV) into a `.npy` array plus its manifest.
+
+    Args:
+        split (str): 'train', 'validation' or 'test'.
+
+    Returns:
+        dict: The written manifest.
+    """
+    files = _source_files(split)
+    if not files:
+        raise FileNotFoundError(f"Split '{split}' not found. Run main.py --force-data first.")
+
+    print(f"   -> [Store] Building '{split}' sequence store...")
+    if dataset_exists(split):
+        # Column projection: only the 9 model inputs are decoded
+        df = read_dataset(split, columns=config.FEATURE_COLS)
+    else:
+        df = pd.read_csv(files[0], usecols=config.FEATURE_COLS)
+    data = df[config.FEATURE_COLS].to_numpy(dtype=STORE_DTYPE)
+
+    array_path, manifest_path = _store_paths(split)
+    os.makedirs(config.SEQUENCE_STORE_DIR, exist_ok=True)
+
+    # Atomic writes: array first, manifest last (a manifest always describes a complete array)
+    tmp_array = array_path + ".tmp.npy"
+    np.save(tmp_array, data)
+    os.replace(tmp_array, array_path)
+
+    manifest = _expected_manifest(split)
+    manifest.update({"rows": int(data.shape[0]), "source_files": len(files)})
+    manifest.update(_source_fingerprint(files))
+
+    tmp_manifest = manifest_path + ".tmp"
+    with open(tmp_manifest, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp_manifest, manifest_path)
+
+    return manifest
+
+
+def build_store() -> None:
+    """(Re)builds the store for every split. Called right after splitting & scaling."""
+    for split in SPLIT_SOURCES:
+        build_split(split)
+
+
+def split_exists(split: str) -> bool:
+    """True if `load_split` can serve the split (Parquet dataset, legacy CSV or an already built store)."""
+    return bool(_source_files(split)) or os.path.exists(_store_paths(split)[0])
+
+
+def load_split(split: str) -> np.ndarray:
+    """
+    Memory-maps the scaled (Rows, Features) array of a split in read-only mode.
+    The store is rebuilt transparently when missing or stale.
+
+    Args:
+        split (str): 'train', 'validation' or 'test'.
+
+    Returns:
+        np.ndarray: Read-only memmap with columns ordered as config.FEATURE_COLS.
+    """
+    array_path, manifest_path = _store_paths(split)
+
+    manifest: Optional[dict] = None
+    if os.path.exists(array_path) and os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+    if manifest is None or not _is_manifest_valid(split, manifest):
+        build_split(split)
+
+    return np.load(array_path, mmap_mode='r')
+
+
+def load_split_timestamps(split: str) -> np.ndarray:
+    """
+    Timestamps of the rows of a split (same order as `load_split`), as int64 epoch seconds.
+    Needed where the time of a window matters (e.g., future time features of a rollout).
+    """
+    files = _source_files(split)
+    if not files:
+        raise FileNotFoundError(f"Split '{split}' not found. Run main.py --force-data first.")
+    if dataset_exists(split):
+        df = read_dataset(split, columns=['timestamp'])
+    else:
+        df = pd.read_csv(files[0], usecols=['timestamp'])
+    return to_epoch_seconds(pd.to_datetime(df['timestamp']))
+
+
+def target_indices() -> list:
+    """Positions of config.TARGET_COLS inside the stored feature matrix."""
+    return [config.FEATURE_COLS.index(col) for col in config.TARGET_COLS]
+
+
+def load_sequences(split: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the sliding windows of a split without materialising them.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: X (read-only strided view over the memmap), y (Labels).
+    """
+    data = load_split(split)
+    gen = TimeSeriesGenerator(
+        input_width=config.SEQ_LENGTH,
+        label_width=config.PREDICT_HORIZON,
+        feature_cols=config.FEATURE_COLS,
+        target_cols=config.TARGET_COLS,
+        mode='view'
+    )
+    return gen.create_sequences_from_arrays(data, data[:, target_indices()])
+
+
+if __name__ == "__main__":
+    print(">>> Building sequence store...")
+    build_store()
+    for split_name in SPLIT_SOURCES:
+        X_split, y_split = load_sequences(split_name)
+        print(f"   {split_name:<12} X: {X_split.shape} | y: {y_split.shape}")
@@ -10,6 +10,14 @@ Key responsibilities:
 1. Chronological splitting: Ensures future data is not used to train past predictions.
 2. Synthetic integration: Injects 'Black Swan' events only into the Training set.
 3. Feature scaling: Fits normalization parameters strictly on Training data to prevent Data Leakage.
+
+Two execution modes produce identical artifacts (splits, scaler, sequence store):
+- In-memory (default): Loads the whole dataset, fits and transforms at once.
+- Streaming (config.SPLIT_STREAMING): Two passes over row chunks of the Parquet dataset.
+  Pass 1 accumulates the per-feature min/max (`MinMaxScaler.partial_fit`), pass 2 transforms
+  each chunk and routes it into the train/validation/test writers. Peak memory is bounded by
+  config.SPLIT_CHUNK_ROWS instead of the dataset size. CSV exports are not written in this
+  mode; those of a previous run are removed.
 """
 
 import pandas as pd
@@ -19,9 +27,53 @@ import sys
 import joblib
 from sklearn.preprocessing import MinMaxScaler
 from src import config
-from src.data_acquisition.data_loader import load_raw_data
+from typing import Dict, Optional
+from src.data_acquisition.data_loader import load_raw_data, add_time_features
+from src.data_acquisition.parquet_store import (
+    CSV_EXPORT_PATHS, ROW_ID_COL, ChunkedDatasetWriter, dataset_exists, dataset_path, iter_dataset_batches,
+    read_dataset, write_dataset
+)
+from src.preprocessing.feature_transform import FeatureTransform
+from src.preprocessing.sequence_store import build_store
+
+# Real data of this year is held out (odd months -> validation, even months -> test)
+HOLDOUT_YEAR = 2024
+
 
-def split_and_normalize_dataset() -> None:
+def _split_masks(timestamps: pd.Series, is_simulated: pd.Series) -> Dict[str, np.ndarray]:
+    """
+    Routing rules shared by the in-memory and the streaming path.
+
+    Returns:
+        dict: Boolean masks 'train_real', 'synthetic', 'validation', 'test'.
+            Real rows after HOLDOUT_YEAR belong to no split.
+    """
+    years = timestamps.dt.year.to_numpy()
+    months = timestamps.dt.month.to_numpy()
+    real = is_simulated.to_numpy() == 0
+    holdout = real & (years == HOLDOUT_YEAR)
+    return {
+        'train_real': real & (years < HOLDOUT_YEAR),
+        'synthetic': is_simulated.to_numpy() == 1,
+        'validation': holdout & (months % 2 != 0),  # Odd months (Jan, Mar, ...)
+        'test': holdout & (months % 2 == 0),  # Even months (Feb, Apr, ...)
+    }
+
+
+def _print_report(counts: Dict[str, int]) -> None:
+    """Final summary table of both execution modes."""
+    print("\n[SUCCESS] Data splitting & normalization complete.")
+    print("-" * 60)
+    print(f"{'Set':<15} | {'Composition':<30} | {'Count':<10}")
+    print("-" * 60)
+    print(f"{'Train':<15} | {'Real(20-23) + Synthetic':<30} | {counts['train']:<10}")
+    print(f"{'Validation':<15} | {'Real(2024 Odd Months)':<30} | {counts['validation']:<10}")
+    print(f"{'Test':<15} | {'Real(2024 Even Months)':<30} | {counts['test']:<10}")
+    print(f"{'Scaler':<15} | {'Saved to':<30} | {config.SCALER_PATH}")
+    print("-" * 60)
+
+
+def split_and_normalize_dataset(streaming: Optional[bool] = None, chunk_rows: Optional[int] = None) -> None:
     """
     Orchestrates the splitting and normalization pipeline.
 
@@ -32,9 +84,17 @@ def split_and_normalize_dataset() -> None:
 
     The scaler handles all 9 inputs defined in config.FEATURE_COLS,
     ensuring Time Embeddings (Sin/Cos) are scaled alongside physical parameters.
+
+    Args:
+        streaming (bool, optional): Out-of-core two-pass mode (default config.SPLIT_STREAMING).
+        chunk_rows (int, optional): Rows per chunk in streaming mode (default config.SPLIT_CHUNK_ROWS).
     """
     print("Starting data splitting & normalization pipeline...")
 
+    if config.SPLIT_STREAMING if streaming is None else streaming:
+        _split_and_normalize_streaming(chunk_rows or config.SPLIT_CHUNK_ROWS)
+        return
+
     # --- EXPERIMENT LOGIC: Chooses between Hybrid and Raw ---
     input_path = ""
     is_hybrid_mode = getattr(config, 'USE_SYNTHETIC_DATA', True) # Default to True if missing
@@ -42,20 +102,14 @@ def split_and_normalize_dataset() -> None:
 
     if is_hybrid_mode:
         print("[MODE] Loading HYBRID dataset (Real + Black Swan)...")
-        input_path = config.HYBRID_DATA_PATH
-        if not os.path.exists(input_path):
+        input_path = dataset_path('hybrid')
+        if not dataset_exists('hybrid'):
             print(f"Hybrid dataset missing at: {input_path}")
             sys.exit(1)
 
         try:
-            df_full = pd.read_csv(input_path)
-            # Handle index
-            if 'timestamp' not in df_full.columns:
-                if 'Unnamed: 0' in df_full.columns:
-                    df_full.rename(columns={'Unnamed: 0': 'timestamp'}, inplace=True)
-
-            # Hybrid dataset comes already formatted, just need datetime conversion
-            df_full['timestamp'] = pd.to_datetime(df_full['timestamp'], errors='coerce')
+            # Typed Parquet read: timestamps arrive as datetime64, only the needed columns are decoded
+            df_full = read_dataset('hybrid', columns=['timestamp'] + config.FEATURE_COLS + ['is_simulated'])
             df_full.set_index('timestamp', inplace=True, drop=False)
 
             # We apply log1p (log(1+x)) to handle the skewness of rain data.
@@ -65,7 +119,7 @@ def split_and_normalize_dataset() -> None:
                 df_full['precipitation'] = np.log1p(df_full['precipitation'])
 
         except Exception as e:
-            print(f"Failed to read Hybrid CSV: {e}")
+            print(f"Failed to read Hybrid dataset: {e}")
             sys.exit(1)
 
     else:
@@ -91,30 +145,19 @@ def split_and_normalize_dataset() -> None:
 
     # Segregate real vs. Synthetic data
     # 'is_simulated' flag allows us to treat real history and synthetic extremes differently
-    df_real = df_full[df_full['is_simulated'] == 0].copy()
-    df_synthetic = df_full[df_full['is_simulated'] == 1].copy()
-
-    print(f"Real samples: {len(df_real)} | Synthetic samples: {len(df_synthetic)}")
-
     # Chronological splitting strategy
     # I split 2024 into Val/Test to simulate "current year" performance.
     # Alternating months ensure we cover all seasons in both Val and Test.
+    masks = _split_masks(df_full['timestamp'], df_full['is_simulated'])
 
-    train_real = df_real[df_real.index.year < 2024].copy()
-    df_2024 = df_real[df_real.index.year == 2024].copy()
-
-    val_mask = (df_2024.index.month % 2 != 0)  # Odd months (Jan, Mar, ...)
-    test_mask = (df_2024.index.month % 2 == 0)  # Even months (Feb, Apr, ...)
-
-    val_real = df_2024[val_mask].copy()
-    test_real = df_2024[test_mask].copy()
+    print(f"Real samples: {int((df_full['is_simulated'] == 0).sum())} | Synthetic samples: {int(masks['synthetic'].sum())}")
 
     # Construct the final datasets
     # Synthetic data is added ONLY to training.
     # I do not want to validate/test on fake data; I want to benchmark against reality.
-    train_final = pd.concat([train_real, df_synthetic])
-    val_final = val_real
-    test_final = test_real
+    train_final = pd.concat([df_full[masks['train_real']], df_full[masks['synthetic']]])
+    val_final = df_full[masks['validation']].copy()
+    test_final = df_full[masks['test']].copy()
 
     # 6. Normalization (MinMax Scaling)
     # Neural Networks converge faster with features in range [0, 1].
@@ -135,29 +178,117 @@ def split_and_normalize_dataset() -> None:
     test_final[feature_cols] = scaler.transform(test_final[feature_cols])
 
     # Save artifacts
-    # Ensuring directory structures exist
-    for path in [os.path.join(config.DATA_DIR, sub) for sub in ['train', 'validation', 'test']]:
-        os.makedirs(path, exist_ok=True)
+    # Partitioned Parquet datasets (+ CSV exports in data/<split>/ when config.EXPORT_CSV is set)
+    write_dataset(train_final, 'train')
+    write_dataset(val_final, 'validation')
+    write_dataset(test_final, 'test')
+
+    # Save the scaler model (+ its pickle-free compiled form used by the inference paths)
+    os.makedirs(os.path.dirname(config.SCALER_PATH), exist_ok=True)
+    joblib.dump(scaler, config.SCALER_PATH)
+    FeatureTransform.from_scaler(scaler).save(config.FEATURE_TRANSFORM_PATH)
+
+    # Persist memory-mappable copies of the scaled splits for train/evaluate/docs
+    build_store()
+
+    _print_report({'train': len(train_final), 'validation': len(val_final), 'test': len(test_final)})
+
+
+def _split_and_normalize_streaming(chunk_rows: int) -> None:
+    """
+    Out-of-core variant of `split_and_normalize_dataset` (same artifacts, bounded memory).
+
+    Row order: every chunk carries the source row id. Real rows keep it, synthetic training
+    rows are offset by the source size, so each split reads back in the same order as the
+    in-memory `pd.concat([train_real, synthetic])` - without ever sorting the whole dataset.
+    """
+    is_hybrid_mode = getattr(config, 'USE_SYNTHETIC_DATA', True)
+    source = 'hybrid' if is_hybrid_mode else 'raw'
+    print(f"[MODE] Streaming {source.upper()} dataset in chunks of {chunk_rows} rows (2 passes)...")
 
-    # Save processed CSVs
-    train_final.to_csv(os.path.join(config.DATA_DIR, 'train', 'train.csv'), index=False)
-    val_final.to_csv(os.path.join(config.DATA_DIR, 'validation', 'validation.csv'), index=False)
-    test_final.to_csv(os.path.join(config.DATA_DIR, 'test', 'test.csv'), index=False)
+    if not dataset_exists(source):
+        if is_hybrid_mode:
+            print(f"Hybrid dataset missing at: {dataset_path(source)}")
+            sys.exit(1)
+        load_raw_data()  # Builds the 'raw' Parquet copy from the CSV download
+
+    feature_cols = config.FEATURE_COLS
+    columns = ['timestamp'] + (feature_cols + ['is_simulated'] if is_hybrid_mode else config.TARGET_COLS)
+
+    def prepared_chunks():
+        """Yields (chunk, masks) with the same per-row preparation as the in-memory path."""
+        for chunk in iter_dataset_batches(source, columns=columns, batch_rows=chunk_rows):
+            if is_hybrid_mode:
+                chunk['precipitation'] = np.log1p(chunk['precipitation'])
+            else:
+                chunk = add_time_features(chunk)
+                chunk['is_simulated'] = 0
+            yield chunk, _split_masks(chunk['timestamp'], chunk['is_simulated'])
+
+    # Pass 1: Min/Max accumulation on the training rows only (no leakage)
+    print("Pass 1/2: Fitting Scaler on training data (real + synthetic)...")
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    counts = {'train_real': 0, 'synthetic': 0, 'validation': 0, 'test': 0}
+    source_rows = 0
+
+    for chunk, masks in prepared_chunks():
+        source_rows += len(chunk)
+        for key in counts:
+            counts[key] += int(masks[key].sum())
+        train_rows = chunk.loc[masks['train_real'] | masks['synthetic'], feature_cols]
+        if len(train_rows):
+            scaler.partial_fit(train_rows)
+
+    if counts['train_real'] + counts['synthetic'] == 0:
+        print("No training rows found; cannot fit the scaler.")
+        sys.exit(1)
+
+    print(f"Real samples: {source_rows - counts['synthetic']} | Synthetic samples: {counts['synthetic']}")
+
+    # Pass 2: Transform + route every chunk to its split
+    print("Pass 2/2: Transforming and writing splits...")
+    output_cols = ['timestamp'] + feature_cols + ['is_simulated']
+    writers = {split: ChunkedDatasetWriter(split) for split in ('train', 'validation', 'test')}
+    try:
+        for chunk, masks in prepared_chunks():
+            chunk[feature_cols] = scaler.transform(chunk[feature_cols])
+            row_ids = chunk[ROW_ID_COL].to_numpy()
+
+            routes = (
+                ('train', masks['train_real'], 0),
+                ('train', masks['synthetic'], source_rows),  # Synthetic rows go after all real ones
+                ('validation', masks['validation'], 0),
+                ('test', masks['test'], 0),
+            )
+            for split, mask, offset in routes:
+                if mask.any():
+                    writers[split].write(chunk.loc[mask, output_cols], row_ids[mask] + offset)
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+
+    for writer in writers.values():
+        writer.close()
+
+    # CSV exports are skipped here: they would require materialising every split in row order.
+    # Exports of a previous run no longer match the new splits, so they are removed, not left stale.
+    # Use parquet_store.export_dataset_csv(<split>) if an inspection copy is needed.
+    for split in writers:
+        csv_path = CSV_EXPORT_PATHS[split]
+        if os.path.exists(csv_path):
+            os.remove(csv_path)
+            print(f"   -> Removed stale CSV export: {csv_path}")
 
-    # Save the scaler model
     os.makedirs(os.path.dirname(config.SCALER_PATH), exist_ok=True)
     joblib.dump(scaler, config.SCALER_PATH)
+    FeatureTransform.from_scaler(scaler).save(config.FEATURE_TRANSFORM_PATH)
+
+    # Persist memory-mappable copies of the scaled splits for train/evaluate/docs
+    build_store()
+
+    _print_report({split: writer.rows_written for split, writer in writers.items()})
 
-    # Final report
-    print("\n[SUCCESS] Data splitting & normalization complete.")
-    print("-" * 60)
-    print(f"{'Set':<15} | {'Composition':<30} | {'Count':<10}")
-    print("-" * 60)
-    print(f"{'Train':<15} | {'Real(20-23) + Synthetic':<30} | {len(train_final):<10}")
-    print(f"{'Validation':<15} | {'Real(2024 Odd Months)':<30} | {len(val_final):<10}")
-    print(f"{'Test':<15} | {'Real(2024 Even Months)':<30} | {len(test_final):<10}")
-    print(f"{'Scaler':<15} | {'Saved to':<30} | {config.SCALER_PATH}")
-    print("-" * 60)
 
 if __name__ == "__main__":
     split_and_normalize_dataset()
\ No newline at end of file
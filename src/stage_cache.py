@@ -0,0 +1,128 @@
+# src/stage_cache.py
+"""
+Content-Hash Stage Cache.
+
+The orchestrator used to decide whether to rerun a stage purely by checking if its
+output file exists, so edits to `config.py` (SEQ_LENGTH, FEATURE_COLS, ...) silently
+reused stale artifacts. This module fingerprints everything a stage depends on:
+
+1. Config values: Only the settings the stage actually reads.
+2. Upstream artifacts: SHA-256 of the input files/directories (e.g., Parquet datasets).
+3. Source code: SHA-256 of the Python modules implementing the stage.
+
+The fingerprint is stored next to the stage's primary output as `<output>.stage.json`.
+A stage is skipped only when its outputs exist and the stored fingerprint matches.
+"""
+
+import os
+import json
+import hashlib
+from typing import Iterable, List
+
+from src import config
+
+
+def _sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Streams a file through SHA-256."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_path(path: str) -> str:
+    """
+    Content hash of a file or of a whole directory tree (relative paths + file hashes).
+    Missing paths hash to 'missing' so that their later appearance invalidates the stage.
+    """
+    if os.path.isfile(path):
+        return _sha256_file(path)
+    if not os.path.isdir(path):
+        return 'missing'
+
+    digest = hashlib.sha256()
+    for dir_path, dir_names, file_names in os.walk(path):
+        dir_names.sort()
+        for name in sorted(file_names):
+            if name.endswith('.stage.json'):
+                continue
+            full_path = os.path.join(dir_path, name)
+            digest.update(os.path.relpath(full_path, path).replace(os.sep, '/').encode())
+            digest.update(_sha256_file(full_path).encode())
+    return digest.hexdigest()
+
+
+def _rel(path: str) -> str:
+    """Project-relative key for readable fingerprints."""
+    return os.path.relpath(path, config.BASE_DIR).replace(os.sep, '/')
+
+
+def fingerprint_stage(config_keys: Iterable[str], inputs: Iterable[str], sources: Iterable[str]) -> dict:
+    """
+    Builds the fingerprint of a stage.
+
+    Args:
+        config_keys: Names of the `src.config` attributes the stage depends on.
+        inputs: Upstream artifact paths (files or directories).
+        sources: Python source files implementing the stage.
+
+    Returns:
+        dict: {"config": {...}, "inputs": {...}, "sources": {...}, "digest": str}
+    """
+    fingerprint = {
+        "config": {key: json.dumps(getattr(config, key, None), sort_keys=True, default=str) for key in config_keys},
+        "inputs": {_rel(path): hash_path(path) for path in inputs},
+        "sources": {_rel(path): hash_path(path) for path in sources},
+    }
+    fingerprint["digest"] = hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+    return fingerprint
+
+
+def stamp_path(primary_output: str) -> str:
+    """Location of the fingerprint stored next to a stage output."""
+    return primary_output.rstrip('/\\') + '.stage.json'
+
+
+def load_stamp(primary_output: str) -> dict:
+    """Previously recorded fingerprint (empty dict if none)."""
+    path = stamp_path(primary_output)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def changed_entries(primary_output: str, fingerprint: dict) -> List[str]:
+    """Human-readable list of the dependencies that differ from the recorded fingerprint."""
+    stamp = load_stamp(primary_output)
+    if not stamp:
+        return ["no previous fingerprint"]
+
+    changes = []
+    for section, prefix in (("config", "config."), ("inputs", ""), ("sources", "")):
+        old, new = stamp.get(section, {}), fingerprint[section]
+        for key in sorted(set(old) | set(new)):
+            if old.get(key) != new.get(key):
+                changes.append(f"{prefix}{key}")
+    return changes
+
+
+def is_stage_fresh(primary_output: str, fingerprint: dict, outputs: Iterable[str]) -> bool:
+    """True if every output exists and the recorded fingerprint matches."""
+    if not all(os.path.exists(path) for path in outputs):
+        return False
+    return load_stamp(primary_output).get("digest") == fingerprint["digest"]
+
+
+def record_stage(primary_output: str, fingerprint: dict) -> None:
+    """Persists the fingerprint of a successfully completed stage (atomic write)."""
+    path = stamp_path(primary_output)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(fingerprint, f, indent=4)
+    os.replace(tmp_path, path)